@@ -32,6 +32,7 @@
 
 #include "Util/ForwardDecl.hpp"
 #include "Util/PhysConstant.hpp"
+#include "Util/MetField.hpp"
 #include "AIM/Coagulation.hpp"
 #include "Core/Mesh.hpp"
 
@@ -118,18 +119,20 @@ class AIM::Grid_Aerosol
         void Coagulate( const double dt, Coagulation &kernel, const UInt N = 2, const UInt SYM = 0 );
 
         /* Ice crystal growth */
-        void Grow( const double dt, Vector_2D &H2O, const Vector_2D &T, const Vector_1D &P, const UInt N = 2, const UInt SYM = 0 );
+        void Grow( const double dt, Vector_2D &H2O, const MetField &T, const Vector_1D &P, const UInt N = 2, const UInt SYM = 0 );
         double EffDiffCoef( const double r, const double T, const double P, const double H2O) const;
         void APC_Scheme(const UInt jNy, const UInt iNx, const double T, const double P,
-                            const double dt, Vector_2D& H2O, Vector_2D& totH2O, Vector_3D& icePart, Vector_3D& iceVol);
-        std::vector<int> ComputeBinParticleFlux(const int x_index, const int y_index, const Vector_3D& iceVol, const Vector_3D& icePart) const;
-        void ApplyBinParticleFlux(const int x_index, const int y_index, const std::vector<int> &toBin, const Vector_3D &iceVol, const Vector_3D &icePart);
+                            const double dt, Vector_2D& H2O, const double totH2O, Vector_1D& icePart, Vector_1D& iceVol);
+        /* icePart and iceVol are the particle numbers and volumes of the bins of one cell */
+        std::vector<int> ComputeBinParticleFlux(const Vector_1D& iceVol, const Vector_1D& icePart) const;
+        void ApplyBinParticleFlux(const int x_index, const int y_index, const std::vector<int> &toBin, const Vector_1D &iceVol, const Vector_1D &icePart);
         
         /* Helper Functions for Coagulation and Ice Growth */
         bool CheckCoagAndGrowInputs(const UInt N, const UInt SYM, UInt& Nx_max, UInt& Ny_max, const std::string funcName) const;
         void CoagAndGrowApplySymmetry(const UInt N, const UInt SYM, const UInt Nx_max, const UInt Ny_max, const char* funcName, Vector_2D& H2O);
         /* Update bin centers - Used after aerosol transport */
-        void UpdateCenters( const Vector_3D &iceV, const Vector_3D &PDF );
+        template<typename Vector3D_t>
+        void UpdateCenters( const Vector3D_t &iceV, const Vector_3Dp &PDF );
         inline void updateNx(int nx_new) { Nx = nx_new; };
         inline void updateNy(int ny_new) { Ny = ny_new; };
 
@@ -146,6 +149,8 @@ class AIM::Grid_Aerosol
         Vector_1D Overall_Size_Dist( const Vector_2D& cellAreas ) const;
         //Gives 3D volume field in m3 / cm3
         Vector_3D Volume( ) const;
+        //Gives the volume field of a single bin in m3 / cm3
+        Vector_2D Volume( UInt iBin ) const;
         Vector_2D TotalVolume( ) const;
         Vector_2D TotalArea( ) const;
         double TotalIceMass_sum( const Vector_2D& cellAreas ) const;
@@ -169,11 +174,25 @@ class AIM::Grid_Aerosol
 
         //This template just lets us minimize copies/moves without writing a bunch of different overloads
         template< typename Vector3D_t, 
-                  typename _  = std::enable_if_t<std::is_same_v<std::decay_t<Vector3D_t>, Vector_3D>> 
+                  typename _  = std::enable_if_t<std::is_same_v<std::decay_t<Vector3D_t>, Vector_3Dp>> 
                 >
         void updatePdf( Vector3D_t&& pdf_new ) {
             pdf = std::forward<Vector3D_t>(pdf_new);
         }
+        //Hands the PDF of bin iBin to func as a double precision Vector_2D (e.g. for the transport solver).
+        //With FLOAT_PDF the bin is widened into a work buffer and narrowed back afterwards,
+        //otherwise the stored field is passed directly.
+        template<typename Func>
+        void transformBinPDF( UInt iBin, Func&& func ) {
+            if constexpr(std::is_same_v<PdfReal, double>) {
+                func(pdf[iBin]);
+            }
+            else {
+                Vector_2D work = VectorUtils::convertVec2D<double>(pdf[iBin]);
+                func(work);
+                VectorUtils::copyVec2D(pdf[iBin], work);
+            }
+        }
         /* utils */
         Vector_1D Average( const Vector_2D &weights,   \
                            const double &totWeight ) const;
@@ -184,15 +203,15 @@ class AIM::Grid_Aerosol
 
         /* gets */
         inline const Vector_1D& getBinCenters() const { return bin_Centers; };
-        inline const Vector_3D& getBinVCenters() const { return bin_VCenters; };
-        inline Vector_3D& getBinVCenters_nonConstRef() { return bin_VCenters; };
+        inline const Vector_3Dp& getBinVCenters() const { return bin_VCenters; };
+        inline Vector_3Dp& getBinVCenters_nonConstRef() { return bin_VCenters; };
         inline const Vector_1D& getBinEdges() const { return bin_Edges; };
         inline const Vector_1D& getBinSizes() const { return bin_Sizes; };
         inline UInt getNBin() const { return nBin; };
         inline const char* getType() const { return type; };
         inline double getAlpha() const { return alpha; };
-        inline const Vector_3D& getPDF() const { return pdf; };
-        inline Vector_3D& getPDF_nonConstRef() { return pdf; };
+        inline const Vector_3Dp& getPDF() const { return pdf; };
+        inline Vector_3Dp& getPDF_nonConstRef() { return pdf; };
         inline int getNx() const { return Nx; }
         inline int getNy() const { return Ny; }
 
@@ -200,8 +219,9 @@ class AIM::Grid_Aerosol
     protected:
 
         unsigned int Nx, Ny;
-        Vector_3D pdf; //Everything with the pdf is implicitly in [ / cm3]
-        Vector_3D bin_VCenters;
+        /* Stored as PdfReal (float with FLOAT_PDF), all arithmetic on them is done in double */
+        Vector_3Dp pdf; //Everything with the pdf is implicitly in [ / cm3]
+        Vector_3Dp bin_VCenters;
         Vector_1D bin_Centers;
         Vector_1D bin_Edges;
         Vector_1D bin_VEdges;
@@ -53,7 +53,7 @@ class AIM::Coagulation
         Coagulation& operator=( const Coagulation& k );
         void buildBeta( const Vector_1D &bin_Centers );
         void buildF( const Vector_1D &bin_VCenters );
-        void buildF( const Vector_3D &bin_VCenters, const UInt jNy, const UInt iNx );
+        void buildF( const Vector_3Dp &bin_VCenters, const UInt jNy, const UInt iNx );
         Vector_2D getKernel() const;
         Vector_1D getKernel_1D() const;
         Vector_2D getBeta() const;
@@ -1,3 +1,5 @@
 /* #undef DEBUG */
 /* #undef RINGS */
 #define OMP
+/* #undef FLOAT_PDF */
+/* #undef APCEMM_MPI */
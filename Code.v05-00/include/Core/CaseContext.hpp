@@ -0,0 +1,53 @@
+#ifndef CASECONTEXT_H_INCLUDED
+#define CASECONTEXT_H_INCLUDED
+
+#include <list>
+#include <map>
+#include <mutex>
+#include <string>
+#include "Util/ForwardDecl.hpp"
+#include "Core/Parameters.hpp"
+#include "EPM/EPMCache.hpp"
+
+//Invariant state shared by all cases run in one process, so that drivers running many cases (the sweep loop,
+//the Python module, external programs linking the library) only pay for it once.
+//Holds the most recent EPM results (in memory, in front of the on-disk EPM cache, so only used when the
+//EPM cache folder is set) and the settling velocities of the ice bins. At most maxEPMResults EPM results are
+//kept, the least recently used are dropped first. All members are thread-safe, concurrent cases can share one context.
+class CaseContext {
+    public:
+        explicit CaseContext(std::size_t maxEPMResults = EPM_MEMORY_CACHE_SIZE): maxEPMResults_(maxEPMResults) {}
+        CaseContext(const CaseContext&) = delete;
+        CaseContext& operator=(const CaseContext&) = delete;
+
+        //Context used when the caller does not provide one
+        static CaseContext& global();
+
+        //On a hit, the microphysics output stored with the result is written to microFile (if not empty)
+        bool findEPMResult(const EPM::CacheKey& key, EPM::EPMResult& result, const std::string& microFile = "") const;
+        //Also keeps the contents of microFile (if it exists), so that later hits can reproduce it.
+        //Drops the least recently used result if the context is full.
+        void storeEPMResult(const EPM::CacheKey& key, const EPM::EPMResult& result, const std::string& microFile = "");
+
+        //AIM::SettlingVelocity, memoized on the bin centers, temperature [K] and pressure [Pa]
+        Vector_1D settlingVelocity(const Vector_1D& binCenters, double temperature_K, double pressure_Pa);
+
+        std::size_t nEPMResults() const;
+        void clear();
+
+    private:
+        struct EPMEntry {
+            EPM::EPMResult result;
+            std::string micro;
+            std::list<std::string>::iterator lruPos;
+        };
+
+        std::size_t maxEPMResults_;
+        mutable std::mutex mutex_;
+        //Keyed by the full key string rather than its hash, to rule out collisions
+        std::map<std::string, EPMEntry> epmResults_;
+        mutable std::list<std::string> epmLru_; //Most recently used first
+        std::map<std::string, Vector_1D> settling_;
+};
+
+#endif /* CASECONTEXT_H_INCLUDED */
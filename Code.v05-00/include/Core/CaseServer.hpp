@@ -0,0 +1,94 @@
+#ifndef CASESERVER_H_INCLUDED
+#define CASESERVER_H_INCLUDED
+
+#include <condition_variable>
+#include <cstddef>
+#include <functional>
+#include <iostream>
+#include <mutex>
+#include <queue>
+#include <string>
+#include <thread>
+#include <unordered_map>
+#include <vector>
+#include "Util/ForwardDecl.hpp"
+
+//Resident APCEMM (--serve): cases are read as newline-delimited JSON, one request per line,
+//    {"id": "a1", "params": {"TEMPERATURE": 217.0, "RHW": 110.0}, "series": true}
+//run on a pool of worker threads, and answered with one JSON object per line in completion order,
+//    {"id": "a1", "case": 0, "status": "Complete", ...}
+//"params" override the case parameters of the base input file and "series" asks for the full time series.
+//"case" sets the case number of the output files, the server numbers the cases itself otherwise.
+//Malformed requests and failed cases are answered with {"id": ..., "error": "..."}.
+//{"command": "shutdown"} stops a socket server from accepting new connections.
+namespace CaseServer {
+    struct Request {
+        std::string id;          //As given, echoed back in the response. Empty if the request has none.
+        bool idQuoted = false;   //Whether id was a JSON string
+        std::unordered_map<std::string, double> params;
+        bool series = false;
+        long long caseId = -1;   //Case number the outputs are written under, -1 for the next free one
+        std::string command;     //Control request (e.g. "shutdown") instead of a case
+    };
+
+    //Throws std::invalid_argument if line is not a valid request
+    Request parseRequest(const std::string& line);
+
+    //Builds a single-line JSON object
+    class JsonObject {
+        public:
+            void add(const std::string& name, double value);
+            void add(const std::string& name, int value);
+            void add(const std::string& name, bool value);
+            void add(const std::string& name, const std::string& value);
+            void add(const std::string& name, const char* value) { add(name, std::string(value)); }
+            void add(const std::string& name, const Vector_1D& values);
+            //Adds a value that is already JSON text
+            void addRaw(const std::string& name, const std::string& json);
+            std::string str() const { return "{" + body_ + "}"; }
+
+        private:
+            std::string body_;
+    };
+
+    std::string quote(const std::string& str);
+
+    //Runs the case of a request and fills in the response (after the id). Exceptions become error responses.
+    typedef std::function<void(const Request&, JsonObject&)> Runner;
+
+    class Server {
+        public:
+            Server(Runner runner, unsigned int nWorkers);
+            ~Server();
+            Server(const Server&) = delete;
+            Server& operator=(const Server&) = delete;
+
+            //Serves the requests read from in until the end of the stream and returns once all are answered
+            void serve(std::istream& in, std::ostream& out);
+            //Listens on a Unix domain socket at path, serving each connection like a stream, until a shutdown
+            //request is received. Connections that are still open then are served to their end.
+            void serveSocket(const std::string& path);
+
+            unsigned int nWorkers() const { return workers_.size(); }
+
+            //Destination of the responses of one stream or connection
+            struct Channel;
+
+        private:
+            void serveLines(const std::function<bool(std::string&)>& readLine, Channel& channel);
+            void respond(const Request& request, Channel& channel);
+            void submit(std::function<void()> job);
+            void work();
+
+            Runner runner_;
+            std::vector<std::thread> workers_;
+            std::queue<std::function<void()>> jobs_;
+            std::mutex mutex_;
+            std::condition_variable cv_;
+            bool stop_ = false;
+            bool shutdown_ = false;
+            int listenFd_ = -1;
+    };
+}
+
+#endif /* CASESERVER_H_INCLUDED */
@@ -26,6 +26,7 @@
 #include "Core/Util.hpp"
 #include "KPP/KPP_Global.h"
 #include "Util/VectorUtils.hpp"
+#include "Core/PlumeObserver.hpp"
 #include <netcdf>
 #include <filesystem>
 
@@ -58,6 +59,13 @@ namespace Diag {
                     const Vector_1D& xEdges, const Vector_1D& yEdges,
                     const Meteorology &met);
     
+    /* Same diagnostics as Diag_TS_Phys, in memory */
+    PlumeDiagnostics plumeDiagnostics( const double time_s,
+                    const AIM::Grid_Aerosol& iceAer, const Vector_2D& H2O,
+                    const Vector_1D& xCoord, const Vector_1D& yCoord,
+                    const Vector_1D& xEdges, const Vector_1D& yEdges,
+                    const Meteorology &met, const bool fields );
+    
     void add0DVar(NcFile& currFile, const float toSave, const NcDim& dim, const string& name, const string& desc, const string& units);
     void add1DVar(NcFile& currFile, const Vector_1D& toSave, const NcDim& dim, const string& name, const string& desc, const string& units);
     void add2DVar(NcFile& currFile, const Vector_2D& toSave, const vector<NcDim> dims, const string& name, const string& desc, const string& units);
@@ -93,8 +93,17 @@ class Input
                 const std::string fileName_BOX,   \
                 const std::string fileName_micro, \
                 const std::string author          );
+        Input( unsigned int iCase,               \
+                const std::unordered_map<std::string, double> &caseParams,      \
+                const std::string fileName,       \
+                const std::string fileName_ADJ,   \
+                const std::string fileName_BOX,   \
+                const std::string fileName_micro, \
+                const std::string author          );
 
         ~Input();
+        //Copy of this case with the parameters that ensemble members can change after the fork
+        Input ensembleMember( double horizDiff, double vertiDiff, double shear ) const;
         UInt Case() const { return Case_; }
 
         double simulationTime() const { return simulationTime_; }
@@ -18,6 +18,8 @@
 #include <vector>
 #include <unordered_map>
 #include "Util/ForwardDecl.hpp"
+#include "Util/MC_Rand.hpp"
+#include "Core/Parameters.hpp"
 
 struct OptInput
 {
@@ -28,9 +30,12 @@ struct OptInput
     /* ========================================== */
 
     int         SIMULATION_OMP_NUM_THREADS;
+    int         SIMULATION_CONCURRENT_CASES = 0; //0: chosen from the number of cases and threads
     bool        SIMULATION_PARAMETER_SWEEP;
-    bool        SIMULATION_MONTECARLO;
-    int         SIMULATION_MCRUNS;
+    bool        SIMULATION_MONTECARLO = false;
+    int         SIMULATION_MCRUNS = 0;
+    MCSampling  SIMULATION_MC_SAMPLING = MCSampling::Random;
+    std::uint64_t SIMULATION_MC_SEED = 0; //Drawn when the input is read if not given (or "random"), recorded in the case manifest
     std::string SIMULATION_OUTPUT_FOLDER;
     bool        SIMULATION_OVERWRITE;
     bool        SIMULATION_THREADED_FFT;
@@ -44,11 +49,19 @@ struct OptInput
     std::string SIMULATION_ADJOINT_FILENAME;
     bool        SIMULATION_BOXMODEL;
     std::string SIMULATION_BOX_FILENAME;
+    std::string SIMULATION_EPM_CACHE_FOLDER; //Empty: no EPM result caching
+    double      SIMULATION_CHECKPOINT_FREQ = 0; //[min], 0: no checkpoints
+    bool        SIMULATION_RESTART = false; //Set from the command line (--restart), not the input file
+    double      SIMULATION_ENSEMBLE_FORK_TIME = 0; //[hr], 0: no ensemble
+    Vector_1D   SIMULATION_ENSEMBLE_DH; //Member values, empty: keep the case value
+    Vector_1D   SIMULATION_ENSEMBLE_DV;
+    Vector_1D   SIMULATION_ENSEMBLE_SHEAR;
 
     /* ========================================== */
     /* ---- PARAMETER MENU ---------------------- */
     /* ========================================== */
 
+    //Parameter sweep: the values of each parameter. Monte Carlo: {min, max} of varied parameters, {value} of constant ones.
     std::unordered_map<std::string, Vector_1D> PARAMETER_PARAM_MAP;    
         
     /* ========================================== */
@@ -157,6 +170,7 @@ struct OptInput
     double ADV_CSIZE_WIDTH_SCALING_FACTOR;
     double ADV_AMBIENT_LAPSERATE;
     double ADV_TROPOPAUSE_PRESSURE;
+    bool ADV_EPM_STIFF_SOLVER = EPM_STIFF_SOLVER;
         
 
 };
@@ -5,6 +5,8 @@
 #include "LAGRID/RemappingFunctions.hpp"
 #include "FVM_ANDS/FVM_Solver.hpp"
 #include "EPM/Integrate.hpp"
+#include "EPM/EPMCache.hpp"
+#include "Core/CaseContext.hpp"
 #include "Core/Diag_Mod.hpp"
 #include "Core/MPMSimVarsWrapper.hpp"
 #include "Core/TimestepVarsWrapper.hpp"
@@ -24,8 +26,18 @@ class LAGRIDPlumeModel {
 
         LAGRIDPlumeModel() = delete;
         LAGRIDPlumeModel(const OptInput &Input_Opt, const Input &input);
+        //Ensemble member forked from the in-memory state of prefix, continuing with the
+        //parameters of member (diffusivities, shear) and the output files of Input_Opt.
+        LAGRIDPlumeModel(const LAGRIDPlumeModel &prefix, const OptInput &Input_Opt, const Input &member);
         SimStatus runFullModel();
+        //Runs the case once up to SIMULATION_ENSEMBLE_FORK_TIME, then every member from a copy of that state.
+        //Returns the status of each member, all Failed if the fork time is not before the end of the case.
+        std::vector<SimStatus> runEnsemble(const std::vector<Input> &members);
         SimStatus runEPM();
+        //Receives the time series diagnostics in memory, not owned. Ensemble members do not inherit it.
+        void setObserver(PlumeObserver* observer) { observer_ = observer; }
+        //Reuses the EPM results and settling velocities of earlier cases, not owned. Ensemble members inherit it.
+        void setContext(CaseContext* context) { context_ = context; }
         struct BufferInfo {
             double leftBuffer;
             double rightBuffer;
@@ -58,6 +70,9 @@ class LAGRIDPlumeModel {
         double simTime_h_;
         double solarTime_h_;
         double shear_rep_;
+        double lastCheckpoint_s_;
+        PlumeObserver* observer_ = nullptr;
+        CaseContext* context_ = nullptr;
 
         typedef std::pair<std::vector<std::vector<int>>, VectorUtils::MaskInfo> MaskType;
         inline MaskType iceNumberMask(double cutoff_ratio = NUM_FILTER_RATIO) {
@@ -69,6 +84,14 @@ class LAGRIDPlumeModel {
             return VectorUtils::Vec2DMask(iceTotalNum, xEdges_, yEdges_, iceNumMaskFunc);
         }
 
+        SimStatus initializeModel();
+        SimStatus runUntil(double tEnd_s);
+        EPM::CacheKey epmCacheKey(const double VAR[], const Vector_2D& aerArray) const;
+        SimStatus integrateEPM(double VAR[], const Vector_2D& aerArray);
+        std::string checkpointPath() const;
+        EPM::CacheKey checkpointKey() const;
+        void writeCheckpoint() const;
+        bool readCheckpoint();
         void createOutputDirectories();
         void initializeGrid();
         void saveTSAerosol();
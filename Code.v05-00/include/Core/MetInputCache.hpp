@@ -0,0 +1,68 @@
+#ifndef METINPUTCACHE_H_INCLUDED
+#define METINPUTCACHE_H_INCLUDED
+
+#include <list>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <tuple>
+#include <netcdf>
+#include "Util/ForwardDecl.hpp"
+
+//Process-wide cache of met input data. With parameter sweeps / Monte Carlo runs every case builds its own
+//Meteorology from the same met file, so the file is opened and each variable is read only once, and all
+//cases share the same immutable arrays.
+//The cache is bounded: beyond MET_CACHE_MAX_MB of arrays and MET_CACHE_MAX_FILES open files, the least
+//recently used ones are dropped (arrays still held by Meteorology objects stay valid).
+//All NetCDF access holds netcdfMutex(), shared with all other NetCDF I/O of the process, since the
+//NetCDF library itself is not thread-safe.
+class MetInputCache {
+    public:
+        struct FileInfo {
+            Vector_1D altitude_km; //All altitude levels in the file [km]
+            int timeDim;           //Number of time steps in the file
+        };
+
+        static MetInputCache& instance();
+
+        std::shared_ptr<const FileInfo> fileInfo(const std::string& fileName);
+
+        //Returns the levels [altStart, altStart + altCount) of varName as an (altitude x timeDim) array.
+        //Without time series input, the first time step is repeated over all timeDim columns.
+        std::shared_ptr<const Vector_2D> readVar(const std::string& fileName, const std::string& varName,
+                                                 std::size_t altStart, std::size_t altCount,
+                                                 std::size_t timeDim, bool timeseries);
+
+        //Drops all cached data and closes the files. Arrays still held by Meteorology objects stay valid.
+        void clear();
+
+    private:
+        MetInputCache() = default;
+        MetInputCache(const MetInputCache&) = delete;
+        MetInputCache& operator=(const MetInputCache&) = delete;
+
+        //Must be called with mutex_ and netcdfMutex() held
+        const netCDF::NcFile& openFile(const std::string& fileName);
+
+        typedef std::tuple<std::string, std::string, std::size_t, std::size_t, std::size_t, bool> VarKey;
+
+        struct CachedVar {
+            std::shared_ptr<const Vector_2D> data;
+            std::size_t bytes;
+            std::list<VarKey>::iterator lruPos;
+        };
+
+        //Must be called with mutex_ held
+        void evictVars();
+
+        std::mutex mutex_; //Guards the maps below
+        std::map<std::string, std::unique_ptr<netCDF::NcFile>> files_;
+        std::list<std::string> filesLru_; //Most recently used first
+        std::map<std::string, std::shared_ptr<const FileInfo>> fileInfo_;
+        std::map<VarKey, CachedVar> vars_;
+        std::list<VarKey> varsLru_; //Most recently used first
+        std::size_t varsBytes_ = 0;
+};
+
+#endif /* METINPUTCACHE_H_INCLUDED */
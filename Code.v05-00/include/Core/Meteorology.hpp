@@ -16,6 +16,7 @@
 
 #include <iostream>
 #include <memory>
+#include <random>
 #include "APCEMM.h"
 #ifdef OMP
     #include "omp.h"
@@ -28,6 +29,7 @@
 #include "Core/Input_Mod.hpp"
 #include "Util/PhysConstant.hpp"
 #include "Util/MetFunction.hpp"
+#include "Util/MetField.hpp"
 /*#include <netcdfcpp.h>*/
 #include <netcdf>
 #include <limits>
@@ -59,7 +61,9 @@ class Meteorology
         Meteorology( const OptInput &optInput,      \
                      const AmbientMetParams& ambParams,   \
                      const Vector_1D& yCoords,
-                     const Vector_1D& yEdges);
+                     const Vector_1D& yEdges,
+                     const double simDuration_h = -1.0,
+                     const std::uint64_t tempPerturbSeed = 0);
 
 
         void regenerate(const Vector_1D& yCoord_new, const Vector_1D& yEdges_new, int nx_new );
@@ -67,14 +71,22 @@ class Meteorology
                      const double simTime_h, const double dTrav_x = 0, const double dTrav_y = 0);
         
         void updateTempPerturb();
+        //Sets a uniform shear, e.g. for ensemble members. Returns false (and does nothing)
+        //if the shear is read from the met input.
+        bool overrideShear( double shear );
+
+        //Binary checkpoint of the time-dependent state (grid, profiles, fields, random number generator and its seed).
+        //readState expects a Meteorology built from the same input, which provides the read-only met input.
+        void writeState( std::ostream& os ) const;
+        void readState( std::istream& is );
         inline double alt( int j ) const { return altitude_[j]; }
 	    inline double press( int j ) const { return pressure_[j]; }
         inline double shear( int j ) const { return shear_[j]; }
         inline double shear() const { return i_Zp_ == -1 ? shear_[0] : shear_[i_Zp_]; }
 
-        inline double temp( int j, int i ) const { return tempTotal_[j][i]; }
-        inline double airMolecDens( int j, int i ) const { return airMolecDens_[j][i]; } // molecules/cm3
-        inline double H2O( int j, int i ) const { return H2O_[j][i]; }
+        inline double temp( int j, int i ) const { return tempTotal_(j, i); }
+        inline double airMolecDens( int j, int i ) const { return airMolecDens_(j, i); } // molecules/cm3
+        inline double H2O( int j, int i ) const { return H2O_(j, i); }
 
         //For getting the temp, rhw, and satdepth corresponding to initial pressure when using met input
         //TODO: Fix these functions and delete the _user variables, just calculate it from the reference altitude.
@@ -103,17 +115,11 @@ class Meteorology
         inline double referencePress() const { return pressureRef_; } //Pressure at y = 0
 
         inline const Vector_1D& tempBase() const { return tempBase_; }
-        inline const Vector_1D H2O_1D() const {
-            Vector_1D h2o1D(yCoords_.size());
-            for(int j = 0; j < yCoords_.size(); j++) {
-                h2o1D[j] = H2O_[j][0];
-            }
-            return h2o1D;
-        }
-        inline const Vector_2D& Temp() const { return tempTotal_; }
+        inline const Vector_1D H2O_1D() const { return H2O_.column(); }
+        inline const MetField& Temp() const { return tempTotal_; }
         inline const Vector_1D& Press() const { return pressure_; }
         inline const Vector_1D& Shear() const { return shear_; }
-        inline const Vector_2D& H2O_field() const { return H2O_; }
+        inline const MetField& H2O_field() const { return H2O_; }
         inline const Vector_1D& VertVeloc() const { return vertVeloc_; }
         inline const Vector_1D& AltEdges() const { return altitudeEdges_; }
         inline const Vector_1D& PressEdges() const { return pressureEdges_; }
@@ -131,10 +137,10 @@ class Meteorology
         
     private:
         inline void zeroVectors() { 
-            tempTotal_ = Vector_2D(ny_, Vector_1D (nx_, 0));
-            tempPerturbation_ = Vector_2D(ny_, Vector_1D (nx_, 0));
-            airMolecDens_ = Vector_2D(ny_, Vector_1D (nx_, 0));
-            H2O_ = Vector_2D(ny_, Vector_1D (nx_, 0));
+            tempTotal_.reset(ny_, nx_);
+            tempPerturbation_.clear();
+            airMolecDens_.reset(ny_, nx_);
+            H2O_.reset(ny_, nx_);
 
             tempBase_ = Vector_1D(ny_, 0);
             shear_ = Vector_1D(ny_, 0);
@@ -144,6 +150,23 @@ class Meteorology
             altitudeEdges_ = Vector_1D(ny_ + 1, 0);
             pressureEdges_ = Vector_1D(ny_ + 1, 0);
         }
+        //Like zeroVectors, but keeps the capacity of the 1D profiles when the grid is regenerated.
+        //The fields go back to horizontally uniform, i.e. temperature perturbations are dropped.
+        inline void resizeFields() {
+            tempTotal_.reset(ny_, nx_);
+            tempPerturbation_.clear();
+            airMolecDens_.reset(ny_, nx_);
+            H2O_.reset(ny_, nx_);
+
+            tempBase_.resize(ny_);
+            shear_.resize(ny_);
+            vertVeloc_.resize(ny_);
+        }
+        //Value of a met input profile (on altitudeInit_) at altitude alt, either interpolated or nearest neighbor
+        inline double profileAtAlt(const Vector_1D& profile, double alt, bool interp) const {
+            return interp ? met::linInterpMetData(altitudeInit_, profile, alt)
+                          : profile[met::nearestNeighbor(altitudeInit_, alt)];
+        }
         inline void initMetLoadTypes(const OptInput& optInput) {
 
             //Can't say "using (scoped) enum xyz" without c++20 so rip
@@ -171,18 +194,23 @@ class Meteorology
             }
         }
 
-        void initAltitudeAndPress( const NcFile& dataFile );
-        void readMetVar( const NcFile& dataFile, std::string varName, Vector_2D& vec_ts, bool timeseries);
+        void initAltitudeAndPress();
+        void setMetWindow( const Vector_1D& altitudeFile_km, int timeDimFile );
+        void readMetWindowLevels();
+        void checkMetWindow();
+        Vector_1D widenMetProfile( const Vector_1D& profile, std::size_t oldStart, const Vector_2D& ts_data, bool timeseries ) const;
+        std::shared_ptr<const Vector_2D> readMetVar( const std::string& varName, bool timeseries ) const;
         void initTempNoMet(const Vector_1D& yCoords);
-        void initTemperature( const NcFile& dataFile );
+        void initTemperature();
         void initH2ONoMet( const Vector_1D& yCoords);
-        void initH2O( const NcFile& dataFile, const OptInput& OptInput );
-        void initShear( const NcFile& dataFile );
-        void initVertVeloc ( const NcFile& dataFile );
+        void initH2O( const OptInput& OptInput );
+        void initShear();
+        void initVertVeloc();
 
         Vector_1D interpMetTimeseriesData(double simTime_h, const Vector_2D& ts_data, bool timeseries) const;
 
         void updateTemperature(double solarTime_h, double simTime_h);
+        void updateTempTotal();
         void updateH2O(double simTime_h);
         void updateShear(double simTime_h);
         void updateAirMolecDens();
@@ -206,9 +234,13 @@ class Meteorology
 
 
         /* For processing met input */
+        std::string metFileName_;
         double met_dt_h_;
-        int altitudeDim_;
-        int timeDim_;
+        double simDuration_h_; //Used to limit the time steps read from the met input, <= 0: read all
+        std::size_t altStart_ = 0; //First level of the met input that is read
+        int altitudeDim_; //Number of levels read
+        int timeDim_; //Number of time steps read
+        double metTime_h_ = 0.0; //Simulation time of the last update of the met input profiles
         Vector_1D pressureInit_; 
         Vector_1D altitudeInit_;
         Vector_1D tempInit_;
@@ -216,10 +248,11 @@ class Meteorology
         Vector_1D rhiInit_;
         Vector_1D vertVelocInit_;
 
-	    Vector_2D tempTimeseriesData_;
-        Vector_2D shearTimeseriesData_;
-        Vector_2D rhiTimeseriesData_;
-        Vector_2D vertVelocTimeseriesData_;
+        //Read-only (altitude x time) met input, shared between cases through MetInputCache
+        std::shared_ptr<const Vector_2D> tempTimeseriesData_;
+        std::shared_ptr<const Vector_2D> shearTimeseriesData_;
+        std::shared_ptr<const Vector_2D> rhiTimeseriesData_;
+        std::shared_ptr<const Vector_2D> vertVelocTimeseriesData_;
 
         /* Ambient input parameters */
         AmbientMetParams ambParams_;
@@ -234,16 +267,19 @@ class Meteorology
         double diurnalPhase_; // [hours]
         double diurnalPert_; // [K]
         double turbTempPertAmplitude_; // [K]
+        std::uint64_t tempPerturbSeed_ = 0; //Derived from the run seed and the case, see caseSeed
+        std::mt19937_64 tempPerturbRng_; //Part of the checkpointed state, so that restarts draw the same perturbations
 
         /* Assume that pressure only depends on the vertical coordinate */
 
         /* Temperature, air density and humidity fields can potentially be
-         * 2D fields */
-        Vector_2D tempTotal_;
-        Vector_2D tempPerturbation_;
+         * 2D fields. They are only stored as such once they become x-dependent,
+         * i.e. when temperature perturbations are turned on. */
+        MetField tempTotal_;
+        Vector_2D tempPerturbation_; //Empty while there are no perturbations
         Vector_1D tempBase_; //Temp without the perturbations
-        Vector_2D airMolecDens_;
-        Vector_2D H2O_;
+        MetField airMolecDens_;
+        MetField H2O_;
         Vector_1D shear_;
         Vector_1D vertVeloc_; // [m/s]
 
@@ -0,0 +1,14 @@
+#ifndef NETCDFLOCK_H_INCLUDED
+#define NETCDFLOCK_H_INCLUDED
+
+#include <mutex>
+
+//The NetCDF library is not thread-safe. Every NetCDF read or write of the process (met input,
+//photolysis rates, time series output) holds this lock for as long as its file is open, so that
+//cases running on different threads never call into the library at the same time.
+inline std::mutex& netcdfMutex() {
+    static std::mutex mutex;
+    return mutex;
+}
+
+#endif /* NETCDFLOCK_H_INCLUDED */
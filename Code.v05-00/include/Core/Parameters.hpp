@@ -17,7 +17,9 @@
 /* How to handle multithreading?
  * 1. Each cases are run in parallel (efficient for low-requirement runs)
  * 2. Each case is run one at a time on multiple CPUs (efficient for contrail
- *    simulations) */
+ *    simulations)
+ * With 0, several cases can still run concurrently on nested thread teams,
+ * see "Concurrent cases (int)" in the SIMULATION MENU. */
 
 #define PARALLEL_CASES 0
 /* Grid parameters */
@@ -75,6 +77,19 @@
 #define VORTEX_SINKING        1           /* Consider vortex sinking? */
 #define EPM_RTOLS             1.00E-05    /* Relative tolerances in EPM */
 #define EPM_ATOLS             1.00E-07    /* Absolute tolerances in EPM */
+#define EPM_STIFF_SOLVER      0           /* Use the implicit (Rosenbrock) integrator in EPM? */
+#define EPM_MEMORY_CACHE_SIZE 16          /* EPM results a CaseContext keeps in memory when EPM caching is on, least recently used are dropped */
+#define EPM_MICRO_SAVE_EVERY  1           /* Write every n-th recorded EPM state to the microphysics output (0 = none) */
 #define SO2TOSO4              0.005       /* Percent conversion from SO2 to SO4 */
 
+/* Met input */
+#define MET_ALT_WINDOW_PAD    3.00E+03    /* Met input levels further than this (or than the height of the initial domain,
+                                       * if larger) from the initial domain are not read [m].
+                                       * Set to a negative value to always read all levels */
+#define MET_ALT_WINDOW_EDGE   5.00E+02    /* All met input levels are read once the domain gets this close to the edge
+                                       * of the levels read [m] */
+#define MET_CACHE_MAX_MB      1.00E+03    /* Met input arrays kept by MetInputCache beyond this size are dropped,
+                                       * least recently used first [MB] */
+#define MET_CACHE_MAX_FILES   8           /* Met input files kept open by MetInputCache, least recently used are closed */
+
 #endif /* PARAMETERS_H_INCLUDED */
@@ -0,0 +1,45 @@
+#ifndef PLUMEOBSERVER_H_INCLUDED
+#define PLUMEOBSERVER_H_INCLUDED
+
+#include "Util/ForwardDecl.hpp"
+
+//Contrail diagnostics at one time series output time, the in-memory counterpart of the ts_aerosol files.
+struct PlumeDiagnostics {
+    double time_s = 0;    //Since the start of the simulation [s]
+    double iceMass = 0;   //Total ice mass of the cross section [kg/m]
+    double numberIce = 0; //Total number of ice particles of the cross section [#/m]
+    double width = 0;     //Extinction-defined width [m]
+    double depth = 0;     //Extinction-defined depth [m]
+    double intOD = 0;     //Integrated vertical optical depth [m]
+
+    //2-D fields (ny x nx), only filled if the observer asks for them
+    Vector_1D x;
+    Vector_1D y;
+    Vector_2D iceNumber;  //[#/cm^3]
+    Vector_2D IWC;        //[kg/m^3]
+    Vector_2D extinction; //[1/m]
+    Vector_2D RHi;        //[%]
+};
+
+//Receives the plume diagnostics of a LAGRIDPlumeModel run at every time series output time
+//(TS_AERO_FREQ), whether or not the ts_aerosol files are written.
+class PlumeObserver {
+    public:
+        virtual ~PlumeObserver() = default;
+        //Whether the 2-D fields should be filled in, they are costly to copy
+        virtual bool wantFields() const { return false; }
+        virtual void observe(const PlumeDiagnostics& diag) = 0;
+};
+
+//Keeps all diagnostics in memory
+class PlumeRecorder : public PlumeObserver {
+    public:
+        explicit PlumeRecorder(bool fields = false): fields_(fields) { }
+        bool wantFields() const override { return fields_; }
+        void observe(const PlumeDiagnostics& diag) override { history.push_back(diag); }
+        std::vector<PlumeDiagnostics> history;
+    private:
+        bool fields_;
+};
+
+#endif
@@ -0,0 +1,30 @@
+#ifndef RUNCASE_H_INCLUDED
+#define RUNCASE_H_INCLUDED
+
+#include <set>
+#include <string>
+#include "Core/CaseContext.hpp"
+#include "Core/Input.hpp"
+#include "Core/Input_Mod.hpp"
+#include "Core/PlumeObserver.hpp"
+#include "Core/Status.hpp"
+
+//Library entry point: runs the plume model (EPM + LAGRID) for one case and returns its status.
+//optInput holds the parsed input file (YamlInputReader::readYamlInputFile), input the parameters of the case
+//(e.g. from YamlInputReader::CaseStream). Output files are written as configured in optInput and input.
+//The context is reused across calls, so that the EPM results and settling velocities computed for earlier
+//cases are not recomputed. runCase may be called concurrently from several threads with the same context.
+SimStatus runCase(const OptInput& optInput, const Input& input, PlumeObserver& observer,
+                  CaseContext& context = CaseContext::global());
+
+//Same, without observer
+SimStatus runCase(const OptInput& optInput, const Input& input, CaseContext& context = CaseContext::global());
+
+//Case id following the highest one of the case outputs (Micro*, ts_aerosol_case*, status_case*) already in
+//outputFolder, 0 if there are none. Cases numbered from there do not overwrite the outputs of earlier runs.
+unsigned int nextFreeCaseId(const std::string& outputFolder);
+
+//Ids of the cases whose outputs are already in outputFolder
+std::set<unsigned int> usedCaseIds(const std::string& outputFolder);
+
+#endif /* RUNCASE_H_INCLUDED */
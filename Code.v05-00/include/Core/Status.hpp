@@ -2,6 +2,8 @@
 #ifndef STATUS_H_INCLUDED
 #define STATUS_H_INCLUDED
 
+#include <string>
+
 enum class SimStatus : int {
     // Exit status: Contrail formed and disappeared before APCEMM reached max simulation timestep
     Complete,
@@ -24,4 +26,16 @@ enum class SimStatus : int {
     EPMSuccess,
 };
 
+inline std::string statusName( SimStatus status ) {
+    switch ( status ) {
+        case SimStatus::Complete:          return "Complete";
+        case SimStatus::Incomplete:        return "Incomplete";
+        case SimStatus::NoWaterSaturation: return "NoWaterSaturation";
+        case SimStatus::NoPersistence:     return "NoPersistence";
+        case SimStatus::NoSurvivalVortex:  return "NoSurvivalVortex";
+        case SimStatus::EPMSuccess:        return "EPMSuccess";
+        default:                           return "Failed";
+    }
+}
+
 #endif // STATUS_H_INCLUDED
@@ -0,0 +1,52 @@
+#ifndef EPMCACHE_H_INCLUDED
+#define EPMCACHE_H_INCLUDED
+
+#include <cstdint>
+#include <iostream>
+#include <string>
+#include <utility>
+#include "Util/ForwardDecl.hpp"
+#include "Core/Status.hpp"
+#include "EPM/Integrate.hpp"
+
+namespace EPM
+{
+    /* The EPM output (ice/sulfate aerosol, H2O, plume area, vortex sinking survival) only depends on
+     * ambient conditions at flight level, the emissions and the aircraft/vortex parameters. Sweeps over
+     * shear, diffusivity or humidity away from flight level therefore keep rerunning the same EPM.
+     * The results can be cached on disk in a user-specified folder and shared across cases and processes.
+     * Each entry is stored in epm_<hash>.txt, together with the full key to detect hash collisions. */
+
+    //Canonical description of the inputs the EPM result depends on.
+    //Values are written in hexadecimal floating point, so identical inputs always give the identical key.
+    class CacheKey
+    {
+        public:
+            void add( const std::string& name, double value );
+            void add( const std::string& name, const double* values, std::size_t n );
+            void add( const std::string& name, const Vector_1D& values );
+            void add( const std::string& name, const Vector_2D& values );
+            void add( const std::string& name, const std::string& value );
+
+            inline const std::string& str() const { return key_; }
+            //FNV-1a hash of the key, as 16 hex digits
+            std::string hash() const;
+
+        private:
+            std::string key_;
+    };
+
+    typedef std::pair<EPMOutput, SimStatus> EPMResult;
+
+    void writeCachedResult( std::ostream& os, const CacheKey& key, const EPMResult& result );
+    //Returns false if the stream does not contain a valid entry for this key
+    bool readCachedResult( std::istream& is, const CacheKey& key, EPMResult& result );
+
+    //Looks up the key in cacheDir. On a hit, the cached microphysics output is also copied to microFile.
+    //Always returns false if cacheDir is empty (caching disabled).
+    bool loadCachedResult( const std::string& cacheDir, const CacheKey& key, EPMResult& result, const std::string& microFile = "" );
+    //Writes the entry atomically (write + rename), so that concurrent runs never see partial files.
+    void storeCachedResult( const std::string& cacheDir, const CacheKey& key, const EPMResult& result, const std::string& microFile = "" );
+}
+
+#endif /* EPMCACHE_H_INCLUDED */
@@ -34,6 +34,7 @@
 #include "AIM/Nucleation.hpp"
 #include "AIM/Aerosol.hpp"
 #include "odeSolver.hpp"
+#include "StiffIntegrator.hpp"
 
 namespace EPM
 {
@@ -50,6 +51,7 @@ namespace EPM
         double area;
         double bypassArea;
         double coreExitTemp;
+        ODEStats odeStats; // Diagnostics of the gas/aerosol ODE integration
     };
 
     /* Vortex sinking timescales, taken from Unterstrasser et al., 2008 */
@@ -84,17 +86,20 @@ namespace EPM
                    const Vector_2D& aerArray, const Aircraft &AC, const Emission &EI, \
                    double &Ice_rad, double &Ice_den, double &Soot_den, double &H2O_mol, \
                    double &SO4g_mol, double &SO4l_mol, AIM::Aerosol &SO4Aer, AIM::Aerosol &IceAer, \
-                   double &Area, double &Ab0, double &Tc0, const bool CHEMISTRY, double ambientLapseRate, std::string micro_data_out );
+                   double &Area, double &Ab0, double &Tc0, const bool CHEMISTRY, double ambientLapseRate, std::string micro_data_out, \
+                   bool stiffSolver = EPM_STIFF_SOLVER, ODEStats* odeStats = nullptr );
 
     std::pair<EPMOutput, SimStatus> Integrate(double tempInit_K, double pressure_Pa, double rhw, double bypassArea, double coreExitTemp, double varArray[], 
-                            const Vector_2D& aerArray, const Aircraft& AC,const Emission& EI, bool CHEMISTRY, double ambientLapseRate, std::string micro_data_out);
+                            const Vector_2D& aerArray, const Aircraft& AC,const Emission& EI, bool CHEMISTRY, double ambientLapseRate, std::string micro_data_out,
+                            bool stiffSolver = EPM_STIFF_SOLVER);
 
     SimStatus RunMicrophysics( double &temperature_K, double pressure_Pa, double relHumidity_w, \
                          double varArray[], const Vector_2D& aerArray, \
                          const Aircraft &AC, const Emission &EI, double delta_T_ad, double delta_T, \
                          double &Ice_rad, double &Ice_den, double &Soot_den, double &H2O_mol, \
                          double &SO4g_mol, double &SO4l_mol, AIM::Aerosol &SO4Aer, AIM::Aerosol &IceAer, \
-                         double &Area, double &Ab0, double &Tc0, const bool CHEMISTRY, double ambientLapseRate, std::string micro_data_out );
+                         double &Area, double &Ab0, double &Tc0, const bool CHEMISTRY, double ambientLapseRate, std::string micro_data_out, \
+                         bool stiffSolver = EPM_STIFF_SOLVER, ODEStats* odeStats = nullptr );
     double dT_Vortex( const double time, const double delta_T, bool deriv = 0 );
     double entrainmentRate( const double time );
     double depositionRate( const double r, const double T, const double P, const double H2O, \
@@ -0,0 +1,140 @@
+#ifndef STIFFINTEGRATOR_H_INCLUDED
+#define STIFFINTEGRATOR_H_INCLUDED
+
+#include <algorithm>
+#include <cmath>
+#include <limits>
+#include <stdexcept>
+#include <string>
+#include <utility>
+#include <boost/numeric/odeint/stepper/rosenbrock4.hpp>
+#include <boost/numeric/odeint/stepper/rosenbrock4_controller.hpp>
+#include "Util/ForwardDecl.hpp"
+
+namespace EPM
+{
+    struct ODEStats {
+        UInt nSteps = 0;     // Accepted steps
+        UInt nRejected = 0;  // Rejected steps (stiff integrator only)
+        UInt nJacobians = 0; // Jacobian evaluations (stiff integrator only)
+    };
+
+    typedef boost::numeric::ublas::vector<double> stiff_state_type;
+    typedef boost::numeric::ublas::matrix<double> stiff_matrix_type;
+
+    /* Adapts a right hand side written for Vector_1D states to the ublas types used by odeint's rosenbrock4.
+     * Only holds a pointer to the system, since odeint copies the system on every step. */
+    template<class System>
+    class stiffRHS
+    {
+        public:
+            explicit stiffRHS( const System& system ): system_( &system ) { }
+
+            void operator()( const stiff_state_type& x, stiff_state_type& dxdt, const double t ) const {
+                Vector_1D xv( x.begin(), x.end() );
+                Vector_1D fv( x.size() );
+                (*system_)( xv, fv, t );
+                std::copy( fv.begin(), fv.end(), dxdt.begin() );
+            }
+
+        private:
+            const System* system_;
+    };
+
+    /* Forward difference Jacobian (and explicit time derivative) of the system. The microphysical rates
+     * (nucleation, freezing, deposition) do not have closed-form derivatives. */
+    template<class System>
+    class stiffJacobian
+    {
+        public:
+            stiffJacobian( const System& system, double absTol, UInt& nEvals ): system_( &system ), absTol_( absTol ), nEvals_( &nEvals ) { }
+
+            void operator()( const stiff_state_type& x, stiff_matrix_type& J, const double t, stiff_state_type& dfdt ) const {
+                const std::size_t n = x.size();
+                const double sqrtEps = std::sqrt( std::numeric_limits<double>::epsilon() );
+                Vector_1D xv( x.begin(), x.end() );
+                Vector_1D f0( n ), f1( n );
+                (*system_)( xv, f0, t );
+
+                for ( std::size_t j = 0; j < n; j++ ) {
+                    const double xj = xv[j];
+                    /* The state variables span many orders of magnitude, so perturb relative to each value */
+                    xv[j] += sqrtEps * ( xj != 0.0 ? std::abs( xj ) : absTol_ );
+                    const double h = xv[j] - xj;
+                    (*system_)( xv, f1, t );
+                    for ( std::size_t i = 0; i < n; i++ ) {
+                        J( i, j ) = ( f1[i] - f0[i] ) / h;
+                    }
+                    xv[j] = xj;
+                }
+
+                const double ht = sqrtEps * std::max( std::abs( t ), 1.0 );
+                (*system_)( xv, f1, t + ht );
+                for ( std::size_t i = 0; i < n; i++ ) {
+                    dfdt[i] = ( f1[i] - f0[i] ) / ht;
+                }
+                (*nEvals_)++;
+            }
+
+        private:
+            const System* system_;
+            double absTol_;
+            UInt* nEvals_;
+    };
+
+    /* Integrates x from t0 to t1 with odeint's rosenbrock4 (L-stable, 4th order) and step size control.
+     * dt is the initial step on input and the step size to continue with on output, so that consecutive
+     * calls (e.g. the EPM sub-intervals) carry the adapted step size over instead of restarting it.
+     * The observer is taken by value and called at t0 and after every accepted step, like odeint's integrate_adaptive.
+     * Returns the number of accepted steps. */
+    template<class System, class Observer>
+    UInt integrateStiff( const System& system, Vector_1D& x, double t0, double t1, double& dt, Observer observer,
+                         double absTol, double relTol, ODEStats& stats )
+    {
+        namespace odeint = boost::numeric::odeint;
+        const UInt MAX_TRIALS = 500;
+
+        stiffRHS<System> rhs( system );
+        stiffJacobian<System> jacobian( system, absTol, stats.nJacobians );
+        odeint::rosenbrock4_controller< odeint::rosenbrock4<double> > controller( absTol, relTol );
+
+        stiff_state_type xs( x.size() );
+        std::copy( x.begin(), x.end(), xs.begin() );
+
+        double t = t0;
+        UInt nSteps = 0;
+        UInt nTrials = 0;
+        observer( x, t );
+        while ( t < t1 ) {
+            /* Do not step past the end of the interval, but remember the unclipped step for the next one */
+            const bool clipped = ( t + dt >= t1 );
+            double dtTry = clipped ? t1 - t : dt;
+
+            if ( controller.try_step( std::make_pair( rhs, jacobian ), xs, t, dtTry ) == odeint::success ) {
+                nSteps++;
+                nTrials = 0;
+                if ( clipped ) {
+                    t = t1;
+                    dt = std::max( dt, dtTry );
+                }
+                else {
+                    dt = dtTry;
+                }
+                std::copy( xs.begin(), xs.end(), x.begin() );
+                observer( x, t );
+            }
+            else {
+                dt = dtTry;
+                stats.nRejected++;
+                if ( ++nTrials >= MAX_TRIALS ) {
+                    throw std::runtime_error( "In EPM::integrateStiff: step size control failed at t = " + std::to_string( t ) + " s" );
+                }
+            }
+        }
+
+        stats.nSteps += nSteps;
+        return nSteps;
+    }
+}
+
+#endif /* STIFFINTEGRATOR_H_INCLUDED */
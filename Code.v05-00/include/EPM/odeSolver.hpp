@@ -18,6 +18,7 @@
 #include <iomanip>
 #include <fstream>
 #include <cmath>
+#include <memory>
 #include <vector>
 #include <boost/range/algorithm.hpp>
 #include <boost/numeric/odeint.hpp>
@@ -86,13 +87,25 @@ template<class System> class EPM::odeSolver
 class EPM::streamingObserver
 {
 
+    /* Records every m_write_every-th state it is called with.
+     * - maxStates = 0 keeps the full history in states/times (unbounded).
+     * - maxStates = N > 0 keeps only the N most recent states as a ring buffer, so memory does not grow with the
+     *   number of steps. Use lastState() instead of indexing m_states in that case.
+     * Every saveEvery-th recorded state is streamed to fileName (if not empty) as it comes in, so the saved
+     * trajectory does not need the history in memory either. print2File() completes and closes the file.
+     * Copies (odeint takes observers by value) share the history, the output file and the water saturation check. */
+
     public:
 
-        streamingObserver( Vector_2D &states, Vector_1D &times, std::vector<UInt> indices, std::string fileName, UInt write_every = 100 );
+        streamingObserver( Vector_2D &states, Vector_1D &times, std::vector<UInt> indices, std::string fileName, UInt write_every = 100, \
+                           UInt maxStates = 0, UInt saveEvery = 1 );
         ~streamingObserver( );
         streamingObserver& operator=( const streamingObserver &obs );
         void operator()( const Vector_1D &x, double t );
         double getLastElement() const;
+        const Vector_1D& lastState() const;
+        double lastTime() const;
+        inline UInt nRecorded() const { return m_record->nRecorded; };
         void print2File( ) const;
         bool checkwatersat( ) const;
 
@@ -108,7 +121,20 @@ class EPM::streamingObserver
 
     private:
         
+        struct Record {
+            UInt maxStates;
+            UInt saveEvery;
+            UInt nRecorded = 0;
+            bool waterSat = false;
+            std::ofstream file;
+        };
+
+        void writeHeader( std::ostream &file ) const;
+        void writeState( std::ostream &file, const Vector_1D &x, double t ) const;
+        bool isWaterSaturated( const Vector_1D &x ) const;
+
         const std::vector<UInt> m_indices;
+        std::shared_ptr<Record> m_record;
 
 };
 
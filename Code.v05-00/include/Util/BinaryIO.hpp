@@ -0,0 +1,78 @@
+#ifndef BINARYIO_H
+#define BINARYIO_H
+
+#include <cstdint>
+#include <istream>
+#include <ostream>
+#include <stdexcept>
+#include <string>
+#include <type_traits>
+#include <vector>
+
+//Raw binary (de)serialization of scalars, strings and nested std::vectors, used for checkpoints.
+//Values are stored in native byte order, so that doubles round trip exactly. Checkpoints are only
+//meant to be read back on the same platform they were written on.
+namespace BinaryIO {
+    template<typename T>
+    void write(std::ostream& os, const T& value) {
+        static_assert(std::is_arithmetic_v<T>, "BinaryIO::write: unsupported type");
+        os.write(reinterpret_cast<const char*>(&value), sizeof(T));
+    }
+
+    inline void write(std::ostream& os, const std::string& str) {
+        write(os, static_cast<std::uint64_t>(str.size()));
+        os.write(str.data(), str.size());
+    }
+
+    template<typename T>
+    void write(std::ostream& os, const std::vector<T>& vec) {
+        write(os, static_cast<std::uint64_t>(vec.size()));
+        if constexpr(std::is_arithmetic_v<T> && !std::is_same_v<T, bool>) {
+            os.write(reinterpret_cast<const char*>(vec.data()), vec.size() * sizeof(T));
+        }
+        else {
+            for(const auto& elem: vec) write(os, static_cast<const T&>(elem));
+        }
+    }
+
+    template<typename T>
+    void read(std::istream& is, T& value) {
+        static_assert(std::is_arithmetic_v<T>, "BinaryIO::read: unsupported type");
+        if(!is.read(reinterpret_cast<char*>(&value), sizeof(T))) {
+            throw std::runtime_error("BinaryIO::read: unexpected end of stream");
+        }
+    }
+
+    inline void read(std::istream& is, std::string& str) {
+        std::uint64_t size;
+        read(is, size);
+        str.resize(size);
+        if(!is.read(str.data(), size)) {
+            throw std::runtime_error("BinaryIO::read: unexpected end of stream");
+        }
+    }
+
+    template<typename T>
+    void read(std::istream& is, std::vector<T>& vec) {
+        std::uint64_t size;
+        read(is, size);
+        vec.resize(size);
+        if constexpr(std::is_arithmetic_v<T> && !std::is_same_v<T, bool>) {
+            if(!is.read(reinterpret_cast<char*>(vec.data()), size * sizeof(T))) {
+                throw std::runtime_error("BinaryIO::read: unexpected end of stream");
+            }
+        }
+        else if constexpr(std::is_same_v<T, bool>) {
+            for(std::size_t i = 0; i < size; i++) {
+                bool value;
+                read(is, value);
+                vec[i] = value;
+            }
+        }
+        else {
+            for(auto& elem: vec) read(is, elem);
+        }
+    }
+}
+
+#endif
@@ -0,0 +1,25 @@
+#ifndef CASESCHEDULER_H_INCLUDED
+#define CASESCHEDULER_H_INCLUDED
+
+#include <cstddef>
+#include <vector>
+
+//Split of the OpenMP thread budget between concurrent cases and the threads within each case.
+//Cases run in an outer parallel loop of nConcurrentCases threads, each case then runs its inner loops
+//(transport, growth, met updates) on a nested team of threadsPerCase threads.
+struct CaseTeams {
+    int nConcurrentCases = 1;
+    int threadsPerCase = 1;
+};
+
+//coreBudget: total number of threads, nCases: number of cases to run,
+//maxThreadsPerCase: threads a single case can use efficiently (e.g. the number of size bins of the per-bin loops).
+//requestedCases > 0 fixes the number of concurrent cases. Otherwise as many cases as possible run concurrently,
+//since cases are independent, and the remaining threads go to the cases up to maxThreadsPerCase.
+CaseTeams chooseCaseTeams(int coreBudget, std::size_t nCases, int maxThreadsPerCase, int requestedCases = 0);
+
+//Fraction of the core budget that was busy running cases over wallSeconds,
+//from the wall times of the cases and the threads each case ran on.
+double caseUtilisation(const std::vector<double>& caseSeconds, int threadsPerCase, double wallSeconds, int coreBudget);
+
+#endif
@@ -16,6 +16,7 @@
 
 #include <vector>
 #include <complex>
+#include "APCEMM.h"
 
 /* List typedefs */
 typedef unsigned int UInt;
@@ -53,4 +54,14 @@ typedef std::vector<Vector_3Dcl> Vector_4Dcl;
 typedef std::vector<UInt> Vector_1Dui;
 typedef std::vector<Vector_1Dui> Vector_2Dui;
 
+/* Storage type of the gridded aerosol PDFs (see FLOAT_PDF option) */
+#ifdef FLOAT_PDF
+typedef float PdfReal;
+#else
+typedef double PdfReal;
+#endif /* FLOAT_PDF */
+typedef std::vector<PdfReal> Vector_1Dp;
+typedef std::vector<Vector_1Dp> Vector_2Dp;
+typedef std::vector<Vector_2Dp> Vector_3Dp;
+
 #endif /* FORWARDDECL_H_INCLUDED */
@@ -16,6 +16,9 @@
 
 #include <iostream>
 #include <cstdlib>
+#include <cstdint>
+#include <string>
+#include <vector>
 
 /* Set seed for pseudo-random generator */
 void setSeed();
@@ -24,4 +27,52 @@ void setSeed();
 template <typename T>
 T fRand(const T fMin, const T fMax);
 
+/* Sampling designs for Monte Carlo simulations */
+enum class MCSampling { Random, Sobol, LatinHypercube };
+
+MCSampling parseMCSampling( const std::string &name );
+std::string MCSamplingName( const MCSampling sampling );
+
+/* Seed of the random numbers drawn within case iCase (e.g. temperature
+ * perturbations) of a run with the given seed */
+std::uint64_t caseSeed( const std::uint64_t seed, const std::size_t iCase );
+
+/* Maximum number of varied parameters of a Sobol design */
+const std::size_t SOBOL_MAX_DIM = 37;
+
+/* Design of nRuns points in the nDims-dimensional unit hypercube, fully
+ * determined by the seed:
+ * - Random: independent uniform samples,
+ * - Sobol: Sobol sequence (Joe & Kuo direction numbers) scrambled with a
+ *   random digital shift per dimension,
+ * - LatinHypercube: one sample per stratum and dimension, in randomly
+ *   permuted strata.
+ * Points are computed on demand from their index, only the Latin hypercube
+ * permutations are stored. */
+class MCDesign
+{
+    public:
+
+        MCDesign() = default;
+        MCDesign( const MCSampling sampling, const std::size_t nDims, \
+                  const std::size_t nRuns, const std::uint64_t seed );
+
+        /* Coordinate iDim of point iRun, in [0, 1) */
+        double operator()( const std::size_t iRun, const std::size_t iDim ) const;
+
+        std::size_t nDims() const { return nDims_; }
+        std::size_t nRuns() const { return nRuns_; }
+
+    private:
+
+        MCSampling sampling_ = MCSampling::Random;
+        std::size_t nDims_ = 0;
+        std::size_t nRuns_ = 0;
+        std::uint64_t seed_ = 0;
+        std::vector<std::vector<std::uint32_t>> directions_;
+        std::vector<std::uint32_t> shifts_;
+        std::vector<std::vector<std::uint32_t>> strata_;
+
+};
+
 #endif /* MC_RAND_H_INCLUDED */
@@ -0,0 +1,30 @@
+#ifndef MPICASERUNNER_H_INCLUDED
+#define MPICASERUNNER_H_INCLUDED
+
+#include <functional>
+#include <ostream>
+#include <string>
+#include <vector>
+#include <mpi.h>
+
+//Distribution of the case list over MPI ranks (APCEMM_MPI builds only).
+//Rank 0 hands out case indices one at a time to the worker ranks as they become free, so that long and short
+//cases balance out. Workers run each case with their own OpenMP threads and report the status and wall time back.
+namespace MPICaseRunner {
+    struct CaseTiming {
+        unsigned int iCase;
+        int rank;       //Rank that ran the case
+        int status;     //Value returned by runCase, e.g. a SimStatus, or -1 for skipped cases
+        double seconds; //Wall time of the case
+    };
+
+    //Runs cases caseBegin to caseEnd-1 over all ranks of comm. With a single rank, rank 0 runs all cases itself.
+    //Returns the timings of all cases (ordered by case) on rank 0, and an empty vector on the other ranks.
+    std::vector<CaseTiming> runCases(unsigned int caseBegin, unsigned int caseEnd,
+                                     const std::function<int(unsigned int)>& runCase, MPI_Comm comm = MPI_COMM_WORLD);
+
+    void writeTimings(std::ostream& os, const std::vector<CaseTiming>& timings);
+    void writeTimings(const std::string& fileName, const std::vector<CaseTiming>& timings);
+}
+
+#endif
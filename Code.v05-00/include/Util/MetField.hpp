@@ -0,0 +1,89 @@
+#ifndef METFIELD_H
+#define METFIELD_H
+
+#include <cstddef>
+#include "Util/ForwardDecl.hpp"
+
+//Ny x Nx met field that is stored as a single value per row (column profile) while it is horizontally
+//uniform, and only switches to full 2D storage once x-dependent values are written to it
+//(e.g. temperature perturbations). Reading with field[j][i] or field(j, i) works the same in both cases.
+class MetField {
+    public:
+        //Read-only view of one row, so that field[j][i] works like for a Vector_2D.
+        class Row {
+            public:
+                Row(const double* data, double value, std::size_t nx) : data_(data), value_(value), nx_(nx) { }
+                inline double operator[](std::size_t i) const { return data_ ? data_[i] : value_; }
+                inline std::size_t size() const { return nx_; }
+            private:
+                const double* data_;
+                double value_;
+                std::size_t nx_;
+        };
+
+        MetField() = default;
+        MetField(std::size_t ny, std::size_t nx, double value = 0) : nx_(nx), column_(ny, value) { }
+
+        inline std::size_t size() const { return column_.size(); }
+        inline std::size_t ny() const { return column_.size(); }
+        inline std::size_t nx() const { return nx_; }
+        inline bool isUniform() const { return field_.empty(); }
+
+        inline double operator()(std::size_t j, std::size_t i) const { return isUniform() ? column_[j] : field_[j][i]; }
+        inline Row operator[](std::size_t j) const {
+            return isUniform() ? Row(nullptr, column_[j], nx_) : Row(field_[j].data(), 0, nx_);
+        }
+
+        //Resets to a horizontally uniform field, e.g. after the grid was regenerated
+        inline void reset(std::size_t ny, std::size_t nx, double value = 0) {
+            nx_ = nx;
+            column_.assign(ny, value);
+            field_.clear();
+        }
+        //Sets every cell of row j, a uniform field stays uniform
+        inline void setRow(std::size_t j, double value) {
+            column_[j] = value;
+            if(!isUniform()) field_[j].assign(nx_, value);
+        }
+        //Switches to full 2D storage, broadcasting the current row values.
+        //Must be called before writing rows from within a parallel region.
+        inline void expand() {
+            if(!isUniform()) return;
+            field_.resize(column_.size());
+            for(std::size_t j = 0; j < column_.size(); j++) {
+                field_[j].assign(nx_, column_[j]);
+            }
+        }
+        //Write access to row j of the 2D storage. Expands the field if needed.
+        inline Vector_1D& row(std::size_t j) {
+            expand();
+            return field_[j];
+        }
+
+        //Row values of a uniform field, or the values at i = 0 otherwise
+        inline Vector_1D column() const {
+            if(isUniform()) return column_;
+            Vector_1D col(field_.size());
+            for(std::size_t j = 0; j < field_.size(); j++) {
+                col[j] = field_[j][0];
+            }
+            return col;
+        }
+
+        //Copy of the field as a full Ny x Nx Vector_2D (e.g. for output), explicit since it copies the whole field
+        inline Vector_2D toVector2D() const {
+            if(!isUniform()) return field_;
+            Vector_2D vec(column_.size());
+            for(std::size_t j = 0; j < column_.size(); j++) {
+                vec[j].assign(nx_, column_[j]);
+            }
+            return vec;
+        }
+
+    private:
+        std::size_t nx_ = 0;
+        Vector_1D column_;
+        Vector_2D field_;
+};
+
+#endif
@@ -4,6 +4,8 @@
 #include "Util/ForwardDecl.hpp"
 #include <limits>
 #include <functional>
+#include <type_traits>
+#include <utility>
 namespace VectorUtils {
     using std::vector;
     Vector_2D cellAreas (const Vector_1D& xEdges, const Vector_1D& yEdges);
@@ -42,6 +44,35 @@ namespace VectorUtils {
         }
     }
     Vector_2D vec2DOperation(const Vector_2D& vec1, const Vector_2D& vec2, std::function<double (double, double)> transformFunc);
+
+    //Element-wise copy of a 2D field into another floating point type, e.g. to widen
+    //single precision storage into a double precision work buffer.
+    template<typename To, typename From>
+    std::vector<std::vector<To>> convertVec2D(const std::vector<std::vector<From>>& vec) {
+        std::vector<std::vector<To>> out(vec.size());
+        for(std::size_t j = 0; j < vec.size(); j++) {
+            out[j].assign(vec[j].begin(), vec[j].end());
+        }
+        return out;
+    }
+    //Same-type conversion of an rvalue is just a move.
+    template<typename To, typename From>
+    std::vector<std::vector<To>> convertVec2D(std::vector<std::vector<From>>&& vec) {
+        if constexpr(std::is_same_v<To, From>) {
+            return std::move(vec);
+        }
+        else {
+            return convertVec2D<To>(static_cast<const std::vector<std::vector<From>>&>(vec));
+        }
+    }
+    //Copies src into an existing buffer of the same shape without reallocating.
+    template<typename To, typename From>
+    void copyVec2D(std::vector<std::vector<To>>& dst, const std::vector<std::vector<From>>& src) {
+        dst.resize(src.size());
+        for(std::size_t j = 0; j < src.size(); j++) {
+            dst[j].assign(src[j].begin(), src[j].end());
+        }
+    }
 }
 
 #endif
\ No newline at end of file
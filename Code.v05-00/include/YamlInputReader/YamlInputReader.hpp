@@ -5,6 +5,11 @@
 #include <stdexcept>
 #include <yaml-cpp/yaml.h> 
 #include <filesystem>
+#include <limits>
+#include <map>
+#include <random>
+#include <cctype>
+#include <cstdint>
 #include "Core/Input_Mod.hpp"
 #include "Util/ForwardDecl.hpp"
 #include "Util/MC_Rand.hpp"   
@@ -24,8 +29,27 @@ namespace YamlInputReader{
     void readAdvancedMenu(OptInput& input, const YAML::Node& advancedNode);
     
     void performOtherInputValidnessChecks(OptInput& input);
+
+    //Lazy view of the cases defined by PARAMETER_PARAM_MAP: the Cartesian product of all parameter values for
+    //parameter sweeps, or SIMULATION_MCRUNS points of the sampling design over the parameter ranges for Monte Carlo.
+    //Cases are built on demand from their index, in the same order as generateCases, so that sweeps of any size
+    //can be started without materializing the case list and any slice of it can be run.
+    class CaseStream{
+        public:
+            CaseStream() = default;
+            explicit CaseStream(const OptInput& input);
+            inline std::size_t size() const { return nCases_; }
+            std::unordered_map<string, double> operator[](std::size_t iCase) const;
+            std::unordered_map<string, double> at(std::size_t iCase) const;
+        private:
+            vector<std::pair<string, Vector_1D>> params_;
+            std::size_t nCases_ = 0;
+            bool monteCarlo_ = false;
+            MCDesign design_;
+    };
     vector<std::unordered_map<string, double>> generateCases(const OptInput& input);
     Vector_1D parseParamSweepInput(const string paramString, const string paramLocation = "", bool monteCarlo = false, int nRuns = 0);
+    Vector_1D parseMonteCarloRange(const string paramString, const string paramLocation = "");
     vector<string> split(const string str, const string delimiter);
 
     inline string trim(const string str){
@@ -94,6 +118,19 @@ namespace YamlInputReader{
     inline int parseIntString(const string paramString, const string paramLocation = ""){
         return (int)(parseDoubleString(paramString, paramLocation));
     }
+    //Full range of std::uint64_t, which a double cannot hold exactly (e.g. random number seeds)
+    inline std::uint64_t parseUInt64String(const string paramString, const string paramLocation = ""){
+        const string str = trim(paramString);
+        if(str.empty() || !std::all_of(str.begin(), str.end(), [](unsigned char c) { return std::isdigit(c); })){
+            throw std::invalid_argument("Unable to read non-negative integer value at parameter " + paramLocation);
+        }
+        try{
+            return std::stoull(str);
+        }
+        catch (std::out_of_range& e){
+            throw std::invalid_argument("Value out of range at parameter " + paramLocation);
+        }
+    }
 
     vector<int> parseVectorIntString(const string paramString, const string paramLocation = "");
     std::string parseFileSystemPath(std::string str);
@@ -423,7 +423,7 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
         }
         bin_VEdges[nBin] = 4.0 / 3.0 * physConst::PI * pow(bin_Edges[nBin], 3);
 
-        bin_VCenters.resize(nBin, Vector_2D(Ny, Vector_1D(Nx, 0.0E+00)));
+        bin_VCenters.resize(nBin, Vector_2Dp(Ny, Vector_1Dp(Nx, 0.0E+00)));
 
         for (UInt iBin = 0; iBin < nBin; iBin++)
         {
@@ -434,7 +434,7 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
             }
         }
 
-        pdf.resize(nBin, Vector_2D(Ny, Vector_1D(Nx, 0.0E+00)));
+        pdf.resize(nBin, Vector_2Dp(Ny, Vector_1Dp(Nx, 0.0E+00)));
 
         /* Allocate mean and standard deviation */
         if (mu_ <= 0) { std::cout << "\nIn Grid_Aerosol::Grid_Aerosol: mean/mode is negative: mu = " << mu_ << "\n"; }
@@ -575,14 +575,15 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
         UInt kBin = 0;
         UInt kBin_ = 0;
 
-        /* Particle volume in each bin */
-        Vector_3D v = Volume(); /* Expressed in [m^3/cm^3] */
-        /* Copy v into v_new */
-        Vector_3D v_new = v;
+        /* Particle volume in each bin of the current grid cell, before and after
+         * coagulation. Built per cell instead of as nBin x Ny x Nx fields. */
+        Vector_1D v(nBin, 0.0E+00);     /* Expressed in [m^3/cm^3] */
+        Vector_1D v_new(nBin, 0.0E+00);
 
         /* Allocate variables */
         double P[nBin];
         double L[nBin];
+        double ratio;
 
         /* Total volume and number per grid cell */
         double totVol, nPart;
@@ -600,19 +601,22 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
          * v_new = ( v + P * dt ) / ( 1.0 + L )
          * The latter is mass-conserving */
 
-        for (jNy = 0; jNy < Ny_max; jNy++)
+        for (jNy = 0; jNy < Ny; jNy++)
         {
 
-            for (iNx = 0; iNx < Nx_max; iNx++)
+            for (iNx = 0; iNx < Nx; iNx++)
             {
 
                 /* Total aerosol volume */
                 totVol = 0.0E+00;
 
-                for (iBin = 0; iBin < nBin; iBin++)
-                    totVol += v[iBin][jNy][iNx]; /* [m^3/cm^3] */
+                for (iBin = 0; iBin < nBin; iBin++) {
+                    v[iBin] = log(bin_Edges[iBin + 1] / bin_Edges[iBin]) * bin_VCenters[iBin][jNy][iNx] * pdf[iBin][jNy][iNx];
+                    v_new[iBin] = v[iBin];
+                    totVol += v[iBin]; /* [m^3/cm^3] */
+                }
 
-                if (totVol * 1E18 > 0.1)
+                if (jNy < Ny_max && iNx < Nx_max && totVol * 1E18 > 0.1)
                 {
                     /* Only run coagulation where aerosol volume is greater
                      * than 0.1 um^3/cm^3 */
@@ -650,7 +654,7 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
                                     /* k coagulating with j to form i */
                                     if (kBin < iBin)
                                     {
-                                        P[iBin] += kernel.f[kBin][jBin][iBin] * kernel.beta[kBin][jBin] * v_new[kBin][jNy][iNx] * nPart;
+                                        P[iBin] += kernel.f[kBin][jBin][iBin] * kernel.beta[kBin][jBin] * v_new[kBin] * nPart;
                                         /* [cm^3/#/s] * [m^3/cm^3] * [#/cm^3] = [m^3/cm^3/s] */
                                     }
                                 }
@@ -662,17 +666,28 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
                         }
 
                         /* Mass conserving scheme: */
-                        v_new[iBin][jNy][iNx] = (v[iBin][jNy][iNx] + dt * P[iBin]) / (1.0 + dt * L[iBin]);
-                        if (v[iBin][jNy][iNx] > 0.0E+00)
-                            pdf[iBin][jNy][iNx] *= v_new[iBin][jNy][iNx] / v[iBin][jNy][iNx];
+                        v_new[iBin] = (v[iBin] + dt * P[iBin]) / (1.0 + dt * L[iBin]);
+                        if (v[iBin] > 0.0E+00)
+                            pdf[iBin][jNy][iNx] *= v_new[iBin] / v[iBin];
+                    }
+                }
+
+                /* Update bin centers, as UpdateCenters */
+                for (iBin = 0; iBin < nBin; iBin++) {
+                    ratio = log(bin_Edges[iBin + 1] / bin_Edges[iBin]);
+                    if (pdf[iBin][jNy][iNx] > 0) {
+                        bin_VCenters[iBin][jNy][iNx] =
+                            std::max(std::min(v_new[iBin] / pdf[iBin][jNy][iNx] / ratio,
+                                              0.9999 * bin_VEdges[iBin + 1]),
+                                     1.0001 * bin_VEdges[iBin]);
+                    }
+                    else {
+                        bin_VCenters[iBin][jNy][iNx] = 0.5 * (bin_VEdges[iBin] + bin_VEdges[iBin + 1]);
                     }
                 }
             }
         }
 
-        /* Update bin centers */
-        UpdateCenters(v_new, pdf);
-
         if (checkMass) { std::cout << "At t + dt: " << Moment(3, Nx / 2, Ny / 2) * 1.0E+18 << "[um^3/cm^3]" << std::endl; }
         
         //Apply Symmetry
@@ -683,7 +698,7 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
 
     } /* End of Grid_Aerosol::Coagulate */
 
-    void Grid_Aerosol::Grow( const double dt, Vector_2D &H2O, const Vector_2D &T, const Vector_1D &P, const UInt N, const UInt SYM )
+    void Grid_Aerosol::Grow( const double dt, Vector_2D &H2O, const MetField &T, const Vector_1D &P, const UInt N, const UInt SYM )
     {
 
         /* DESCRIPTION:
@@ -695,7 +710,7 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
          * - double dt :: Timestep in s
          * - Vector_2D H2O :: Vector containing water vapor molecular concentrations [molec/cm^3]
          *    -> ( Ny x Nx )
-         * - Vector_2D T   :: Vector containing temperature values [K]
+         * - MetField T  :: Temperature field [K], possibly stored per row
          *    -> ( Ny x Nx )
          * - Vector_1D P   :: Vector containing pressure values [Pa]
          *    -> ( Ny )
@@ -718,49 +733,30 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
         /* Scaled Boltzmann constant */
         const double kB_ = physConst::kB * 1.00E+06;
 
-        /* Declare and initialize particle totals and water vapor array */
-        Vector_3D icePart = Number( );
-        Vector_3D iceVol  = Volume( );
-        Vector_2D totH2O  = H2O;
-        
-        double pSat;
+        /* Particle numbers and volumes are only needed one cell at a time: they
+         * are built per cell in double precision from the stored PDF instead of
+         * as nBin x Ny x Nx fields */
 
         #pragma omp parallel if( !PARALLEL_CASES ) default( shared )
         {
 
             /* All declarations here are enforced as thread private */
 
-            double partVol  = 0.0E+00;
-            double icePart_ = 0.0E+00;
-            double iceVol_  = 0.0E+00;
-
-            int jBin = -1;
+            Vector_1D icePart( nBin, 0.0E+00 );
+            Vector_1D iceVol ( nBin, 0.0E+00 );
             std::vector<int> toBin( nBin, 0 );
-            std::vector<int>::iterator iterBegin, iterCurr, iterEnd;
 
             /* Declare and initialize variable to store saturation quantities,
             * pressure and temperature */
             double locT = 0.0E+00;
             double locP = 0.0E+00;
-
+            double pSat = 0.0E+00;
+            double totH2O = 0.0E+00;
+            double ratio = 0.0E+00;
 
             #pragma omp for                                                               \
             private ( iNx, jNy, iBin                                            ) \
             schedule( static, 1                                                )
-            for ( jNy = 0; jNy < Ny_max; jNy++ ) {
-                for ( iNx = 0; iNx < Nx_max; iNx++ ) {
-                    for ( iBin = 0; iBin < nBin; iBin++ ) {
-                        totH2O[jNy][iNx] += iceVol[iBin][jNy][iNx] * UNITCONVERSION;
-                        /* Unit check:
-                        * [ molec/cm^3 ] = [ m^3 ice/cm^3 air ]   * [ molec/m^3 ice ] */
-                    }
-                }
-            }
-
-            #pragma omp for                                                               \
-            private ( iNx, jNy, iBin, jBin, locP, locT              ) \
-            private ( partVol, icePart_, iceVol_                                ) \
-            schedule( static, 1                                                )
             for ( jNy = 0; jNy < Ny_max; jNy++ ) {
                 /* Store local pressure.
                 * TODO: 
@@ -772,6 +768,19 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
                     /* Store local temperature */
                     locT = T[jNy][iNx];
 
+                    /* Particle totals of the cell, total water (gaseous + solid) of the
+                     * cells that are not copied over by symmetry */
+                    totH2O = H2O[jNy][iNx];
+                    for ( iBin = 0; iBin < nBin; iBin++ ) {
+                        ratio = log( bin_Edges[iBin+1] / bin_Edges[iBin] );
+                        icePart[iBin] = ratio * pdf[iBin][jNy][iNx];
+                        iceVol[iBin]  = ratio * bin_VCenters[iBin][jNy][iNx] * pdf[iBin][jNy][iNx];
+                        if ( iNx < Nx_max )
+                            totH2O += iceVol[iBin] * UNITCONVERSION;
+                        /* Unit check:
+                        * [ molec/cm^3 ] = [ m^3 ice/cm^3 air ]   * [ molec/m^3 ice ] */
+                    }
+
                     /* Store local saturation pressure w.r.t ice */
                     pSat = physFunc::pSat_H2Os( locT );
 
@@ -784,7 +793,7 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
 
 
                     /* 1. Compute bin particle flux */
-                    toBin = ComputeBinParticleFlux(iNx, jNy, iceVol, icePart);
+                    toBin = ComputeBinParticleFlux(iceVol, icePart);
 
                     /* 2. Attribute new particles according to fluxes */
                     ApplyBinParticleFlux(iNx, jNy, toBin, iceVol, icePart);
@@ -797,7 +806,7 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
     } /* End of Grid::Aerosol::Grow */
 
     void Grid_Aerosol::APC_Scheme(const UInt jNy, const UInt iNx, const double T, const double P,
-                            const double dt, Vector_2D& H2O, Vector_2D& totH2O, Vector_3D& icePart, Vector_3D& iceVol){
+                            const double dt, Vector_2D& H2O, const double totH2O, Vector_1D& icePart, Vector_1D& iceVol){
         
         double totPart = 0.0, totalkGrowth = 0.0, totalkGrowth_kelvin = 0.0, totH2Oi = 0.0;
         double pSat = physFunc::pSat_H2Os( T );
@@ -818,7 +827,7 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
         /* Check if partNum greater than a limit */
         for ( UInt iBin = 0; iBin < nBin; iBin++ ) {
 
-            totPart += icePart[iBin][jNy][iNx];
+            totPart += icePart[iBin];
 
         }
 
@@ -830,7 +839,7 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
         for ( UInt iBin = 0; iBin < nBin; iBin++ ) {
         
             //Factor of 1e6 for cm3 - m3 conversion. 
-            kGrowth[iBin] = 1.0e6 * icePart[iBin][jNy][iNx] * 4.0 * physConst::PI * bin_Centers[iBin]\
+            kGrowth[iBin] = 1.0e6 * icePart[iBin] * 4.0 * physConst::PI * bin_Centers[iBin]\
                 * EffDiffCoef( bin_Centers[iBin], T, P, H2O[jNy][iNx]);  
 
             totalkGrowth += kGrowth[iBin];
@@ -849,23 +858,23 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
         
         /* Make sure that molecular water does not go over 
         * total water (gaseous + solid) concentrations */
-        H2O[jNy][iNx] = std::min( H2O[jNy][iNx], totH2O[jNy][iNx] );
+        H2O[jNy][iNx] = std::min( H2O[jNy][iNx], totH2O );
         
         for ( UInt iBin = 0; iBin < nBin; iBin++ ) {
             //Update molar concentration of ice [mol/cm3] and convert to volumetric concentration [m3/cm3]
-            c_qit = (iceVol[iBin][jNy][iNx] * physConst::RHO_ICE / MW_H2O) + dt*kGrowth[iBin]*(C_qt - physFunc::Kelvin(bin_Centers[iBin])*C_qsi);
-            iceVol[iBin][jNy][iNx] = c_qit * MW_H2O / physConst::RHO_ICE;
+            c_qit = (iceVol[iBin] * physConst::RHO_ICE / MW_H2O) + dt*kGrowth[iBin]*(C_qt - physFunc::Kelvin(bin_Centers[iBin])*C_qsi);
+            iceVol[iBin] = c_qit * MW_H2O / physConst::RHO_ICE;
         
-            iceVol[iBin][jNy][iNx] = \
-                    std::min( std::max( iceVol[iBin][jNy][iNx], 0.0E+00 ), icePart[iBin][jNy][iNx] * MAXVOL );
+            iceVol[iBin] = \
+                    std::min( std::max( iceVol[iBin], 0.0E+00 ), icePart[iBin] * MAXVOL );
         
             /* Compute total water taken up on particles */
-            totH2Oi += iceVol[iBin][jNy][iNx] * UNITCONVERSION;
+            totH2Oi += iceVol[iBin] * UNITCONVERSION;
             /* Unit check:
             * [molec/cm^3 air] = [m^3 ice/cm^3 air] * [molec/m^3 ice] */
         }
         
-        H2O[jNy][iNx] = totH2O[jNy][iNx] - totH2Oi; 
+        H2O[jNy][iNx] = totH2O - totH2Oi; 
     } //End of Grid_Aerosol::APC_Scheme
 
     double Grid_Aerosol::EffDiffCoef( const double r, const double T, const double P, const double H2O ) const
@@ -905,8 +914,7 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
 
     // TODO: Decide on a better way to handle ice particles that go above max volume. Currently,
     // they just stay in the highest volume box.
-    std::vector<int> Grid_Aerosol::ComputeBinParticleFlux(const int x_index, const int y_index,
-                                                          const Vector_3D &iceVol, const Vector_3D &icePart) const
+    std::vector<int> Grid_Aerosol::ComputeBinParticleFlux(const Vector_1D &iceVol, const Vector_1D &icePart) const
     {
         std::vector<int> toBin(nBin, 0);
         double partVol;
@@ -914,7 +922,7 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
         {
 
             toBin[iBin] = -1;
-            partVol = iceVol[iBin][y_index][x_index] / icePart[iBin][y_index][x_index];
+            partVol = iceVol[iBin] / icePart[iBin];
 
             toBin[iBin] = std::lower_bound(bin_VEdges.begin(), bin_VEdges.end(), partVol) - bin_VEdges.begin() - 1;
 
@@ -935,7 +943,7 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
     } //End of Grid_Aerosol::ComputeBinParticleFlux
 
     void Grid_Aerosol::ApplyBinParticleFlux(const int x_index, const int y_index,
-                                            const std::vector<int> &toBin, const Vector_3D &iceVol, const Vector_3D &icePart)
+                                            const std::vector<int> &toBin, const Vector_1D &iceVol, const Vector_1D &icePart)
     {
 
         std::vector<int>::const_iterator iterBegin, iterCurr, iterEnd;
@@ -955,8 +963,8 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
             while ((iterCurr = std::find(iterCurr, iterEnd, iBin)) != iterEnd)
             {
                 jBin = iterCurr - iterBegin; // j is less than or more than i, and this amount of will transfer to
-                icePart_ += icePart[jBin][y_index][x_index];
-                iceVol_ += iceVol[jBin][y_index][x_index];
+                icePart_ += icePart[jBin];
+                iceVol_ += iceVol[jBin];
                 iterCurr++;
             }
 
@@ -1108,13 +1116,14 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
         }
     }
     
-    void Grid_Aerosol::UpdateCenters(const Vector_3D &iceV, const Vector_3D &PDF)
+    template<typename Vector3D_t>
+    void Grid_Aerosol::UpdateCenters(const Vector3D_t &iceV, const Vector_3Dp &PDF)
     {
         #pragma omp parallel for default(shared)
         for (UInt iBin = 0; iBin < nBin; iBin++)
         {   
             //Must resize the bin_VCenters to avoid indexing errors
-            bin_VCenters[iBin] = Vector_2D(Ny, Vector_1D(Nx));
+            bin_VCenters[iBin] = Vector_2Dp(Ny, Vector_1Dp(Nx));
             double ratio = log(bin_Edges[iBin + 1] / bin_Edges[iBin]);
             for (UInt jNy = 0; jNy < Ny; jNy++)
             {
@@ -1135,6 +1144,11 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
 
     } /* End of Grid_Aerosol::UpdateCenters */
 
+    template void Grid_Aerosol::UpdateCenters<Vector_3D>(const Vector_3D &iceV, const Vector_3Dp &PDF);
+#ifdef FLOAT_PDF
+    template void Grid_Aerosol::UpdateCenters<Vector_3Dp>(const Vector_3Dp &iceV, const Vector_3Dp &PDF);
+#endif /* FLOAT_PDF */
+
     Vector_2D Grid_Aerosol::Moment(UInt n) const
     {
 
@@ -1278,6 +1292,22 @@ Aerosol::Aerosol(const Vector_1D& bin_Centers_, const Vector_1D& bin_Edges_, dou
 
     } /* End of Grid_Aerosol::Volume */
 
+    Vector_2D Grid_Aerosol::Volume(UInt iBin) const
+    {
+
+        Vector_2D volume(Ny, Vector_1D(Nx, 0.0E+00));
+        const double ratio = log(bin_Edges[iBin + 1] / bin_Edges[iBin]);
+
+        for (UInt jNy = 0; jNy < Ny; jNy++)
+        {
+            for (UInt iNx = 0; iNx < Nx; iNx++)
+                volume[jNy][iNx] = ratio * bin_VCenters[iBin][jNy][iNx] * pdf[iBin][jNy][iNx];
+        }
+
+        return volume;
+
+    } /* End of Grid_Aerosol::Volume */
+
     Vector_2D Grid_Aerosol::TotalArea() const
     {
 
@@ -372,7 +372,7 @@ namespace AIM
 
     } /* End of Coagulation::buildF */
 
-    void Coagulation::buildF( const Vector_3D &bin_VCenters, const UInt jNy, const UInt iNx )
+    void Coagulation::buildF( const Vector_3Dp &bin_VCenters, const UInt jNy, const UInt iNx )
     {
 
         double vij;
@@ -0,0 +1,79 @@
+#include <fstream>
+#include <iterator>
+#include "AIM/Settling.hpp"
+#include "Core/CaseContext.hpp"
+
+CaseContext& CaseContext::global() {
+    static CaseContext context;
+    return context;
+}
+
+bool CaseContext::findEPMResult(const EPM::CacheKey& key, EPM::EPMResult& result, const std::string& microFile) const {
+    std::string micro;
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        auto it = epmResults_.find(key.str());
+        if ( it == epmResults_.end() ) return false;
+        epmLru_.splice(epmLru_.begin(), epmLru_, it->second.lruPos);
+        result = it->second.result;
+        micro = it->second.micro;
+    }
+    if ( !microFile.empty() && !micro.empty() ) {
+        std::ofstream file(microFile, std::ios::binary);
+        file << micro;
+    }
+    return true;
+}
+
+void CaseContext::storeEPMResult(const EPM::CacheKey& key, const EPM::EPMResult& result, const std::string& microFile) {
+    if ( maxEPMResults_ == 0 ) return;
+    EPMEntry entry{result, "", {}};
+    if ( !microFile.empty() ) {
+        std::ifstream file(microFile, std::ios::binary);
+        if ( file.is_open() ) {
+            entry.micro.assign(std::istreambuf_iterator<char>(file), std::istreambuf_iterator<char>());
+        }
+    }
+    const std::string keyStr = key.str();
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto it = epmResults_.find(keyStr);
+    if ( it != epmResults_.end() ) {
+        epmLru_.erase(it->second.lruPos);
+        epmResults_.erase(it);
+    }
+    while ( epmResults_.size() >= maxEPMResults_ ) {
+        epmResults_.erase(epmLru_.back());
+        epmLru_.pop_back();
+    }
+    epmLru_.push_front(keyStr);
+    entry.lruPos = epmLru_.begin();
+    epmResults_.emplace(keyStr, std::move(entry));
+}
+
+Vector_1D CaseContext::settlingVelocity(const Vector_1D& binCenters, double temperature_K, double pressure_Pa) {
+    EPM::CacheKey key;
+    key.add("T", temperature_K);
+    key.add("P", pressure_Pa);
+    key.add("binCenters", binCenters);
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        auto it = settling_.find(key.str());
+        if ( it != settling_.end() ) return it->second;
+    }
+    Vector_1D vFall = AIM::SettlingVelocity(binCenters, temperature_K, pressure_Pa);
+    std::lock_guard<std::mutex> lock(mutex_);
+    settling_.emplace(key.str(), vFall);
+    return vFall;
+}
+
+std::size_t CaseContext::nEPMResults() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return epmResults_.size();
+}
+
+void CaseContext::clear() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    epmResults_.clear();
+    epmLru_.clear();
+    settling_.clear();
+}
@@ -0,0 +1,368 @@
+#include <algorithm>
+#include <cerrno>
+#include <cmath>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <filesystem>
+#include <limits>
+#include <sstream>
+#include <stdexcept>
+#include <sys/socket.h>
+#include <sys/un.h>
+#include <unistd.h>
+#include <yaml-cpp/yaml.h>
+#include "Core/CaseServer.hpp"
+
+namespace CaseServer
+{
+    namespace
+    {
+        bool isNumber( const std::string& str ) {
+            char* end;
+            std::strtod(str.c_str(), &end);
+            return !str.empty() && *end == '\0';
+        }
+
+        std::string number( double value ) {
+            /* JSON has no NaN or infinity */
+            if ( !std::isfinite(value) ) return "null";
+            std::ostringstream ss;
+            ss.precision(17);
+            ss << value;
+            return ss.str();
+        }
+
+        //Splits the bytes read from a file descriptor into lines
+        std::function<bool(std::string&)> fdLineReader( int fd ) {
+            return [fd, buffer = std::string()]( std::string& line ) mutable {
+                while ( true ) {
+                    const std::size_t pos = buffer.find('\n');
+                    if ( pos != std::string::npos ) {
+                        line = buffer.substr(0, pos);
+                        buffer.erase(0, pos + 1);
+                        return true;
+                    }
+                    char chunk[4096];
+                    const ssize_t n = ::read(fd, chunk, sizeof(chunk));
+                    if ( n < 0 && errno == EINTR ) continue;
+                    if ( n <= 0 ) {
+                        /* Last line without newline */
+                        if ( buffer.empty() ) return false;
+                        line.swap(buffer);
+                        buffer.clear();
+                        return true;
+                    }
+                    buffer.append(chunk, n);
+                }
+            };
+        }
+    }
+
+    Request parseRequest( const std::string& line ) {
+        YAML::Node node;
+        try {
+            node = YAML::Load(line);
+        }
+        catch ( YAML::Exception& e ) {
+            throw std::invalid_argument("Could not parse request: " + std::string(e.what()));
+        }
+        if ( !node.IsMap() ) throw std::invalid_argument("Request is not a JSON object");
+
+        Request request;
+        try {
+            for ( const auto& entry: node ) {
+                const std::string key = entry.first.as<std::string>();
+                const YAML::Node& value = entry.second;
+                if ( key == "id" ) {
+                    if ( !value.IsScalar() ) throw std::invalid_argument("Request id must be a string or a number");
+                    request.id = value.as<std::string>();
+                    /* Plain scalars that are not numbers are echoed back as strings, so that the response is valid JSON */
+                    request.idQuoted = value.Tag() == "!" || !isNumber(request.id);
+                }
+                else if ( key == "params" ) {
+                    if ( !value.IsMap() ) throw std::invalid_argument("Request params must be a JSON object");
+                    for ( const auto& param: value ) {
+                        request.params[param.first.as<std::string>()] = param.second.as<double>();
+                    }
+                }
+                else if ( key == "series" ) {
+                    request.series = value.as<bool>();
+                }
+                else if ( key == "case" ) {
+                    request.caseId = value.as<long long>();
+                    if ( request.caseId < 0 || request.caseId >= std::numeric_limits<unsigned int>::max() ) {
+                        throw std::invalid_argument("Request case must be a non-negative integer");
+                    }
+                }
+                else if ( key == "command" ) {
+                    request.command = value.as<std::string>();
+                }
+                else {
+                    throw std::invalid_argument("Unknown request field " + key);
+                }
+            }
+        }
+        catch ( YAML::Exception& e ) {
+            throw std::invalid_argument("Invalid request: " + std::string(e.what()));
+        }
+        return request;
+    }
+
+    std::string quote( const std::string& str ) {
+        std::string quoted = "\"";
+        for ( unsigned char c: str ) {
+            switch ( c ) {
+                case '"':  quoted += "\\\""; break;
+                case '\\': quoted += "\\\\"; break;
+                case '\n': quoted += "\\n"; break;
+                case '\r': quoted += "\\r"; break;
+                case '\t': quoted += "\\t"; break;
+                default:
+                    if ( c < 0x20 ) {
+                        char escaped[8];
+                        std::snprintf(escaped, sizeof(escaped), "\\u%04x", c);
+                        quoted += escaped;
+                    }
+                    else {
+                        quoted += c;
+                    }
+            }
+        }
+        return quoted + "\"";
+    }
+
+    void JsonObject::addRaw( const std::string& name, const std::string& json ) {
+        if ( !body_.empty() ) body_ += ", ";
+        body_ += quote(name) + ": " + json;
+    }
+
+    void JsonObject::add( const std::string& name, double value ) {
+        addRaw(name, number(value));
+    }
+
+    void JsonObject::add( const std::string& name, int value ) {
+        addRaw(name, std::to_string(value));
+    }
+
+    void JsonObject::add( const std::string& name, bool value ) {
+        addRaw(name, value ? "true" : "false");
+    }
+
+    void JsonObject::add( const std::string& name, const std::string& value ) {
+        addRaw(name, quote(value));
+    }
+
+    void JsonObject::add( const std::string& name, const Vector_1D& values ) {
+        std::string json = "[";
+        for ( std::size_t i = 0; i < values.size(); i++ ) {
+            json += (i > 0 ? ", " : "") + number(values[i]);
+        }
+        addRaw(name, json + "]");
+    }
+
+    //Responses are written whole, one at a time
+    struct Server::Channel {
+        virtual ~Channel() = default;
+        virtual void write( const std::string& line ) = 0;
+
+        void send( const std::string& line ) {
+            std::lock_guard<std::mutex> lock(mutex);
+            write(line);
+        }
+
+        std::mutex mutex;
+        std::condition_variable done;
+        std::size_t pending = 0;
+    };
+
+    namespace
+    {
+        struct StreamChannel: public Server::Channel {
+            explicit StreamChannel( std::ostream& out ): out_(out) { }
+            void write( const std::string& line ) override { out_ << line << std::endl; }
+            std::ostream& out_;
+        };
+
+        struct SocketChannel: public Server::Channel {
+            explicit SocketChannel( int fd ): fd_(fd) { }
+            ~SocketChannel() { ::close(fd_); }
+            void write( const std::string& line ) override {
+                const std::string data = line + "\n";
+                std::size_t sent = 0;
+                while ( sent < data.size() ) {
+                    /* A client that went away must not raise SIGPIPE */
+                    const ssize_t n = ::send(fd_, data.data() + sent, data.size() - sent, MSG_NOSIGNAL);
+                    if ( n < 0 && errno == EINTR ) continue;
+                    if ( n <= 0 ) return;
+                    sent += n;
+                }
+            }
+            int fd_;
+        };
+    }
+
+    Server::Server( Runner runner, unsigned int nWorkers ):
+        runner_(std::move(runner))
+    {
+        for ( unsigned int i = 0; i < std::max(nWorkers, 1u); i++ ) {
+            workers_.emplace_back(&Server::work, this);
+        }
+    }
+
+    Server::~Server() {
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            stop_ = true;
+        }
+        cv_.notify_all();
+        for ( auto& worker: workers_ ) worker.join();
+    }
+
+    void Server::serve( std::istream& in, std::ostream& out ) {
+        StreamChannel channel(out);
+        serveLines([&in]( std::string& line ) { return static_cast<bool>(std::getline(in, line)); }, channel);
+    }
+
+    void Server::serveSocket( const std::string& path ) {
+        sockaddr_un addr{};
+        addr.sun_family = AF_UNIX;
+        if ( path.empty() || path.size() >= sizeof(addr.sun_path) ) {
+            throw std::invalid_argument("Invalid socket path " + path);
+        }
+        std::strncpy(addr.sun_path, path.c_str(), sizeof(addr.sun_path) - 1);
+
+        /* Replace the socket of an earlier server, but never an ordinary file */
+        std::error_code ec;
+        if ( std::filesystem::is_socket(path, ec) ) {
+            std::filesystem::remove(path, ec);
+        }
+
+        const int fd = ::socket(AF_UNIX, SOCK_STREAM, 0);
+        if ( fd < 0 ) throw std::runtime_error("Could not create socket: " + std::string(std::strerror(errno)));
+        if ( ::bind(fd, reinterpret_cast<sockaddr*>(&addr), sizeof(addr)) < 0 || ::listen(fd, SOMAXCONN) < 0 ) {
+            const std::string error = std::strerror(errno);
+            ::close(fd);
+            throw std::runtime_error("Could not listen on " + path + ": " + error);
+        }
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            listenFd_ = fd;
+            shutdown_ = false;
+        }
+
+        std::vector<std::thread> connections;
+        while ( true ) {
+            const int client = ::accept(fd, nullptr, nullptr);
+            if ( client < 0 ) {
+                std::lock_guard<std::mutex> lock(mutex_);
+                if ( shutdown_ ) break;
+                if ( errno == EINTR || errno == ECONNABORTED ) continue;
+                listenFd_ = -1;
+                ::close(fd);
+                throw std::runtime_error("Could not accept connection on " + path + ": " + std::strerror(errno));
+            }
+            connections.emplace_back([this, client]() {
+                SocketChannel channel(client);
+                serveLines(fdLineReader(client), channel);
+            });
+        }
+
+        for ( auto& connection: connections ) connection.join();
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            listenFd_ = -1;
+        }
+        ::close(fd);
+        std::filesystem::remove(path, ec);
+    }
+
+    void Server::serveLines( const std::function<bool(std::string&)>& readLine, Channel& channel ) {
+        std::string line;
+        while ( readLine(line) ) {
+            if ( line.find_first_not_of(" \t\r") == std::string::npos ) continue;
+
+            Request request;
+            try {
+                request = parseRequest(line);
+            }
+            catch ( std::exception& e ) {
+                JsonObject response;
+                response.add("error", e.what());
+                channel.send(response.str());
+                continue;
+            }
+
+            if ( !request.command.empty() ) {
+                JsonObject response;
+                if ( !request.id.empty() ) response.addRaw("id", request.idQuoted ? quote(request.id) : request.id);
+                if ( request.command != "shutdown" ) {
+                    response.add("error", "Unknown command " + request.command);
+                    channel.send(response.str());
+                    continue;
+                }
+                {
+                    /* Unblocks accept() in serveSocket */
+                    std::lock_guard<std::mutex> lock(mutex_);
+                    shutdown_ = true;
+                    if ( listenFd_ >= 0 ) ::shutdown(listenFd_, SHUT_RDWR);
+                }
+                response.add("command", request.command);
+                channel.send(response.str());
+                break;
+            }
+
+            {
+                std::lock_guard<std::mutex> lock(channel.mutex);
+                channel.pending++;
+            }
+            submit([this, request, &channel]() {
+                respond(request, channel);
+                /* Notify with the lock held, the channel may be destroyed as soon as it is released */
+                std::lock_guard<std::mutex> lock(channel.mutex);
+                channel.pending--;
+                channel.done.notify_all();
+            });
+        }
+
+        std::unique_lock<std::mutex> lock(channel.mutex);
+        channel.done.wait(lock, [&channel]() { return channel.pending == 0; });
+    }
+
+    void Server::respond( const Request& request, Channel& channel ) {
+        const std::string id = request.idQuoted ? quote(request.id) : request.id;
+        JsonObject response;
+        if ( !request.id.empty() ) response.addRaw("id", id);
+        try {
+            runner_(request, response);
+        }
+        catch ( std::exception& e ) {
+            response = JsonObject();
+            if ( !request.id.empty() ) response.addRaw("id", id);
+            response.add("error", e.what());
+        }
+        channel.send(response.str());
+    }
+
+    void Server::submit( std::function<void()> job ) {
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            jobs_.push(std::move(job));
+        }
+        cv_.notify_one();
+    }
+
+    void Server::work() {
+        while ( true ) {
+            std::function<void()> job;
+            {
+                std::unique_lock<std::mutex> lock(mutex_);
+                cv_.wait(lock, [this]() { return stop_ || !jobs_.empty(); });
+                if ( jobs_.empty() ) return;
+                job = std::move(jobs_.front());
+                jobs_.pop();
+            }
+            job();
+        }
+    }
+}
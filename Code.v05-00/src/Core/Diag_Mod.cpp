@@ -12,6 +12,7 @@
 /* ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ */
 
 #include "Core/Diag_Mod.hpp"
+#include "Core/NetCDFLock.hpp"
 namespace Diag {
 
     static const NcType& varDataType = ncFloat;
@@ -75,6 +76,7 @@ namespace Diag {
         const char* outFile = fileName.c_str();
 
         // Open the file for writing - replacing anything already there
+        std::lock_guard<std::mutex> ncLock(netcdfMutex());
         NcFile currFile(outFile,NcFile::replace);
 
         time_t rawtime;
@@ -291,6 +293,7 @@ namespace Diag {
         const char* outFile = fileName.c_str();
 
         // Open file and don't worry about overwrite
+        std::lock_guard<std::mutex> ncLock(netcdfMutex());
         NcFile currFile(outFile,NcFile::replace);
 
         time_t rawtime;
@@ -359,7 +362,7 @@ namespace Diag {
         add2DVar(currFile, H2O, xyDims, "H2O", "H2O molecular concentration", "molec / cm^3");
 
         /* Saving meteorological temperature */
-        add2DVar(currFile, met.Temp(), xyDims, "Temperature", "Temperature", "K");
+        add2DVar(currFile, met.Temp().toVector2D(), xyDims, "Temperature", "Temperature", "K");
 
         /* Saving ice aerosol particle number */
         add2DVar(currFile, iceAer.TotalNumber(), xyDims, "Ice aerosol particle number", "Ice aerosol particle number concentration", "# / cm^3");
@@ -395,7 +398,7 @@ namespace Diag {
         add2DVar(currFile, iceAer.IWC(), xyDims, "IWC", "Ice Water Content", "kg / m^3");
 
         /* Saving RHi */
-        add2DVar(currFile, physFunc::RHi_Field(H2O, met.Temp(), met.Press()), xyDims, "RHi", "Relative Humidity w.r.t. Ice", "%");
+        add2DVar(currFile, physFunc::RHi_Field(H2O, met.Temp().toVector2D(), met.Press()), xyDims, "RHi", "Relative Humidity w.r.t. Ice", "%");
 
         //Contrail width, depth, and integrated OD
         add0DVar(currFile, iceAer.extinctionWidth(xCoord), tDim, "width", "Contrail Extinction-Defined Width", "m");
@@ -403,6 +406,35 @@ namespace Diag {
         add0DVar(currFile, iceAer.intYOD(dx_vec, dy_vec), tDim, "intOD", "Integrated Vertical Optical Depth", "m");
     } /* End of Diag_TS_Phys */
 
+    PlumeDiagnostics plumeDiagnostics( const double time_s,
+                    const AIM::Grid_Aerosol& iceAer, const Vector_2D& H2O,
+                    const Vector_1D& xCoord, const Vector_1D& yCoord,
+                    const Vector_1D& xEdges, const Vector_1D& yEdges,
+                    const Meteorology &met, const bool fields )
+    {
+        Vector_2D areas = VectorUtils::cellAreas(xEdges, yEdges);
+        Vector_1D dx_vec(xCoord.size(), xCoord[1] - xCoord[0]);
+        Vector_1D dy_vec(yCoord.size(), yCoord[1] - yCoord[0]);
+
+        PlumeDiagnostics diag;
+        diag.time_s = time_s;
+        diag.iceMass = iceAer.TotalIceMass_sum(areas);
+        diag.numberIce = iceAer.TotalNumber_sum(areas);
+        diag.width = iceAer.extinctionWidth(xCoord);
+        diag.depth = iceAer.extinctionDepth(yCoord);
+        diag.intOD = iceAer.intYOD(dx_vec, dy_vec);
+
+        if ( fields ) {
+            diag.x = xCoord;
+            diag.y = yCoord;
+            diag.iceNumber = iceAer.TotalNumber();
+            diag.IWC = iceAer.IWC();
+            diag.extinction = iceAer.Extinction();
+            diag.RHi = physFunc::RHi_Field(H2O, met.Temp().toVector2D(), met.Press());
+        }
+        return diag;
+    } /* End of plumeDiagnostics */
+
 }
 
 /* End of Diag_Mod.cpp */
@@ -73,39 +73,51 @@ Input::Input( unsigned int iCase,               \
         const std::string fileName_BOX,   \
         const std::string fileName_micro, \
         const std::string author          ):
+    Input( iCase, parameters[iCase], fileName, fileName_ADJ, fileName_BOX, fileName_micro, author )
+{
+
+}
+
+Input::Input( unsigned int iCase,               \
+        const std::unordered_map<std::string, double> &caseParams,      \
+        const std::string fileName,       \
+        const std::string fileName_ADJ,   \
+        const std::string fileName_BOX,   \
+        const std::string fileName_micro, \
+        const std::string author          ):
     Case_          ( iCase                 ),
-    simulationTime_( parameters[iCase].at("PLUMEPROCESS")),
-    temperature_K_ ( parameters[iCase].at("TEMPERATURE")),
-    relHumidity_w_ ( parameters[iCase].at("RHW")),
-    pressure_Pa_   ( parameters[iCase].at("PRESSURE")),
-    horizDiff_     ( parameters[iCase].at("DH")),
-    vertiDiff_     ( parameters[iCase].at("DV")),
-    shear_         ( parameters[iCase].at("SHEAR")),
-    nBV_           ( parameters[iCase].at("NBV")),
-    longitude_deg_ ( parameters[iCase].at("LONGITUDE")),
-    latitude_deg_  ( parameters[iCase].at("LATITUDE")),
-    emissionDOY_   ( parameters[iCase].at("EDAY")),
-    emissionTime_  ( parameters[iCase].at("ETIME")),
-    backgNOx_      ( parameters[iCase].at("BACKG_NOX")),
-    backgHNO3_     ( parameters[iCase].at("BACKG_HNO3")),
-    backgO3_       ( parameters[iCase].at("BACKG_O3")),
-    backgCO_       ( parameters[iCase].at("BACKG_CO")),
-    backgCH4_      ( parameters[iCase].at("BACKG_CH4")),
-    backgSO2_      ( parameters[iCase].at("BACKG_SO2")),
-    EI_NOx_        ( parameters[iCase].at("EI_NOX")),
-    EI_CO_         ( parameters[iCase].at("EI_CO")),
-    EI_HC_         ( parameters[iCase].at("EI_UHC")),
-    EI_SO2_        ( parameters[iCase].at("EI_SO2")),
-    EI_SO2TOSO4_   ( parameters[iCase].at("EI_SO2TOSO4")),
-    EI_Soot_       ( parameters[iCase].at("EI_SOOT")),
-    sootRad_       ( parameters[iCase].at("EI_SOOTRAD")),
-    fuelFlow_      ( parameters[iCase].at("FF")),
-    aircraftMass_  ( parameters[iCase].at("AMASS")),
-    flightSpeed_   ( parameters[iCase].at("FSPEED")),
-    numEngines_    ( parameters[iCase].at("NUMENG")),
-    wingspan_      ( parameters[iCase].at("WINGSPAN")),
-    coreExitTemp_  ( parameters[iCase].at("COREEXITTEMP")),
-    bypassArea_    ( parameters[iCase].at("BYPASSAREA")),
+    simulationTime_( caseParams.at("PLUMEPROCESS")),
+    temperature_K_ ( caseParams.at("TEMPERATURE")),
+    relHumidity_w_ ( caseParams.at("RHW")),
+    pressure_Pa_   ( caseParams.at("PRESSURE")),
+    horizDiff_     ( caseParams.at("DH")),
+    vertiDiff_     ( caseParams.at("DV")),
+    shear_         ( caseParams.at("SHEAR")),
+    nBV_           ( caseParams.at("NBV")),
+    longitude_deg_ ( caseParams.at("LONGITUDE")),
+    latitude_deg_  ( caseParams.at("LATITUDE")),
+    emissionDOY_   ( caseParams.at("EDAY")),
+    emissionTime_  ( caseParams.at("ETIME")),
+    backgNOx_      ( caseParams.at("BACKG_NOX")),
+    backgHNO3_     ( caseParams.at("BACKG_HNO3")),
+    backgO3_       ( caseParams.at("BACKG_O3")),
+    backgCO_       ( caseParams.at("BACKG_CO")),
+    backgCH4_      ( caseParams.at("BACKG_CH4")),
+    backgSO2_      ( caseParams.at("BACKG_SO2")),
+    EI_NOx_        ( caseParams.at("EI_NOX")),
+    EI_CO_         ( caseParams.at("EI_CO")),
+    EI_HC_         ( caseParams.at("EI_UHC")),
+    EI_SO2_        ( caseParams.at("EI_SO2")),
+    EI_SO2TOSO4_   ( caseParams.at("EI_SO2TOSO4")),
+    EI_Soot_       ( caseParams.at("EI_SOOT")),
+    sootRad_       ( caseParams.at("EI_SOOTRAD")),
+    fuelFlow_      ( caseParams.at("FF")),
+    aircraftMass_  ( caseParams.at("AMASS")),
+    flightSpeed_   ( caseParams.at("FSPEED")),
+    numEngines_    ( caseParams.at("NUMENG")),
+    wingspan_      ( caseParams.at("WINGSPAN")),
+    coreExitTemp_  ( caseParams.at("COREEXITTEMP")),
+    bypassArea_    ( caseParams.at("BYPASSAREA")),
     fileName_      ( fileName ),
     fileName_ADJ_  ( fileName_ADJ ),
     fileName_BOX_  ( fileName_BOX ),
@@ -121,6 +133,17 @@ Input::~Input()
 
 } /* End of Input::~Input */
 
+Input Input::ensembleMember( double horizDiff, double vertiDiff, double shear ) const
+{
+
+    Input member( *this );
+    member.horizDiff_ = horizDiff;
+    member.vertiDiff_ = vertiDiff;
+    member.shear_ = shear;
+    return member;
+
+} /* End of Input::ensembleMember */
+
 /* End of Input.cpp */
 
 void Input::checkInputValidity(){
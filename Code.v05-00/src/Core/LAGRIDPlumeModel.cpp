@@ -1,5 +1,9 @@
 #include "Core/LAGRIDPlumeModel.hpp"
 #include "Core/Status.hpp"
+#include "EPM/EPMCache.hpp"
+#include "Util/BinaryIO.hpp"
+#include <fstream>
+#include <random>
 LAGRIDPlumeModel::LAGRIDPlumeModel( const OptInput &optInput, const Input &input ):
     optInput_(optInput),
     input_(input),
@@ -20,29 +24,151 @@ LAGRIDPlumeModel::LAGRIDPlumeModel( const OptInput &optInput, const Input &input
 
     createOutputDirectories();
 }
+LAGRIDPlumeModel::LAGRIDPlumeModel( const LAGRIDPlumeModel &prefix, const OptInput &optInput, const Input &member ):
+    optInput_(optInput),
+    input_(member),
+    numThreads_(prefix.numThreads_),
+    sun_(prefix.sun_),
+    aircraft_(prefix.aircraft_),
+    jetA_(prefix.jetA_),
+    EI_(prefix.EI_),
+    simVars_(MPMSimVarsWrapper(member, optInput)),
+    timestepVars_(prefix.timestepVars_),
+    iceAerosol_(prefix.iceAerosol_),
+    EPM_result_(prefix.EPM_result_),
+    met_(prefix.met_),
+    diffCoeffX_(prefix.diffCoeffX_),
+    diffCoeffY_(prefix.diffCoeffY_),
+    survivalFrac_(prefix.survivalFrac_),
+    yCoords_(prefix.yCoords_),
+    yEdges_(prefix.yEdges_),
+    xCoords_(prefix.xCoords_),
+    xEdges_(prefix.xEdges_),
+    H2O_(prefix.H2O_),
+    vFall_(prefix.vFall_),
+    initNumParts_(prefix.initNumParts_),
+    simTime_h_(prefix.simTime_h_),
+    solarTime_h_(prefix.solarTime_h_),
+    shear_rep_(prefix.shear_rep_),
+    lastCheckpoint_s_(prefix.lastCheckpoint_s_),
+    context_(prefix.context_)
+{
+    //The diffusion coefficients are read from input_ at every transport step, only the shear is part of the met state
+    if ( member.shear() != prefix.input_.shear() && !met_.overrideShear(member.shear()) ) {
+        std::cout << "Ensemble member shear is ignored, the shear is read from the met input" << std::endl;
+    }
+}
+
 SimStatus LAGRIDPlumeModel::runFullModel() {
     auto start = std::chrono::high_resolution_clock::now();
     omp_set_num_threads(numThreads_);
+    SimStatus status = initializeModel();
+    if(status != SimStatus::EPMSuccess) {
+        return status;
+    }
+    status = runUntil(timestepVars_.tFinal_s);
+
+    //The run is over, a restart would start from scratch
+    std::error_code ec;
+    std::filesystem::remove(checkpointPath(), ec);
+    auto stop = std::chrono::high_resolution_clock::now();
+    auto duration = std::chrono::duration_cast<std::chrono::milliseconds>(stop-start);
+    std::cout << "APCEMM LAGRID Plume Model Run Finished! Run time: " << duration.count() << "ms" << std::endl;
+    return status;
+}
+
+std::vector<SimStatus> LAGRIDPlumeModel::runEnsemble(const std::vector<Input> &members) {
+    auto start = std::chrono::high_resolution_clock::now();
+    omp_set_num_threads(numThreads_);
+
+    //Forked at or after the end of the case, the members would not run a single time step
+    const double tFork_s = timestepVars_.tInitial_s + optInput_.SIMULATION_ENSEMBLE_FORK_TIME * 3600.0;
+    if(tFork_s >= timestepVars_.tFinal_s) {
+        std::cout << "Ensemble fork time (" << optInput_.SIMULATION_ENSEMBLE_FORK_TIME << " hr) is not before the end "
+                  << "of the plume process (" << (timestepVars_.tFinal_s - timestepVars_.tInitial_s) / 3600.0
+                  << " hr), the case is not run" << std::endl;
+        return std::vector<SimStatus>(members.size(), SimStatus::Failed);
+    }
+
+    //Shared prefix: EPM, vortex sinking and the plume up to the fork time
+    SimStatus status = initializeModel();
+    if(status == SimStatus::EPMSuccess) {
+        status = runUntil(tFork_s);
+    }
+    //The prefix already finished (EPM failure, no ice left), which holds for all members
+    std::vector<SimStatus> memberStatus(members.size(), status);
+    if(status != SimStatus::Incomplete) {
+        return memberStatus;
+    }
+
+    //Members write their own time series, but never checkpoints (the prefix does)
+    std::vector<OptInput> memberOpts(members.size(), optInput_);
+    for(std::size_t k = 0; k < members.size(); k++) {
+        std::string& fileName = memberOpts[k].TS_AERO_FILENAME;
+        std::size_t pos = fileName.find("hhmm");
+        fileName.insert(pos == std::string::npos ? 0 : pos, "member" + std::to_string(k) + "_");
+        memberOpts[k].SIMULATION_CHECKPOINT_FREQ = 0;
+    }
+
+    //Members run concurrently, the remaining threads parallelize within each member
+    const int nMemberThreads = std::max(1, std::min(numThreads_, static_cast<int>(members.size())));
+    const int nInnerThreads = std::max(1, numThreads_ / nMemberThreads);
+    //One more nested level than the current one, which is already nested when cases run concurrently
+    omp_set_max_active_levels(std::max(omp_get_max_active_levels(), omp_get_level() + 2));
+    #pragma omp parallel for schedule(dynamic, 1) num_threads(nMemberThreads)
+    for(int k = 0; k < static_cast<int>(members.size()); k++) {
+        omp_set_num_threads(nInnerThreads);
+        try {
+            LAGRIDPlumeModel member(*this, memberOpts[k], members[k]);
+            memberStatus[k] = member.runUntil(timestepVars_.tFinal_s);
+        }
+        catch(std::exception& e) {
+            #pragma omp critical
+            { std::cout << "Ensemble member " << k << " failed: " << e.what() << std::endl; }
+            memberStatus[k] = SimStatus::Failed;
+        }
+    }
+
+    std::error_code ec;
+    std::filesystem::remove(checkpointPath(), ec);
+    auto stop = std::chrono::high_resolution_clock::now();
+    auto duration = std::chrono::duration_cast<std::chrono::milliseconds>(stop-start);
+    std::cout << "APCEMM LAGRID Plume Model Ensemble Finished! Run time: " << duration.count() << "ms" << std::endl;
+    return memberStatus;
+}
+
+SimStatus LAGRIDPlumeModel::initializeModel() {
     SimStatus EPM_RC = runEPM();
     if(EPM_RC != SimStatus::EPMSuccess) {
         return EPM_RC;
     }
 
     //Initialize aerosol into grid and init H2O
+    //The grid initialization also sets up the bin structure that a checkpoint is read into.
     initializeGrid();
-    initH2O();
-    saveTSAerosol();
+    if ( optInput_.SIMULATION_RESTART && readCheckpoint() ) {
+        std::cout << "Resuming from checkpoint at time step " << timestepVars_.nTime << std::endl;
+    }
+    else {
+        initH2O();
+        saveTSAerosol();
 
-    //Setup settling velocities
-    if ( simVars_.GRAVSETTLING ) {
-        vFall_ = AIM::SettlingVelocity( iceAerosol_.getBinCenters(), \
-                                       met_.tempRef(), simVars_.pressure_Pa );
+        //Setup settling velocities
+        if ( simVars_.GRAVSETTLING ) {
+            vFall_ = context_ ? context_->settlingVelocity( iceAerosol_.getBinCenters(), met_.tempRef(), simVars_.pressure_Pa )
+                              : AIM::SettlingVelocity( iceAerosol_.getBinCenters(), \
+                                                       met_.tempRef(), simVars_.pressure_Pa );
+        }
     }
+    lastCheckpoint_s_ = timestepVars_.curr_Time_s;
+    return SimStatus::EPMSuccess;
+}
 
+SimStatus LAGRIDPlumeModel::runUntil(double tEnd_s) {
     bool EARLY_STOP = false;
     SimStatus status = SimStatus::Incomplete;
     //Start time loop
-    while ( timestepVars_.curr_Time_s < timestepVars_.tFinal_s ) {
+    while ( timestepVars_.curr_Time_s < tEnd_s ) {
         /* Print message */
         std::cout << "\n";
         std::cout << "\n - Time step: " << timestepVars_.nTime + 1 << " out of " << timestepVars_.timeArray.size();
@@ -76,7 +202,7 @@ SimStatus LAGRIDPlumeModel::runFullModel() {
         if(COCIP_MIXING) {
             Meteorology met_temp = met_;
             met_temp.Update( timestepVars_.TRANSPORT_DT, solarTime_h_, simTime_h_);
-            H2O_amb_after_cocip = met_temp.H2O_field();
+            H2O_amb_after_cocip = met_temp.H2O_field().toVector2D();
             numberMask_after_cocip = iceNumberMask();
             runCocipH2OMixing(H2O_before_cocip, H2O_amb_after_cocip, numberMask_before_cocip, numberMask_after_cocip);
         }
@@ -122,10 +248,14 @@ SimStatus LAGRIDPlumeModel::runFullModel() {
             status = SimStatus::Complete;
             break;
         }
+
+        const bool lastStep = timestepVars_.curr_Time_s >= timestepVars_.tFinal_s;
+        if ( optInput_.SIMULATION_CHECKPOINT_FREQ > 0 && !lastStep && \
+             timestepVars_.curr_Time_s - lastCheckpoint_s_ >= optInput_.SIMULATION_CHECKPOINT_FREQ * 60.0 - 1e-3 ) {
+            writeCheckpoint();
+            lastCheckpoint_s_ = timestepVars_.curr_Time_s;
+        }
     }
-    auto stop = std::chrono::high_resolution_clock::now();
-    auto duration = std::chrono::duration_cast<std::chrono::milliseconds>(stop-start);
-    std::cout << "APCEMM LAGRID Plume Model Run Finished! Run time: " << duration.count() << "ms" << std::endl;
     return status;
 }
 
@@ -148,7 +278,8 @@ SimStatus LAGRIDPlumeModel::runEPM() {
     ambMetParams.press_Pa = simVars_.pressure_Pa;
     ambMetParams.shear = input_.shear();
 
-    met_ = Meteorology(optInput_, ambMetParams, yCoords_, yEdges_);
+    met_ = Meteorology(optInput_, ambMetParams, yCoords_, yEdges_, timestepVars_.tFinal_h - timestepVars_.tInitial_h,
+                       caseSeed(optInput_.SIMULATION_MC_SEED, input_.Case()));
 
     std::cout << "Temperature      = " << met_.tempRef() << " K" << std::endl;
     std::cout << "RHw              = " << met_.rhwRef() << " %" << std::endl;
@@ -173,8 +304,67 @@ SimStatus LAGRIDPlumeModel::runEPM() {
     //This sets the values in VAR and FIX to the values in the solution data structure at indices i, j
     epmSolution.getData(VAR, FIX, i_0, j_0);
 
+    //EPM results only depend on the flight-level conditions, emissions and aircraft, so they can be reused across cases.
+    //Caching is opt-in through the EPM cache folder, the context keeps the most recent results in memory in front of it.
+    if ( optInput_.SIMULATION_EPM_CACHE_FOLDER.empty() ) {
+        EPM_result_.second = integrateEPM(VAR, aerArray);
+        return EPM_result_.second;
+    }
+    EPM::CacheKey cacheKey = epmCacheKey(VAR, aerArray);
+    if ( context_ && context_->findEPMResult(cacheKey, EPM_result_, input_.fileName_micro()) ) {
+        std::cout << "Reusing EPM results of an earlier case (" << cacheKey.hash() << ")" << std::endl;
+        return EPM_result_.second;
+    }
+    if ( EPM::loadCachedResult(optInput_.SIMULATION_EPM_CACHE_FOLDER, cacheKey, EPM_result_, input_.fileName_micro()) ) {
+        std::cout << "Reusing cached EPM results (" << cacheKey.hash() << ")" << std::endl;
+        if ( context_ ) context_->storeEPMResult(cacheKey, EPM_result_, input_.fileName_micro());
+        return EPM_result_.second;
+    }
+
+    EPM_result_.second = integrateEPM(VAR, aerArray);
+    EPM::storeCachedResult(optInput_.SIMULATION_EPM_CACHE_FOLDER, cacheKey, EPM_result_, input_.fileName_micro());
+    if ( context_ ) context_->storeEPMResult(cacheKey, EPM_result_, input_.fileName_micro());
+    return EPM_result_.second;
+}
+
+EPM::CacheKey LAGRIDPlumeModel::epmCacheKey(const double VAR[], const Vector_2D& aerArray) const {
+    EPM::CacheKey key;
+    /* Ambient conditions at flight level */
+    key.add("temperature", met_.tempRef());
+    key.add("pressure", simVars_.pressure_Pa);
+    key.add("rhw", met_.rhwRef());
+    key.add("satdepth", met_.satdepthUser());
+    key.add("lapseRate", optInput_.ADV_AMBIENT_LAPSERATE);
+    key.add("chemistry", simVars_.CHEMISTRY);
+    key.add("stiffSolver", optInput_.ADV_EPM_STIFF_SOLVER);
+    key.add("species", VAR, NVAR);
+    key.add("aerosol", aerArray);
+    /* Engine and emissions */
+    key.add("bypassArea", input_.bypassArea());
+    key.add("coreExitTemp", input_.coreExitTemp());
+    key.add("engine", EI_.getEngineName());
+    key.add("fuel", EI_.getFuelChem());
+    const double emissionIndices[] = { EI_.getCO2(), EI_.getH2O(), EI_.getNOx(), EI_.getNO(), EI_.getNO2(), EI_.getHNO2(),
+                                       EI_.getSO2(), EI_.getCO(), EI_.getHC(), EI_.getCH4(), EI_.getC2H6(), EI_.getPRPE(),
+                                       EI_.getALK4(), EI_.getCH2O(), EI_.getALD2(), EI_.getGLYX(), EI_.getMGLY(),
+                                       EI_.getSoot(), EI_.getSootRad() };
+    key.add("EI", emissionIndices, sizeof(emissionIndices) / sizeof(emissionIndices[0]));
+    /* Aircraft and wake vortex */
+    key.add("vFlight", aircraft_.VFlight());
+    key.add("fuelFlow", aircraft_.FuelFlow());
+    key.add("engNumber", aircraft_.EngNumber());
+    key.add("wingspan", aircraft_.Wingspan());
+    key.add("mass", aircraft_.currMass());
+    const Vortex& vortex = aircraft_.vortex();
+    const double vortexParams[] = { vortex.N_BV(), vortex.b(), vortex.gamma(), vortex.t(), vortex.w(),
+                                    vortex.eps_star(), vortex.delta_zw(), vortex.delta_z1(), vortex.D1() };
+    key.add("vortex", vortexParams, sizeof(vortexParams) / sizeof(vortexParams[0]));
+    return key;
+}
+
+SimStatus LAGRIDPlumeModel::integrateEPM(double VAR[], const Vector_2D& aerArray) {
     //RUN EPM
-    EPM_result_ = EPM::Integrate(met_.tempRef(), simVars_.pressure_Pa, met_.rhwRef(), input_.bypassArea(), input_.coreExitTemp(), VAR, aerArray, aircraft_, EI_, simVars_.CHEMISTRY, optInput_.ADV_AMBIENT_LAPSERATE, input_.fileName_micro() );
+    EPM_result_ = EPM::Integrate(met_.tempRef(), simVars_.pressure_Pa, met_.rhwRef(), input_.bypassArea(), input_.coreExitTemp(), VAR, aerArray, aircraft_, EI_, simVars_.CHEMISTRY, optInput_.ADV_AMBIENT_LAPSERATE, input_.fileName_micro(), optInput_.ADV_EPM_STIFF_SOLVER );
     EPM::EPMOutput& epmOutput = EPM_result_.first;
     SimStatus EPM_RC = EPM_result_.second;
 
@@ -247,7 +437,7 @@ void LAGRIDPlumeModel::initializeGrid() {
     double rho_air = simVars_.pressure_Pa / (physConst::R_Air * epmOut.finalTemp);
     double B1 = optInput_.ADV_CSIZE_WIDTH_BASE + optInput_.ADV_CSIZE_WIDTH_SCALING_FACTOR * N_dil(aircraft_.vortex().t()) * m_F / ( physConst::PI/4 * rho_air * D1); // initial contrail width [m]
 
-    Vector_3D pdf_init;
+    Vector_3Dp pdf_init;
     
     //Initialize area assuming ellipse-like shape
     double initPlumeArea = EPM_result_.first.area;
@@ -265,7 +455,7 @@ void LAGRIDPlumeModel::initializeGrid() {
         double EPM_nPart_bin = epmIceAer.binMoment(n) * epmOut.area;
         double logBinRatio = log(iceAerosol_.getBinEdges()[n+1] / iceAerosol_.getBinEdges()[n]);
         //Start contrail at altitude -D1/2 to reflect the sinking.
-        pdf_init.push_back( LAGRID::initVarToGridGaussian(EPM_nPart_bin, xEdges_, yEdges_, 0, -D1/2, sigma_x, sigma_y, logBinRatio) );
+        pdf_init.push_back( VectorUtils::convertVec2D<PdfReal>(LAGRID::initVarToGridGaussian(EPM_nPart_bin, xEdges_, yEdges_, 0, -D1/2, sigma_x, sigma_y, logBinRatio)) );
         //pdf_init.push_back( LAGRID::initVarToGridBimodalY(EPM_nPart_bin, xEdges_, yEdges_, 0, -D1/2, initWidth, initDepth, logBinRatio) );
     }
     iceAerosol_.updatePdf(std::move(pdf_init));
@@ -278,7 +468,7 @@ void LAGRIDPlumeModel::initializeGrid() {
 }
 
 void LAGRIDPlumeModel::initH2O() {
-    H2O_ = met_.H2O_field();
+    H2O_ = met_.H2O_field().toVector2D();
 
     //Add emitted plume H2O. This function is called after releasing the initial crystals into the grid,
     //so we can use that as a "mask" for where to emit the H2O.
@@ -328,7 +518,8 @@ void LAGRIDPlumeModel::updateDiffVecs() {
 }
 void LAGRIDPlumeModel::runTransport(double timestep) {
     //Update the zero bc to reflect grid size changes
-    auto ZERO_BC = FVM_ANDS::bcFrom2DVector(iceAerosol_.getPDF()[0], true);
+    //Only the dimensions are used for a zero bc, and the pdf is on the same grid as H2O
+    auto ZERO_BC = FVM_ANDS::bcFrom2DVector(H2O_, true);
 
     //TODO: Implement height dependent shear. For now, just taking shear of y coordinate with highest xOD to avoid bugs.
     auto xOD = iceAerosol_.xOD(Vector_1D(xCoords_.size(), xCoords_[1] - xCoords_[0]));
@@ -339,7 +530,7 @@ void LAGRIDPlumeModel::runTransport(double timestep) {
     shear_rep_ = met_.shear(maxIdx);
 
     const FVM_ANDS::AdvDiffParams fvmSolverInitParams(0, 0, shear_rep_, input_.horizDiff(), input_.vertiDiff(), timestepVars_.TRANSPORT_DT);
-    const FVM_ANDS::BoundaryConditions ZERO_BC_INIT = FVM_ANDS::bcFrom2DVector(iceAerosol_.getPDF()[0], true);
+    const FVM_ANDS::BoundaryConditions ZERO_BC_INIT = FVM_ANDS::bcFrom2DVector(H2O_, true);
     updateDiffVecs();
     //Transport the Ice Aerosol PDF
     #pragma omp parallel for default(shared)
@@ -354,7 +545,9 @@ void LAGRIDPlumeModel::runTransport(double timestep) {
         solver.updateAdvection(0, -vFall_[n], shear_rep_);
 
         //passing in "false" to the "parallelAdvection" param to not spawn more threads
-        solver.operatorSplitSolve2DVec(iceAerosol_.getPDF_nonConstRef()[n], ZERO_BC, false);
+        iceAerosol_.transformBinPDF(n, [&](Vector_2D& pdf_n) {
+            solver.operatorSplitSolve2DVec(pdf_n, ZERO_BC, false);
+        });
     }
     //Transport H2O
     {   
@@ -365,7 +558,7 @@ void LAGRIDPlumeModel::runTransport(double timestep) {
         solver.updateAdvection(0, 0, 0);
 
         //Ambient met is the boundary condition
-        auto H2O_BC = FVM_ANDS::bcFrom2DVector(met_.H2O_field());
+        auto H2O_BC = FVM_ANDS::bcFrom2DVector(met_.H2O_field().toVector2D());
         solver.operatorSplitSolve2DVec(H2O_, H2O_BC);
     }
 }
@@ -403,9 +596,7 @@ void LAGRIDPlumeModel::remapAllVars(double remapTimestep) {
     auto& mask = numberMask.first;
     auto& maskInfo = numberMask.second;
 
-    Vector_3D& pdfRef = iceAerosol_.getPDF_nonConstRef();
-    Vector_3D& vCentersRef = iceAerosol_.getBinVCenters_nonConstRef();
-    Vector_3D volume = iceAerosol_.Volume();
+    Vector_3Dp volume(iceAerosol_.getNBin());
 
     double vertDiffLengthScale = sqrt(VectorUtils::VecMax2D(diffCoeffY_) * remapTimestep);
     double horizDiffLengthScale = sqrt(VectorUtils::VecMax2D(diffCoeffX_) * remapTimestep);
@@ -438,12 +629,17 @@ void LAGRIDPlumeModel::remapAllVars(double remapTimestep) {
     /* TODO: Benchmark various ways of parallelizing this section, mainly the volume calculation that requires a reduction */
     #pragma omp parallel for default(shared)
     for(int n = 0; n < iceAerosol_.getNBin(); n++) {
+        //Volume of this bin has to be computed (in double) before its pdf is overwritten
+        Vector_2D volume_n = iceAerosol_.Volume(n);
         //Update pdf and volume
-        pdfRef[n] = remapVariable(maskInfo, buffers, pdfRef[n], mask).phi;
-        volume[n] = remapVariable(maskInfo, buffers, volume[n], mask).phi;
+        iceAerosol_.transformBinPDF(n, [&](Vector_2D& pdf_n) {
+            pdf_n = remapVariable(maskInfo, buffers, pdf_n, mask).phi;
+        });
+        volume[n] = VectorUtils::convertVec2D<PdfReal>(remapVariable(maskInfo, buffers, volume_n, mask).phi);
     }
 
     //Only update nx and ny of iceAerosol after the loop, otherwise functions will get messed up if we later add other calls in the loop above
+    const Vector_3Dp& pdfRef = iceAerosol_.getPDF();
     iceAerosol_.updateNx(pdfRef[0][0].size());
     iceAerosol_.updateNy(pdfRef[0].size());
 
@@ -467,27 +663,8 @@ void LAGRIDPlumeModel::remapAllVars(double remapTimestep) {
     std::generate(yEdges_.begin(), yEdges_.end(), [dy, this, j = 0.0]() mutable { return yCoords_[0] + dy*(j++ - 0.5); });
     std::generate(xEdges_.begin(), xEdges_.end(), [dx, this, i = 0.0]() mutable { return xCoords_[0] + dx*(i++ - 0.5); });
 
-    //Regenerate Met based on new grid 
-    if(!optInput_.MET_LOADMET) {
-        //This way of regenning met is extremely stupid
-        OptInput temp_opt = optInput_;
-        temp_opt.ADV_GRID_NX = xCoords_.size();
-        temp_opt.ADV_GRID_NY = yCoords_.size();
-        temp_opt.ADV_GRID_XLIM_LEFT = -xEdges_[0];
-        temp_opt.ADV_GRID_XLIM_RIGHT = xEdges_[xEdges_.size() - 1];
-        temp_opt.ADV_GRID_YLIM_DOWN = -yEdges_[0];
-        temp_opt.ADV_GRID_YLIM_UP = -yEdges_[yEdges_.size() - 1];
-        AmbientMetParams ambParamsTemp;
-        ambParamsTemp.press_Pa = met_.referencePress();
-        ambParamsTemp.solarTime_h = solarTime_h_;
-        ambParamsTemp.temp_K = met_.tempRef();
-        ambParamsTemp.rhi = met_.rhiRef();
-        ambParamsTemp.shear = met_.shearRef();
-        met_ = Meteorology(temp_opt, ambParamsTemp, yCoords_, yEdges_);
-    }
-    else {
-        met_.regenerate(yCoords_, yEdges_, xCoords_.size());
-    }
+    //Regenerate Met based on new grid. Only re-samples the cached met profiles onto the new columns.
+    met_.regenerate(yCoords_, yEdges_, xCoords_.size());
 
     //With new met, set boundary conditions of H2O to ambient.
     //FIXME: Fix this issue with boundary nodes on the H2O
@@ -573,17 +750,198 @@ void LAGRIDPlumeModel::createOutputDirectories() {
 
 void LAGRIDPlumeModel::saveTSAerosol() {
     const double MOD_EPS = 1e-3;
-    if ( simVars_.TS_AERO && \
+    if ( ( simVars_.TS_AERO || observer_ ) && \
         (( simVars_.TS_AERO_FREQ == 0 ) || \
         ( std::fmod((timestepVars_.curr_Time_s - timestepVars_.timeArray[0])/60.0, simVars_.TS_AERO_FREQ) < MOD_EPS )) ) 
     {
+        if ( observer_ ) {
+            observer_->observe( Diag::plumeDiagnostics( timestepVars_.curr_Time_s - timestepVars_.timeArray[0], \
+                                iceAerosol_, H2O_, xCoords_, yCoords_, xEdges_, yEdges_, met_, observer_->wantFields() ) );
+        }
+        if ( !simVars_.TS_AERO ) return;
+
         int hh = (int) (timestepVars_.curr_Time_s - timestepVars_.timeArray[0])/3600;
         int mm = (int) (timestepVars_.curr_Time_s - timestepVars_.timeArray[0])/60   - 60 * hh;
         int ss = (int) (timestepVars_.curr_Time_s - timestepVars_.timeArray[0])      - 60 * ( mm + 60 * hh );
 
+        //Diag_TS_Phys holds the process-wide NetCDF lock, ensemble members and parallel cases can save concurrently
         Diag::Diag_TS_Phys( simVars_.TS_AERO_FILEPATH.c_str(), hh, mm, ss, \
                         iceAerosol_, H2O_, xCoords_, yCoords_, xEdges_, yEdges_, met_);
         std::cout << "Save Complete" << std::endl;    
     }
 
-}
\ No newline at end of file
+}
+
+std::string LAGRIDPlumeModel::checkpointPath() const {
+    return (std::filesystem::path(optInput_.SIMULATION_OUTPUT_FOLDER) / ("checkpoint_case" + std::to_string(input_.Case()) + ".bin")).string();
+}
+
+EPM::CacheKey LAGRIDPlumeModel::checkpointKey() const {
+    //Identifies the case a checkpoint belongs to, e.g. Monte Carlo cases are redrawn on every run.
+    EPM::CacheKey key;
+    key.add("simulationTime", input_.simulationTime());
+    key.add("temperature", input_.temperature_K());
+    key.add("pressure", input_.pressure_Pa());
+    key.add("rhw", input_.relHumidity_w());
+    key.add("horizDiff", input_.horizDiff());
+    key.add("vertiDiff", input_.vertiDiff());
+    key.add("shear", input_.shear());
+    key.add("nBV", input_.nBV());
+    key.add("longitude", input_.longitude_deg());
+    key.add("latitude", input_.latitude_deg());
+    key.add("emissionDOY", input_.emissionDOY());
+    key.add("emissionTime", input_.emissionTime());
+    key.add("EI", Vector_1D{ input_.EI_NOx(), input_.EI_CO(), input_.EI_HC(), input_.EI_SO2(), input_.EI_SO2TOSO4(), input_.EI_Soot(), input_.sootRad() });
+    key.add("aircraft", Vector_1D{ input_.fuelFlow(), input_.aircraftMass(), input_.flightSpeed(), input_.numEngines(), input_.wingspan(), input_.coreExitTemp(), input_.bypassArea() });
+    key.add("grid", Vector_1D{ static_cast<double>(optInput_.ADV_GRID_NX), static_cast<double>(optInput_.ADV_GRID_NY), optInput_.ADV_GRID_XLIM_LEFT, optInput_.ADV_GRID_XLIM_RIGHT, optInput_.ADV_GRID_YLIM_UP, optInput_.ADV_GRID_YLIM_DOWN });
+    key.add("timeArray", timestepVars_.timeArray);
+    return key;
+}
+
+namespace {
+    const std::string CHECKPOINT_HEADER = "APCEMM_CHECKPOINT";
+    const std::uint32_t CHECKPOINT_VERSION = 1;
+}
+
+void LAGRIDPlumeModel::writeCheckpoint() const {
+    const std::filesystem::path path = checkpointPath();
+    std::filesystem::path tmp = path;
+    tmp += ".tmp" + std::to_string(std::random_device{}());
+
+    /* A failed checkpoint should never stop the simulation */
+    try {
+        {
+            std::ofstream file(tmp, std::ios::binary);
+            BinaryIO::write(file, CHECKPOINT_HEADER);
+            BinaryIO::write(file, CHECKPOINT_VERSION);
+            BinaryIO::write(file, checkpointKey().str());
+
+            //Time stepping
+            const TimestepVarsWrapper& ts = timestepVars_;
+            BinaryIO::write(file, ts.curr_Time_s);
+            BinaryIO::write(file, ts.dt);
+            BinaryIO::write(file, ts.nTime);
+            BinaryIO::write(file, std::vector<bool>{ ts.LAST_STEP, ts.ITS_TIME_FOR_TRANSPORT, ts.ITS_TIME_FOR_CHEM, ts.ITS_TIME_FOR_LIQ_COAGULATION,
+                                                    ts.ITS_TIME_FOR_ICE_COAGULATION, ts.ITS_TIME_FOR_ICE_GROWTH, ts.ITS_TIME_FOR_TEMPPERTURB });
+            BinaryIO::write(file, Vector_1D{ ts.lastTimeTransport, ts.lastTimeChem, ts.lastTimeLiqCoag, ts.lastTimeIceCoag, ts.lastTimeIceGrowth, ts.lastTimeTempPerturb });
+            BinaryIO::write(file, Vector_1D{ ts.totalIceParticles_before, ts.totalIceMass_before, ts.totalIceParticles_initial, ts.totalIceMass_initial,
+                                             ts.totalIceParticles_now, ts.totalIceMass_now, ts.totalIceParticles_last, ts.totalIceMass_last,
+                                             ts.totalIceParticles_after, ts.totalIceMass_after, ts.totPart_lost, ts.totIce_lost });
+
+            //Grid, ice and H2O
+            BinaryIO::write(file, xCoords_);
+            BinaryIO::write(file, xEdges_);
+            BinaryIO::write(file, yCoords_);
+            BinaryIO::write(file, yEdges_);
+            BinaryIO::write(file, iceAerosol_.getNx());
+            BinaryIO::write(file, iceAerosol_.getNy());
+            BinaryIO::write(file, iceAerosol_.getPDF());
+            BinaryIO::write(file, iceAerosol_.getBinVCenters());
+            BinaryIO::write(file, H2O_);
+            BinaryIO::write(file, diffCoeffX_);
+            BinaryIO::write(file, diffCoeffY_);
+            BinaryIO::write(file, vFall_);
+            BinaryIO::write(file, initNumParts_);
+            BinaryIO::write(file, simTime_h_);
+            BinaryIO::write(file, solarTime_h_);
+            BinaryIO::write(file, shear_rep_);
+
+            met_.writeState(file);
+            if ( !file ) throw std::runtime_error("Could not write " + tmp.string());
+        }
+        std::filesystem::rename(tmp, path);
+        std::cout << "Checkpoint written to " << path.string() << std::endl;
+    }
+    catch ( std::exception& e ) {
+        std::cout << "Could not write checkpoint: " << e.what() << std::endl;
+        std::error_code ec;
+        std::filesystem::remove(tmp, ec);
+    }
+}
+
+bool LAGRIDPlumeModel::readCheckpoint() {
+    std::ifstream file(checkpointPath(), std::ios::binary);
+    if ( !file.is_open() ) {
+        std::cout << "No checkpoint found for case " << input_.Case() << ", starting from the beginning" << std::endl;
+        return false;
+    }
+
+    std::string header, key;
+    std::uint32_t version;
+    BinaryIO::read(file, header);
+    BinaryIO::read(file, version);
+    if ( header != CHECKPOINT_HEADER || version != CHECKPOINT_VERSION ) {
+        throw std::runtime_error("In LAGRIDPlumeModel::readCheckpoint: " + checkpointPath() + " is not a valid checkpoint");
+    }
+    BinaryIO::read(file, key);
+    if ( key != checkpointKey().str() ) {
+        std::cout << "Checkpoint " << checkpointPath() << " was written for different inputs, starting from the beginning" << std::endl;
+        return false;
+    }
+
+    TimestepVarsWrapper& ts = timestepVars_;
+    std::vector<bool> flags;
+    Vector_1D lastTimes, totals;
+    BinaryIO::read(file, ts.curr_Time_s);
+    BinaryIO::read(file, ts.dt);
+    BinaryIO::read(file, ts.nTime);
+    BinaryIO::read(file, flags);
+    BinaryIO::read(file, lastTimes);
+    BinaryIO::read(file, totals);
+    if ( flags.size() != 7 || lastTimes.size() != 6 || totals.size() != 12 ) {
+        throw std::runtime_error("In LAGRIDPlumeModel::readCheckpoint: corrupted time stepping data");
+    }
+    ts.LAST_STEP = flags[0];
+    ts.ITS_TIME_FOR_TRANSPORT = flags[1];
+    ts.ITS_TIME_FOR_CHEM = flags[2];
+    ts.ITS_TIME_FOR_LIQ_COAGULATION = flags[3];
+    ts.ITS_TIME_FOR_ICE_COAGULATION = flags[4];
+    ts.ITS_TIME_FOR_ICE_GROWTH = flags[5];
+    ts.ITS_TIME_FOR_TEMPPERTURB = flags[6];
+    ts.lastTimeTransport = lastTimes[0];
+    ts.lastTimeChem = lastTimes[1];
+    ts.lastTimeLiqCoag = lastTimes[2];
+    ts.lastTimeIceCoag = lastTimes[3];
+    ts.lastTimeIceGrowth = lastTimes[4];
+    ts.lastTimeTempPerturb = lastTimes[5];
+    ts.totalIceParticles_before = totals[0];
+    ts.totalIceMass_before = totals[1];
+    ts.totalIceParticles_initial = totals[2];
+    ts.totalIceMass_initial = totals[3];
+    ts.totalIceParticles_now = totals[4];
+    ts.totalIceMass_now = totals[5];
+    ts.totalIceParticles_last = totals[6];
+    ts.totalIceMass_last = totals[7];
+    ts.totalIceParticles_after = totals[8];
+    ts.totalIceMass_after = totals[9];
+    ts.totPart_lost = totals[10];
+    ts.totIce_lost = totals[11];
+
+    int nx, ny;
+    Vector_3Dp pdf;
+    BinaryIO::read(file, xCoords_);
+    BinaryIO::read(file, xEdges_);
+    BinaryIO::read(file, yCoords_);
+    BinaryIO::read(file, yEdges_);
+    BinaryIO::read(file, nx);
+    BinaryIO::read(file, ny);
+    BinaryIO::read(file, pdf);
+    BinaryIO::read(file, iceAerosol_.getBinVCenters_nonConstRef());
+    if ( pdf.size() != iceAerosol_.getNBin() ) {
+        throw std::runtime_error("In LAGRIDPlumeModel::readCheckpoint: checkpoint has a different number of ice bins");
+    }
+    iceAerosol_.updatePdf(std::move(pdf));
+    iceAerosol_.updateNx(nx);
+    iceAerosol_.updateNy(ny);
+    BinaryIO::read(file, H2O_);
+    BinaryIO::read(file, diffCoeffX_);
+    BinaryIO::read(file, diffCoeffY_);
+    BinaryIO::read(file, vFall_);
+    BinaryIO::read(file, initNumParts_);
+    BinaryIO::read(file, simTime_h_);
+    BinaryIO::read(file, solarTime_h_);
+    BinaryIO::read(file, shear_rep_);
+
+    met_.readState(file);
+    return true;
+}
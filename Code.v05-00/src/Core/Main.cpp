@@ -16,10 +16,17 @@
 #include <stdlib.h>
 #include <string>
 #include <vector>
+#include <map>
+#include <set>
+#include <mutex>
 #include <fstream>
 #include <cstdio>
 #include <ctime>
 #include <filesystem>
+#include <chrono>
+#include <cmath>
+#include <algorithm>
+#include <cctype>
 #include <unistd.h>
 #include <limits.h>
 #include <sys/stat.h>
@@ -28,14 +35,32 @@
 #include "Core/Parameters.hpp"
 #include "Core/Input.hpp"
 #include "Core/LAGRIDPlumeModel.hpp"
+#include "Core/RunCase.hpp"
+#include "Core/CaseServer.hpp"
 #include "Core/Status.hpp"
+#include "Util/CaseScheduler.hpp"
+#ifdef APCEMM_MPI
+    #include "Util/MPICaseRunner.hpp"
+#endif /* APCEMM_MPI */
 
 static int DIR_FAIL = -9;
 
 void CreateREADME( const std::string folder, const std::string fileName, \
                    const std::string purpose );
-void CreateStatusOutput(const std::string folder, const int caseNumber, const SimStatus status);
+void CreateStatusOutput(const std::string folder, const int caseNumber, const SimStatus status, const std::string suffix = "");
+std::vector<Input> EnsembleMembers( const OptInput &Input_Opt, const Input &inputCase );
+bool SelectCases( const std::string casesArg, const std::string shardArg, const unsigned int nCases, \
+                  unsigned int &caseBegin, unsigned int &caseEnd );
+void CreateCaseManifest( const OptInput &Input_Opt, const std::string inputFile, const std::string selection, \
+                         const YamlInputReader::CaseStream &cases, \
+                         const unsigned int caseBegin, const unsigned int caseEnd );
 int PlumeModel( OptInput &Input_Opt, const Input &inputCase );
+bool RunCase( OptInput Input_Opt, const YamlInputReader::CaseStream &cases, \
+              const unsigned int iCase, SimStatus &case_status );
+int ServeCases( OptInput &Input_Opt, const YamlInputReader::CaseStream &cases, const std::string socketPath, \
+                std::streambuf *responseBuf );
+void ServeCase( const OptInput &Input_Opt, const std::unordered_map<std::string, double> &baseCase, \
+                const unsigned int iCase, const CaseServer::Request &request, CaseServer::JsonObject &response );
 
 inline bool exist( const std::string &name )
 {
@@ -48,38 +73,81 @@ inline bool exist( const std::string &name )
 int main( int argc, char* argv[])
 {
 
-    std::vector<std::unordered_map<std::string, double> > parameters;
+    YamlInputReader::CaseStream cases;
     unsigned int iCase, nCases;
-    const unsigned int iOFFSET = 0;
-    
-    const unsigned int model = 1;
 
     /* Declaring the Input Option object for use in APCEMM */
     OptInput Input_Opt; // Input Option object
 
-    /*
-     * model = 0 -> Box Model
-     *
-     * model = 1 -> Plume Model
-     *                   + 
-     *              Adjoint Model
-     *
-     * model = 2 -> Adjoint Model
-     *
-     * model = 3 -> Box Model
-     *                  +
-     *              Plume Model
-     */
+    /* Rank of this process, only rank 0 writes the shared output files */
+    int rank = 0, nRanks = 1;
+    #ifdef APCEMM_MPI
+        int provided;
+        MPI_Init_thread( &argc, &argv, MPI_THREAD_FUNNELED, &provided );
+        MPI_Comm_rank( MPI_COMM_WORLD, &rank );
+        MPI_Comm_size( MPI_COMM_WORLD, &nRanks );
+    #endif /* APCEMM_MPI */
+
     if(argc < 2){
         std::cout << "No Input File Detected!" << std::endl;
         std::cout << "Exiting ... " << std::endl;
+        #ifdef APCEMM_MPI
+            MPI_Finalize();
+        #endif /* APCEMM_MPI */
+        return 1;
+    }
+    /* Command line options:
+     * --restart        resumes each case from its latest checkpoint (if any)
+     * --cases START:END only runs cases START to END-1 of the case list
+     * --shard i/n      only runs the i-th (0-based) of n contiguous slices of the case list
+     * --serve          stays resident and runs the cases requested on stdin (see Core/CaseServer.hpp)
+     * --socket PATH    same, with requests read from a Unix domain socket at PATH */
+    bool restart = false, serve = false;
+    std::string casesArg, shardArg, socketPath;
+    for ( int iArg = 2; iArg < argc; iArg++ ) {
+        const std::string arg = argv[iArg];
+        if ( arg == "--restart" ) {
+            restart = true;
+        }
+        else if ( arg == "--serve" ) {
+            serve = true;
+        }
+        else if ( ( arg == "--cases" || arg == "--shard" ) && iArg + 1 < argc ) {
+            ( arg == "--cases" ? casesArg : shardArg ) = argv[++iArg];
+        }
+        else if ( arg == "--socket" && iArg + 1 < argc ) {
+            serve = true;
+            socketPath = argv[++iArg];
+        }
+        else {
+            std::cout << "Unexpected Input: " << arg << std::endl;
+            std::cout << "Exiting ... " << std::endl;
+            #ifdef APCEMM_MPI
+                MPI_Finalize();
+            #endif /* APCEMM_MPI */
+            return 1;
+        }
+    }
+    if ( !casesArg.empty() && !shardArg.empty() ) {
+        std::cout << "--cases and --shard cannot be combined" << std::endl;
+        std::cout << "Exiting ... " << std::endl;
+        #ifdef APCEMM_MPI
+            MPI_Finalize();
+        #endif /* APCEMM_MPI */
         return 1;
     }
-    else if(argc > 2){
-        std::cout << "Unexpected Input: " << argv[2] << std::endl;
+    if ( serve && ( !casesArg.empty() || !shardArg.empty() || restart || nRanks > 1 ) ) {
+        std::cout << "--serve cannot be combined with --cases, --shard, --restart or MPI" << std::endl;
         std::cout << "Exiting ... " << std::endl;
+        #ifdef APCEMM_MPI
+            MPI_Finalize();
+        #endif /* APCEMM_MPI */
         return 1;
     }
+    /* With requests on stdin, stdout only carries the responses and the model log goes to stderr */
+    std::streambuf *stdoutBuf = std::cout.rdbuf();
+    if ( serve && socketPath.empty() ) std::cout.rdbuf( std::cerr.rdbuf() );
+    unsigned int caseBegin, caseEnd;
 
     #pragma omp master
     {
@@ -89,16 +157,31 @@ int main( int argc, char* argv[])
         INPUT_FILE_PATH = std::filesystem::canonical(INPUT_FILE_PATH);
 
         YamlInputReader::readYamlInputFile( Input_Opt, INPUT_FILE_PATH.generic_string() );
+        Input_Opt.SIMULATION_RESTART = restart;
+
+        #ifdef APCEMM_MPI
+            /* All ranks need the same Monte Carlo cases */
+            MPI_Bcast( &Input_Opt.SIMULATION_MC_SEED, 1, MPI_UINT64_T, 0, MPI_COMM_WORLD );
+        #endif /* APCEMM_MPI */
 
-        /* Collect parameters and create cases */
-        parameters = YamlInputReader::generateCases( Input_Opt );
+        /* Collect parameters. Cases are generated on demand from their index. */
+        cases = YamlInputReader::CaseStream( Input_Opt );
 
         /* Number of cases */
-        nCases  = parameters.size();
+        nCases  = cases.size();
+
+        /* Slice of the case list run by this process. Case numbers stay global. */
+        if ( !SelectCases( casesArg, shardArg, nCases, caseBegin, caseEnd ) ) {
+            std::cout << "Exiting ... " << std::endl;
+            #ifdef APCEMM_MPI
+                MPI_Finalize();
+            #endif /* APCEMM_MPI */
+            exit(1);
+        }
         
         /* Create output directory */
         struct stat sb;
-        if ( !( stat( Input_Opt.SIMULATION_OUTPUT_FOLDER.c_str(), &sb) == 0 \
+        if ( rank == 0 && !( stat( Input_Opt.SIMULATION_OUTPUT_FOLDER.c_str(), &sb) == 0 \
                     && S_ISDIR(sb.st_mode) ) ) {
 
             /* Create directory */
@@ -110,6 +193,10 @@ int main( int argc, char* argv[])
                 std::cout << " Could not create directory: ";
                 std::cout << Input_Opt.SIMULATION_OUTPUT_FOLDER << std::endl;
                 std::cout << " You may not have write permission" << std::endl;
+                #ifdef APCEMM_MPI
+                    /* The other ranks are waiting at the barrier below */
+                    MPI_Abort( MPI_COMM_WORLD, 1 );
+                #endif /* APCEMM_MPI */
                 exit(1);
             }
             
@@ -118,6 +205,14 @@ int main( int argc, char* argv[])
             CreateREADME( Input_Opt.SIMULATION_OUTPUT_FOLDER, "README", description );
 
         }
+
+        /* Monte Carlo samples are only known from the seed, always record them */
+        if ( rank == 0 && ( !casesArg.empty() || !shardArg.empty() || Input_Opt.SIMULATION_MONTECARLO ) ) {
+            const std::string selection = !casesArg.empty() ? "cases " + casesArg : \
+                                          !shardArg.empty() ? "shard " + shardArg : "all";
+            CreateCaseManifest( Input_Opt, INPUT_FILE_PATH.generic_string(), selection, \
+                                cases, caseBegin, caseEnd );
+        }
     } /* master CPU */
 
     /* ====================================================================== */
@@ -145,160 +240,271 @@ int main( int argc, char* argv[])
 
     //PARALLEL_CASES = Input_Opt.SIMULATION_PARAMETER_SWEEP;
 
+    if ( serve ) {
+        const int serveStatus = ServeCases( Input_Opt, cases, socketPath, stdoutBuf );
+        std::cout.rdbuf( stdoutBuf );
+        #ifdef APCEMM_MPI
+            MPI_Finalize();
+        #endif /* APCEMM_MPI */
+        return serveStatus;
+    }
+
     /* ====================================================================== */
     /* ---- CASE LOOP STARTS HERE ------------------------------------------- */
     /* ====================================================================== */
 
-    #pragma omp parallel for schedule(dynamic, 1) shared(Input_Opt, parameters, nCases) if( PARALLEL_CASES )
-    for ( iCase = 0; iCase < nCases; iCase++ ) {
-
-        unsigned int jCase = iOFFSET + iCase;
-
-        std::string fullPath, fullPath_ADJ, fullPath_BOX, fullPath_micro;
-        std::stringstream ss, ss_ADJ, ss_BOX, ss_micro;
-        ss     << std::setw(6) << std::setfill('0') << jCase;
-        std::string file     = Input_Opt.SIMULATION_FORWARD_FILENAME + ss.str();
-        ss_ADJ << std::setw(6) << std::setfill('0') << jCase;
-        std::string file_ADJ = Input_Opt.SIMULATION_ADJOINT_FILENAME + ss_ADJ.str();
-        ss_BOX << std::setw(6) << std::setfill('0') << jCase;
-        std::string file_BOX = Input_Opt.SIMULATION_BOX_FILENAME + ss_BOX.str();
-        ss_micro << std::setw(6) << std::setfill('0') << jCase;
-        std::string file_micro = "Micro" + ss_micro.str();
-
-        if ( Input_Opt.SIMULATION_OUTPUT_FOLDER.back() == '/' ) {
-            fullPath       = Input_Opt.SIMULATION_OUTPUT_FOLDER + file;
-            fullPath_ADJ   = Input_Opt.SIMULATION_OUTPUT_FOLDER + file_ADJ;
-            fullPath_BOX   = Input_Opt.SIMULATION_OUTPUT_FOLDER + file_BOX;
-            fullPath_micro = Input_Opt.SIMULATION_OUTPUT_FOLDER + file_micro;
-        } else {
-            fullPath       = Input_Opt.SIMULATION_OUTPUT_FOLDER + '/' + file;
-            fullPath_ADJ   = Input_Opt.SIMULATION_OUTPUT_FOLDER + '/' + file_ADJ;
-            fullPath_BOX   = Input_Opt.SIMULATION_OUTPUT_FOLDER + '/' + file_BOX;
-            fullPath_micro = Input_Opt.SIMULATION_OUTPUT_FOLDER + '/' + file_micro;
+    #ifdef APCEMM_MPI
+    if ( nRanks > 1 ) {
+        /* Rank 0 hands out the cases, each worker runs them one after the other with its own OpenMP threads */
+        MPI_Barrier( MPI_COMM_WORLD );
+        const std::vector<MPICaseRunner::CaseTiming> timings = MPICaseRunner::runCases( caseBegin, caseEnd, \
+            [&Input_Opt, &cases]( unsigned int i ) {
+                SimStatus case_status;
+                return RunCase( Input_Opt, cases, i, case_status ) ? static_cast<int>( case_status ) : -1;
+            } );
+        if ( rank == 0 ) {
+            MPICaseRunner::writeTimings( Input_Opt.SIMULATION_OUTPUT_FOLDER + "/timings_cases" + std::to_string(caseBegin) \
+                                         + "-" + std::to_string(caseEnd) + ".txt", timings );
+            std::cout << "\n All cases have been completed!" << std::endl;
         }
-        fullPath = fullPath + ".nc";
-        fullPath_ADJ = fullPath_ADJ + ".nc";
-        fullPath_BOX = fullPath_BOX + ".nc";
-        fullPath_micro = fullPath_micro + ".out";
-
-        bool fileExist = 0;
-
-        if ( Input_Opt.SIMULATION_ADJOINT ) {
-            #pragma omp critical
-            { fileExist = exist( fullPath_ADJ ); }
-        } else {
-            #pragma omp critical
-            { fileExist = exist( fullPath ); }
+        MPI_Finalize();
+        return 0;
+    }
+    #endif /* APCEMM_MPI */
+
+    /* Split the threads between concurrent cases and nested teams within each case. The per-bin loops of a
+     * case do not scale beyond the number of ice bins, with PARALLEL_CASES the inner loops are serial. */
+    const int coreBudget = Input_Opt.SIMULATION_OMP_NUM_THREADS;
+    const int nIceBins = std::floor( 1 + log( pow( (PA_R_HIG/PA_R_LOW), 3.0 ) ) / log( PA_VRAT ) );
+    const CaseTeams teams = chooseCaseTeams( coreBudget, caseEnd - caseBegin, PARALLEL_CASES ? 1 : nIceBins, \
+                                             Input_Opt.SIMULATION_CONCURRENT_CASES );
+    Input_Opt.SIMULATION_OMP_NUM_THREADS = teams.threadsPerCase;
+    #ifdef OMP
+        if ( teams.nConcurrentCases > 1 )
+            omp_set_max_active_levels( std::max( omp_get_max_active_levels(), 2 ) );
+    #endif /* OMP */
+    std::cout << "\n Running " << teams.nConcurrentCases << " case(s) at a time on " \
+              << teams.threadsPerCase << " thread(s) each" << std::endl;
+
+    std::vector<double> caseSeconds( caseEnd - caseBegin, 0.0 );
+    const auto loopStart = std::chrono::steady_clock::now();
+
+    #pragma omp parallel for schedule(dynamic, 1) num_threads(teams.nConcurrentCases) \
+        shared(Input_Opt, cases, nCases, caseSeconds) if( teams.nConcurrentCases > 1 )
+    for ( iCase = caseBegin; iCase < caseEnd; iCase++ ) {
+        const auto caseStart = std::chrono::steady_clock::now();
+        SimStatus case_status;
+        if ( RunCase( Input_Opt, cases, iCase, case_status ) ) {
+            caseSeconds[iCase - caseBegin] = std::chrono::duration<double>( std::chrono::steady_clock::now() - caseStart ).count();
         }
+    }
 
-        // Hardcode for now
-        std::string author = "Thibaud M. Fritz (fritzt@mit.edu)";
+    const double loopSeconds = std::chrono::duration<double>( std::chrono::steady_clock::now() - loopStart ).count();
+    std::cout << "\n Core utilisation: " << std::fixed << std::setprecision(1) \
+              << 100.0 * caseUtilisation( caseSeconds, teams.threadsPerCase, loopSeconds, coreBudget ) \
+              << "% of " << coreBudget << " threads over " << loopSeconds << " s" << std::endl;
+    
+    /* ====================================================================== */
+    /* ---- CASE LOOP ENDS HERE --------------------------------------------- */
+    /* ====================================================================== */
+   
+    std::cout << "\n All cases have been completed!" << std::endl;
 
-        if ( !fileExist || Input_Opt.SIMULATION_OVERWRITE ) {
+    /* ====================================================================== */
+    /* ---- END NORMALLY ---------------------------------------------------- */
+    /* ====================================================================== */
 
-            const Input inputCase( iCase, parameters, \
-                                   fullPath,          \
-                                   fullPath_ADJ,      \
-                                   fullPath_BOX,      \
-                                   fullPath_micro,    \
-                                   author );
+    #ifdef APCEMM_MPI
+        MPI_Finalize();
+    #endif /* APCEMM_MPI */
 
-            #pragma omp critical
-            { 
-                std::cout << " -> Running case " << iCase;
-                #ifdef OMP
-                    std::cout << " on thread " << omp_get_thread_num();
-                #endif /* OMP */
-                std::cout << "" << std::endl;
-            }
-            Input_Opt.TS_AERO_FILENAME = "ts_aerosol_case" + std::to_string(iCase) + "_hhmm.nc";
+    return 0;
 
-            SimStatus case_status;
-            switch (model) {
 
-                /* Box Model */
-                case 0:
+} /* End of Main */
 
-                    std::cout << "Not implemented yet" << std::endl;
-                    break;
+bool RunCase( OptInput Input_Opt, const YamlInputReader::CaseStream &cases, \
+              const unsigned int iCase, SimStatus &case_status )
+{
 
-                /* Plume Model (APCEMM) */
-                case 1: {
-                    std::cout << "running epm... " << std::endl;
-                    LAGRIDPlumeModel LAGRID_Model(Input_Opt, inputCase);
-                    case_status = LAGRID_Model.runFullModel();
-                    // iERR = PlumeModel( Input_Opt, inputCase );
-                    break;
-                    
-                }
+    /* Runs one case, on a copy of the input options since the time series file names are set per case.
+     * Returns false if the case was skipped (output exists and may not be overwritten, or finished before a restart). */
+    const unsigned int iOFFSET = 0;
 
-                /* Adjoint Model */
-                case 2:
+    /*
+     * model = 0 -> Box Model
+     *
+     * model = 1 -> Plume Model
+     *                   + 
+     *              Adjoint Model
+     *
+     * model = 2 -> Adjoint Model
+     *
+     * model = 3 -> Box Model
+     *                  +
+     *              Plume Model
+     */
+    const unsigned int model = 1;
 
-                    std::cout << "Not implemented yet" << std::endl;
-                    break;
+    unsigned int jCase = iOFFSET + iCase;
+
+    std::string fullPath, fullPath_ADJ, fullPath_BOX, fullPath_micro;
+    std::stringstream ss, ss_ADJ, ss_BOX, ss_micro;
+    ss     << std::setw(6) << std::setfill('0') << jCase;
+    std::string file     = Input_Opt.SIMULATION_FORWARD_FILENAME + ss.str();
+    ss_ADJ << std::setw(6) << std::setfill('0') << jCase;
+    std::string file_ADJ = Input_Opt.SIMULATION_ADJOINT_FILENAME + ss_ADJ.str();
+    ss_BOX << std::setw(6) << std::setfill('0') << jCase;
+    std::string file_BOX = Input_Opt.SIMULATION_BOX_FILENAME + ss_BOX.str();
+    ss_micro << std::setw(6) << std::setfill('0') << jCase;
+    std::string file_micro = "Micro" + ss_micro.str();
+
+    if ( Input_Opt.SIMULATION_OUTPUT_FOLDER.back() == '/' ) {
+        fullPath       = Input_Opt.SIMULATION_OUTPUT_FOLDER + file;
+        fullPath_ADJ   = Input_Opt.SIMULATION_OUTPUT_FOLDER + file_ADJ;
+        fullPath_BOX   = Input_Opt.SIMULATION_OUTPUT_FOLDER + file_BOX;
+        fullPath_micro = Input_Opt.SIMULATION_OUTPUT_FOLDER + file_micro;
+    } else {
+        fullPath       = Input_Opt.SIMULATION_OUTPUT_FOLDER + '/' + file;
+        fullPath_ADJ   = Input_Opt.SIMULATION_OUTPUT_FOLDER + '/' + file_ADJ;
+        fullPath_BOX   = Input_Opt.SIMULATION_OUTPUT_FOLDER + '/' + file_BOX;
+        fullPath_micro = Input_Opt.SIMULATION_OUTPUT_FOLDER + '/' + file_micro;
+    }
+    fullPath = fullPath + ".nc";
+    fullPath_ADJ = fullPath_ADJ + ".nc";
+    fullPath_BOX = fullPath_BOX + ".nc";
+    fullPath_micro = fullPath_micro + ".out";
+
+    bool fileExist = 0;
+
+    if ( Input_Opt.SIMULATION_ADJOINT ) {
+        #pragma omp critical
+        { fileExist = exist( fullPath_ADJ ); }
+    } else {
+        #pragma omp critical
+        { fileExist = exist( fullPath ); }
+    }
 
-                case 3:
+    // Hardcode for now
+    std::string author = "Thibaud M. Fritz (fritzt@mit.edu)";
+
+    /* When restarting, cases that already finished (i.e. wrote their status) are not rerun */
+    if ( Input_Opt.SIMULATION_RESTART ) {
+        bool finished = 0;
+        #pragma omp critical
+        { finished = exist( Input_Opt.SIMULATION_OUTPUT_FOLDER + "/status_case" + std::to_string(iCase) ); }
+        if ( finished ) {
+            std::cout << " -> Case " << iCase << " already finished, skipping" << std::endl;
+            return false;
+        }
+    }
 
-                    std::cout << "Not implemented yet" << std::endl;
-                    break;
+    if ( !fileExist || Input_Opt.SIMULATION_OVERWRITE ) {
+
+        const Input inputCase( iCase, cases[iCase], \
+                               fullPath,          \
+                               fullPath_ADJ,      \
+                               fullPath_BOX,      \
+                               fullPath_micro,    \
+                               author );
+
+        #pragma omp critical
+        { 
+            std::cout << " -> Running case " << iCase;
+            #ifdef OMP
+                std::cout << " on thread " << omp_get_thread_num();
+            #endif /* OMP */
+            std::cout << "" << std::endl;
+        }
+        Input_Opt.TS_AERO_FILENAME = "ts_aerosol_case" + std::to_string(iCase) + "_hhmm.nc";
 
-                default:
+        case_status = SimStatus::Failed;
+        switch (model) {
 
-                    std::cout << "Wrong input for model" << std::endl;
-                    std::cout << "model = " << model << "" << std::endl;
-                    std::cout << "Value should be between 0 and 3" << std::endl;
-                    break;
-                    
-            }
+            /* Box Model */
+            case 0:
 
-            #pragma omp critical 
-            {
-                if ( case_status == SimStatus::Failed ) {
-                    std::cout.precision(3);
-                    std::cout << "\n APCEMM Case: " << iCase << " failed";
-                    #ifdef OMP
-                        std::cout << " on thread " << omp_get_thread_num();
-                    #endif /* OMP */
-                    std::cout << "." << std::endl;
-                    // This error reporting is not being used right now
-                    // std::cout << " Error: " << iERR << "" << std::endl;
-                    std::cout << std::fixed;
-                    std::cout << std::setprecision(3);
-                    std::cout << " T   : " << std::setw(8) << inputCase.temperature_K();
-                    std::cout << " [K]" << std::endl;
-                    std::cout << " P   : " << std::setw(8) << inputCase.pressure_Pa()/((double) 100.0);
-                    std::cout << " [hPa]" << std::endl;
-                    std::cout << " RH_w: " << std::setw(8) << inputCase.relHumidity_w();
-                    std::cout << " [%]" << std::endl;
-                    std::cout << " LON : " << std::setw(8) << inputCase.longitude_deg();
-                    std::cout << " [deg]" << std::endl;
-                    std::cout << " LAT : " << std::setw(8) << inputCase.latitude_deg();
-                    std::cout << " [deg]" << std::endl;
+                std::cout << "Not implemented yet" << std::endl;
+                break;
+
+            /* Plume Model (APCEMM) */
+            case 1: {
+                std::cout << "running epm... " << std::endl;
+                if ( Input_Opt.SIMULATION_ENSEMBLE_FORK_TIME > 0 ) {
+                    LAGRIDPlumeModel LAGRID_Model(Input_Opt, inputCase);
+                    LAGRID_Model.setContext( &CaseContext::global() );
+                    std::vector<SimStatus> member_status = LAGRID_Model.runEnsemble( EnsembleMembers( Input_Opt, inputCase ) );
+                    case_status = member_status[0];
+                    #pragma omp critical
+                    {
+                        for ( std::size_t k = 0; k < member_status.size(); k++ ) {
+                            if ( member_status[k] == SimStatus::Failed ) case_status = SimStatus::Failed;
+                            CreateStatusOutput(Input_Opt.SIMULATION_OUTPUT_FOLDER, iCase, member_status[k], "_member" + std::to_string(k));
+                        }
+                    }
                 }
-                else { std::cout << " APCEMM Case: " << iCase << " completed." << std::endl; }
+                else {
+                    case_status = runCase( Input_Opt, inputCase );
+                }
+                // iERR = PlumeModel( Input_Opt, inputCase );
+                break;
                 
-                CreateStatusOutput(Input_Opt.SIMULATION_OUTPUT_FOLDER, iCase, case_status);
             }
 
-        }
+            /* Adjoint Model */
+            case 2:
 
-    }
-    
-    /* ====================================================================== */
-    /* ---- CASE LOOP ENDS HERE --------------------------------------------- */
-    /* ====================================================================== */
-   
-    std::cout << "\n All cases have been completed!" << std::endl;
+                std::cout << "Not implemented yet" << std::endl;
+                break;
 
-    /* ====================================================================== */
-    /* ---- END NORMALLY ---------------------------------------------------- */
-    /* ====================================================================== */
+            case 3:
 
-    return 0;
+                std::cout << "Not implemented yet" << std::endl;
+                break;
 
+            default:
 
-} /* End of Main */
+                std::cout << "Wrong input for model" << std::endl;
+                std::cout << "model = " << model << "" << std::endl;
+                std::cout << "Value should be between 0 and 3" << std::endl;
+                break;
+                
+        }
+
+        #pragma omp critical 
+        {
+            if ( case_status == SimStatus::Failed ) {
+                std::cout.precision(3);
+                std::cout << "\n APCEMM Case: " << iCase << " failed";
+                #ifdef OMP
+                    std::cout << " on thread " << omp_get_thread_num();
+                #endif /* OMP */
+                std::cout << "." << std::endl;
+                // This error reporting is not being used right now
+                // std::cout << " Error: " << iERR << "" << std::endl;
+                std::cout << std::fixed;
+                std::cout << std::setprecision(3);
+                std::cout << " T   : " << std::setw(8) << inputCase.temperature_K();
+                std::cout << " [K]" << std::endl;
+                std::cout << " P   : " << std::setw(8) << inputCase.pressure_Pa()/((double) 100.0);
+                std::cout << " [hPa]" << std::endl;
+                std::cout << " RH_w: " << std::setw(8) << inputCase.relHumidity_w();
+                std::cout << " [%]" << std::endl;
+                std::cout << " LON : " << std::setw(8) << inputCase.longitude_deg();
+                std::cout << " [deg]" << std::endl;
+                std::cout << " LAT : " << std::setw(8) << inputCase.latitude_deg();
+                std::cout << " [deg]" << std::endl;
+            }
+            else { std::cout << " APCEMM Case: " << iCase << " completed." << std::endl; }
+            
+            CreateStatusOutput(Input_Opt.SIMULATION_OUTPUT_FOLDER, iCase, case_status);
+        }
+
+    }
+
+    return ( !fileExist || Input_Opt.SIMULATION_OVERWRITE );
+
+} /* End of RunCase */
 
 void CreateREADME( const std::string folder, const std::string fileName, const std::string purpose )
 {
@@ -380,9 +586,141 @@ void CreateREADME( const std::string folder, const std::string fileName, const s
 
 } /* End of PrintMessage */
 
-void CreateStatusOutput(const std::string folder, const int caseNumber, const SimStatus status)
+int ServeCases( OptInput &Input_Opt, const YamlInputReader::CaseStream &cases, const std::string socketPath, \
+                std::streambuf *responseBuf )
+{
+
+    /* Requests override the parameters of the first case of the input file */
+    if ( cases.size() == 0 ) {
+        std::cerr << " No base case to serve from" << std::endl;
+        return 1;
+    }
+    const std::unordered_map<std::string, double> baseCase = cases[0];
+
+    /* Requested cases are usually short and independent, so they are run one per thread by default */
+    const int coreBudget = Input_Opt.SIMULATION_OMP_NUM_THREADS;
+    const int nIceBins = std::floor( 1 + log( pow( (PA_R_HIG/PA_R_LOW), 3.0 ) ) / log( PA_VRAT ) );
+    const CaseTeams teams = chooseCaseTeams( coreBudget, coreBudget, PARALLEL_CASES ? 1 : nIceBins, \
+                                             Input_Opt.SIMULATION_CONCURRENT_CASES );
+    Input_Opt.SIMULATION_OMP_NUM_THREADS = teams.threadsPerCase;
+
+    /* Case numbers keep counting across requests and start after the cases already in the output folder
+     * (e.g. from an earlier server), so that output files are never shared. A request may choose its case
+     * number instead, but not one that is already used. */
+    std::set<unsigned int> usedCases = usedCaseIds( Input_Opt.SIMULATION_OUTPUT_FOLDER );
+    unsigned int nextCase = usedCases.empty() ? 0 : *usedCases.rbegin() + 1;
+    std::mutex caseMutex;
+    CaseServer::Server server( [&]( const CaseServer::Request &request, CaseServer::JsonObject &response ) {
+        unsigned int iCase;
+        {
+            std::lock_guard<std::mutex> lock( caseMutex );
+            if ( request.caseId >= 0 ) {
+                iCase = static_cast<unsigned int>( request.caseId );
+                if ( usedCases.count( iCase ) ) {
+                    throw std::invalid_argument( "Case " + std::to_string( iCase ) + " is already used" );
+                }
+            }
+            else {
+                while ( usedCases.count( nextCase ) ) nextCase++;
+                iCase = nextCase++;
+            }
+            usedCases.insert( iCase );
+        }
+        ServeCase( Input_Opt, baseCase, iCase, request, response );
+    }, teams.nConcurrentCases );
+
+    std::cerr << " Serving cases on " << ( socketPath.empty() ? "stdin" : socketPath ) << " with " \
+              << teams.nConcurrentCases << " worker(s) of " << teams.threadsPerCase << " thread(s)" << std::endl;
+    try {
+        if ( socketPath.empty() ) {
+            std::ostream responses( responseBuf );
+            server.serve( std::cin, responses );
+        }
+        else {
+            server.serveSocket( socketPath );
+        }
+    }
+    catch ( std::exception &e ) {
+        std::cerr << " " << e.what() << std::endl;
+        return 1;
+    }
+    return 0;
+
+} /* End of ServeCases */
+
+void ServeCase( const OptInput &Input_Opt, const std::unordered_map<std::string, double> &baseCase, \
+                const unsigned int iCase, const CaseServer::Request &request, CaseServer::JsonObject &response )
 {
-    std::string fileName = "status_case" + std::to_string(caseNumber);
+
+    std::unordered_map<std::string, double> caseParams = baseCase;
+    for ( const auto &param: request.params ) {
+        auto it = caseParams.find( param.first );
+        if ( it == caseParams.end() ) {
+            throw std::invalid_argument( "Unknown parameter " + param.first );
+        }
+        it->second = param.second;
+    }
+
+    /* Same output files as for the case list */
+    std::stringstream ss;
+    ss << std::setw(6) << std::setfill('0') << iCase;
+    const std::filesystem::path folder( Input_Opt.SIMULATION_OUTPUT_FOLDER );
+    const Input inputCase( iCase, caseParams, \
+                           ( folder / ( Input_Opt.SIMULATION_FORWARD_FILENAME + ss.str() + ".nc" ) ).string(), \
+                           ( folder / ( Input_Opt.SIMULATION_ADJOINT_FILENAME + ss.str() + ".nc" ) ).string(), \
+                           ( folder / ( Input_Opt.SIMULATION_BOX_FILENAME + ss.str() + ".nc" ) ).string(), \
+                           ( folder / ( "Micro" + ss.str() + ".out" ) ).string(), \
+                           "Thibaud M. Fritz (fritzt@mit.edu)" );
+    OptInput caseOpt = Input_Opt;
+    caseOpt.TS_AERO_FILENAME = "ts_aerosol_case" + std::to_string(iCase) + "_hhmm.nc";
+
+    PlumeRecorder recorder;
+    const auto start = std::chrono::steady_clock::now();
+    const SimStatus status = runCase( caseOpt, inputCase, recorder );
+    const double seconds = std::chrono::duration<double>( std::chrono::steady_clock::now() - start ).count();
+    CreateStatusOutput( Input_Opt.SIMULATION_OUTPUT_FOLDER, iCase, status );
+
+    response.add( "case", static_cast<int>( iCase ) );
+    response.add( "status", statusName( status ) );
+    response.add( "seconds", seconds );
+    if ( !recorder.history.empty() ) {
+        const PlumeDiagnostics &last = recorder.history.back();
+        response.add( "time", last.time_s );
+        response.add( "ice_mass", last.iceMass );
+        response.add( "number_ice", last.numberIce );
+        response.add( "width", last.width );
+        response.add( "depth", last.depth );
+        response.add( "intOD", last.intOD );
+    }
+    if ( request.series ) {
+        Vector_1D time, iceMass, numberIce, width, depth, intOD;
+        for ( const PlumeDiagnostics &diag: recorder.history ) {
+            time.push_back( diag.time_s );
+            iceMass.push_back( diag.iceMass );
+            numberIce.push_back( diag.numberIce );
+            width.push_back( diag.width );
+            depth.push_back( diag.depth );
+            intOD.push_back( diag.intOD );
+        }
+        CaseServer::JsonObject series;
+        series.add( "time", time );
+        series.add( "ice_mass", iceMass );
+        series.add( "number_ice", numberIce );
+        series.add( "width", width );
+        series.add( "depth", depth );
+        series.add( "intOD", intOD );
+        response.addRaw( "series", series.str() );
+    }
+    if ( caseOpt.TS_AERO ) {
+        response.add( "ts_aerosol", ( folder / caseOpt.TS_AERO_FILENAME ).string() );
+    }
+    response.add( "micro", inputCase.fileName_micro() );
+
+} /* End of ServeCase */
+
+void CreateStatusOutput(const std::string folder, const int caseNumber, const SimStatus status, const std::string suffix)
+{
+    std::string fileName = "status_case" + std::to_string(caseNumber) + suffix;
     std::ofstream statusFile;
 
     const std::string fullPath = folder + "/" + fileName;
@@ -417,4 +755,121 @@ void CreateStatusOutput(const std::string folder, const int caseNumber, const Si
 
 } /* End of CreateStatusOutput */
 
+std::vector<Input> EnsembleMembers( const OptInput &Input_Opt, const Input &inputCase )
+{
+
+    /* One member per combination of the member values, parameters without values keep the case value */
+    const Vector_1D DH = Input_Opt.SIMULATION_ENSEMBLE_DH.empty() ? Vector_1D{ inputCase.horizDiff() } : Input_Opt.SIMULATION_ENSEMBLE_DH;
+    const Vector_1D DV = Input_Opt.SIMULATION_ENSEMBLE_DV.empty() ? Vector_1D{ inputCase.vertiDiff() } : Input_Opt.SIMULATION_ENSEMBLE_DV;
+    const Vector_1D shear = Input_Opt.SIMULATION_ENSEMBLE_SHEAR.empty() ? Vector_1D{ inputCase.shear() } : Input_Opt.SIMULATION_ENSEMBLE_SHEAR;
+
+    std::vector<Input> members;
+    for ( double dh: DH ) {
+        for ( double dv: DV ) {
+            for ( double s: shear ) {
+                members.push_back( inputCase.ensembleMember( dh, dv, s ) );
+            }
+        }
+    }
+    return members;
+
+} /* End of EnsembleMembers */
+
+bool SelectCases( const std::string casesArg, const std::string shardArg, const unsigned int nCases, \
+                  unsigned int &caseBegin, unsigned int &caseEnd )
+{
+
+    caseBegin = 0;
+    caseEnd = nCases;
+
+    /* Case numbers are non-negative integers, std::stoul would accept signs and trailing characters */
+    auto isIndex = []( const std::string &str ) {
+        return !str.empty() && std::all_of( str.begin(), str.end(), []( unsigned char c ) { return std::isdigit(c); } );
+    };
+
+    if ( !casesArg.empty() ) {
+        /* START:END, END is exclusive and defaults to the number of cases */
+        const std::size_t sep = casesArg.find(':');
+        unsigned long begin, end = nCases;
+        try {
+            if ( sep == std::string::npos || !isIndex( casesArg.substr(0, sep) ) \
+                 || ( sep + 1 < casesArg.size() && !isIndex( casesArg.substr(sep + 1) ) ) )
+                throw std::invalid_argument( casesArg );
+            begin = std::stoul( casesArg.substr(0, sep) );
+            if ( sep + 1 < casesArg.size() )
+                end = std::stoul( casesArg.substr(sep + 1) );
+        }
+        catch ( std::exception &e ) {
+            std::cout << "--cases expects START:END, got " << casesArg << std::endl;
+            return false;
+        }
+        if ( end > nCases || begin >= end ) {
+            std::cout << "--cases START:END requires 0 <= START < END <= " << nCases \
+                      << " (number of cases), got " << casesArg << std::endl;
+            return false;
+        }
+        caseBegin = (unsigned int) begin;
+        caseEnd = (unsigned int) end;
+    }
+    else if ( !shardArg.empty() ) {
+        /* i/n: contiguous slices whose sizes differ by at most one case */
+        const std::size_t sep = shardArg.find('/');
+        unsigned long iShard, nShards;
+        try {
+            if ( sep == std::string::npos || !isIndex( shardArg.substr(0, sep) ) || !isIndex( shardArg.substr(sep + 1) ) )
+                throw std::invalid_argument( shardArg );
+            iShard = std::stoul( shardArg.substr(0, sep) );
+            nShards = std::stoul( shardArg.substr(sep + 1) );
+        }
+        catch ( std::exception &e ) {
+            std::cout << "--shard expects i/n, got " << shardArg << std::endl;
+            return false;
+        }
+        if ( nShards == 0 || iShard >= nShards ) {
+            std::cout << "--shard i/n requires 0 <= i < n, got " << shardArg << std::endl;
+            return false;
+        }
+        caseBegin = (unsigned int) ( iShard * nCases / nShards );
+        caseEnd = (unsigned int) ( ( iShard + 1 ) * nCases / nShards );
+    }
+
+    std::cout << "\n Running cases " << caseBegin << " to " << caseEnd << " (exclusive) of " << nCases << std::endl;
+    return true;
+
+} /* End of SelectCases */
+
+void CreateCaseManifest( const OptInput &Input_Opt, const std::string inputFile, const std::string selection, \
+                         const YamlInputReader::CaseStream &cases, \
+                         const unsigned int caseBegin, const unsigned int caseEnd )
+{
+
+    /* Lists the cases run by this process, so that the outputs of all shards can be matched to their parameters */
+    const std::string fullPath = Input_Opt.SIMULATION_OUTPUT_FOLDER + "/manifest_cases" + std::to_string(caseBegin) + "-" + std::to_string(caseEnd) + ".txt";
+    std::ofstream manifest( fullPath.c_str() );
+
+    manifest << "# APCEMM case manifest" << "\n";
+    manifest << "input file: " << inputFile << "\n";
+    manifest << "selection: " << selection << "\n";
+    if ( Input_Opt.SIMULATION_MONTECARLO ) {
+        manifest << "monte carlo sampling: " << MCSamplingName( Input_Opt.SIMULATION_MC_SAMPLING ) << "\n";
+        manifest << "monte carlo seed: " << Input_Opt.SIMULATION_MC_SEED << "\n";
+    }
+    manifest << "total cases: " << cases.size() << "\n";
+    manifest << "case range: " << caseBegin << ":" << caseEnd << "\n";
+    manifest << "cases:" << "\n";
+    manifest << std::setprecision(17);
+    for ( unsigned int iCase = caseBegin; iCase < caseEnd; iCase++ ) {
+        /* Sorted by name, so that manifests of the same input are identical */
+        const std::unordered_map<std::string, double> caseParams = cases[iCase];
+        std::map<std::string, double> sorted( caseParams.begin(), caseParams.end() );
+        manifest << "  " << iCase << ":";
+        for ( const auto& p: sorted )
+            manifest << " " << p.first << "=" << p.second;
+        manifest << "\n";
+    }
+
+    manifest.close();
+
+} /* End of CreateCaseManifest */
+
 /* End of Main.cpp */
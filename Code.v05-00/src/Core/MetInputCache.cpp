@@ -0,0 +1,117 @@
+#include <stdexcept>
+#include <vector>
+#include "Core/MetInputCache.hpp"
+#include "Core/NetCDFLock.hpp"
+#include "Core/Parameters.hpp"
+
+using namespace netCDF;
+
+MetInputCache& MetInputCache::instance() {
+    static MetInputCache cache;
+    return cache;
+}
+
+const NcFile& MetInputCache::openFile(const std::string& fileName) {
+    auto it = files_.find(fileName);
+    if(it != files_.end()) {
+        filesLru_.remove(fileName);
+        filesLru_.push_front(fileName);
+        return *it->second;
+    }
+
+    //Close the least recently used files first, the arrays read from them stay cached
+    while( !filesLru_.empty() && files_.size() >= MET_CACHE_MAX_FILES ) {
+        files_.erase(filesLru_.back());
+        filesLru_.pop_back();
+    }
+
+    auto file = std::make_unique<NcFile>(fileName.c_str(), NcFile::read);
+    filesLru_.push_front(fileName);
+    return *files_.emplace(fileName, std::move(file)).first->second;
+}
+
+void MetInputCache::evictVars() {
+    const std::size_t maxBytes = static_cast<std::size_t>(MET_CACHE_MAX_MB * 1.0E+06);
+    while( varsBytes_ > maxBytes && !varsLru_.empty() ) {
+        auto it = vars_.find(varsLru_.back());
+        varsBytes_ -= it->second.bytes;
+        vars_.erase(it);
+        varsLru_.pop_back();
+    }
+}
+
+std::shared_ptr<const MetInputCache::FileInfo> MetInputCache::fileInfo(const std::string& fileName) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto it = fileInfo_.find(fileName);
+    if(it != fileInfo_.end()) return it->second;
+
+    std::lock_guard<std::mutex> ncLock(netcdfMutex());
+    const NcFile& dataFile = openFile(fileName);
+    auto info = std::make_shared<FileInfo>();
+    info->altitude_km.resize(dataFile.getDim("altitude").getSize());
+    info->timeDim = dataFile.getDim("time").getSize();
+    dataFile.getVar("altitude").getVar(info->altitude_km.data());
+
+    fileInfo_.emplace(fileName, info);
+    return info;
+}
+
+std::shared_ptr<const Vector_2D> MetInputCache::readVar(const std::string& fileName, const std::string& varName,
+                                                        std::size_t altStart, std::size_t altCount,
+                                                        std::size_t timeDim, bool timeseries) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    VarKey key(fileName, varName, altStart, altCount, timeDim, timeseries);
+    auto it = vars_.find(key);
+    if(it != vars_.end()) {
+        varsLru_.splice(varsLru_.begin(), varsLru_, it->second.lruPos);
+        return it->second.data;
+    }
+
+    std::size_t nTimeRead;
+    Vector_1D data; //flattened (altitude, time) hyperslab
+    {
+        std::lock_guard<std::mutex> ncLock(netcdfMutex());
+        NcVar ncvar = openFile(fileName).getVar(varName.c_str());
+        bool supportsTimeseries = ncvar.getDimCount() == 2;
+        if( !supportsTimeseries && timeseries ) {
+            throw std::runtime_error("Variable\"" + varName + "\" in met input file does not support time series input! Please set the corresponding time series input option to false.");
+        }
+
+        //Only read the requested hyperslab. Without time series input only the first time is needed.
+        nTimeRead = (timeseries && supportsTimeseries) ? timeDim : 1;
+        std::vector<std::size_t> start = { altStart };
+        std::vector<std::size_t> count = { altCount };
+        if( supportsTimeseries ) {
+            start.push_back(0);
+            count.push_back(nTimeRead);
+        }
+        data.resize(altCount * nTimeRead);
+        ncvar.getVar(start, count, data.data());
+    }
+
+    auto vec_ts = std::make_shared<Vector_2D>(altCount, Vector_1D(timeDim, 0));
+    for ( std::size_t i = 0; i < altCount; i++ ) {
+        for ( std::size_t itime = 0; itime < timeDim; itime++ ) {
+            (*vec_ts)[i][itime] = timeseries ? data[i*nTimeRead + itime] : data[i*nTimeRead];
+        }
+    }
+
+    std::size_t bytes = altCount * timeDim * sizeof(double);
+    varsLru_.push_front(key);
+    vars_.emplace(key, CachedVar{vec_ts, bytes, varsLru_.begin()});
+    varsBytes_ += bytes;
+    evictVars();
+    return vec_ts;
+}
+
+void MetInputCache::clear() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    vars_.clear();
+    varsLru_.clear();
+    varsBytes_ = 0;
+    fileInfo_.clear();
+
+    std::lock_guard<std::mutex> ncLock(netcdfMutex());
+    files_.clear();
+    filesLru_.clear();
+}
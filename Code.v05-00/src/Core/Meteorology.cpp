@@ -12,12 +12,16 @@
 /* ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ */
 
 #include "Core/Meteorology.hpp"
-#include "Util/MC_Rand.hpp"
+#include "Core/MetInputCache.hpp"
+#include "Util/BinaryIO.hpp"
+#include <sstream>
 
 Meteorology::Meteorology( const OptInput &optInput,
                           const AmbientMetParams& ambParams,
                           const Vector_1D& yCoords,
-                          const Vector_1D& yEdges):
+                          const Vector_1D& yEdges,
+                          const double simDuration_h,
+                          const std::uint64_t tempPerturbSeed ):
     ambParams_(ambParams),
     pressureRef_(ambParams.press_Pa),
     yCoords_(yCoords),
@@ -25,13 +29,15 @@ Meteorology::Meteorology( const OptInput &optInput,
     nx_(optInput.ADV_GRID_NX),
     ny_(optInput.ADV_GRID_NY),
     met_dt_h_(optInput.MET_DT),
+    simDuration_h_(simDuration_h),
     useMetFileInput_(optInput.MET_LOADMET),
     interpTemp_(optInput.MET_INTERPTEMPDATA),
     interpRH_(optInput.MET_INTERPRHDATA),
     interpShear_(optInput.MET_INTERPSHEARDATA),
     interpVertVeloc_(optInput.MET_INTERPVERTVELOC),
     turbTempPertAmplitude_(optInput.MET_TEMP_PERTURB_AMPLITUDE),
-    rhi_far_(optInput.MET_SUBSAT_RHI)
+    rhi_far_(optInput.MET_SUBSAT_RHI),
+    tempPerturbSeed_(tempPerturbSeed)
 {
 
     zeroVectors();
@@ -71,43 +77,45 @@ Meteorology::Meteorology( const OptInput &optInput,
 
     diurnalPert_ = diurnalAmplitude_ * cos( 2.0E+00 * physConst::PI * ( ambParams_.solarTime_h - diurnalPhase_ ) / 24.0E+00 );
 
-    //Declare met input file here, keeps ownership of file to constructor only.
-    //Dont want to deal with using a ptr and worry about what functions deference it.
-    NcFile dataFile;
+    //Seeded from the run seed and the case (see caseSeed), so that the perturbations can be reproduced
+    tempPerturbRng_.seed( tempPerturbSeed_ );
+
+    //The met input is read through the process-wide MetInputCache, so cases that share
+    //the same met file (parameter sweeps, Monte Carlo) only open and read it once.
     if( optInput.MET_LOADMET ) {
-        dataFile.open( optInput.MET_FILENAME.c_str(), NcFile::read );
+        metFileName_ = optInput.MET_FILENAME;
     }
 
     try {
-        initAltitudeAndPress( dataFile );
+        initAltitudeAndPress();
     }
     catch (NcException& e) {
         throw std::runtime_error("Could not parse altitude and pressure data from specified met input file");
     }
 
     try {
-        initTemperature( dataFile );
+        initTemperature();
     }
     catch (NcException& e) {
         throw std::runtime_error("Could not parse temperature data from specified met input file");
     }
 
     try {
-        initH2O( dataFile, optInput );
+        initH2O( optInput );
     }
     catch (NcException& e) {
         throw std::runtime_error("Could not parse relative humidity data from specified met input file");
     }
 
     try {
-        initShear( dataFile );
+        initShear();
     }
     catch (NcException& e) {
         throw std::runtime_error("Could not parse shear data from specified met input file");
     }
 
     try {
-        initVertVeloc( dataFile );
+        initVertVeloc();
     }
     catch (NcException& e) {
         throw std::runtime_error("Could not parse vertical velocity data from specified met input file");
@@ -118,88 +126,79 @@ Meteorology::Meteorology( const OptInput &optInput,
 
     #pragma omp parallel for if ( !PARALLEL_CASES ) 
     for (int jNy = 0; jNy < ny_; jNy++ ) {
-        airMolecDens_[jNy].assign(nx_, pressure_[jNy] / tempBase_[jNy] * invkB);
+        airMolecDens_.setRow(jNy, pressure_[jNy] / tempBase_[jNy] * invkB);
     }
 
 } /* End of Meteorology::Meteorology */
 
 void Meteorology::regenerate( const Vector_1D& yCoord_new, const Vector_1D& yEdges_new, int nx_new ) {
+    /* Re-samples the met onto a new (remapped) grid without re-reading any input.
+     * The 1-D profiles (tempInit_, rhiInit_, ... with met input, the lapse rate / moist layer otherwise)
+     * are cached from the last update, so only the ny_new columns have to be evaluated. */
     double dy_new = yEdges_new[1] - yEdges_new[0];
     int ny_new = yCoord_new.size();
     double alt_y0 = altitudeEdges_[0] + (yEdges_new[0] - yEdges_[0]);
-    Vector_1D alt_new(ny_new);
-    Vector_1D altEdges_new(ny_new + 1);
-    Vector_1D press_new(ny_new);
-    Vector_1D pressEdges_new(ny_new + 1);
-
-    std::generate(altEdges_new.begin(), altEdges_new.end(), [&, j = 0] () mutable { return alt_y0 + dy_new * j++; });
-    std::generate(alt_new.begin(), alt_new.end(), [&, j = 0] () mutable { return alt_y0 + dy_new * (0.5 + j++); });
-
-    met::ISA(alt_new, press_new);
-    met::ISA(altEdges_new, pressEdges_new);
-
-    tempBase_.resize(ny_new);
-    tempTotal_ = Vector_2D(ny_new, Vector_1D(nx_new));
-    tempPerturbation_ = Vector_2D(ny_new, Vector_1D(nx_new));
-    H2O_ = Vector_2D(ny_new, Vector_1D(nx_new));
-    airMolecDens_ = Vector_2D(ny_new, Vector_1D(nx_new));
-    shear_.resize(ny_new);
+
     yCoords_ = yCoord_new;
     yEdges_ = yEdges_new;
     ny_ = ny_new;
     nx_ = nx_new;
-    altitude_ = alt_new;
-    pressure_ = press_new;
-    altitudeEdges_ = altEdges_new;
-    pressureEdges_ = pressEdges_new;
-    if(vertVelocLoadType_ != MetVarLoadType::NoMetInput) {
-        vertVeloc_.resize(ny_new);
+
+    altitude_.resize(ny_);
+    altitudeEdges_.resize(ny_ + 1);
+    pressure_.resize(ny_);
+    pressureEdges_.resize(ny_ + 1);
+    std::generate(altitudeEdges_.begin(), altitudeEdges_.end(), [&, j = 0] () mutable { return alt_y0 + dy_new * j++; });
+    std::generate(altitude_.begin(), altitude_.end(), [&, j = 0] () mutable { return alt_y0 + dy_new * (0.5 + j++); });
+    met::ISA(altitude_, pressure_);
+    met::ISA(altitudeEdges_, pressureEdges_);
+    if( useMetFileInput_ ) {
+        i_Zp_ = met::nearestNeighbor( pressure_, pressureRef_ );
+        checkMetWindow();
     }
 
+    //Reuse the existing allocations where possible, the fields are fully overwritten below
+    resizeFields();
+
     //Regenerate temp field
     if(tempLoadType_ == MetVarLoadType::NoMetInput) {
-        initTempNoMet(yCoord_new);
+        initTempNoMet(yCoords_);
     }
     else {
-        for(int j = 0; j < ny_new; j++) {
-            int i_Z = met::nearestNeighbor( altitudeInit_, alt_new[j]);
-            double tempInterp = met::linInterpMetData(altitudeInit_, tempInit_, alt_new[j]);
-            tempBase_[j] = interpTemp_ ? tempInterp : tempInit_[i_Z];
-            tempTotal_[j].assign(nx_new, tempBase_[j]);
+        for(int j = 0; j < ny_; j++) {
+            tempBase_[j] = profileAtAlt(tempInit_, altitude_[j], interpTemp_);
+            tempTotal_.setRow(j, tempBase_[j]);
         }
     }
     
     //Regenerate H2O
     if(rhLoadType_ == MetVarLoadType::NoMetInput) {
-        initH2ONoMet(yCoord_new);
+        initH2ONoMet(yCoords_);
     }
     else {
-        for(int j = 0; j < ny_new; j++) {
-            int i_Z = met::nearestNeighbor( altitudeInit_, alt_new[j]);
-            double rhiInterp = met::linInterpMetData(altitudeInit_, rhiInit_, alt_new[j]);
-            double rhiToUse = interpRH_ ? rhiInterp : rhiInit_[i_Z];
-            H2O_[j].assign(nx_new, physFunc::RHiToH2O(rhiToUse, tempBase_[j]));
+        for(int j = 0; j < ny_; j++) {
+            double rhiToUse = profileAtAlt(rhiInit_, altitude_[j], interpRH_);
+            H2O_.setRow(j, physFunc::RHiToH2O(rhiToUse, tempBase_[j]));
         }
     }
 
     // Regenerate shear
-    for ( int j = 0;  j < ny_new; j++ ) {
-        int i_Z = met::nearestNeighbor( altitudeInit_, alt_new[j]);
-        if(shearLoadType_ == MetVarLoadType::NoMetInput) {
-            shear_[j] = ambParams_.shear;
-        }
-        else {
-            double shear_local = met::linInterpMetData(altitudeInit_, shearInit_, alt_new[j]);
-            shear_[j] = interpShear_ ? shear_local : shearInit_[i_Z];
+    if(shearLoadType_ == MetVarLoadType::NoMetInput) {
+        shear_.assign(ny_, ambParams_.shear);
+    }
+    else {
+        for ( int j = 0;  j < ny_; j++ ) {
+            shear_[j] = profileAtAlt(shearInit_, altitude_[j], interpShear_);
         }
     }
 
     // Regenerate vert veloc
-    if(vertVelocLoadType_ != MetVarLoadType::NoMetInput) {
-        for ( int j = 0;  j < ny_new; j++ ) {
-            int i_Z = met::nearestNeighbor( altitudeInit_, alt_new[j]);
-            double w_local = met::linInterpMetData(altitudeInit_, vertVelocInit_, alt_new[j]);
-            vertVeloc_[j] = interpVertVeloc_ ? w_local : vertVelocInit_[i_Z];
+    if(vertVelocLoadType_ == MetVarLoadType::NoMetInput) {
+        vertVeloc_.assign(ny_, 0);
+    }
+    else {
+        for ( int j = 0;  j < ny_; j++ ) {
+            vertVeloc_[j] = profileAtAlt(vertVelocInit_, altitude_[j], interpVertVeloc_);
         }
     }
     updateAirMolecDens();
@@ -218,6 +217,10 @@ void Meteorology::Update( const double dt, const double solarTime_h, \
         met::ISA( altitude_, pressure_ );
     }
 
+    if( useMetFileInput_ ) {
+        checkMetWindow();
+    }
+
     //First, we take the vertical velocity at the simtime specifed outside, typically halfway into the timestep.
     //Then advect to the new altitude based on the pressure velocity at the reference altitude at time simTime.
     updateVertVeloc(simTime_h);
@@ -228,9 +231,10 @@ void Meteorology::Update( const double dt, const double solarTime_h, \
     updateShear(simTime_h);
     updateH2O(simTime_h);
     updateAirMolecDens();
+    metTime_h_ = simTime_h;
 } /* End of Meteorology::UpdateMet */
 
-void Meteorology::initAltitudeAndPress( const NcFile& dataFile ) {
+void Meteorology::initAltitudeAndPress() {
     //Must call this before the other initialize functions!
     if( !useMetFileInput_ ) {
             
@@ -254,24 +258,16 @@ void Meteorology::initAltitudeAndPress( const NcFile& dataFile ) {
     */
 
     /* Identify the length of variables in input file */
-    altitudeDim_ = dataFile.getDim("altitude").getSize();
-    timeDim_ = dataFile.getDim("time").getSize();
+    MetInputCache& metCache = MetInputCache::instance();
+    std::shared_ptr<const MetInputCache::FileInfo> fileInfo = metCache.fileInfo(metFileName_);
+    const Vector_1D& altitudeFile = fileInfo->altitude_km;
 
-    /* Extract pressure and altitude from input file. */
-    altitudeInit_.resize(altitudeDim_);
-    pressureInit_.resize(altitudeDim_);
-
-    //The netcdf API is garbage and makes you pass in a C style array despite being branded as a "C++" library
-    NcVar altitude_ncVar = dataFile.getVar("altitude");
-    NcVar pressure_ncVar = dataFile.getVar("pressure");
-    altitude_ncVar.getVar(altitudeInit_.data());
-    pressure_ncVar.getVar(pressureInit_.data());
+    /* Only the levels around the domain and the time steps covering the simulation
+     * are read from the file (see setMetWindow) */
+    setMetWindow(altitudeFile, fileInfo->timeDim);
 
-    //Cache initial pressure and altitude values for generating later met vars.
-    for (int i = 0; i < altitudeDim_; i++ ) {
-        pressureInit_[i] *= 100.0; //convert from hPa to Pa
-        altitudeInit_[i] *= 1000.0; //convert from km to m
-    }
+    /* Extract pressure and altitude from input file. */
+    readMetWindowLevels();
 
     for ( int j = 0; j < ny_; j++ ) {
         altitude_[j] = altitudeRef_ + yCoords_[j];
@@ -285,52 +281,145 @@ void Meteorology::initAltitudeAndPress( const NcFile& dataFile ) {
     i_Zp_ = met::nearestNeighbor( pressure_, pressureRef_); 
 }
 
-void Meteorology::readMetVar( const NcFile& dataFile, std::string varName, Vector_2D& vec_ts, bool timeseries) {
-    NcVar ncvar = dataFile.getVar(varName.c_str());
-    bool supportsTimeseries = ncvar.getDimCount() == 2;
-    if( !supportsTimeseries && timeseries ) {
-        throw std::runtime_error("Variable\"" + varName + "\" in met input file does not support time series input! Please set the corresponding time series input option to false.");
+void Meteorology::setMetWindow( const Vector_1D& altitudeFile_km, int timeDimFile ) {
+    /* Finds the hyperslab of the met input that can actually be used:
+     * - All levels within the padding of the initial domain, plus one level on either
+     *   side so that interpolation is always bracketed. The padding is MET_ALT_WINDOW_PAD or
+     *   the height of the initial domain, whichever is larger, so that it covers the vortex sinking
+     *   and the growth of the domain by remapping. Should the domain still get close to the edge of
+     *   the window (e.g. by vertical advection), checkMetWindow reads all levels.
+     * - The time steps up to the end of the simulation (+1 to interpolate the last step). */
+    int altitudeDimFile = altitudeFile_km.size();
+    altStart_ = 0;
+    altitudeDim_ = altitudeDimFile;
+    timeDim_ = timeDimFile;
+
+    if ( MET_ALT_WINDOW_PAD >= 0 && altitudeDimFile > 1 ) {
+        double pad = std::max<double>( MET_ALT_WINDOW_PAD, yEdges_[yEdges_.size() - 1] - yEdges_[0] ); // [m]
+        double altMin = ( altitudeRef_ + yEdges_[0] - pad ) / 1000.0; // [km]
+        double altMax = ( altitudeRef_ + yEdges_[yEdges_.size() - 1] + pad ) / 1000.0; // [km]
+        int iFirst = altitudeDimFile;
+        int iLast = -1;
+        for ( int i = 0; i < altitudeDimFile; i++ ) {
+            if ( altitudeFile_km[i] >= altMin && altitudeFile_km[i] <= altMax ) {
+                iFirst = std::min(iFirst, i);
+                iLast = std::max(iLast, i);
+            }
+        }
+        //If no level falls in the window, keep the full profile and let the interpolation complain
+        if ( iLast >= 0 ) {
+            iFirst = std::max(iFirst - 1, 0);
+            iLast = std::min(iLast + 1, altitudeDimFile - 1);
+            altStart_ = iFirst;
+            altitudeDim_ = iLast - iFirst + 1;
+        }
     }
-    int dataLength = supportsTimeseries ? altitudeDim_ * timeDim_ : altitudeDim_;
-    double data[dataLength]; //flattened array to hold values for all altitude and time
-    ncvar.getVar(data);
 
-    vec_ts = Vector_2D(altitudeDim_, Vector_1D(timeDim_, 0));
-    
+    if ( simDuration_h_ > 0 && met_dt_h_ > 0 ) {
+        int nTimeNeeded = static_cast<int>(simDuration_h_ / met_dt_h_) + 2;
+        timeDim_ = std::max(std::min(nTimeNeeded, timeDimFile), 1);
+    }
+}
 
-    for ( int i = 0; i < altitudeDim_; i++ ) {
-        for ( int itime = 0; itime < timeDim_; itime++ ) {
-            int data_idx;
+void Meteorology::readMetWindowLevels() {
+    /* Altitude and pressure of the levels set in setMetWindow */
+    MetInputCache& metCache = MetInputCache::instance();
+    std::shared_ptr<const MetInputCache::FileInfo> fileInfo = metCache.fileInfo(metFileName_);
+    const Vector_1D& altitudeFile = fileInfo->altitude_km;
+    altitudeInit_.assign(altitudeFile.begin() + altStart_, altitudeFile.begin() + altStart_ + altitudeDim_);
+    std::shared_ptr<const Vector_2D> pressureFile = metCache.readVar(metFileName_, "pressure", altStart_, altitudeDim_, 1, false);
+    pressureInit_.resize(altitudeDim_);
+    for (int i = 0; i < altitudeDim_; i++ ) {
+        pressureInit_[i] = (*pressureFile)[i][0];
+    }
 
-            if(!supportsTimeseries) data_idx = i;
-            else data_idx = timeseries ? i*timeDim_ + itime : i*timeDim_; 
+    //Cache initial pressure and altitude values for generating later met vars.
+    for (int i = 0; i < altitudeDim_; i++ ) {
+        pressureInit_[i] *= 100.0; //convert from hPa to Pa
+        altitudeInit_[i] *= 1000.0; //convert from km to m
+    }
+}
 
-            vec_ts[i][itime] = data[data_idx];
-        }
+void Meteorology::checkMetWindow() {
+    /* Falls back to reading all levels of the met input once the domain gets within
+     * MET_ALT_WINDOW_EDGE of the edge of the levels read, unless that edge is the end of the file.
+     * The profiles keep their values on the levels already read, the other levels are
+     * taken from the met input at the time of the last update. */
+    std::shared_ptr<const MetInputCache::FileInfo> fileInfo = MetInputCache::instance().fileInfo(metFileName_);
+    const Vector_1D& altitudeFile = fileInfo->altitude_km;
+    int altitudeDimFile = altitudeFile.size();
+    if ( altitudeDim_ == altitudeDimFile || altitudeInit_.empty() ) return;
+
+    auto windowRange = std::minmax_element(altitudeInit_.begin(), altitudeInit_.end());
+    auto fileRange = std::minmax_element(altitudeFile.begin(), altitudeFile.end());
+    auto domainRange = std::minmax_element(altitudeEdges_.begin(), altitudeEdges_.end());
+    bool nearBottom = *windowRange.first > *fileRange.first * 1000.0
+                      && *domainRange.first - MET_ALT_WINDOW_EDGE < *windowRange.first;
+    bool nearTop = *windowRange.second < *fileRange.second * 1000.0
+                   && *domainRange.second + MET_ALT_WINDOW_EDGE > *windowRange.second;
+    if ( !nearBottom && !nearTop ) return;
+
+    std::cout << "WARNING: the domain gets close to the edge of the met input levels read (see MET_ALT_WINDOW_PAD). Reading all levels." << std::endl;
+    std::size_t oldStart = altStart_;
+    altStart_ = 0;
+    altitudeDim_ = altitudeDimFile;
+    readMetWindowLevels();
+
+    if ( tempLoadType_ != MetVarLoadType::NoMetInput ) {
+        bool timeseries = (tempLoadType_ == MetVarLoadType::TimeSeries);
+        tempTimeseriesData_ = readMetVar("temperature", timeseries);
+        tempInit_ = widenMetProfile(tempInit_, oldStart, *tempTimeseriesData_, timeseries);
+    }
+    if ( rhLoadType_ != MetVarLoadType::NoMetInput ) {
+        rhiTimeseriesData_ = readMetVar("relative_humidity_ice", rhLoadType_ == MetVarLoadType::TimeSeries);
+        rhiInit_ = widenMetProfile(rhiInit_, oldStart, *rhiTimeseriesData_, true);
+    }
+    if ( shearLoadType_ != MetVarLoadType::NoMetInput ) {
+        bool timeseries = (shearLoadType_ == MetVarLoadType::TimeSeries);
+        shearTimeseriesData_ = readMetVar("shear", timeseries);
+        shearInit_ = widenMetProfile(shearInit_, oldStart, *shearTimeseriesData_, timeseries);
+    }
+    if ( vertVelocLoadType_ != MetVarLoadType::NoMetInput ) {
+        bool timeseries = (vertVelocLoadType_ == MetVarLoadType::TimeSeries);
+        vertVelocTimeseriesData_ = readMetVar("w", timeseries);
+        vertVelocInit_ = widenMetProfile(vertVelocInit_, oldStart, *vertVelocTimeseriesData_, timeseries);
     }
 }
 
+Vector_1D Meteorology::widenMetProfile( const Vector_1D& profile, std::size_t oldStart, const Vector_2D& ts_data, bool timeseries ) const {
+    //Same interpolation in time as the update functions, the levels that were already read are kept as they are
+    Vector_1D widened = interpMetTimeseriesData(metTime_h_, ts_data, timeseries);
+    std::copy(profile.begin(), profile.end(), widened.begin() + oldStart);
+    return widened;
+}
+
+std::shared_ptr<const Vector_2D> Meteorology::readMetVar( const std::string& varName, bool timeseries ) const {
+    //Only reads the window of (altitude, time) set in setMetWindow. The data is shared with all other
+    //Meteorology objects reading the same window of the same file.
+    return MetInputCache::instance().readVar(metFileName_, varName, altStart_, altitudeDim_, timeDim_, timeseries);
+}
+
 void Meteorology::initTempNoMet (const Vector_1D& yCoords) {
     #pragma omp parallel for default(shared)
     for ( int j = 0; j < yCoords.size(); j++ ) {
         //Convention: lower altitude than reference= negative y, higher = positive y
         double temp_local = ambParams_.temp_K + yCoords[j] * lapseRate_ + diurnalPert_;
         tempBase_[j] = temp_local;
-        tempTotal_[j].assign(nx_, tempBase_[j]);
+        tempTotal_.setRow(j, tempBase_[j]);
     }
 }
-void Meteorology::initTemperature( const NcFile& dataFile ) {
+void Meteorology::initTemperature() {
 
     if ( tempLoadType_ == MetVarLoadType::NoMetInput ) {
         initTempNoMet(yCoords_);
         return;
     }
 
-    readMetVar(dataFile, "temperature", tempTimeseriesData_, tempLoadType_ == MetVarLoadType::TimeSeries); 
+    tempTimeseriesData_ = readMetVar("temperature", tempLoadType_ == MetVarLoadType::TimeSeries); 
     
     tempInit_.resize(altitudeDim_);
     for (int i = 0; i < altitudeDim_; i++) {
-        tempInit_[i] = tempTimeseriesData_[i][0];
+        tempInit_[i] = (*tempTimeseriesData_)[i][0];
     }
 
     /* Identify closest temperature to given pressure */
@@ -343,7 +432,7 @@ void Meteorology::initTemperature( const NcFile& dataFile ) {
         int i_Z = met::nearestNeighbor( altitudeInit_, altitude_[j]);
         double tempInterp = met::linInterpMetData(altitudeInit_, tempInit_, altitude_[j]);
         tempBase_[j] = interpTemp_ ? tempInterp : tempInit_[i_Z];
-        tempTotal_[j].assign(nx_, tempBase_[j]);
+        tempTotal_.setRow(j, tempBase_[j]);
     }
 }
 
@@ -364,11 +453,11 @@ void Meteorology::initH2ONoMet (const Vector_1D& yCoords) {
         double H2O_local = yCoords[j] > moist_layer_bot_y && yCoords[j] < moist_layer_top_y
                             ? physFunc::RHiToH2O(RH_star, tempBase_[j])
                             : physFunc::RHiToH2O(RH_far, tempBase_[j]);
-        H2O_[j].assign(nx_, H2O_local);
+        H2O_.setRow(j, H2O_local);
     }
 }
 
-void Meteorology::initH2O( const NcFile& dataFile, const OptInput& optInput ) { 
+void Meteorology::initH2O( const OptInput& optInput ) { 
     //Cannot call this before initTemperature!
 
     if( rhLoadType_ == MetVarLoadType::NoMetInput ) {
@@ -376,20 +465,20 @@ void Meteorology::initH2O( const NcFile& dataFile, const OptInput& optInput ) {
         return;
     }
 
-    readMetVar(dataFile, "relative_humidity_ice", rhiTimeseriesData_, rhLoadType_ == MetVarLoadType::TimeSeries); 
+    rhiTimeseriesData_ = readMetVar("relative_humidity_ice", rhLoadType_ == MetVarLoadType::TimeSeries); 
     
     rhiInit_.resize(altitudeDim_);
     
     for (int i = 0; i < altitudeDim_; i++) {
         //Scale RHi if specified
         if (optInput.MET_HUMIDSCAL_MODIFICATION_SCHEME == "scaling") {
-            rhiInit_[i] = met::rhiCorrection(rhiTimeseriesData_[i][0], optInput.MET_HUMIDSCAL_SCALING_A, optInput.MET_HUMIDSCAL_SCALING_B);
+            rhiInit_[i] = met::rhiCorrection((*rhiTimeseriesData_)[i][0], optInput.MET_HUMIDSCAL_SCALING_A, optInput.MET_HUMIDSCAL_SCALING_B);
         }
         else if (optInput.MET_HUMIDSCAL_MODIFICATION_SCHEME == "constant") {
             rhiInit_[i] = optInput.MET_HUMIDSCAL_CONST_RHI;
         }
         else {
-            rhiInit_[i] = rhiTimeseriesData_[i][0];
+            rhiInit_[i] = (*rhiTimeseriesData_)[i][0];
         }
     }
     Vector_1D localRHi(ny_);
@@ -406,7 +495,7 @@ void Meteorology::initH2O( const NcFile& dataFile, const OptInput& optInput ) {
         double rhiInterp = met::linInterpMetData(altitudeInit_, rhiInit_, altitude_[jNy]);
         double rhiToUse = interpRH_ ? rhiInterp : rhiInit_[i_Z];
         localRHi[jNy] = rhiToUse;
-        H2O_[jNy].assign(nx_, physFunc::RHiToH2O(rhiToUse, tempBase_[jNy]));
+        H2O_.setRow(jNy, physFunc::RHiToH2O(rhiToUse, tempBase_[jNy]));
 
     }
 
@@ -430,17 +519,17 @@ void Meteorology::initH2O( const NcFile& dataFile, const OptInput& optInput ) {
     }
 }
 
-void Meteorology::initShear ( const NcFile& dataFile ) {
+void Meteorology::initShear () {
 
     if ( shearLoadType_ == MetVarLoadType::NoMetInput ) {
         shear_.assign(ny_, ambParams_.shear);
         return;
     }
 
-    readMetVar(dataFile, "shear", shearTimeseriesData_, shearLoadType_ == MetVarLoadType::TimeSeries); 
+    shearTimeseriesData_ = readMetVar("shear", shearLoadType_ == MetVarLoadType::TimeSeries); 
     shearInit_.resize(altitudeDim_);
     for (int i = 0; i < altitudeDim_; i++) {
-        shearInit_[i] = shearTimeseriesData_[i][0];
+        shearInit_[i] = (*shearTimeseriesData_)[i][0];
     }
 
     for ( int jNy = 0;  jNy < ny_; jNy++ ) {
@@ -452,18 +541,18 @@ void Meteorology::initShear ( const NcFile& dataFile ) {
     }
 }
 
-void Meteorology::initVertVeloc ( const NcFile& dataFile ) {
+void Meteorology::initVertVeloc () {
     if ( vertVelocLoadType_ == MetVarLoadType::NoMetInput ) {
         vertVeloc_.assign(ny_, 0);
         return;
     }
 
     //Vert veloc is assumed default as timeseries input.
-    readMetVar(dataFile, "w", vertVelocTimeseriesData_, vertVelocLoadType_ == MetVarLoadType::TimeSeries);
+    vertVelocTimeseriesData_ = readMetVar("w", vertVelocLoadType_ == MetVarLoadType::TimeSeries);
     
     vertVelocInit_.resize(altitudeDim_);
     for (int i = 0; i < altitudeDim_; i++) {
-        vertVelocInit_[i] = vertVelocTimeseriesData_[i][0];
+        vertVelocInit_[i] = (*vertVelocTimeseriesData_)[i][0];
     }
 
     for ( int jNy = 0;  jNy < ny_; jNy++ ) {
@@ -506,30 +595,42 @@ void Meteorology::updateTemperature(double solarTime_h, double simTime_h) {
     double deltaDiurnalPert = diurnalPert_ - diurnalPertPrev;
     
     if( tempLoadType_ == MetVarLoadType::NoMetInput ) {
-        #pragma omp parallel for if(!PARALLEL_CASES)
         for (int j = 0; j < ny_; j++ ) {
             tempBase_[j] += deltaDiurnalPert;
-            /* Unit check: Y [m] * LapseRate [K/m] */
-            for (int i = 0; i < nx_; i++ ) {
-                tempTotal_[j][i] = tempBase_[j] + tempPerturbation_[j][i];
-            }
         }
+        updateTempTotal();
         return;
     }
     bool timeseries = (tempLoadType_ == MetVarLoadType::TimeSeries);
-    tempInit_ = interpMetTimeseriesData(simTime_h, tempTimeseriesData_, timeseries);
+    tempInit_ = interpMetTimeseriesData(simTime_h, *tempTimeseriesData_, timeseries);
 
     #pragma omp parallel for if (!PARALLEL_CASES)
     for ( int j = 0; j < ny_; j++ ) {
         int i_Z = met::nearestNeighbor( altitudeInit_, altitude_[j] );
         double temp_local = met::linInterpMetData(altitudeInit_, tempInit_, altitude_[j]);
         tempBase_[j] = interpTemp_ ? temp_local : tempInit_[i_Z];
-        for ( int i = 0; i < nx_; i++ ) {
-            tempTotal_[j][i] =  tempBase_[j] + tempPerturbation_[j][i];
-        }
+    }
+    updateTempTotal();
 
+}
+
+void Meteorology::updateTempTotal() {
+    //Without perturbations the temperature stays horizontally uniform, O(ny) update
+    if( tempPerturbation_.empty() ) {
+        for ( int j = 0; j < ny_; j++ ) {
+            tempTotal_.setRow(j, tempBase_[j]);
+        }
+        return;
     }
 
+    tempTotal_.expand();
+    #pragma omp parallel for if (!PARALLEL_CASES)
+    for ( int j = 0; j < ny_; j++ ) {
+        Vector_1D& tempRow = tempTotal_.row(j);
+        for ( int i = 0; i < nx_; i++ ) {
+            tempRow[i] = tempBase_[j] + tempPerturbation_[j][i];
+        }
+    }
 }
 
 void Meteorology::updateH2O(double simTime_h) { 
@@ -539,14 +640,14 @@ void Meteorology::updateH2O(double simTime_h) {
         if RH timeseries is not specified, the RH field will not be changed by the update function.
      */
     if (rhLoadType_ == MetVarLoadType::NoMetInput) return;
-    rhiInit_ = interpMetTimeseriesData(simTime_h, rhiTimeseriesData_, true);
+    rhiInit_ = interpMetTimeseriesData(simTime_h, *rhiTimeseriesData_, true);
 
     #pragma omp parallel for if (!PARALLEL_CASES)
     for ( int j = 0; j < ny_; j++ ) {
         int i_Z = met::nearestNeighbor( altitudeInit_, altitude_[j] );
         double rh_local = met::linInterpMetData(altitudeInit_, rhiInit_, altitude_[j]);
         double h2o_local = physFunc::RHiToH2O(rh_local, tempBase_[j]);
-        H2O_[j].assign(nx_, h2o_local);
+        H2O_.setRow(j, h2o_local);
     }
 }
 
@@ -555,7 +656,7 @@ void Meteorology::updateShear(double simTime_h) {
     if( shearLoadType_ == MetVarLoadType::NoMetInput )  return;
 
     bool timeseries = (shearLoadType_ == MetVarLoadType::TimeSeries);
-    shearInit_ = interpMetTimeseriesData(simTime_h, shearTimeseriesData_, timeseries);
+    shearInit_ = interpMetTimeseriesData(simTime_h, *shearTimeseriesData_, timeseries);
 
     for ( int jNy = 0; jNy < ny_; jNy++ ) {
         int i_Z = met::nearestNeighbor( altitudeInit_, altitude_[jNy] );
@@ -569,7 +670,7 @@ void Meteorology::updateVertVeloc(double simTime_h) {
     if( vertVelocLoadType_ == MetVarLoadType::NoMetInput )  return;
 
     bool timeseries = (vertVelocLoadType_ == MetVarLoadType::TimeSeries);
-    vertVelocInit_ = interpMetTimeseriesData(simTime_h, vertVelocTimeseriesData_, timeseries);
+    vertVelocInit_ = interpMetTimeseriesData(simTime_h, *vertVelocTimeseriesData_, timeseries);
 
     for ( int jNy = 0; jNy < ny_; jNy++ ) {
         int i_Z = met::nearestNeighbor( altitudeInit_, altitude_[jNy] );
@@ -580,27 +681,63 @@ void Meteorology::updateVertVeloc(double simTime_h) {
 }
 
 void Meteorology::updateTempPerturb() {
+    //Temperature (and air density) become x-dependent from here on
+    if( tempPerturbation_.empty() ) {
+        tempPerturbation_ = Vector_2D(ny_, Vector_1D(nx_, 0));
+    }
+    tempTotal_.expand();
+
+    //The random numbers are drawn serially from the member generator, so that the perturbations
+    //do not depend on the thread count and can be reproduced after a restart.
+    std::uniform_real_distribution<double> uniform(-1.0, 1.0);
+    for (int j = 0; j < ny_; j++){
+        for(int i = 0; i < nx_; i++){
+            double epsilon1 = uniform(tempPerturbRng_);
+            double epsilon2 = uniform(tempPerturbRng_);
+            tempPerturbation_[j][i] = epsilon1 * epsilon2 * turbTempPertAmplitude_;
+        }
+    }
+
     #pragma omp parallel for\
     if(!PARALLEL_CASES) \
     default(shared)
     for (int j = 0; j < ny_; j++){
+        Vector_1D& tempRow = tempTotal_.row(j);
         for(int i = 0; i < nx_; i++){
-            double epsilon1 = fRand(-1.0, 1.0);
-            double epsilon2 = fRand(-1.0, 1.0);
-            tempPerturbation_[j][i] = epsilon1 * epsilon2 * turbTempPertAmplitude_;
-            tempTotal_[j][i] = tempBase_[j] + tempPerturbation_[j][i]; //Bad practice of having 1 function update both the temp perturb and the total temp but whatever
+            tempRow[i] = tempBase_[j] + tempPerturbation_[j][i]; //Bad practice of having 1 function update both the temp perturb and the total temp but whatever
         }
     }
 }
 
+bool Meteorology::overrideShear( double shear ) {
+    if( shearLoadType_ != MetVarLoadType::NoMetInput ) return false;
+
+    //regenerate() rebuilds the shear profile from the ambient parameters
+    ambParams_.shear = shear;
+    shear_.assign(ny_, shear);
+    return true;
+}
+
 void Meteorology::updateAirMolecDens() {
     double invkB = 1.00E-06 / physConst::kB;
+
+    //Air density is only x-dependent if the temperature is
+    if( tempTotal_.isUniform() ) {
+        if( !airMolecDens_.isUniform() ) airMolecDens_.reset(ny_, nx_);
+        for ( int jNy = 0; jNy < ny_; jNy++ ) {
+            airMolecDens_.setRow(jNy, pressure_[jNy] / tempTotal_(jNy, 0) * invkB);
+        }
+        return;
+    }
+
+    airMolecDens_.expand();
     #pragma omp parallel for        \
     if      ( !PARALLEL_CASES ) \
     default ( shared          )
     for ( int jNy = 0; jNy < ny_; jNy++ ) {
+        Vector_1D& airMolecDensRow = airMolecDens_.row(jNy);
         for ( int iNx = 0; iNx < nx_; iNx++ )
-            airMolecDens_[jNy][iNx] = pressure_[jNy] / tempTotal_[jNy][iNx] * invkB;
+            airMolecDensRow[iNx] = pressure_[jNy] / tempTotal_(jNy, iNx) * invkB;
     }
 }
 
@@ -663,5 +800,129 @@ void Meteorology::vertAdvectAltPress(double dt) {
     }
 }
 
-/* End of Meteorology.cpp */
+namespace {
+    //Only stores the row values while the field is horizontally uniform
+    void writeMetField(std::ostream& os, const MetField& field) {
+        BinaryIO::write(os, static_cast<std::uint64_t>(field.nx()));
+        BinaryIO::write(os, static_cast<std::uint8_t>(field.isUniform()));
+        if(field.isUniform()) {
+            BinaryIO::write(os, field.column());
+        }
+        else {
+            BinaryIO::write(os, field.toVector2D());
+        }
+    }
+
+    void readMetField(std::istream& is, MetField& field) {
+        std::uint64_t nx;
+        std::uint8_t uniform;
+        BinaryIO::read(is, nx);
+        BinaryIO::read(is, uniform);
+        if(uniform) {
+            Vector_1D column;
+            BinaryIO::read(is, column);
+            field.reset(column.size(), nx);
+            for(std::size_t j = 0; j < column.size(); j++) {
+                field.setRow(j, column[j]);
+            }
+        }
+        else {
+            Vector_2D values;
+            BinaryIO::read(is, values);
+            field.reset(values.size(), nx);
+            for(std::size_t j = 0; j < values.size(); j++) {
+                field.row(j) = values[j];
+            }
+        }
+    }
+}
 
+void Meteorology::writeState( std::ostream& os ) const {
+    BinaryIO::write(os, i_Zp_);
+    BinaryIO::write(os, nx_);
+    BinaryIO::write(os, ny_);
+    BinaryIO::write(os, yCoords_);
+    BinaryIO::write(os, yEdges_);
+    BinaryIO::write(os, tempInit_);
+    BinaryIO::write(os, shearInit_);
+    BinaryIO::write(os, rhiInit_);
+    BinaryIO::write(os, vertVelocInit_);
+    BinaryIO::write(os, altitudeRef_);
+    BinaryIO::write(os, pressureRef_);
+    BinaryIO::write(os, diurnalPert_);
+    writeMetField(os, tempTotal_);
+    BinaryIO::write(os, tempPerturbation_);
+    BinaryIO::write(os, tempBase_);
+    writeMetField(os, airMolecDens_);
+    writeMetField(os, H2O_);
+    BinaryIO::write(os, shear_);
+    BinaryIO::write(os, vertVeloc_);
+    BinaryIO::write(os, altitude_);
+    BinaryIO::write(os, pressure_);
+    BinaryIO::write(os, altitudeEdges_);
+    BinaryIO::write(os, pressureEdges_);
+    BinaryIO::write(os, static_cast<std::uint64_t>(altStart_));
+    BinaryIO::write(os, altitudeDim_);
+    BinaryIO::write(os, metTime_h_);
+
+    BinaryIO::write(os, tempPerturbSeed_);
+    std::ostringstream rngState;
+    rngState << tempPerturbRng_;
+    BinaryIO::write(os, rngState.str());
+}
+
+void Meteorology::readState( std::istream& is ) {
+    BinaryIO::read(is, i_Zp_);
+    BinaryIO::read(is, nx_);
+    BinaryIO::read(is, ny_);
+    BinaryIO::read(is, yCoords_);
+    BinaryIO::read(is, yEdges_);
+    BinaryIO::read(is, tempInit_);
+    BinaryIO::read(is, shearInit_);
+    BinaryIO::read(is, rhiInit_);
+    BinaryIO::read(is, vertVelocInit_);
+    BinaryIO::read(is, altitudeRef_);
+    BinaryIO::read(is, pressureRef_);
+    BinaryIO::read(is, diurnalPert_);
+    readMetField(is, tempTotal_);
+    BinaryIO::read(is, tempPerturbation_);
+    BinaryIO::read(is, tempBase_);
+    readMetField(is, airMolecDens_);
+    readMetField(is, H2O_);
+    BinaryIO::read(is, shear_);
+    BinaryIO::read(is, vertVeloc_);
+    BinaryIO::read(is, altitude_);
+    BinaryIO::read(is, pressure_);
+    BinaryIO::read(is, altitudeEdges_);
+    BinaryIO::read(is, pressureEdges_);
+
+    //The saved profiles are on the levels read at the time of the checkpoint (see checkMetWindow)
+    std::uint64_t altStart;
+    int altitudeDim;
+    BinaryIO::read(is, altStart);
+    BinaryIO::read(is, altitudeDim);
+    BinaryIO::read(is, metTime_h_);
+    if( useMetFileInput_ && ( altStart != altStart_ || altitudeDim != altitudeDim_ ) ) {
+        altStart_ = altStart;
+        altitudeDim_ = altitudeDim;
+        readMetWindowLevels();
+        if( tempLoadType_ != MetVarLoadType::NoMetInput )
+            tempTimeseriesData_ = readMetVar("temperature", tempLoadType_ == MetVarLoadType::TimeSeries);
+        if( rhLoadType_ != MetVarLoadType::NoMetInput )
+            rhiTimeseriesData_ = readMetVar("relative_humidity_ice", rhLoadType_ == MetVarLoadType::TimeSeries);
+        if( shearLoadType_ != MetVarLoadType::NoMetInput )
+            shearTimeseriesData_ = readMetVar("shear", shearLoadType_ == MetVarLoadType::TimeSeries);
+        if( vertVelocLoadType_ != MetVarLoadType::NoMetInput )
+            vertVelocTimeseriesData_ = readMetVar("w", vertVelocLoadType_ == MetVarLoadType::TimeSeries);
+    }
+
+    BinaryIO::read(is, tempPerturbSeed_);
+    std::string rngState;
+    BinaryIO::read(is, rngState);
+    std::istringstream rngStream(rngState);
+    if( !(rngStream >> tempPerturbRng_) ) {
+        throw std::runtime_error("In Meteorology::readState: invalid random number generator state");
+    }
+}
+
+/* End of Meteorology.cpp */
@@ -255,7 +255,7 @@ SimStatus PlumeModel( OptInput &Input_Opt, const Input &input )
     ambMetParams.press_Pa = simVars.pressure_Pa;
     ambMetParams.shear = input.shear();
     
-    Meteorology Met( Input_Opt, ambMetParams, m.y(), m.yE());
+    Meteorology Met( Input_Opt, ambMetParams, m.y(), m.yE(), -1.0, caseSeed( Input_Opt.SIMULATION_MC_SEED, input.Case() ) );
 
     if ( Input_Opt.MET_LOADMET && Input_Opt.MET_LOADTEMP ) {
         simVars.temperature_K = Met.tempRef();
@@ -767,7 +767,9 @@ SimStatus PlumeModel( OptInput &Input_Opt, const Input &input )
                     solver.updateAdvection(0, -vFall[iBin_PA], shear);
 
                     //passing in "false" to the "parallelAdvection" param to not spawn more threads
-                    solver.operatorSplitSolve2DVec(Data.solidAerosol.getPDF_nonConstRef()[iBin_PA], ZERO_BOUNDARY_COND, false);
+                    Data.solidAerosol.transformBinPDF(iBin_PA, [&](Vector_2D& pdf_n) {
+                        solver.operatorSplitSolve2DVec(pdf_n, ZERO_BOUNDARY_COND, false);
+                    });
 
                 }
 
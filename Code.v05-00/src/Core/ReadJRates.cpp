@@ -12,6 +12,7 @@
 /* ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ */
 
 #include "Core/ReadJRates.hpp"
+#include "Core/NetCDFLock.hpp"
 
 void ReadJRates( const char* ROOTDIR,                          \
                  const unsigned int MM, const unsigned int DD, \
@@ -45,6 +46,7 @@ void ReadJRates( const char* ROOTDIR,                          \
     //    std::cout << " Photolysis rate input file '" << fullPath << "' not found!" << std::endl;
     //    exit(-1);
     //}
+    std::lock_guard<std::mutex> ncLock(netcdfMutex());
     NcFile dataFile( fullPath.c_str(), NcFile::read );
 
     varName = "lon";
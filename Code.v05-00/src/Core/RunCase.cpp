@@ -0,0 +1,48 @@
+#include <algorithm>
+#include <cctype>
+#include <filesystem>
+#include <limits>
+#include "Core/LAGRIDPlumeModel.hpp"
+#include "Core/RunCase.hpp"
+
+namespace {
+    SimStatus runModel(const OptInput& optInput, const Input& input, PlumeObserver* observer, CaseContext& context) {
+        LAGRIDPlumeModel model(optInput, input);
+        model.setObserver(observer);
+        model.setContext(&context);
+        return model.runFullModel();
+    }
+}
+
+SimStatus runCase(const OptInput& optInput, const Input& input, PlumeObserver& observer, CaseContext& context) {
+    return runModel(optInput, input, &observer, context);
+}
+
+SimStatus runCase(const OptInput& optInput, const Input& input, CaseContext& context) {
+    return runModel(optInput, input, nullptr, context);
+}
+
+std::set<unsigned int> usedCaseIds(const std::string& outputFolder) {
+    const std::string prefixes[] = { "Micro", "ts_aerosol_case", "status_case" };
+    std::set<unsigned int> ids;
+    std::error_code ec;
+    for ( const auto& entry: std::filesystem::directory_iterator(outputFolder, ec) ) {
+        const std::string name = entry.path().filename().string();
+        for ( const std::string& prefix: prefixes ) {
+            if ( name.compare(0, prefix.size(), prefix) != 0 ) continue;
+            auto digitsEnd = std::find_if(name.begin() + prefix.size(), name.end(), [](unsigned char c) { return !std::isdigit(c); });
+            if ( digitsEnd == name.begin() + prefix.size() ) continue;
+            try {
+                const unsigned long id = std::stoul(std::string(name.begin() + prefix.size(), digitsEnd));
+                if ( id < std::numeric_limits<unsigned int>::max() ) ids.insert(static_cast<unsigned int>(id));
+            }
+            catch ( std::out_of_range& e ) { }
+        }
+    }
+    return ids;
+}
+
+unsigned int nextFreeCaseId(const std::string& outputFolder) {
+    const std::set<unsigned int> ids = usedCaseIds(outputFolder);
+    return ids.empty() ? 0 : *ids.rbegin() + 1;
+}
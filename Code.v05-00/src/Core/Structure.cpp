@@ -344,7 +344,7 @@ void Solution::initializeSpeciesH2O(const Input& input, const OptInput& Input_Op
         /* Use meteorological input? */
 
         //TODO: Fix this insanely wasteful copy. Probably not happening without significant refactoring everything.
-        Species[ind_H2Omet] = met.H2O_field();
+        Species[ind_H2Omet] = met.H2O_field().toVector2D();
         /* Update H2O */
         for ( UInt i = 0; i < size_x; i++ ) {
             for ( UInt j = 0; j < size_y; j++ ) {
@@ -0,0 +1,197 @@
+#include <cstdlib>
+#include <filesystem>
+#include <fstream>
+#include <random>
+#include <sstream>
+#include <stdexcept>
+#include "EPM/EPMCache.hpp"
+
+namespace EPM
+{
+    namespace
+    {
+        const std::string CACHE_HEADER = "APCEMM_EPM_CACHE 1";
+
+        std::string hexDouble( double value ) {
+            std::ostringstream ss;
+            ss << std::hexfloat << value;
+            return ss.str();
+        }
+
+        //std::istream >> double does not parse hexfloats, strtod does
+        bool readDouble( std::istream& is, double& value ) {
+            std::string token;
+            if ( !(is >> token) ) return false;
+            char* end;
+            value = std::strtod(token.c_str(), &end);
+            return *end == '\0';
+        }
+
+        bool readField( std::istream& is, const std::string& name, double& value ) {
+            std::string token;
+            return (is >> token) && token == name && readDouble(is, value);
+        }
+
+        void writeAerosol( std::ostream& os, const std::string& name, const AIM::Aerosol& aer ) {
+            os << name << " " << aer.getNBin();
+            for ( double edge: aer.getBinEdges() ) os << " " << hexDouble(edge);
+            for ( double center: aer.getBinCenters() ) os << " " << hexDouble(center);
+            for ( double pdf: aer.getPDF() ) os << " " << hexDouble(pdf);
+            os << "\n";
+        }
+
+        bool readAerosol( std::istream& is, const std::string& name, AIM::Aerosol& aer ) {
+            std::string token;
+            std::size_t nBin;
+            if ( !(is >> token) || token != name || !(is >> nBin) ) return false;
+            Vector_1D edges(nBin + 1), centers(nBin), pdf(nBin);
+            for ( double& x: edges ) if ( !readDouble(is, x) ) return false;
+            for ( double& x: centers ) if ( !readDouble(is, x) ) return false;
+            for ( double& x: pdf ) if ( !readDouble(is, x) ) return false;
+            /* Same placeholder distribution parameters as for the grid initialization, the pdf is overwritten */
+            aer = AIM::Aerosol(centers, edges, 0.0, 1.0, 1.6);
+            aer.updatePdf(pdf);
+            return true;
+        }
+
+        std::filesystem::path entryPath( const std::string& cacheDir, const CacheKey& key, const std::string& extension ) {
+            return std::filesystem::path(cacheDir) / ("epm_" + key.hash() + extension);
+        }
+
+        //Copies src to dst through a temporary file in the destination folder, so that dst is replaced atomically
+        void atomicCopy( const std::filesystem::path& src, const std::filesystem::path& dst ) {
+            std::filesystem::path tmp = dst;
+            tmp += ".tmp" + std::to_string(std::random_device{}());
+            std::filesystem::copy_file(src, tmp, std::filesystem::copy_options::overwrite_existing);
+            std::filesystem::rename(tmp, dst);
+        }
+    }
+
+    void CacheKey::add( const std::string& name, double value ) {
+        key_ += name + "=" + hexDouble(value) + ";";
+    }
+
+    void CacheKey::add( const std::string& name, const double* values, std::size_t n ) {
+        key_ += name + "=[";
+        for ( std::size_t i = 0; i < n; i++ ) {
+            key_ += hexDouble(values[i]) + (i + 1 < n ? "," : "");
+        }
+        key_ += "];";
+    }
+
+    void CacheKey::add( const std::string& name, const Vector_1D& values ) {
+        add(name, values.data(), values.size());
+    }
+
+    void CacheKey::add( const std::string& name, const Vector_2D& values ) {
+        for ( std::size_t i = 0; i < values.size(); i++ ) {
+            add(name + "[" + std::to_string(i) + "]", values[i]);
+        }
+    }
+
+    void CacheKey::add( const std::string& name, const std::string& value ) {
+        key_ += name + "=\"" + value + "\";";
+    }
+
+    std::string CacheKey::hash() const {
+        std::uint64_t h = 14695981039346656037ULL;
+        for ( unsigned char c: key_ ) {
+            h ^= c;
+            h *= 1099511628211ULL;
+        }
+        std::ostringstream ss;
+        ss << std::hex;
+        ss.width(16);
+        ss.fill('0');
+        ss << h;
+        return ss.str();
+    }
+
+    void writeCachedResult( std::ostream& os, const CacheKey& key, const EPMResult& result ) {
+        const EPMOutput& out = result.first;
+        os << CACHE_HEADER << "\n";
+        os << "key " << key.str() << "\n";
+        os << "status " << static_cast<int>(result.second) << "\n";
+        os << "finalTemp " << hexDouble(out.finalTemp) << "\n";
+        os << "iceRadius " << hexDouble(out.iceRadius) << "\n";
+        os << "iceDensity " << hexDouble(out.iceDensity) << "\n";
+        os << "sootDensity " << hexDouble(out.sootDensity) << "\n";
+        os << "H2O_mol " << hexDouble(out.H2O_mol) << "\n";
+        os << "SO4g_mol " << hexDouble(out.SO4g_mol) << "\n";
+        os << "SO4l_mol " << hexDouble(out.SO4l_mol) << "\n";
+        os << "area " << hexDouble(out.area) << "\n";
+        os << "bypassArea " << hexDouble(out.bypassArea) << "\n";
+        os << "coreExitTemp " << hexDouble(out.coreExitTemp) << "\n";
+        writeAerosol(os, "SO4Aer", out.SO4Aer);
+        writeAerosol(os, "IceAer", out.IceAer);
+        os << "end\n";
+    }
+
+    bool readCachedResult( std::istream& is, const CacheKey& key, EPMResult& result ) {
+        std::string line;
+        if ( !std::getline(is, line) || line != CACHE_HEADER ) return false;
+        if ( !std::getline(is, line) || line != "key " + key.str() ) return false;
+
+        std::string token;
+        int status;
+        if ( !(is >> token) || token != "status" || !(is >> status) ) return false;
+
+        EPMOutput out;
+        bool ok = readField(is, "finalTemp", out.finalTemp)
+               && readField(is, "iceRadius", out.iceRadius)
+               && readField(is, "iceDensity", out.iceDensity)
+               && readField(is, "sootDensity", out.sootDensity)
+               && readField(is, "H2O_mol", out.H2O_mol)
+               && readField(is, "SO4g_mol", out.SO4g_mol)
+               && readField(is, "SO4l_mol", out.SO4l_mol)
+               && readField(is, "area", out.area)
+               && readField(is, "bypassArea", out.bypassArea)
+               && readField(is, "coreExitTemp", out.coreExitTemp)
+               && readAerosol(is, "SO4Aer", out.SO4Aer)
+               && readAerosol(is, "IceAer", out.IceAer)
+               && (is >> token) && token == "end";
+        if ( !ok ) return false;
+
+        result = EPMResult(out, static_cast<SimStatus>(status));
+        return true;
+    }
+
+    bool loadCachedResult( const std::string& cacheDir, const CacheKey& key, EPMResult& result, const std::string& microFile ) {
+        if ( cacheDir.empty() ) return false;
+
+        std::ifstream file(entryPath(cacheDir, key, ".txt"));
+        if ( !file.is_open() || !readCachedResult(file, key, result) ) return false;
+
+        std::error_code ec;
+        std::filesystem::path microEntry = entryPath(cacheDir, key, ".micro");
+        if ( !microFile.empty() && std::filesystem::exists(microEntry, ec) ) {
+            std::filesystem::copy_file(microEntry, microFile, std::filesystem::copy_options::overwrite_existing, ec);
+        }
+        return true;
+    }
+
+    void storeCachedResult( const std::string& cacheDir, const CacheKey& key, const EPMResult& result, const std::string& microFile ) {
+        if ( cacheDir.empty() ) return;
+
+        /* A failure to write the cache should never stop the simulation */
+        try {
+            std::filesystem::create_directories(cacheDir);
+            if ( !microFile.empty() && std::filesystem::exists(microFile) ) {
+                atomicCopy(microFile, entryPath(cacheDir, key, ".micro"));
+            }
+
+            std::filesystem::path entry = entryPath(cacheDir, key, ".txt");
+            std::filesystem::path tmp = entry;
+            tmp += ".tmp" + std::to_string(std::random_device{}());
+            {
+                std::ofstream file(tmp);
+                writeCachedResult(file, key, result);
+                if ( !file ) throw std::runtime_error("Could not write " + tmp.string());
+            }
+            std::filesystem::rename(tmp, entry);
+        }
+        catch ( std::exception& e ) {
+            std::cout << "Could not store EPM results in cache folder " << cacheDir << ": " << e.what() << std::endl;
+        }
+    }
+}
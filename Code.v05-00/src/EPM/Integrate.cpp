@@ -21,7 +21,8 @@ namespace EPM
                    const Vector_2D& aerArray, const Aircraft &AC, const Emission &EI, \
                    double &Ice_rad, double &Ice_den, double &Soot_den, double &H2O_mol, \
                    double &SO4g_mol, double &SO4l_mol, AIM::Aerosol &SO4Aer, AIM::Aerosol &IceAer, \
-                   double &Area, double &Ab0, double &Tc0, const bool CHEMISTRY, double ambientLapseRate, std::string micro_data_out )
+                   double &Area, double &Ab0, double &Tc0, const bool CHEMISTRY, double ambientLapseRate, std::string micro_data_out, \
+                   bool stiffSolver, ODEStats* odeStats )
     {
 
         /* Get mean vortex displacement in [m] */
@@ -38,7 +39,8 @@ namespace EPM
          * The minus sign is because delta_z is the distance pointing down */
 
         SimStatus EPM_RC = RunMicrophysics( temperature_K, pressure_Pa, relHumidity_w, varArray, aerArray, AC, EI, delta_T_ad, delta_T, \
-                                      Ice_rad, Ice_den, Soot_den, H2O_mol, SO4g_mol, SO4l_mol, SO4Aer, IceAer, Area, Ab0, Tc0, CHEMISTRY, ambientLapseRate, micro_data_out );
+                                      Ice_rad, Ice_den, Soot_den, H2O_mol, SO4g_mol, SO4l_mol, SO4Aer, IceAer, Area, Ab0, Tc0, CHEMISTRY, ambientLapseRate, micro_data_out, \
+                                      stiffSolver, odeStats );
 
         return EPM_RC;
 
@@ -46,7 +48,8 @@ namespace EPM
 
     /* TODO: Make the original integrate function work with the new EPMOutput struct directly, and then delete this function.*/
     std::pair<EPMOutput, SimStatus> Integrate(double tempInit_K, double pressure_Pa, double rhw, double bypassArea, double coreExitTemp, double varArray[], 
-                            const Vector_2D& aerArray, const Aircraft& AC,const Emission& EI, bool CHEMISTRY, double ambientLapseRate, std::string micro_data_out) 
+                            const Vector_2D& aerArray, const Aircraft& AC,const Emission& EI, bool CHEMISTRY, double ambientLapseRate, std::string micro_data_out,
+                            bool stiffSolver) 
     {
         EPMOutput out;
         out.finalTemp = tempInit_K;
@@ -54,7 +57,8 @@ namespace EPM
         out.coreExitTemp = coreExitTemp;
         SimStatus returnCode = Integrate(out.finalTemp, pressure_Pa, rhw, varArray, aerArray, AC, EI, out.iceRadius,
                                     out.iceDensity, out.sootDensity, out.H2O_mol, out.SO4g_mol, out.SO4l_mol,
-                                    out.SO4Aer, out.IceAer, out.area, out.bypassArea, out.coreExitTemp, CHEMISTRY, ambientLapseRate, micro_data_out);
+                                    out.SO4Aer, out.IceAer, out.area, out.bypassArea, out.coreExitTemp, CHEMISTRY, ambientLapseRate, micro_data_out,
+                                    stiffSolver, &out.odeStats);
         return std::make_pair(out, returnCode);
     }
 
@@ -64,7 +68,8 @@ namespace EPM
                          double delta_T_ad, double delta_T, double &Ice_rad, double &Ice_den, \
                          double &Soot_den, double &H2O_mol, double &SO4g_mol, double &SO4l_mol, \
                          AIM::Aerosol &SO4Aer, AIM::Aerosol &IceAer, double &Area, double &Ab0, double &Tc0, 
-                         const bool CHEMISTRY, double ambientLapseRate, std::string micro_data_out )
+                         const bool CHEMISTRY, double ambientLapseRate, std::string micro_data_out, \
+                         bool stiffSolver, ODEStats* odeStats )
     {
     
         double relHumidity_i_Amb, relHumidity_i_postVortex, relHumidity_i_Final;
@@ -489,7 +494,8 @@ namespace EPM
         Vector_2D obs_Var;
         Vector_1D obs_Time;
 
-        EPM::streamingObserver observer( obs_Var, obs_Time, EPM_ind, micro_data_out, 2 );
+        /* Only the most recent state is needed here, the trajectory is streamed to micro_data_out */
+        EPM::streamingObserver observer( obs_Var, obs_Time, EPM_ind, micro_data_out, 2, 1, EPM_MICRO_SAVE_EVERY );
 
         /* Creating ode's right hand side */
         gas_aerosol_rhs rhs( temperature_K, pressure_Pa, delta_T, H2O_amb, SO4_amb, SO4l_amb, SO4g_amb, HNO3_amb, Soot_amb, EI.getSootRad(), KernelSO4Soot);
@@ -500,6 +506,11 @@ namespace EPM
         /* Current time step in s */
         double currTimeStep;
 
+        /* ODE step statistics, and step size carried over between intervals by the stiff integrator */
+        ODEStats localStats;
+        ODEStats& stats = odeStats ? *odeStats : localStats;
+        double stiffTimeStep = -1.0;
+
         /* Dilution factor */
         double dilFactor, dilFactor_b;
 
@@ -531,22 +542,32 @@ namespace EPM
                 SO4l_b = 0.0;
             }
             else {
-                dilFactor_b = observer.m_states[observer.m_states.size()-1][EPM_ind_Trac];
-                SO4l_b = observer.m_states[observer.m_states.size()-1][EPM_ind_SO4l];
-                T_b = observer.m_states[observer.m_states.size()-1][EPM_ind_T];
-                P_b = observer.m_states[observer.m_states.size()-1][EPM_ind_P];
+                dilFactor_b = observer.lastState()[EPM_ind_Trac];
+                SO4l_b = observer.lastState()[EPM_ind_SO4l];
+                T_b = observer.lastState()[EPM_ind_T];
+                P_b = observer.lastState()[EPM_ind_P];
             }
 
             /* Diffusion + Water uptake */
-            if ( adaptiveStep == 1 ) {
-                totSteps += boost::numeric::odeint::integrate_adaptive( boost::numeric::odeint::make_controlled< error_stepper_type >( EPM_ATOLS, EPM_RTOLS ), rhs, x, timeArray[iTime], timeArray[iTime+1], currTimeStep/100.0, observer );
+            if ( stiffSolver ) {
+                /* Continue with the step size the previous interval ended with, rather than restarting at currTimeStep/100 */
+                if ( stiffTimeStep <= 0.0 )
+                    stiffTimeStep = currTimeStep/100.0;
+                totSteps += integrateStiff( rhs, x, timeArray[iTime], timeArray[iTime+1], stiffTimeStep, observer, EPM_ATOLS, EPM_RTOLS, stats );
+            }
+            else if ( adaptiveStep == 1 ) {
+                UInt nSteps = boost::numeric::odeint::integrate_adaptive( boost::numeric::odeint::make_controlled< error_stepper_type >( EPM_ATOLS, EPM_RTOLS ), rhs, x, timeArray[iTime], timeArray[iTime+1], currTimeStep/100.0, observer );
+                stats.nSteps += nSteps;
+                totSteps += nSteps;
             }
             else {
-                totSteps += boost::numeric::odeint::integrate( rhs, x, timeArray[iTime], timeArray[iTime+1], currTimeStep/100.0, observer );
+                UInt nSteps = boost::numeric::odeint::integrate( rhs, x, timeArray[iTime], timeArray[iTime+1], currTimeStep/100.0, observer );
+                stats.nSteps += nSteps;
+                totSteps += nSteps;
             }
             
-            dilFactor = observer.m_states[observer.m_states.size()-1][EPM_ind_Trac] / dilFactor_b;
-            SO4l = observer.m_states[observer.m_states.size()-1][EPM_ind_SO4l] ;
+            dilFactor = observer.lastState()[EPM_ind_Trac] / dilFactor_b;
+            SO4l = observer.lastState()[EPM_ind_SO4l] ;
 
             n_air = physConst::Na * x[EPM_ind_P]/(physConst::R * x[EPM_ind_T] * 1.0e6);
             n_air_prev = physConst::Na *  P_b/(physConst::R * T_b * 1.0e6);
@@ -554,11 +575,11 @@ namespace EPM
             nPDF_new = ( SO4l*n_air - SO4l_b*n_air_prev);
 
             if ( nPDF_new >= 1.0E-20 ) {
-                x_star   = AIM::x_star( observer.m_states[observer.m_states.size()-1][EPM_ind_T], observer.m_states[observer.m_states.size()-1][EPM_ind_H2O] * n_air, std::max(x[EPM_ind_SO4g] * n_air, 0.0) );
-                nTot     = AIM::nTot( observer.m_states[observer.m_states.size()-1][EPM_ind_T], x_star, observer.m_states[observer.m_states.size()-1][EPM_ind_H2O] * n_air, std::max(x[EPM_ind_SO4g]*n_air, 0.0) );
+                x_star   = AIM::x_star( observer.lastState()[EPM_ind_T], observer.lastState()[EPM_ind_H2O] * n_air, std::max(x[EPM_ind_SO4g] * n_air, 0.0) );
+                nTot     = AIM::nTot( observer.lastState()[EPM_ind_T], x_star, observer.lastState()[EPM_ind_H2O] * n_air, std::max(x[EPM_ind_SO4g]*n_air, 0.0) );
                 nTot     = ( nTot <= 1.0E-20 ) ? 1.0E-20 : nTot;
                 radSO4   = AIM::radCluster( x_star, nTot );
-//                rho_Sulf = AIM::rho( x_star, observer.m_states[observer.m_states.size()-1][EPM_ind_T]);
+//                rho_Sulf = AIM::rho( x_star, observer.lastState()[EPM_ind_T]);
 
                 if ( radSO4 >= 1.0E-10 ) {
                     AIM::Aerosol nPDF_SO4_new( SO4_rJ, SO4_rE, nPDF_new, radSO4, sSO4, "lognormal" );
@@ -577,13 +598,13 @@ namespace EPM
 
             /* Aerosol PDF @ 3mins */
             if ( iTime == iTime_3mins ) {
-                PartRad_3mins  = observer.m_states[observer.m_states.size()-1][EPM_ind_ParR];
-                PartDens_3mins = observer.m_states[observer.m_states.size()-1][EPM_ind_Part] * n_air;
-                H2OMol_3mins   = observer.m_states[observer.m_states.size()-1][EPM_ind_H2O]; //* observer.m_states[observer.m_states.size()-1][EPM_ind_P] / ( physConst::kB * observer.m_states[observer.m_states.size()-1][EPM_ind_T] ) * 1.0E-06;
-                Tracer_3mins   = observer.m_states[observer.m_states.size()-1][EPM_ind_Trac];
+                PartRad_3mins  = observer.lastState()[EPM_ind_ParR];
+                PartDens_3mins = observer.lastState()[EPM_ind_Part] * n_air;
+                H2OMol_3mins   = observer.lastState()[EPM_ind_H2O]; //* observer.lastState()[EPM_ind_P] / ( physConst::kB * observer.lastState()[EPM_ind_T] ) * 1.0E-06;
+                Tracer_3mins   = observer.lastState()[EPM_ind_Trac];
 //                SO4pdf_3mins   = nPDF_SO4;
-                SO4l_3mins     = observer.m_states[observer.m_states.size()-1][EPM_ind_SO4l]; // * observer.m_states[observer.m_states.size()-1][EPM_ind_P] / ( physConst::kB * observer.m_states[observer.m_states.size()-1][EPM_ind_T] * 1.0E+06 ) ;
-                SO4g_3mins     = observer.m_states[observer.m_states.size()-1][EPM_ind_SO4g]; // * observer.m_states[observer.m_states.size()-1][EPM_ind_P] / ( physConst::kB * observer.m_states[observer.m_states.size()-1][EPM_ind_T] * 1.0E+06 ) ;
+                SO4l_3mins     = observer.lastState()[EPM_ind_SO4l]; // * observer.lastState()[EPM_ind_P] / ( physConst::kB * observer.lastState()[EPM_ind_T] * 1.0E+06 ) ;
+                SO4g_3mins     = observer.lastState()[EPM_ind_SO4g]; // * observer.lastState()[EPM_ind_P] / ( physConst::kB * observer.lastState()[EPM_ind_T] * 1.0E+06 ) ;
 //                pSO4pdf_3mins  = new AIM::Aerosol( nPDF_SO4 );
                 pSO4pdf_3mins.updatePdf( nPDF_SO4.getPDF() );
         
@@ -591,6 +612,13 @@ namespace EPM
 
         }
        
+#ifdef DEBUG
+        std::cout << "EPM ODE steps: " << stats.nSteps;
+        if ( stiffSolver )
+            std::cout << " (rosenbrock4, " << stats.nRejected << " rejected, " << stats.nJacobians << " Jacobians)";
+        std::cout << std::endl;
+#endif /* DEBUG */
+
 #pragma omp critical
         {
             observer.print2File();
@@ -152,17 +152,28 @@ namespace EPM
 
     } /* End of odeSolver::getState */
 
-    streamingObserver::streamingObserver( Vector_2D &states, Vector_1D &times, std::vector<UInt> indices, std::string filename, UInt write_every ):
+    streamingObserver::streamingObserver( Vector_2D &states, Vector_1D &times, std::vector<UInt> indices, std::string filename, UInt write_every, \
+                                          UInt maxStates, UInt saveEvery ):
         m_write_every( write_every ),
         fileName( filename ),
         m_states( states ),
         m_times( times ),
-        m_indices( indices )
+        m_indices( indices ),
+        m_record( std::make_shared<Record>() )
 
     {
 
         /* Constructor */
 
+        m_record->maxStates = maxStates;
+        m_record->saveEvery = saveEvery;
+
+        if ( !fileName.empty() && saveEvery > 0 ) {
+            m_record->file.open( fileName );
+            if ( m_record->file.is_open() )
+                writeHeader( m_record->file );
+        }
+
     } /* End of streamingObserver::streamingObserver */
 
     streamingObserver::~streamingObserver( )
@@ -183,6 +194,7 @@ namespace EPM
         m_states = obs.m_states;
         m_times = obs.m_times;
         fileName = obs.fileName;
+        m_record = obs.m_record;
         return *this;
 
     } /* End of streamingObserver::operator= */
@@ -192,187 +204,224 @@ namespace EPM
 
         if ( ( m_count % m_write_every ) == 0 ) {
         
-            m_states.push_back( x );
-            m_times.push_back( t );
+            Record &record = *m_record;
+
+            if ( record.maxStates == 0 ) {
+                m_states.push_back( x );
+                m_times.push_back( t );
+            }
+            else if ( m_states.size() < record.maxStates ) {
+                m_states.push_back( x );
+                m_times.push_back( t );
+            }
+            else {
+                /* Overwrite the oldest state in place, without reallocating */
+                const UInt iSlot = record.nRecorded % record.maxStates;
+                std::copy( x.begin(), x.end(), m_states[iSlot].begin() );
+                m_times[iSlot] = t;
+            }
+
+            if ( !record.waterSat && isWaterSaturated( x ) )
+                record.waterSat = true;
+
+            if ( record.file.is_open() && ( record.nRecorded % record.saveEvery ) == 0 )
+                writeState( record.file, x, t );
 
+            record.nRecorded++;
             m_count++;
 
         }
 
     } /* End of streamingObserver::operator() */
 
+    const Vector_1D& streamingObserver::lastState( ) const
+    {
+
+        const UInt maxStates = m_record->maxStates;
+        const UInt iLast = m_record->nRecorded - 1;
+        return m_states[ maxStates == 0 ? iLast : iLast % maxStates ];
+
+    } /* End of streamingObserver::lastState */
+
+    double streamingObserver::lastTime( ) const
+    {
+
+        const UInt maxStates = m_record->maxStates;
+        const UInt iLast = m_record->nRecorded - 1;
+        return m_times[ maxStates == 0 ? iLast : iLast % maxStates ];
+
+    } /* End of streamingObserver::lastTime */
+
     double streamingObserver::getLastElement( ) const
     {
 
-        return m_states[m_count][0];
+        return lastState()[0];
 
     } /* End of streamingObserver::getLastElement */
 
     void streamingObserver::print2File( ) const
     {
 
-        std::ofstream file (fileName);
+        /* States were already written as they were recorded */
+        if ( m_record->saveEvery == 0 || fileName.empty() )
+            return;
 
-        if ( file.is_open() == 0 ) {
+        if ( m_record->file.is_open() == 0 ) {
 
             std::cout << "\nIn streamingObserver::streamingObserver: Couldn't open " << fileName << "!\n";
 
         }
         else {
 
-            unsigned int counter;
-            const char* sep = ", ";
-            const unsigned int prec = 6;
-
-            double n_air; 
-
-            /* Variable list: 
-             * - Temperature [K]
-             * - Water molecular concentration [molecules/cm^3] 
-             * - Saturation with respect to ice [-]
-             * - Saturation with respect to liquid water [-]
-             * - TBC ...
-             * - */
-
-            file << std::setw(prec+8) << "Time [s], ";
-            file << std::setw(prec+8) << "Tracer [-], ";
-            file << std::setw(prec+8) << "Temp. [K], ";
-            file << std::setw(prec+8) << "Pres. [Pa], ";
-            file << std::setw(prec+8) << "H2O [/cm3], ";
-            file << std::setw(prec+8) << "RH_i [-], ";
-            file << std::setw(prec+8) << "RH_w [-], ";
-            file << std::setw(prec+8) << "SO4 [/cm3], ";
-            file << std::setw(prec+8) << "SO4g [/cm3], ";
-            file << std::setw(prec+8) << "SO4l [/cm3], ";
-            file << std::setw(prec+8) << "SO4s [/cm3], ";
-            file << std::setw(prec+8) << "SO4Sat [-], ";
-            file << std::setw(prec+8) << "HNO3 [/cm3], ";
-            file << std::setw(prec+8) << "HNO3Sat[-], ";
-            file << std::setw(prec+8) << "Part[/cm3], ";
-            file << std::setw(prec+8) << "Rad[mum], ";
-            file << std::setw(prec+8) << "Theta1[-], ";
-            file << std::setw(prec+8) << "Theta2[-], ";
-
-            /* New line */
-            file << "\n";
-            file << std::setfill('-') << std::setw(18*(prec+8)) << "-";
-
-            file << std::setfill(' ');
-
-            for ( counter = 0; counter < m_states.size(); counter++ ) {
-                /* New line */
-                file << "\n";
-
-                file << std::scientific << std::setprecision(prec) << std::setfill(' ');
-
-                /* Output data */
-
-                /* Print time [s] */
-                file << m_times[counter];
-                file << sep;
-
-                /* Print tracer dilution ratio [-] */
-                file << m_states[counter][m_indices[0]];
-                file << sep;
-
-                /* Print temperature [K] */
-                file << m_states[counter][m_indices[1]];
-                file << sep;
-                
-                /* Print pressure [Pa] */
-                file << m_states[counter][m_indices[2]];
-                file << sep;
-                
-                /* Compute number concentration of air for conversions sake */
-                n_air = m_states[counter][m_indices[2]] / (physConst::kB * m_states[counter][m_indices[1]] * 1.0e6) ; 
-
-                /* Print gaseous water molecular concentration [molec/cm^3] */
-                file << m_states[counter][m_indices[3]] * n_air ;
-                file << sep;
-
-                /* Print rel. humidities [-] */
-                file << m_states[counter][m_indices[3]] * m_states[counter][m_indices[2]] / physFunc::pSat_H2Os( m_states[counter][m_indices[1]] );
-                file << sep;
-                file << m_states[counter][m_indices[3]] * m_states[counter][m_indices[2]] / physFunc::pSat_H2Ol( m_states[counter][m_indices[1]] );
-                file << sep;
-                
-                /* Print gaseous SO4 molecular concentration [molec/cm^3] */
-                file << m_states[counter][m_indices[4]] * n_air ;
-                file << sep;
-                
-                /* Print gaseous SO4 gaseous molecular concentration [molec/cm^3] */
-                file << m_states[counter][m_indices[6]] * n_air;
-                file << sep;
-
-                /* Print gaseous SO4 liquid molecular concentration [molec/cm^3] */
-                file << m_states[counter][m_indices[5]] * n_air;
-                file << sep;
-                
-                /* Print gaseous SO4 on part [molec/cm^3] */
-                file << m_states[counter][m_indices[7]] * m_states[counter][m_indices[2]] / ( physConst::kB * m_states[counter][m_indices[1]] * 1.0E+06 ) ;
-                file << sep;
-
-                /* Print SO4 saturation [-] */
-                file << ( m_states[counter][m_indices[5]] + m_states[counter][m_indices[6]] ) * m_states[counter][m_indices[2]] / physFunc::pSat_H2SO4( m_states[counter][m_indices[1]] );
-                file << sep;
-                
-                /* Print gaseous HNO3 molecular concentration [molec/cm^3] */
-                file << m_states[counter][m_indices[8]] * m_states[counter][m_indices[2]] / ( physConst::kB * m_states[counter][m_indices[1]] * 1.0E+06 ) ;
-                file << sep;
-                
-                /* Print HNO3 saturation [-] */
-                file << m_states[counter][m_indices[8]] * physConst::kB * m_states[counter][m_indices[1]] * 1.0E+06 / physFunc::pSat_HNO3( m_states[counter][m_indices[1]], \
-                        m_states[counter][m_indices[2]] * physConst::kB * m_states[counter][m_indices[1]] * 1.0E+06 );
-                file << sep;
-                
-                /* Print particle concentration [#/cm^3] */
-                file << m_states[counter][m_indices[9]] * n_air;
-                file << sep;
-                
-                /* Print particle radius [mum] */
-                file << m_states[counter][m_indices[10]] * 1.0E+06;
-                file << sep;
-                
-                /* Print soot coverage [-] */
-                file << m_states[counter][m_indices[11]];
-                file << sep;
-                
-                /* Print soot coverage [-] */
-                file << m_states[counter][m_indices[12]];
-                file << sep;
-
-            }
-
-            file << "\n";
-            file.close();
+            m_record->file << "\n";
+            m_record->file.close();
 
         }
 
     } /* End of streamingObserver::print2File */
 
-    bool streamingObserver::checkwatersat( ) const
+    void streamingObserver::writeHeader( std::ostream &file ) const
     {
 
-        /* Variable definitions */
-        int counter = 0;
-        float RHw;
-        bool watersup { false };
+        const unsigned int prec = 6;
+
+        /* Variable list: 
+         * - Temperature [K]
+         * - Water molecular concentration [molecules/cm^3] 
+         * - Saturation with respect to ice [-]
+         * - Saturation with respect to liquid water [-]
+         * - TBC ...
+         * - */
+
+        file << std::setw(prec+8) << "Time [s], ";
+        file << std::setw(prec+8) << "Tracer [-], ";
+        file << std::setw(prec+8) << "Temp. [K], ";
+        file << std::setw(prec+8) << "Pres. [Pa], ";
+        file << std::setw(prec+8) << "H2O [/cm3], ";
+        file << std::setw(prec+8) << "RH_i [-], ";
+        file << std::setw(prec+8) << "RH_w [-], ";
+        file << std::setw(prec+8) << "SO4 [/cm3], ";
+        file << std::setw(prec+8) << "SO4g [/cm3], ";
+        file << std::setw(prec+8) << "SO4l [/cm3], ";
+        file << std::setw(prec+8) << "SO4s [/cm3], ";
+        file << std::setw(prec+8) << "SO4Sat [-], ";
+        file << std::setw(prec+8) << "HNO3 [/cm3], ";
+        file << std::setw(prec+8) << "HNO3Sat[-], ";
+        file << std::setw(prec+8) << "Part[/cm3], ";
+        file << std::setw(prec+8) << "Rad[mum], ";
+        file << std::setw(prec+8) << "Theta1[-], ";
+        file << std::setw(prec+8) << "Theta2[-], ";
+
+        /* New line */
+        file << "\n";
+        file << std::setfill('-') << std::setw(18*(prec+8)) << "-";
+
+        file << std::setfill(' ');
+
+    } /* End of streamingObserver::writeHeader */
+
+    void streamingObserver::writeState( std::ostream &file, const Vector_1D &x, double t ) const
+    {
 
-        /* Loop over until RHw >= 1.0 */
-        while ( !watersup && counter < m_states.size() ) {
+        const char* sep = ", ";
+        const unsigned int prec = 6;
 
-            /* Check value of RHw and update watersub */
-            RHw = m_states[counter][m_indices[3]] * m_states[counter][m_indices[2]] / physFunc::pSat_H2Ol( m_states[counter][m_indices[1]] );
-            if ( RHw >= 1.0 ) {
-                watersup = true;
-            }
+        /* New line */
+        file << "\n";
 
-            /* Iterate the counter */
-            counter += 1;
+        file << std::scientific << std::setprecision(prec) << std::setfill(' ');
 
-        }
+        /* Output data */
+
+        /* Print time [s] */
+        file << t;
+        file << sep;
+
+        /* Print tracer dilution ratio [-] */
+        file << x[m_indices[0]];
+        file << sep;
+
+        /* Print temperature [K] */
+        file << x[m_indices[1]];
+        file << sep;
+        
+        /* Print pressure [Pa] */
+        file << x[m_indices[2]];
+        file << sep;
+        
+        /* Compute number concentration of air for conversions sake */
+        double n_air = x[m_indices[2]] / (physConst::kB * x[m_indices[1]] * 1.0e6) ; 
+
+        /* Print gaseous water molecular concentration [molec/cm^3] */
+        file << x[m_indices[3]] * n_air ;
+        file << sep;
+
+        /* Print rel. humidities [-] */
+        file << x[m_indices[3]] * x[m_indices[2]] / physFunc::pSat_H2Os( x[m_indices[1]] );
+        file << sep;
+        file << x[m_indices[3]] * x[m_indices[2]] / physFunc::pSat_H2Ol( x[m_indices[1]] );
+        file << sep;
+        
+        /* Print gaseous SO4 molecular concentration [molec/cm^3] */
+        file << x[m_indices[4]] * n_air ;
+        file << sep;
+        
+        /* Print gaseous SO4 gaseous molecular concentration [molec/cm^3] */
+        file << x[m_indices[6]] * n_air;
+        file << sep;
+
+        /* Print gaseous SO4 liquid molecular concentration [molec/cm^3] */
+        file << x[m_indices[5]] * n_air;
+        file << sep;
+        
+        /* Print gaseous SO4 on part [molec/cm^3] */
+        file << x[m_indices[7]] * x[m_indices[2]] / ( physConst::kB * x[m_indices[1]] * 1.0E+06 ) ;
+        file << sep;
+
+        /* Print SO4 saturation [-] */
+        file << ( x[m_indices[5]] + x[m_indices[6]] ) * x[m_indices[2]] / physFunc::pSat_H2SO4( x[m_indices[1]] );
+        file << sep;
+        
+        /* Print gaseous HNO3 molecular concentration [molec/cm^3] */
+        file << x[m_indices[8]] * x[m_indices[2]] / ( physConst::kB * x[m_indices[1]] * 1.0E+06 ) ;
+        file << sep;
+        
+        /* Print HNO3 saturation [-] */
+        file << x[m_indices[8]] * physConst::kB * x[m_indices[1]] * 1.0E+06 / physFunc::pSat_HNO3( x[m_indices[1]], \
+                x[m_indices[2]] * physConst::kB * x[m_indices[1]] * 1.0E+06 );
+        file << sep;
+        
+        /* Print particle concentration [#/cm^3] */
+        file << x[m_indices[9]] * n_air;
+        file << sep;
+        
+        /* Print particle radius [mum] */
+        file << x[m_indices[10]] * 1.0E+06;
+        file << sep;
+        
+        /* Print soot coverage [-] */
+        file << x[m_indices[11]];
+        file << sep;
+        
+        /* Print soot coverage [-] */
+        file << x[m_indices[12]];
+        file << sep;
+
+    } /* End of streamingObserver::writeState */
+
+    bool streamingObserver::isWaterSaturated( const Vector_1D &x ) const
+    {
+
+        float RHw = x[m_indices[3]] * x[m_indices[2]] / physFunc::pSat_H2Ol( x[m_indices[1]] );
+        return ( RHw >= 1.0 );
+
+    } /* End of streamingObserver::isWaterSaturated */
+
+    bool streamingObserver::checkwatersat( ) const
+    {
 
-        return watersup;
+        /* Tracked as states are recorded, so that it also covers states that left the ring buffer */
+        return m_record->waterSat;
 
     } /* End of streamingObserver::checkwatersat */
 
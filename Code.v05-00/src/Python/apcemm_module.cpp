@@ -0,0 +1,186 @@
+// Python bindings of the LAGRID plume model: runs cases in-process and returns the time series diagnostics
+// as NumPy arrays, without starting the APCEMM executable or writing/reading netCDF files.
+#include <filesystem>
+#include <iomanip>
+#include <map>
+#include <memory>
+#include <optional>
+#include <sstream>
+#include <pybind11/pybind11.h>
+#include <pybind11/functional.h>
+#include <pybind11/numpy.h>
+#include <pybind11/stl.h>
+#include "Core/Input.hpp"
+#include "Core/Input_Mod.hpp"
+#include "Core/RunCase.hpp"
+#include "Core/PlumeObserver.hpp"
+#include "Core/Status.hpp"
+#include "YamlInputReader/YamlInputReader.hpp"
+
+namespace py = pybind11;
+
+namespace
+{
+    //Options of an input file, with the case stream built from them. The stream (e.g. a Sobol or Latin hypercube
+    //design) is built once per Options object and only rebuilt if its parameters are changed from Python.
+    struct PyOptions : OptInput {
+        const YamlInputReader::CaseStream& cases() const {
+            if ( !cases_ || casesParams_ != PARAMETER_PARAM_MAP ) {
+                cases_ = std::make_shared<const YamlInputReader::CaseStream>(*this);
+                casesParams_ = PARAMETER_PARAM_MAP;
+            }
+            return *cases_;
+        }
+        private:
+            mutable std::shared_ptr<const YamlInputReader::CaseStream> cases_;
+            mutable std::unordered_map<std::string, Vector_1D> casesParams_;
+    };
+
+    //Case id of a run_case call: the given one, or the next one not used in the output folder by this process
+    //or by the files of earlier runs. Only called with the GIL held, which serializes the calls.
+    unsigned int assignCaseId( const std::string& outputFolder, std::optional<unsigned int> caseId ) {
+        static std::map<std::string, unsigned int> nextIds;
+        auto it = nextIds.find(outputFolder);
+        if ( it == nextIds.end() ) it = nextIds.emplace(outputFolder, nextFreeCaseId(outputFolder)).first;
+        const unsigned int id = caseId ? *caseId : it->second;
+        it->second = std::max(it->second, id + 1);
+        return id;
+    }
+
+    //Records the diagnostics and, if given, forwards each of them to a Python callable
+    class PyRecorder : public PlumeRecorder {
+        public:
+            PyRecorder( bool fields, py::object callback ): PlumeRecorder(fields), callback_(std::move(callback)) { }
+            void observe( const PlumeDiagnostics& diag ) override {
+                PlumeRecorder::observe(diag);
+                if ( callback_.is_none() ) return;
+                //The model runs without the GIL
+                py::gil_scoped_acquire gil;
+                callback_(diagnosticsDict(diag));
+            }
+            static py::dict diagnosticsDict( const PlumeDiagnostics& diag ) {
+                py::dict d;
+                d["time"] = diag.time_s;
+                d["ice_mass"] = diag.iceMass;
+                d["number_ice"] = diag.numberIce;
+                d["width"] = diag.width;
+                d["depth"] = diag.depth;
+                d["intOD"] = diag.intOD;
+                if ( !diag.iceNumber.empty() ) {
+                    d["ice_number"] = field(diag.iceNumber);
+                    d["IWC"] = field(diag.IWC);
+                    d["extinction"] = field(diag.extinction);
+                    d["RHi"] = field(diag.RHi);
+                }
+                return d;
+            }
+            static py::array_t<double> field( const Vector_2D& f ) {
+                const std::size_t ny = f.size(), nx = ny ? f[0].size() : 0;
+                py::array_t<double> a(std::vector<std::size_t>{ ny, nx });
+                auto view = a.mutable_unchecked<2>();
+                for ( std::size_t j = 0; j < ny; j++ )
+                    for ( std::size_t i = 0; i < nx; i++ ) view(j, i) = f[j][i];
+                return a;
+            }
+        private:
+            py::object callback_;
+    };
+
+    py::array_t<double> series( const std::vector<PlumeDiagnostics>& history, double PlumeDiagnostics::* member ) {
+        py::array_t<double> a(history.size());
+        auto view = a.mutable_unchecked<1>();
+        for ( std::size_t t = 0; t < history.size(); t++ ) view(t) = history[t].*member;
+        return a;
+    }
+
+    py::array_t<double> fieldSeries( const std::vector<PlumeDiagnostics>& history, Vector_2D PlumeDiagnostics::* member ) {
+        const std::size_t nt = history.size();
+        const std::size_t ny = nt ? (history[0].*member).size() : 0;
+        const std::size_t nx = ny ? (history[0].*member)[0].size() : 0;
+        py::array_t<double> a(std::vector<std::size_t>{ nt, ny, nx });
+        auto view = a.mutable_unchecked<3>();
+        for ( std::size_t t = 0; t < nt; t++ ) {
+            const Vector_2D& f = history[t].*member;
+            //The grid is remapped during the run, fields of another size are cut or zero-padded
+            for ( std::size_t j = 0; j < ny; j++ )
+                for ( std::size_t i = 0; i < nx; i++ )
+                    view(t, j, i) = ( j < f.size() && i < f[j].size() ) ? f[j][i] : 0.0;
+        }
+        return a;
+    }
+
+    py::dict runPyCase( const PyOptions& options, const std::unordered_map<std::string, double>& params,
+                      std::optional<unsigned int> requestedId, bool fields, py::object callback ) {
+        //Parameters not given are taken from the first case of the input file
+        std::unordered_map<std::string, double> caseParams;
+        const YamlInputReader::CaseStream& cases = options.cases();
+        if ( cases.size() > 0 ) caseParams = cases[0];
+        for ( const auto& p: params ) caseParams[p.first] = p.second;
+
+        const unsigned int caseId = assignCaseId( options.SIMULATION_OUTPUT_FOLDER, requestedId );
+
+        //Same file name as the executable writes for this case id
+        std::stringstream ss;
+        ss << std::setw(6) << std::setfill('0') << caseId;
+        const std::filesystem::path folder( options.SIMULATION_OUTPUT_FOLDER );
+        const std::string micro = ( folder / ( "Micro" + ss.str() + ".out" ) ).string();
+        const Input input( caseId, caseParams, "", "", "", micro, "" );
+        OptInput caseOptions = options;
+        caseOptions.TS_AERO_FILENAME = "ts_aerosol_case" + std::to_string(caseId) + "_hhmm.nc";
+
+        PyRecorder recorder( fields, std::move(callback) );
+        SimStatus status;
+        {
+            py::gil_scoped_release release;
+            status = ::runCase( caseOptions, input, recorder );
+        }
+
+        py::dict result;
+        result["case_id"] = caseId;
+        result["status"] = statusName(status);
+        result["time"] = series(recorder.history, &PlumeDiagnostics::time_s);
+        result["ice_mass"] = series(recorder.history, &PlumeDiagnostics::iceMass);
+        result["number_ice"] = series(recorder.history, &PlumeDiagnostics::numberIce);
+        result["width"] = series(recorder.history, &PlumeDiagnostics::width);
+        result["depth"] = series(recorder.history, &PlumeDiagnostics::depth);
+        result["intOD"] = series(recorder.history, &PlumeDiagnostics::intOD);
+        if ( fields ) {
+            result["ice_number"] = fieldSeries(recorder.history, &PlumeDiagnostics::iceNumber);
+            result["IWC"] = fieldSeries(recorder.history, &PlumeDiagnostics::IWC);
+            result["extinction"] = fieldSeries(recorder.history, &PlumeDiagnostics::extinction);
+            result["RHi"] = fieldSeries(recorder.history, &PlumeDiagnostics::RHi);
+        }
+        return result;
+    }
+}
+
+PYBIND11_MODULE(apcemm, m) {
+    m.doc() = "In-process interface to the APCEMM LAGRID plume model";
+
+    py::class_<PyOptions>(m, "Options", "Simulation options, as read from an APCEMM input file")
+        .def_readwrite("output_folder", &OptInput::SIMULATION_OUTPUT_FOLDER)
+        .def_readwrite("num_threads", &OptInput::SIMULATION_OMP_NUM_THREADS)
+        .def_readwrite("epm_cache_folder", &OptInput::SIMULATION_EPM_CACHE_FOLDER)
+        .def_readwrite("epm_stiff_solver", &OptInput::ADV_EPM_STIFF_SOLVER)
+        .def_readwrite("save_ts_aerosol", &OptInput::TS_AERO, "Write the ts_aerosol netCDF files")
+        .def_readwrite("ts_aerosol_freq", &OptInput::TS_AERO_FREQ, "Output frequency of the diagnostics [min], 0: every time step")
+        .def_readwrite("parameters", &OptInput::PARAMETER_PARAM_MAP)
+        .def("num_cases", []( const PyOptions& o ) { return o.cases().size(); })
+        .def("case", []( const PyOptions& o, std::size_t i ) { return o.cases().at(i); },
+             py::arg("index"), "Parameters of case index of the sweep / Monte Carlo set");
+
+    m.def("read_options", []( const std::string& fileName ) {
+            PyOptions options;
+            YamlInputReader::readYamlInputFile( options, std::filesystem::canonical(fileName).generic_string() );
+            return options;
+        }, py::arg("file_name"), "Reads an APCEMM input file");
+
+    m.def("run_case", &runPyCase, py::arg("options"), py::arg("params") = std::unordered_map<std::string, double>(),
+          py::arg("case_id") = py::none(), py::arg("fields") = false, py::arg("callback") = py::none(),
+          "Runs one case of the plume model and returns its time series diagnostics as NumPy arrays.\n"
+          "params overrides the parameters of the first case of the input file (keys as in Options.case(), e.g. TEMPERATURE, RHW).\n"
+          "case_id numbers the output files of the case. If not given, the next id not used in the output folder\n"
+          "(by this process or the files of earlier runs) is taken; the id is returned as result[\"case_id\"].\n"
+          "fields also returns the 2-D fields (time x y x x), callback is called with the diagnostics of every output time.\n"
+          "The GIL is released while the model runs, so that cases can run in Python threads.");
+}
@@ -0,0 +1,22 @@
+#include <algorithm>
+#include <numeric>
+#include <stdexcept>
+#include "Util/CaseScheduler.hpp"
+
+CaseTeams chooseCaseTeams( int coreBudget, std::size_t nCases, int maxThreadsPerCase, int requestedCases ) {
+    if ( coreBudget < 1 ) {
+        throw std::invalid_argument("chooseCaseTeams: the core budget must be at least 1");
+    }
+    const int maxConcurrent = static_cast<int>( std::max<std::size_t>( 1, std::min<std::size_t>( nCases, coreBudget ) ) );
+
+    CaseTeams teams;
+    teams.nConcurrentCases = requestedCases > 0 ? std::min( requestedCases, maxConcurrent ) : maxConcurrent;
+    teams.threadsPerCase = std::max( 1, std::min( coreBudget / teams.nConcurrentCases, maxThreadsPerCase ) );
+    return teams;
+}
+
+double caseUtilisation( const std::vector<double>& caseSeconds, int threadsPerCase, double wallSeconds, int coreBudget ) {
+    if ( wallSeconds <= 0 || coreBudget < 1 ) return 0;
+    const double busy = std::accumulate( caseSeconds.begin(), caseSeconds.end(), 0.0 ) * threadsPerCase;
+    return busy / ( wallSeconds * coreBudget );
+}
@@ -11,6 +11,10 @@
 /*                                                                  */
 /* ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ */
 
+#include <algorithm>
+#include <cctype>
+#include <random>
+#include <stdexcept>
 #include "Util/MC_Rand.hpp"
 
 void setSeed() {
@@ -36,4 +40,194 @@ template float fRand(const float fMin, const float fMax);
 template int fRand(const int fMin, const int fMax);
 template unsigned int fRand(const unsigned int fMin, const unsigned int fMax);
 
+namespace
+{
+
+    /* Primitive polynomials (degree s, coefficients a) and initial direction
+     * numbers m of dimensions 2 to SOBOL_MAX_DIM, from the new-joe-kuo-6.21201
+     * table of S. Joe and F. Y. Kuo, "Constructing Sobol sequences with better
+     * two-dimensional projections", SIAM J. Sci. Comput. 30, 2008. */
+    struct SobolPolynomial
+    {
+        unsigned int s;
+        unsigned int a;
+        std::uint32_t m[7];
+    };
+
+    const SobolPolynomial SOBOL_POLYNOMIALS[SOBOL_MAX_DIM - 1] = {
+        { 1,  0, { 1 } },
+        { 2,  1, { 1, 3 } },
+        { 3,  1, { 1, 3, 1 } },
+        { 3,  2, { 1, 1, 1 } },
+        { 4,  1, { 1, 1, 3, 3 } },
+        { 4,  4, { 1, 3, 5, 13 } },
+        { 5,  2, { 1, 1, 5, 5, 17 } },
+        { 5,  4, { 1, 1, 5, 5, 5 } },
+        { 5,  7, { 1, 1, 7, 11, 19 } },
+        { 5, 11, { 1, 1, 5, 1, 1 } },
+        { 5, 13, { 1, 1, 1, 3, 11 } },
+        { 5, 14, { 1, 3, 5, 5, 31 } },
+        { 6,  1, { 1, 3, 3, 9, 7, 49 } },
+        { 6, 13, { 1, 1, 1, 15, 21, 21 } },
+        { 6, 16, { 1, 3, 1, 13, 27, 49 } },
+        { 6, 19, { 1, 1, 1, 15, 7, 5 } },
+        { 6, 22, { 1, 3, 1, 15, 13, 25 } },
+        { 6, 25, { 1, 1, 5, 5, 19, 61 } },
+        { 7,  1, { 1, 3, 7, 11, 23, 15, 103 } },
+        { 7,  4, { 1, 3, 7, 13, 13, 15, 69 } },
+        { 7,  7, { 1, 1, 3, 13, 7, 35, 63 } },
+        { 7,  8, { 1, 3, 5, 9, 1, 25, 53 } },
+        { 7, 14, { 1, 3, 1, 13, 9, 35, 107 } },
+        { 7, 19, { 1, 3, 1, 5, 27, 61, 31 } },
+        { 7, 21, { 1, 1, 5, 11, 19, 41, 61 } },
+        { 7, 28, { 1, 3, 5, 3, 3, 13, 69 } },
+        { 7, 31, { 1, 1, 7, 13, 1, 19, 1 } },
+        { 7, 32, { 1, 3, 7, 5, 13, 19, 59 } },
+        { 7, 37, { 1, 1, 3, 9, 25, 29, 41 } },
+        { 7, 41, { 1, 3, 5, 13, 23, 1, 55 } },
+        { 7, 42, { 1, 3, 7, 3, 13, 59, 17 } },
+        { 7, 50, { 1, 3, 1, 3, 5, 53, 69 } },
+        { 7, 55, { 1, 1, 5, 5, 23, 33, 13 } },
+        { 7, 56, { 1, 1, 7, 7, 1, 61, 123 } },
+        { 7, 59, { 1, 1, 7, 9, 13, 61, 49 } },
+        { 7, 62, { 1, 3, 3, 5, 3, 55, 33 } },
+    };
+
+    const unsigned int SOBOL_BITS = 32;
+
+    /* Direction numbers V_1 ... V_32 of Sobol dimension iDim (starting at 0) */
+    std::vector<std::uint32_t> sobolDirections( const std::size_t iDim ) {
+        std::vector<std::uint32_t> V( SOBOL_BITS );
+        if ( iDim == 0 ) {
+            for ( unsigned int i = 0; i < SOBOL_BITS; i++ )
+                V[i] = std::uint32_t(1) << ( SOBOL_BITS - 1 - i );
+            return V;
+        }
+
+        const SobolPolynomial &poly = SOBOL_POLYNOMIALS[iDim - 1];
+        const unsigned int s = poly.s;
+        for ( unsigned int i = 0; i < s; i++ )
+            V[i] = poly.m[i] << ( SOBOL_BITS - 1 - i );
+        for ( unsigned int i = s; i < SOBOL_BITS; i++ ) {
+            V[i] = V[i - s] ^ ( V[i - s] >> s );
+            for ( unsigned int k = 1; k < s; k++ )
+                V[i] ^= ( ( poly.a >> ( s - 1 - k ) ) & 1 ) * V[i - k];
+        }
+        return V;
+    }
+
+    /* SplitMix64 finalizer, used as a counter-based generator so that any
+     * sample can be drawn directly from (seed, run, dimension) */
+    std::uint64_t mix64( std::uint64_t x ) {
+        x += 0x9E3779B97F4A7C15ULL;
+        x = ( x ^ ( x >> 30 ) ) * 0xBF58476D1CE4E5B9ULL;
+        x = ( x ^ ( x >> 27 ) ) * 0x94D049BB133111EBULL;
+        return x ^ ( x >> 31 );
+    }
+
+    std::uint64_t hashSample( const std::uint64_t seed, const std::size_t iRun, const std::size_t iDim ) {
+        return mix64( mix64( seed ^ mix64( iDim ) ) + iRun );
+    }
+
+    double toUnit( const std::uint64_t h ) {
+        /* 53 random bits, in [0, 1) */
+        return ( h >> 11 ) * ( 1.0 / 9007199254740992.0 );
+    }
+
+}
+
+MCSampling parseMCSampling( const std::string &name ) {
+
+    std::string str = name;
+    std::transform( str.begin(), str.end(), str.begin(), \
+                    []( unsigned char c ) { return std::tolower(c); } );
+
+    if ( str == "random" )
+        return MCSampling::Random;
+    else if ( str == "sobol" )
+        return MCSampling::Sobol;
+    else if ( str == "lhs" || str == "latin hypercube" )
+        return MCSampling::LatinHypercube;
+    else
+        throw std::invalid_argument( "Unknown Monte Carlo sampling \"" + name + "\", expected random, sobol or lhs" );
+
+} /* End of parseMCSampling */
+
+std::string MCSamplingName( const MCSampling sampling ) {
+
+    switch ( sampling ) {
+        case MCSampling::Sobol:
+            return "sobol";
+        case MCSampling::LatinHypercube:
+            return "lhs";
+        default:
+            return "random";
+    }
+
+} /* End of MCSamplingName */
+
+std::uint64_t caseSeed( const std::uint64_t seed, const std::size_t iCase ) {
+
+    return mix64( mix64( seed ) ^ mix64( ~std::uint64_t( iCase ) ) );
+
+} /* End of caseSeed */
+
+MCDesign::MCDesign( const MCSampling sampling, const std::size_t nDims, \
+                    const std::size_t nRuns, const std::uint64_t seed ):
+    sampling_( sampling ),
+    nDims_( nDims ),
+    nRuns_( nRuns ),
+    seed_( seed )
+{
+
+    if ( sampling_ == MCSampling::Sobol ) {
+        if ( nDims_ > SOBOL_MAX_DIM )
+            throw std::invalid_argument( "Sobol sampling supports at most " + std::to_string( SOBOL_MAX_DIM ) \
+                                         + " varied parameters, got " + std::to_string( nDims_ ) );
+        if ( nRuns_ > ( std::size_t(1) << SOBOL_BITS ) )
+            throw std::invalid_argument( "Sobol sampling supports at most 2^32 runs" );
+
+        for ( std::size_t iDim = 0; iDim < nDims_; iDim++ ) {
+            directions_.push_back( sobolDirections( iDim ) );
+            shifts_.push_back( std::uint32_t( hashSample( seed_, nRuns_, iDim ) >> 32 ) );
+        }
+    }
+    else if ( sampling_ == MCSampling::LatinHypercube ) {
+        /* Fisher-Yates shuffle of the strata. Written out rather than
+         * std::shuffle, whose results differ between standard libraries. */
+        for ( std::size_t iDim = 0; iDim < nDims_; iDim++ ) {
+            std::mt19937_64 rng( mix64( seed_ ^ mix64( iDim ) ) );
+            std::vector<std::uint32_t> strata( nRuns_ );
+            for ( std::size_t i = 0; i < nRuns_; i++ )
+                strata[i] = i;
+            for ( std::size_t i = nRuns_; i > 1; i-- )
+                std::swap( strata[i - 1], strata[rng() % i] );
+            strata_.push_back( strata );
+        }
+    }
+
+} /* End of MCDesign::MCDesign */
+
+double MCDesign::operator()( const std::size_t iRun, const std::size_t iDim ) const {
+
+    switch ( sampling_ ) {
+        case MCSampling::Sobol:
+        {
+            std::uint32_t x = shifts_[iDim];
+            const std::vector<std::uint32_t> &V = directions_[iDim];
+            std::size_t n = iRun;
+            for ( unsigned int bit = 0; n != 0; bit++, n >>= 1 ) {
+                if ( n & 1 )
+                    x ^= V[bit];
+            }
+            return x * ( 1.0 / 4294967296.0 );
+        }
+        case MCSampling::LatinHypercube:
+            return ( strata_[iDim][iRun] + toUnit( hashSample( seed_, iRun, iDim ) ) ) / nRuns_;
+        default:
+            return toUnit( hashSample( seed_, iRun, iDim ) );
+    }
+
+} /* End of MCDesign::operator() */
+
 /* End of MC_Rand.cpp */
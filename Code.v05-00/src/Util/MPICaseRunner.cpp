@@ -0,0 +1,88 @@
+#include <algorithm>
+#include <fstream>
+#include <iomanip>
+#include "Util/MPICaseRunner.hpp"
+
+namespace MPICaseRunner
+{
+    namespace
+    {
+        const int TAG_RESULT = 1; //Worker -> master: result of the last case (or none) and request for the next one
+        const int TAG_CASE = 2;   //Master -> worker: next case index, or NO_CASE to stop
+        const double NO_CASE = -1;
+
+        CaseTiming timeCase( unsigned int iCase, int rank, const std::function<int(unsigned int)>& runCase ) {
+            const double start = MPI_Wtime();
+            const int status = runCase(iCase);
+            return CaseTiming{ iCase, rank, status, MPI_Wtime() - start };
+        }
+    }
+
+    std::vector<CaseTiming> runCases( unsigned int caseBegin, unsigned int caseEnd,
+                                      const std::function<int(unsigned int)>& runCase, MPI_Comm comm ) {
+        int rank, nRanks;
+        MPI_Comm_rank(comm, &rank);
+        MPI_Comm_size(comm, &nRanks);
+        std::vector<CaseTiming> timings;
+
+        if ( nRanks == 1 ) {
+            for ( unsigned int iCase = caseBegin; iCase < caseEnd; iCase++ ) {
+                timings.push_back(timeCase(iCase, rank, runCase));
+            }
+            return timings;
+        }
+
+        /* Messages are {case, status, seconds}, a case of NO_CASE carries no result */
+        double msg[3];
+        if ( rank == 0 ) {
+            unsigned int nextCase = caseBegin;
+            int nActive = nRanks - 1;
+            while ( nActive > 0 ) {
+                MPI_Status mpiStatus;
+                MPI_Recv(msg, 3, MPI_DOUBLE, MPI_ANY_SOURCE, TAG_RESULT, comm, &mpiStatus);
+                if ( msg[0] != NO_CASE ) {
+                    timings.push_back(CaseTiming{ static_cast<unsigned int>(msg[0]), mpiStatus.MPI_SOURCE, static_cast<int>(msg[1]), msg[2] });
+                }
+
+                double next = NO_CASE;
+                if ( nextCase < caseEnd ) {
+                    next = nextCase++;
+                }
+                else {
+                    nActive--;
+                }
+                MPI_Send(&next, 1, MPI_DOUBLE, mpiStatus.MPI_SOURCE, TAG_CASE, comm);
+            }
+            std::sort(timings.begin(), timings.end(),
+                      [](const CaseTiming& a, const CaseTiming& b) { return a.iCase < b.iCase; });
+        }
+        else {
+            msg[0] = NO_CASE;
+            while ( true ) {
+                MPI_Send(msg, 3, MPI_DOUBLE, 0, TAG_RESULT, comm);
+                double next;
+                MPI_Recv(&next, 1, MPI_DOUBLE, 0, TAG_CASE, comm, MPI_STATUS_IGNORE);
+                if ( next == NO_CASE ) break;
+
+                const CaseTiming timing = timeCase(static_cast<unsigned int>(next), rank, runCase);
+                msg[0] = timing.iCase;
+                msg[1] = timing.status;
+                msg[2] = timing.seconds;
+            }
+        }
+        return timings;
+    }
+
+    void writeTimings( std::ostream& os, const std::vector<CaseTiming>& timings ) {
+        os << "# case rank status seconds\n";
+        os << std::fixed << std::setprecision(3);
+        for ( const CaseTiming& t: timings ) {
+            os << t.iCase << " " << t.rank << " " << t.status << " " << t.seconds << "\n";
+        }
+    }
+
+    void writeTimings( const std::string& fileName, const std::vector<CaseTiming>& timings ) {
+        std::ofstream file(fileName);
+        writeTimings(file, timings);
+    }
+}
@@ -80,12 +80,36 @@ namespace YamlInputReader{
         if(input.SIMULATION_OMP_NUM_THREADS < 1){
             throw std::invalid_argument("OpenMP Num Threads (under SIMULATION MENU) cannot be less than 1!");
         }
+        //Optional, missing or 0 lets APCEMM split the threads between concurrent cases and threads per case
+        YAML::Node concurrentNode = simNode["Concurrent cases (int)"];
+        if(concurrentNode.IsDefined() && !concurrentNode.IsNull()) {
+            input.SIMULATION_CONCURRENT_CASES = parseIntString(concurrentNode.as<string>(), "Concurrent cases (int)");
+            if(input.SIMULATION_CONCURRENT_CASES < 0) {
+                throw std::invalid_argument("Concurrent cases (under SIMULATION MENU) cannot be negative!");
+            }
+        }
 
         YAML::Node paramSweepSubmenu = simNode["PARAM SWEEP SUBMENU"];
         input.SIMULATION_PARAMETER_SWEEP = parseBoolString(paramSweepSubmenu["Parameter sweep (T/F)"].as<string>(), "Parameter sweep (T/F");
         input.SIMULATION_MONTECARLO = parseBoolString(paramSweepSubmenu["Run Monte Carlo (T/F)"].as<string>(), "Run Monte Carlo (T/F)");
         input.SIMULATION_MCRUNS =  parseIntString(paramSweepSubmenu["Num Monte Carlo runs (int)"].as<string>(), "Num Monte Carlo runs (int)");
 
+        //Optional, default to independent random samples with a seed drawn here, so that it can be recorded
+        YAML::Node samplingNode = paramSweepSubmenu["Monte Carlo sampling [random/sobol/lhs] (string)"];
+        if(samplingNode.IsDefined() && !samplingNode.IsNull()) {
+            input.SIMULATION_MC_SAMPLING = parseMCSampling(trim(samplingNode.as<string>()));
+        }
+        //Any 64-bit value (0 included) is a seed. Missing, empty or "random" draws one, for non-reproducible runs.
+        YAML::Node seedNode = paramSweepSubmenu["Monte Carlo seed (uint64)"];
+        const string seedString = seedNode.IsDefined() && !seedNode.IsNull() ? trim(seedNode.as<string>()) : "";
+        if(seedString.empty() || seedString == "random") {
+            std::random_device rd;
+            input.SIMULATION_MC_SEED = (std::uint64_t(rd()) << 32) | rd();
+        }
+        else {
+            input.SIMULATION_MC_SEED = parseUInt64String(seedString, "Monte Carlo seed (uint64)");
+        }
+
         YAML::Node outputSubmenu = simNode["OUTPUT SUBMENU"];
         input.SIMULATION_OUTPUT_FOLDER = parseFileSystemPath(outputSubmenu["Output folder (string)"].as<string>());
         input.SIMULATION_OVERWRITE = parseBoolString(outputSubmenu["Overwrite if folder exists (T/F)"].as<string>(), "Overwrite if folder exists (T/F)");
@@ -109,53 +133,88 @@ namespace YamlInputReader{
         input.SIMULATION_BOXMODEL = parseBoolString(boxModelSubmenu["Run box model (T/F)"].as<string>(), "Run box model (T/F)");
         input.SIMULATION_BOX_FILENAME = boxModelSubmenu["netCDF filename format (string)"].as<string>();
 
+        //Optional, so that existing input files keep working. Empty or missing disables the EPM cache.
+        YAML::Node epmCacheNode = simNode["EPM cache folder (string)"];
+        std::string epmCacheFolder = epmCacheNode.IsDefined() && !epmCacheNode.IsNull() ? epmCacheNode.as<string>() : "";
+        input.SIMULATION_EPM_CACHE_FOLDER = epmCacheFolder.empty() ? "" : parseFileSystemPath(epmCacheFolder);
+
+        //Optional, missing or 0 disables checkpointing
+        YAML::Node checkpointNode = simNode["Checkpoint frequency [min] (double)"];
+        if(checkpointNode.IsDefined() && !checkpointNode.IsNull()) {
+            input.SIMULATION_CHECKPOINT_FREQ = parseDoubleString(checkpointNode.as<string>(), "Checkpoint frequency [min] (double)");
+            if(input.SIMULATION_CHECKPOINT_FREQ < 0) {
+                throw std::invalid_argument("Checkpoint frequency (under SIMULATION MENU) cannot be negative!");
+            }
+        }
+
+        //Optional, missing or a fork time of 0 disables ensembles
+        YAML::Node ensembleSubmenu = simNode["ENSEMBLE SUBMENU"];
+        if(ensembleSubmenu.IsDefined() && !ensembleSubmenu.IsNull()) {
+            auto readMemberValues = [&ensembleSubmenu](const string& key) {
+                YAML::Node node = ensembleSubmenu[key];
+                return node.IsDefined() && !node.IsNull() ? parseParamSweepInput(node.as<string>(), key) : Vector_1D();
+            };
+            input.SIMULATION_ENSEMBLE_FORK_TIME = parseDoubleString(ensembleSubmenu["Fork time [hr] (double)"].as<string>(), "Fork time [hr] (double)");
+            if(input.SIMULATION_ENSEMBLE_FORK_TIME < 0) {
+                throw std::invalid_argument("Ensemble fork time (under SIMULATION MENU) cannot be negative!");
+            }
+            input.SIMULATION_ENSEMBLE_DH = readMemberValues("Member horiz. diff. [m^2/s] (double)");
+            input.SIMULATION_ENSEMBLE_DV = readMemberValues("Member verti. diff. [m^2/s] (double)");
+            input.SIMULATION_ENSEMBLE_SHEAR = readMemberValues("Member wind shear [1/s] (double)");
+        }
+
         if(input.SIMULATION_PARAMETER_SWEEP == input.SIMULATION_MONTECARLO){
             throw std::invalid_argument("In Simulation Menu: Parameter sweep and Monte Carlo cannot have the same value!");
         }
     }
     void readParamMenu(OptInput& input, const YAML::Node& paramNode){
+        //Monte Carlo parameters are min:max ranges (or constants), sampled when the cases are generated
+        auto parseParamInput = [&input](const string paramString, const string paramLocation){
+            return input.SIMULATION_MONTECARLO ? parseMonteCarloRange(paramString, paramLocation)
+                                               : parseParamSweepInput(paramString, paramLocation);
+        };
 
-        input.PARAMETER_PARAM_MAP["PLUMEPROCESS"] = parseParamSweepInput(paramNode["Plume Process [hr] (double)"].as<string>(), "Plume Process [hr] (double)");
+        input.PARAMETER_PARAM_MAP["PLUMEPROCESS"] = parseParamInput(paramNode["Plume Process [hr] (double)"].as<string>(), "Plume Process [hr] (double)");
 
         YAML::Node metParamSubmenu = paramNode["METEOROLOGICAL PARAMETERS SUBMENU"];
-        input.PARAMETER_PARAM_MAP["TEMPERATURE"] = parseParamSweepInput(metParamSubmenu["Temperature [K] (double)"].as<string>(), "Temperature [K] (double)");
-        input.PARAMETER_PARAM_MAP["RHW"] = parseParamSweepInput(metParamSubmenu["R.Hum. wrt water [%] (double)"].as<string>(), "R.Hum. wrt water [%] (double)");
-        input.PARAMETER_PARAM_MAP["PRESSURE"] = parseParamSweepInput(metParamSubmenu["Pressure [hPa] (double)"].as<string>(), "Pressure [hPa] (double)");
-        input.PARAMETER_PARAM_MAP["DH"] = parseParamSweepInput(metParamSubmenu["Horiz. diff. coeff. [m^2/s] (double)"].as<string>(), "Horiz. diff. coeff. [m^2/s] (double)");
-        input.PARAMETER_PARAM_MAP["DV"] = parseParamSweepInput(metParamSubmenu["Verti. diff. [m^2/s] (double)"].as<string>(), "Verti. diff. [m^2/s] (double)");
-        input.PARAMETER_PARAM_MAP["SHEAR"] = parseParamSweepInput(metParamSubmenu["Wind shear [1/s] (double)"].as<string>(), "Wind shear [1/s] (double)");
-        input.PARAMETER_PARAM_MAP["NBV"] = parseParamSweepInput(metParamSubmenu["Brunt-Vaisala Frequency [s^-1] (double)"].as<string>(), "Brunt-Vaisala Frequency [s^-1] (double)");
+        input.PARAMETER_PARAM_MAP["TEMPERATURE"] = parseParamInput(metParamSubmenu["Temperature [K] (double)"].as<string>(), "Temperature [K] (double)");
+        input.PARAMETER_PARAM_MAP["RHW"] = parseParamInput(metParamSubmenu["R.Hum. wrt water [%] (double)"].as<string>(), "R.Hum. wrt water [%] (double)");
+        input.PARAMETER_PARAM_MAP["PRESSURE"] = parseParamInput(metParamSubmenu["Pressure [hPa] (double)"].as<string>(), "Pressure [hPa] (double)");
+        input.PARAMETER_PARAM_MAP["DH"] = parseParamInput(metParamSubmenu["Horiz. diff. coeff. [m^2/s] (double)"].as<string>(), "Horiz. diff. coeff. [m^2/s] (double)");
+        input.PARAMETER_PARAM_MAP["DV"] = parseParamInput(metParamSubmenu["Verti. diff. [m^2/s] (double)"].as<string>(), "Verti. diff. [m^2/s] (double)");
+        input.PARAMETER_PARAM_MAP["SHEAR"] = parseParamInput(metParamSubmenu["Wind shear [1/s] (double)"].as<string>(), "Wind shear [1/s] (double)");
+        input.PARAMETER_PARAM_MAP["NBV"] = parseParamInput(metParamSubmenu["Brunt-Vaisala Frequency [s^-1] (double)"].as<string>(), "Brunt-Vaisala Frequency [s^-1] (double)");
 
         YAML::Node locTimeSubmenu = paramNode["LOCATION AND TIME SUBMENU"];
-        input.PARAMETER_PARAM_MAP["LONGITUDE"] = parseParamSweepInput(locTimeSubmenu["LON [deg] (double)"].as<string>(), "LAT [deg] (double)");
-        input.PARAMETER_PARAM_MAP["LATITUDE"] = parseParamSweepInput(locTimeSubmenu["LAT [deg] (double)"].as<string>(), "LON [deg] (double)");
-        input.PARAMETER_PARAM_MAP["EDAY"] = parseParamSweepInput(locTimeSubmenu["Emission day [1-365] (int)"].as<string>(), "Emission day [1-365] (int)");
-        input.PARAMETER_PARAM_MAP["ETIME"] = parseParamSweepInput(locTimeSubmenu["Emission time [hr] (double)"].as<string>(), "Emission time [hr] (double)");
+        input.PARAMETER_PARAM_MAP["LONGITUDE"] = parseParamInput(locTimeSubmenu["LON [deg] (double)"].as<string>(), "LAT [deg] (double)");
+        input.PARAMETER_PARAM_MAP["LATITUDE"] = parseParamInput(locTimeSubmenu["LAT [deg] (double)"].as<string>(), "LON [deg] (double)");
+        input.PARAMETER_PARAM_MAP["EDAY"] = parseParamInput(locTimeSubmenu["Emission day [1-365] (int)"].as<string>(), "Emission day [1-365] (int)");
+        input.PARAMETER_PARAM_MAP["ETIME"] = parseParamInput(locTimeSubmenu["Emission time [hr] (double)"].as<string>(), "Emission time [hr] (double)");
        
         YAML::Node backMixRatioSubmenu = paramNode["BACKGROUND MIXING RATIOS SUBMENU"];
-        input.PARAMETER_PARAM_MAP["BACKG_NOX"] = parseParamSweepInput(backMixRatioSubmenu["NOx [ppt] (double)"].as<string>(), "NOx [ppt] (double)");
-        input.PARAMETER_PARAM_MAP["BACKG_HNO3"] = parseParamSweepInput(backMixRatioSubmenu["HNO3 [ppt] (double)"].as<string>(), "HNO3 [ppt] (double)");
-        input.PARAMETER_PARAM_MAP["BACKG_O3"] = parseParamSweepInput(backMixRatioSubmenu["O3 [ppb] (double)"].as<string>(), "O3 [ppb] (double)");
-        input.PARAMETER_PARAM_MAP["BACKG_CO"] = parseParamSweepInput(backMixRatioSubmenu["CO [ppb] (double)"].as<string>(), "CO [ppb] (double)");
-        input.PARAMETER_PARAM_MAP["BACKG_CH4"] = parseParamSweepInput(backMixRatioSubmenu["CH4 [ppm] (double)"].as<string>(), "CH4 [ppm] (double)");
-        input.PARAMETER_PARAM_MAP["BACKG_SO2"] = parseParamSweepInput(backMixRatioSubmenu["SO2 [ppt] (double)"].as<string>(), "SO2 [ppt] (double)");
+        input.PARAMETER_PARAM_MAP["BACKG_NOX"] = parseParamInput(backMixRatioSubmenu["NOx [ppt] (double)"].as<string>(), "NOx [ppt] (double)");
+        input.PARAMETER_PARAM_MAP["BACKG_HNO3"] = parseParamInput(backMixRatioSubmenu["HNO3 [ppt] (double)"].as<string>(), "HNO3 [ppt] (double)");
+        input.PARAMETER_PARAM_MAP["BACKG_O3"] = parseParamInput(backMixRatioSubmenu["O3 [ppb] (double)"].as<string>(), "O3 [ppb] (double)");
+        input.PARAMETER_PARAM_MAP["BACKG_CO"] = parseParamInput(backMixRatioSubmenu["CO [ppb] (double)"].as<string>(), "CO [ppb] (double)");
+        input.PARAMETER_PARAM_MAP["BACKG_CH4"] = parseParamInput(backMixRatioSubmenu["CH4 [ppm] (double)"].as<string>(), "CH4 [ppm] (double)");
+        input.PARAMETER_PARAM_MAP["BACKG_SO2"] = parseParamInput(backMixRatioSubmenu["SO2 [ppt] (double)"].as<string>(), "SO2 [ppt] (double)");
 
         YAML::Node eiSubmenu = paramNode["EMISSION INDICES SUBMENU"];
-        input.PARAMETER_PARAM_MAP["EI_NOX"] = parseParamSweepInput(eiSubmenu["NOx [g(NO2)/kg_fuel] (double)"].as<string>(), "NOx [g(NO2)/kg_fuel] (double)");
-        input.PARAMETER_PARAM_MAP["EI_CO"] = parseParamSweepInput(eiSubmenu["CO [g/kg_fuel] (double)"].as<string>(), "CO [g/kg_fuel] (double)");
-        input.PARAMETER_PARAM_MAP["EI_UHC"] = parseParamSweepInput(eiSubmenu["UHC [g/kg_fuel] (double)"].as<string>(), "UHC [g/kg_fuel] (double)");
-        input.PARAMETER_PARAM_MAP["EI_SO2"] = parseParamSweepInput(eiSubmenu["SO2 [g/kg_fuel] (double)"].as<string>(), "SO2 [g/kg_fuel] (double)");
-        input.PARAMETER_PARAM_MAP["EI_SO2TOSO4"] =  parseParamSweepInput(eiSubmenu["SO2 to SO4 conv [%] (double)"].as<string>(), "SO2 to SO4 conv [%] (double)");
-        input.PARAMETER_PARAM_MAP["EI_SOOT"] = parseParamSweepInput(eiSubmenu["Soot [g/kg_fuel] (double)"].as<string>(), "Soot [g/kg_fuel] (double)");
+        input.PARAMETER_PARAM_MAP["EI_NOX"] = parseParamInput(eiSubmenu["NOx [g(NO2)/kg_fuel] (double)"].as<string>(), "NOx [g(NO2)/kg_fuel] (double)");
+        input.PARAMETER_PARAM_MAP["EI_CO"] = parseParamInput(eiSubmenu["CO [g/kg_fuel] (double)"].as<string>(), "CO [g/kg_fuel] (double)");
+        input.PARAMETER_PARAM_MAP["EI_UHC"] = parseParamInput(eiSubmenu["UHC [g/kg_fuel] (double)"].as<string>(), "UHC [g/kg_fuel] (double)");
+        input.PARAMETER_PARAM_MAP["EI_SO2"] = parseParamInput(eiSubmenu["SO2 [g/kg_fuel] (double)"].as<string>(), "SO2 [g/kg_fuel] (double)");
+        input.PARAMETER_PARAM_MAP["EI_SO2TOSO4"] =  parseParamInput(eiSubmenu["SO2 to SO4 conv [%] (double)"].as<string>(), "SO2 to SO4 conv [%] (double)");
+        input.PARAMETER_PARAM_MAP["EI_SOOT"] = parseParamInput(eiSubmenu["Soot [g/kg_fuel] (double)"].as<string>(), "Soot [g/kg_fuel] (double)");
         
-        input.PARAMETER_PARAM_MAP["EI_SOOTRAD"] = parseParamSweepInput(paramNode["Soot Radius [m] (double)"].as<string>(), "Soot Radius [m] (double)");
-        input.PARAMETER_PARAM_MAP["FF"] = parseParamSweepInput(paramNode["Total fuel flow [kg/s] (double)"].as<string>(), "Total fuel flow [kg/s] (double)");
-        input.PARAMETER_PARAM_MAP["AMASS"] = parseParamSweepInput(paramNode["Aircraft mass [kg] (double)"].as<string>(), "Aircraft mass [kg] (double)");
-        input.PARAMETER_PARAM_MAP["FSPEED"] = parseParamSweepInput(paramNode["Flight speed [m/s] (double)"].as<string>(), "Flight speed [m/s] (double)");
-        input.PARAMETER_PARAM_MAP["NUMENG"] = parseParamSweepInput(paramNode["Num. of engines [2/4] (int)"].as<string>(), " Num. of engines [2/4] (int)"); // Why is this a vector1d in the first place...
-        input.PARAMETER_PARAM_MAP["WINGSPAN"] = parseParamSweepInput(paramNode["Wingspan [m] (double)"].as<string>(), "Wingspan [m] (double)");
-        input.PARAMETER_PARAM_MAP["COREEXITTEMP"] = parseParamSweepInput(paramNode["Core exit temp. [K] (double)"].as<string>(), "Core exit temp. [K] (double)");
-        input.PARAMETER_PARAM_MAP["BYPASSAREA"] = parseParamSweepInput(paramNode["Exit bypass area [m^2] (double)"].as<string>(), "Exit bypass area [m^2] (double)");
+        input.PARAMETER_PARAM_MAP["EI_SOOTRAD"] = parseParamInput(paramNode["Soot Radius [m] (double)"].as<string>(), "Soot Radius [m] (double)");
+        input.PARAMETER_PARAM_MAP["FF"] = parseParamInput(paramNode["Total fuel flow [kg/s] (double)"].as<string>(), "Total fuel flow [kg/s] (double)");
+        input.PARAMETER_PARAM_MAP["AMASS"] = parseParamInput(paramNode["Aircraft mass [kg] (double)"].as<string>(), "Aircraft mass [kg] (double)");
+        input.PARAMETER_PARAM_MAP["FSPEED"] = parseParamInput(paramNode["Flight speed [m/s] (double)"].as<string>(), "Flight speed [m/s] (double)");
+        input.PARAMETER_PARAM_MAP["NUMENG"] = parseParamInput(paramNode["Num. of engines [2/4] (int)"].as<string>(), " Num. of engines [2/4] (int)"); // Why is this a vector1d in the first place...
+        input.PARAMETER_PARAM_MAP["WINGSPAN"] = parseParamInput(paramNode["Wingspan [m] (double)"].as<string>(), "Wingspan [m] (double)");
+        input.PARAMETER_PARAM_MAP["COREEXITTEMP"] = parseParamInput(paramNode["Core exit temp. [K] (double)"].as<string>(), "Core exit temp. [K] (double)");
+        input.PARAMETER_PARAM_MAP["BYPASSAREA"] = parseParamInput(paramNode["Exit bypass area [m^2] (double)"].as<string>(), "Exit bypass area [m^2] (double)");
         
         //convert hPa to Pa because the solver uses Pa as the default unit
         for(double& i: input.PARAMETER_PARAM_MAP["PRESSURE"]){
@@ -296,6 +355,12 @@ namespace YamlInputReader{
         input.ADV_AMBIENT_LAPSERATE = parseDoubleString(advancedNode["Ambient Lapse Rate [K/km] (double)"].as<string>(), "Ambient Lapse Rate [K/km] (double)");
         input.ADV_TROPOPAUSE_PRESSURE = parseDoubleString(advancedNode["Tropopause Pressure [Pa] (double)"].as<string>(), "Tropopause Pressure [Pa] (double)");
 
+        //Optional, missing keeps the compile-time default (EPM_STIFF_SOLVER)
+        YAML::Node stiffSolverNode = advancedNode["EPM stiff solver (T/F)"];
+        if(stiffSolverNode.IsDefined() && !stiffSolverNode.IsNull()) {
+            input.ADV_EPM_STIFF_SOLVER = parseBoolString(stiffSolverNode.as<string>(), "EPM stiff solver (T/F)");
+        }
+
         if(input.ADV_GRID_NX < 0 ||
            input.ADV_GRID_NY < 0 ||
            input.ADV_GRID_XLIM_LEFT < 0 || 
@@ -307,44 +372,90 @@ namespace YamlInputReader{
         }
     }
 
-    vector<std::unordered_map<string, double>> generateCasesHelper(vector<std::unordered_map<string, double>>& allCases, const vector<std::pair<string, Vector_1D>>& params, const int row){
-        if(row ==  params.size()){
-            return allCases;
-        }
-
-        //For first row, just add maps with one entry for each case, these will be duplicated and filled up.
-        string paramName = params[row].first;
-        Vector_1D paramCases = params[row].second;
-        if(allCases.empty()){
-            for(const auto& c: paramCases){
-                allCases.push_back(std::unordered_map<string, double>({{paramName, c}}));
-            }   
-        }
-        else{
-            //Generate new cases from existing ones as we go down the parameter list
-            vector<std::unordered_map<string,double>> newCases;
-            for(const auto& i: allCases){
-                for(const auto& j: paramCases){
-                    std::unordered_map<string,double> tempMap = i;
-                    tempMap[paramName] = j;
-                    newCases.push_back(tempMap);
+    CaseStream::CaseStream(const OptInput& input){
+        if(input.SIMULATION_MONTECARLO){
+            //Varied parameters are the design dimensions, in name order so that the samples do not depend on the hash map order
+            std::map<string, Vector_1D> sorted(input.PARAMETER_PARAM_MAP.begin(), input.PARAMETER_PARAM_MAP.end());
+            params_.assign(sorted.begin(), sorted.end());
+            std::size_t nDims = 0;
+            for (const auto& p: params_){
+                if(p.second.size() == 2) nDims++;
+            }
+            nCases_ = input.SIMULATION_MCRUNS > 0 ? input.SIMULATION_MCRUNS : 0;
+            design_ = MCDesign(input.SIMULATION_MC_SAMPLING, nDims, nCases_, input.SIMULATION_MC_SEED);
+            monteCarlo_ = true;
+            return;
+        }
+
+        //Each entry of the parameter map is one digit of the case index, the last parameter varies fastest
+        for (const auto& p: input.PARAMETER_PARAM_MAP){
+            params_.push_back(p);
+        }
+        if(params_.empty()) return;
+
+        nCases_ = 1;
+        for (const auto& p: params_){
+            if(!p.second.empty() && nCases_ > std::numeric_limits<std::size_t>::max() / p.second.size()){
+                throw std::invalid_argument("Too many cases in the parameter sweep!");
+            }
+            nCases_ *= p.second.size();
+        }
+    }
+
+    std::unordered_map<string, double> CaseStream::operator[](std::size_t iCase) const {
+        std::unordered_map<string, double> caseParams;
+        if(monteCarlo_){
+            std::size_t iDim = 0;
+            for (const auto& p: params_){
+                if(p.second.size() == 2){
+                    caseParams[p.first] = p.second[0] + design_(iCase, iDim++) * (p.second[1] - p.second[0]);
+                }
+                else{
+                    caseParams[p.first] = p.second[0];
                 }
             }
-            allCases = std::move(newCases);
+            return caseParams;
         }
-        //Repeat pattern of adding to the list of cases as we go down the param list until end and all cases have been generated
-        return generateCasesHelper(allCases, params, row + 1);
+
+        for (auto p = params_.rbegin(); p != params_.rend(); ++p){
+            const std::size_t nValues = p->second.size();
+            caseParams[p->first] = p->second[iCase % nValues];
+            iCase /= nValues;
+        }
+        return caseParams;
+    }
+
+    std::unordered_map<string, double> CaseStream::at(std::size_t iCase) const {
+        if(iCase >= nCases_){
+            throw std::out_of_range("Case " + std::to_string(iCase) + " requested, but there are only " + std::to_string(nCases_) + " cases!");
+        }
+        return (*this)[iCase];
     }
 
     vector<std::unordered_map<string, double>> generateCases(const OptInput& input){
+        const CaseStream cases(input);
+        vector<std::unordered_map<string, double>> allCases;
+        allCases.reserve(cases.size());
+        for(std::size_t iCase = 0; iCase < cases.size(); iCase++){
+            allCases.push_back(cases[iCase]);
+        }
+        return allCases;
+    }
 
-        //Convert parameter map to vector, each row of the vector represents one parameter
-        vector<std::pair<string, Vector_1D>> params;
-        for (const auto& p: input.PARAMETER_PARAM_MAP){
-            params.push_back(p);
+    Vector_1D parseMonteCarloRange(const string paramString, const string paramLocation){
+        const vector<string> colon_split_tokens = split(trim(paramString), ":");
+        if(colon_split_tokens.size() == 1){
+            return Vector_1D{parseDoubleString(colon_split_tokens[0], paramLocation)};
         }
-        vector<std::unordered_map<string, double>> allCases;
-        return generateCasesHelper(allCases, params, 0);
+        if(colon_split_tokens.size() != 2){
+            throw std::invalid_argument("Monte Carlo Simulation requires parameter input format of min:max or a singular (constant) value at " + paramLocation + "!");
+        }
+        const double min = parseDoubleString(colon_split_tokens[0], paramLocation);
+        const double max = parseDoubleString(colon_split_tokens[1], paramLocation);
+        if(max < min){
+            throw std::invalid_argument("Monte Carlo range min:max has max < min at " + paramLocation + "!");
+        }
+        return Vector_1D{min, max};
     }
 
     Vector_1D parseParamSweepInput(const string paramString, const string paramLocation, bool monteCarlo, int nRuns){
@@ -1,6 +1,9 @@
 #include "AIM/Aerosol.hpp"
 #include "Util/ForwardDecl.hpp"
 #include "Util/PhysConstant.hpp"
+#include "Util/PhysFunction.hpp"
+#include "Util/MetField.hpp"
+#include "Util/MolarWeights.hpp"
 #include <catch2/catch_test_macros.hpp>
 #include <catch2/catch_approx.hpp>
 #include <fstream>
@@ -236,4 +239,99 @@ TEST_CASE ("Aerosol", "[single-file]" ) {
         REQUIRE(result[low_idx] < 10.0);
     }
 
-}
\ No newline at end of file
+}
+TEST_CASE ("Grid_Aerosol per-bin access", "[single-file]" ) {
+
+    int nBins = 10;
+    double r_min = 1e-8;
+    double r_max = 1e-6;
+    Vector_1D bin_centers(nBins);
+    Vector_1D bin_edges(nBins+1);
+    double ratio = r_max/r_min;
+    for (int i = 0; i < nBins; i++) {
+        bin_edges[i] = r_min * pow(ratio, double(i) / double(nBins));
+        bin_centers[i] = 0.5 * r_min * pow(ratio, double(i) / double(nBins)) * ( 1 + pow(ratio, 1.0/nBins) );
+    }
+    bin_edges[nBins] = r_max;
+
+    UInt Nx = 4;
+    UInt Ny = 3;
+    Grid_Aerosol aerosol(Nx, Ny, bin_centers, bin_edges, 1.0e4, 1.0e-7, 1.6);
+
+    SECTION("Volume of a single bin") {
+        Vector_3D volume = aerosol.Volume();
+        for (int n = 0; n < nBins; n++) {
+            Vector_2D volume_n = aerosol.Volume(n);
+            for (UInt j = 0; j < Ny; j++) {
+                for (UInt i = 0; i < Nx; i++) {
+                    REQUIRE(volume_n[j][i] == Catch::Approx(volume[n][j][i]));
+                }
+            }
+        }
+    }
+
+    SECTION("transformBinPDF") {
+        double total = aerosol.TotalNumber()[0][0];
+        double bin_pdf = aerosol.getPDF()[2][0][0];
+        aerosol.transformBinPDF(2, [](Vector_2D& pdf_n) {
+            for (auto& row : pdf_n) {
+                for (auto& val : row) val *= 2.0;
+            }
+        });
+        REQUIRE(aerosol.getPDF()[2][1][3] == Catch::Approx(2.0 * bin_pdf));
+        REQUIRE(aerosol.getPDF()[3][1][3] == Catch::Approx(aerosol.getPDF()[3][0][0]));
+        REQUIRE(aerosol.TotalNumber()[1][3] > total);
+
+        //Shape changes (e.g. remapping) have to be carried over to the stored pdf
+        aerosol.transformBinPDF(0, [](Vector_2D& pdf_n) {
+            pdf_n = Vector_2D(2, Vector_1D(5, 1.0));
+        });
+        REQUIRE(aerosol.getPDF()[0].size() == 2);
+        REQUIRE(aerosol.getPDF()[0][1].size() == 5);
+        REQUIRE(aerosol.getPDF()[0][1][4] == Catch::Approx(1.0));
+    }
+}
+
+TEST_CASE ("Grid_Aerosol ice growth", "[single-file]" ) {
+
+    int nBins = 20;
+    double r_min = 1e-8;
+    double r_max = 1e-4;
+    Vector_1D bin_centers(nBins);
+    Vector_1D bin_edges(nBins+1);
+    double ratio = r_max/r_min;
+    for (int i = 0; i <= nBins; i++) {
+        bin_edges[i] = r_min * pow(ratio, double(i) / double(nBins));
+    }
+    for (int i = 0; i < nBins; i++) {
+        bin_centers[i] = 0.5 * ( bin_edges[i] + bin_edges[i+1] );
+    }
+
+    UInt Nx = 6;
+    UInt Ny = 4;
+    Grid_Aerosol aerosol(Nx, Ny, bin_centers, bin_edges, 1.0e2, 1.0e-6, 1.6);
+    MetField T(Ny, Nx, 215.0);
+    Vector_1D P(Ny, 25000.0);
+    //Supersaturated wrt ice
+    const double H2O_0 = 1.2 * physFunc::pSat_H2Os(215.0) / (physConst::kB * 215.0 * 1.0E+06);
+    Vector_2D H2O(Ny, Vector_1D(Nx, H2O_0));
+
+    //Total water (gaseous + ice) in each cell [molec/cm^3]
+    auto totalWater = [&](UInt j, UInt i) {
+        double ice = 0;
+        for (int n = 0; n < nBins; n++) ice += aerosol.Volume(n)[j][i];
+        return H2O[j][i] + ice * physConst::RHO_ICE / MW_H2O * physConst::Na;
+    };
+    const double total_0 = totalWater(1, 2);
+    const double number_0 = aerosol.TotalNumber()[1][2];
+
+    for (int step = 0; step < 10; step++) {
+        aerosol.Grow(60.0, H2O, T, P);
+    }
+
+    //Water is deposited on the crystals, which grow without changing in number
+    REQUIRE(H2O[1][2] < H2O_0);
+    REQUIRE(totalWater(1, 2) == Catch::Approx(total_0).epsilon(1.0E-06));
+    REQUIRE(aerosol.TotalNumber()[1][2] == Catch::Approx(number_0).epsilon(1.0E-06));
+    REQUIRE(aerosol.Radius(2, 1) > 1.0e-6);
+}
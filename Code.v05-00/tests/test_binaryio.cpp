@@ -0,0 +1,57 @@
+#include "Util/BinaryIO.hpp"
+#include "Util/ForwardDecl.hpp"
+#include <catch2/catch_test_macros.hpp>
+#include <sstream>
+
+TEST_CASE("Binary checkpoint IO", "[single-file]") {
+    std::stringstream ss;
+    const double third = 1.0 / 3.0;
+    const Vector_2D field = {{third, -0.0, 1.0e-300}, {}, {2.5}};
+    const Vector_3Dp pdf = {{{1.0f, 2.0f}, {3.0f, 4.0f}}};
+    const std::vector<bool> flags = {true, false, true};
+
+    BinaryIO::write(ss, std::string("APCEMM"));
+    BinaryIO::write(ss, 42);
+    BinaryIO::write(ss, third);
+    BinaryIO::write(ss, field);
+    BinaryIO::write(ss, pdf);
+    BinaryIO::write(ss, flags);
+
+    SECTION("Round trip is exact") {
+        std::string str;
+        int i;
+        double d;
+        Vector_2D field_read;
+        Vector_3Dp pdf_read;
+        std::vector<bool> flags_read;
+        BinaryIO::read(ss, str);
+        BinaryIO::read(ss, i);
+        BinaryIO::read(ss, d);
+        BinaryIO::read(ss, field_read);
+        BinaryIO::read(ss, pdf_read);
+        BinaryIO::read(ss, flags_read);
+        REQUIRE(str == "APCEMM");
+        REQUIRE(i == 42);
+        REQUIRE(d == third);
+        REQUIRE(field_read == field);
+        REQUIRE(pdf_read == pdf);
+        REQUIRE(flags_read == flags);
+    }
+
+    SECTION("Truncated stream") {
+        std::string data = ss.str();
+        std::stringstream truncated(data.substr(0, data.size() - 1));
+        std::string str;
+        int i;
+        double d;
+        Vector_2D field_read;
+        Vector_3Dp pdf_read;
+        std::vector<bool> flags_read;
+        BinaryIO::read(truncated, str);
+        BinaryIO::read(truncated, i);
+        BinaryIO::read(truncated, d);
+        BinaryIO::read(truncated, field_read);
+        BinaryIO::read(truncated, pdf_read);
+        REQUIRE_THROWS_AS(BinaryIO::read(truncated, flags_read), std::runtime_error);
+    }
+}
@@ -0,0 +1,89 @@
+#include "Core/CaseContext.hpp"
+#include "AIM/Settling.hpp"
+#include <catch2/catch_test_macros.hpp>
+#include <filesystem>
+#include <fstream>
+#include <sstream>
+
+TEST_CASE("Case context", "[single-file]") {
+    CaseContext context;
+    EPM::CacheKey key;
+    key.add("temperature", 217.0);
+    key.add("rhw", 63.4);
+
+    EPM::EPMOutput out;
+    out.iceRadius = 1.1e-6;
+    out.area = 123.456;
+    Vector_1D edges = {1.0e-9, 1.0e-8, 1.0e-7};
+    Vector_1D centers = {5.0e-9, 5.0e-8};
+    out.IceAer = AIM::Aerosol(centers, edges, 0.0, 1.0, 1.6);
+    out.IceAer.updatePdf({0.3, 0.7});
+    out.SO4Aer = out.IceAer;
+
+    SECTION("EPM results") {
+        EPM::EPMResult read;
+        REQUIRE_FALSE(context.findEPMResult(key, read));
+        context.storeEPMResult(key, EPM::EPMResult(out, SimStatus::NoSurvivalVortex));
+        REQUIRE(context.nEPMResults() == 1);
+        REQUIRE(context.findEPMResult(key, read));
+        REQUIRE(read.second == SimStatus::NoSurvivalVortex);
+        REQUIRE(read.first.area == out.area);
+        REQUIRE(read.first.IceAer.getPDF() == out.IceAer.getPDF());
+
+        EPM::CacheKey other;
+        other.add("temperature", 218.0);
+        REQUIRE_FALSE(context.findEPMResult(other, read));
+
+        context.clear();
+        REQUIRE(context.nEPMResults() == 0);
+        REQUIRE_FALSE(context.findEPMResult(key, read));
+    }
+
+    SECTION("Least recently used EPM results are dropped") {
+        CaseContext small(2);
+        EPM::CacheKey keys[3];
+        for ( int k = 0; k < 3; k++ ) keys[k].add("temperature", 217.0 + k);
+
+        EPM::EPMResult read;
+        small.storeEPMResult(keys[0], EPM::EPMResult(out, SimStatus::EPMSuccess));
+        small.storeEPMResult(keys[1], EPM::EPMResult(out, SimStatus::EPMSuccess));
+        REQUIRE(small.findEPMResult(keys[0], read));
+        small.storeEPMResult(keys[2], EPM::EPMResult(out, SimStatus::EPMSuccess));
+        REQUIRE(small.nEPMResults() == 2);
+        REQUIRE(small.findEPMResult(keys[0], read));
+        REQUIRE_FALSE(small.findEPMResult(keys[1], read));
+        REQUIRE(small.findEPMResult(keys[2], read));
+
+        CaseContext none(0);
+        none.storeEPMResult(keys[0], EPM::EPMResult(out, SimStatus::EPMSuccess));
+        REQUIRE(none.nEPMResults() == 0);
+    }
+
+    SECTION("Microphysics output is reproduced") {
+        std::filesystem::path dir = std::filesystem::temp_directory_path() / "APCEMM_test_casecontext";
+        std::filesystem::create_directories(dir);
+        const std::string micro = (dir / "Micro000000.out").string();
+        const std::string microHit = (dir / "Micro000001.out").string();
+        {
+            std::ofstream file(micro);
+            file << "t T RHw\n0 500 0.1\n";
+        }
+        context.storeEPMResult(key, EPM::EPMResult(out, SimStatus::EPMSuccess), micro);
+
+        EPM::EPMResult read;
+        REQUIRE(context.findEPMResult(key, read, microHit));
+        std::ifstream file(microHit);
+        std::stringstream contents;
+        contents << file.rdbuf();
+        REQUIRE(contents.str() == "t T RHw\n0 500 0.1\n");
+
+        std::filesystem::remove_all(dir);
+    }
+
+    SECTION("Settling velocities") {
+        Vector_1D vFall = context.settlingVelocity(centers, 220.0, 25000.0);
+        REQUIRE(vFall == AIM::SettlingVelocity(centers, 220.0, 25000.0));
+        REQUIRE(context.settlingVelocity(centers, 220.0, 25000.0) == vFall);
+        REQUIRE(context.settlingVelocity(centers, 230.0, 25000.0) != vFall);
+    }
+}
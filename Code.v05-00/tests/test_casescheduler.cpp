@@ -0,0 +1,53 @@
+#include "Util/CaseScheduler.hpp"
+#include <catch2/catch_test_macros.hpp>
+#include <cmath>
+#include <stdexcept>
+
+TEST_CASE("Case x thread scheduler", "[single-file]") {
+    SECTION("Single case gets all threads up to its limit") {
+        CaseTeams teams = chooseCaseTeams(32, 1, 38);
+        REQUIRE(teams.nConcurrentCases == 1);
+        REQUIRE(teams.threadsPerCase == 32);
+
+        teams = chooseCaseTeams(64, 1, 38);
+        REQUIRE(teams.nConcurrentCases == 1);
+        REQUIRE(teams.threadsPerCase == 38);
+    }
+
+    SECTION("Cases are spread over the budget first") {
+        CaseTeams teams = chooseCaseTeams(32, 4, 38);
+        REQUIRE(teams.nConcurrentCases == 4);
+        REQUIRE(teams.threadsPerCase == 8);
+
+        teams = chooseCaseTeams(32, 1000, 38);
+        REQUIRE(teams.nConcurrentCases == 32);
+        REQUIRE(teams.threadsPerCase == 1);
+
+        //Serial inner loops (PARALLEL_CASES)
+        teams = chooseCaseTeams(8, 3, 1);
+        REQUIRE(teams.nConcurrentCases == 3);
+        REQUIRE(teams.threadsPerCase == 1);
+    }
+
+    SECTION("Requested number of concurrent cases") {
+        CaseTeams teams = chooseCaseTeams(32, 1000, 38, 4);
+        REQUIRE(teams.nConcurrentCases == 4);
+        REQUIRE(teams.threadsPerCase == 8);
+
+        teams = chooseCaseTeams(32, 2, 38, 8);
+        REQUIRE(teams.nConcurrentCases == 2);
+        REQUIRE(teams.threadsPerCase == 16);
+
+        teams = chooseCaseTeams(4, 0, 38);
+        REQUIRE(teams.nConcurrentCases == 1);
+        REQUIRE(teams.threadsPerCase == 4);
+
+        REQUIRE_THROWS_AS(chooseCaseTeams(0, 10, 38), std::invalid_argument);
+    }
+
+    SECTION("Utilisation") {
+        //Two cases of 10 s on 4 threads each, within 20 s on 8 threads
+        REQUIRE(std::abs(caseUtilisation({10.0, 10.0}, 4, 20.0, 8) - 0.5) < 1e-12);
+        REQUIRE(caseUtilisation({}, 4, 0.0, 8) == 0.0);
+    }
+}
@@ -0,0 +1,150 @@
+#include "Core/CaseServer.hpp"
+#include <catch2/catch_test_macros.hpp>
+#include <algorithm>
+#include <chrono>
+#include <cstring>
+#include <filesystem>
+#include <set>
+#include <sstream>
+#include <stdexcept>
+#include <sys/socket.h>
+#include <sys/un.h>
+#include <thread>
+#include <unistd.h>
+
+using namespace CaseServer;
+
+namespace {
+    //Stands in for the model: answers with the sum of the parameters
+    void sumCase(const Request& request, JsonObject& response) {
+        if ( request.params.count("FAIL") ) throw std::runtime_error("case failed");
+        double sum = 0;
+        for ( const auto& p: request.params ) sum += p.second;
+        response.add("sum", sum);
+        if ( request.series ) response.add("series", Vector_1D{1.0, 2.5});
+    }
+
+    std::vector<std::string> lines(const std::string& str) {
+        std::vector<std::string> out;
+        std::istringstream ss(str);
+        std::string line;
+        while ( std::getline(ss, line) ) out.push_back(line);
+        return out;
+    }
+}
+
+TEST_CASE("Case server requests", "[single-file]") {
+    SECTION("Parse") {
+        Request request = parseRequest(R"({"id": "a1", "params": {"TEMPERATURE": 217.5, "RHW":110}, "series": true})");
+        REQUIRE(request.id == "a1");
+        REQUIRE(request.idQuoted);
+        REQUIRE(request.params.size() == 2);
+        REQUIRE(request.params.at("TEMPERATURE") == 217.5);
+        REQUIRE(request.params.at("RHW") == 110.0);
+        REQUIRE(request.series);
+
+        request = parseRequest(R"({"id": 7})");
+        REQUIRE(request.id == "7");
+        REQUIRE_FALSE(request.idQuoted);
+        REQUIRE(request.params.empty());
+        REQUIRE_FALSE(request.series);
+        REQUIRE(request.caseId == -1);
+
+        REQUIRE(parseRequest(R"({"id": 7, "case": 12})").caseId == 12);
+        REQUIRE(parseRequest(R"({"command": "shutdown"})").command == "shutdown");
+    }
+
+    SECTION("Invalid requests") {
+        REQUIRE_THROWS_AS(parseRequest("[1, 2]"), std::invalid_argument);
+        REQUIRE_THROWS_AS(parseRequest(R"({"id": 1, "params": [1]})"), std::invalid_argument);
+        REQUIRE_THROWS_AS(parseRequest(R"({"params": {"RHW": "wet"}})"), std::invalid_argument);
+        REQUIRE_THROWS_AS(parseRequest(R"({"parms": {"RHW": 100}})"), std::invalid_argument);
+        REQUIRE_THROWS_AS(parseRequest(R"({"id": 1)"), std::invalid_argument);
+        REQUIRE_THROWS_AS(parseRequest(R"({"case": -1})"), std::invalid_argument);
+        REQUIRE_THROWS_AS(parseRequest(R"({"case": 1.5})"), std::invalid_argument);
+    }
+
+    SECTION("JSON output") {
+        JsonObject obj;
+        obj.add("name", "a \"b\"\n");
+        obj.add("n", 3);
+        obj.add("x", 0.1);
+        obj.add("ok", true);
+        obj.add("v", Vector_1D{1.0, std::nan("")});
+        REQUIRE(obj.str() == R"({"name": "a \"b\"\n", "n": 3, "x": 0.10000000000000001, "ok": true, "v": [1, null]})");
+        /* Responses can be read back by the request parser */
+        REQUIRE(parseRequest(R"({"id": )" + quote("a \"b\"\n") + "}").id == "a \"b\"\n");
+    }
+}
+
+TEST_CASE("Case server", "[single-file]") {
+    Server server(sumCase, 4);
+    REQUIRE(server.nWorkers() == 4);
+
+    SECTION("Stream") {
+        std::stringstream in, out;
+        for ( int i = 0; i < 50; i++ ) {
+            in << R"({"id": )" << i << R"(, "params": {"A": )" << i << R"(, "B": 0.5}})" << "\n";
+        }
+        in << "\n";
+        in << R"({"id": "bad", "params": {"FAIL": 1}})" << "\n";
+        in << "not json" << "\n";
+        in << R"({"id": "s", "series": true})";
+        server.serve(in, out);
+
+        std::vector<std::string> responses = lines(out.str());
+        REQUIRE(responses.size() == 53);
+        std::set<std::string> answered;
+        for ( const std::string& line: responses ) {
+            if ( line.rfind(R"({"id": )", 0) == 0 ) answered.insert(line.substr(0, line.find(", ")));
+        }
+        REQUIRE(answered.size() == 52);
+        REQUIRE(std::count(responses.begin(), responses.end(), R"({"id": 12, "sum": 12.5})") == 1);
+        REQUIRE(std::count(responses.begin(), responses.end(), R"({"id": "bad", "error": "case failed"})") == 1);
+        REQUIRE(std::count(responses.begin(), responses.end(), R"({"id": "s", "sum": 0, "series": [1, 2.5]})") == 1);
+        REQUIRE(std::count(responses.begin(), responses.end(), R"({"error": "Request is not a JSON object"})") == 1);
+    }
+
+    SECTION("Socket") {
+        const std::string path = (std::filesystem::temp_directory_path() / "APCEMM_test_caseserver.sock").string();
+        std::thread serving([&server, &path]() { server.serveSocket(path); });
+
+        sockaddr_un addr{};
+        addr.sun_family = AF_UNIX;
+        std::strncpy(addr.sun_path, path.c_str(), sizeof(addr.sun_path) - 1);
+        int fd = -1;
+        for ( int attempt = 0; attempt < 200 && fd < 0; attempt++ ) {
+            fd = ::socket(AF_UNIX, SOCK_STREAM, 0);
+            if ( ::connect(fd, reinterpret_cast<sockaddr*>(&addr), sizeof(addr)) < 0 ) {
+                ::close(fd);
+                fd = -1;
+                std::this_thread::sleep_for(std::chrono::milliseconds(10));
+            }
+        }
+        REQUIRE(fd >= 0);
+
+        const std::string requests = R"({"id": 1, "params": {"A": 2}})" "\n" R"({"id": 2, "params": {"A": 3}})" "\n";
+        REQUIRE(::write(fd, requests.data(), requests.size()) == static_cast<ssize_t>(requests.size()));
+        std::string received;
+        char buf[256];
+        while ( std::count(received.begin(), received.end(), '\n') < 2 ) {
+            const ssize_t n = ::read(fd, buf, sizeof(buf));
+            REQUIRE(n > 0);
+            received.append(buf, n);
+        }
+        std::vector<std::string> responses = lines(received);
+        std::sort(responses.begin(), responses.end());
+        REQUIRE(responses == std::vector<std::string>{R"({"id": 1, "sum": 2})", R"({"id": 2, "sum": 3})"});
+
+        const std::string shutdown = R"({"command": "shutdown"})" "\n";
+        REQUIRE(::write(fd, shutdown.data(), shutdown.size()) == static_cast<ssize_t>(shutdown.size()));
+        received.clear();
+        ssize_t n;
+        while ( (n = ::read(fd, buf, sizeof(buf))) > 0 ) received.append(buf, n);
+        REQUIRE(received == R"({"command": "shutdown"})" "\n");
+        ::close(fd);
+
+        serving.join();
+        REQUIRE_FALSE(std::filesystem::exists(path));
+    }
+}
@@ -0,0 +1,88 @@
+#include "EPM/EPMCache.hpp"
+#include "Util/ForwardDecl.hpp"
+#include <catch2/catch_test_macros.hpp>
+#include <filesystem>
+#include <sstream>
+
+using namespace EPM;
+
+TEST_CASE("EPM result cache", "[single-file]") {
+    CacheKey key;
+    key.add("temperature", 217.0);
+    key.add("rhw", 63.4);
+    key.add("species", Vector_1D{1.0e10, 0.1, 3.0});
+
+    EPMOutput out;
+    out.finalTemp = 217.3;
+    out.iceRadius = 1.1e-6;
+    out.iceDensity = 1.2e4;
+    out.sootDensity = 1.3e4;
+    out.H2O_mol = 1.0 / 3.0;
+    out.SO4g_mol = 1.5e-12;
+    out.SO4l_mol = 2.5e-12;
+    out.area = 123.456;
+    out.bypassArea = 1.2;
+    out.coreExitTemp = 547.3;
+    Vector_1D edges = {1.0e-9, 1.0e-8, 1.0e-7, 1.0e-6};
+    Vector_1D centers = {5.0e-9, 5.0e-8, 5.0e-7};
+    out.SO4Aer = AIM::Aerosol(centers, edges, 0.0, 1.0, 1.6);
+    out.SO4Aer.updatePdf({1.0, 2.0, 3.0});
+    out.IceAer = AIM::Aerosol(centers, edges, 0.0, 1.0, 1.6);
+    out.IceAer.updatePdf({0.1, 0.2, 0.7});
+    EPMResult result(out, SimStatus::EPMSuccess);
+
+    SECTION("Key") {
+        CacheKey same;
+        same.add("temperature", 217.0);
+        same.add("rhw", 63.4);
+        same.add("species", Vector_1D{1.0e10, 0.1, 3.0});
+        CacheKey other;
+        other.add("temperature", 217.0);
+        other.add("rhw", 63.4 + 1e-12);
+        other.add("species", Vector_1D{1.0e10, 0.1, 3.0});
+
+        REQUIRE(key.str() == same.str());
+        REQUIRE(key.hash() == same.hash());
+        REQUIRE(key.hash().size() == 16);
+        REQUIRE(key.hash() != other.hash());
+    }
+
+    SECTION("Round trip is exact") {
+        std::stringstream ss;
+        writeCachedResult(ss, key, result);
+        EPMResult read;
+        REQUIRE(readCachedResult(ss, key, read));
+        REQUIRE(read.second == SimStatus::EPMSuccess);
+        REQUIRE(read.first.H2O_mol == out.H2O_mol);
+        REQUIRE(read.first.area == out.area);
+        REQUIRE(read.first.coreExitTemp == out.coreExitTemp);
+        REQUIRE(read.first.IceAer.getBinEdges() == edges);
+        REQUIRE(read.first.IceAer.getBinCenters() == centers);
+        REQUIRE(read.first.IceAer.getPDF() == out.IceAer.getPDF());
+        REQUIRE(read.first.SO4Aer.getPDF() == out.SO4Aer.getPDF());
+    }
+
+    SECTION("Different key is a miss") {
+        std::stringstream ss;
+        writeCachedResult(ss, key, result);
+        CacheKey other;
+        other.add("temperature", 218.0);
+        EPMResult read;
+        REQUIRE_FALSE(readCachedResult(ss, other, read));
+    }
+
+    SECTION("Cache folder") {
+        std::filesystem::path dir = std::filesystem::temp_directory_path() / "APCEMM_test_epmcache";
+        std::filesystem::remove_all(dir);
+        EPMResult read;
+
+        REQUIRE_FALSE(loadCachedResult("", key, read));
+        REQUIRE_FALSE(loadCachedResult(dir.string(), key, read));
+        storeCachedResult(dir.string(), key, EPMResult(out, SimStatus::NoSurvivalVortex));
+        REQUIRE(loadCachedResult(dir.string(), key, read));
+        REQUIRE(read.second == SimStatus::NoSurvivalVortex);
+        REQUIRE(read.first.iceDensity == out.iceDensity);
+
+        std::filesystem::remove_all(dir);
+    }
+}
@@ -1,8 +1,13 @@
 #include "EPM/Integrate.hpp"
+#include "EPM/StiffIntegrator.hpp"
+#include "Core/Fuel.hpp"
+#include "KPP/KPP_Parameters.h"
 #include "Util/ForwardDecl.hpp"
 #include "Util/PhysConstant.hpp"
 #include <catch2/catch_test_macros.hpp>
 #include <catch2/catch_approx.hpp>
+#include <chrono>
+#include <filesystem>
 #include <fstream>
 #include <iostream>
 
@@ -51,4 +56,137 @@ TEST_CASE("EPM integrate", "[single-file]") {
 
 }
 
+TEST_CASE("EPM stiff integrator", "[single-file]") {
+    // Robertson's chemical kinetics problem, a standard stiff test case
+    auto robertson = [](const Vector_1D& y, Vector_1D& dydt, const double t) {
+        dydt[0] = -0.04 * y[0] + 1.0e4 * y[1] * y[2];
+        dydt[2] = 3.0e7 * y[1] * y[1];
+        dydt[1] = -dydt[0] - dydt[2];
+    };
+    int nObserved = 0;
+    auto countObserver = [&nObserved](const Vector_1D&, double) { nObserved++; };
+    Vector_1D y = {1.0, 0.0, 0.0};
+    ODEStats stats;
+    double dt = 1.0e-6;
+
+    SECTION("Accuracy") {
+        integrateStiff(robertson, y, 0.0, 40.0, dt, countObserver, 1.0e-10, 1.0e-6, stats);
+        REQUIRE(y[0] == Catch::Approx(0.7158270687).epsilon(1.0e-4));
+        REQUIRE(y[1] == Catch::Approx(9.185534764e-6).epsilon(1.0e-3));
+        REQUIRE(y[2] == Catch::Approx(0.2841637457).epsilon(1.0e-4));
+        REQUIRE(nObserved == static_cast<int>(stats.nSteps) + 1);
+        REQUIRE(stats.nJacobians >= stats.nSteps);
+        // Explicit methods need steps of order 1e-3 s here to remain stable
+        REQUIRE(stats.nSteps < 500);
+    }
+
+    SECTION("Step size is carried across intervals") {
+        UInt nFirst = integrateStiff(robertson, y, 0.0, 20.0, dt, countObserver, 1.0e-10, 1.0e-6, stats);
+        REQUIRE(dt > 1.0e-2);
+        UInt nSecond = integrateStiff(robertson, y, 20.0, 40.0, dt, countObserver, 1.0e-10, 1.0e-6, stats);
+        REQUIRE(nSecond < nFirst / 2);
+        REQUIRE(stats.nSteps == nFirst + nSecond);
+        REQUIRE(y[0] == Catch::Approx(0.7158270687).epsilon(1.0e-4));
+    }
+}
+
+TEST_CASE("EPM streaming observer", "[single-file]") {
+    std::vector<UInt> indices = {0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12};
+    Vector_1D x(13, 1.0e-12);
+    x[1] = 220.0;
+    x[2] = 25000.0;
+    Vector_2D states;
+    Vector_1D times;
+    std::filesystem::path fileName = std::filesystem::temp_directory_path() / "APCEMM_test_micro.out";
+
+    // odeint takes the observer by value
+    auto observe = [&x](streamingObserver obs, UInt nCalls, UInt first) {
+        for ( UInt i = first; i < first + nCalls; i++ ) {
+            x[0] = i;
+            obs(x, static_cast<double>(i));
+        }
+    };
+    auto countLines = [&fileName]() {
+        std::ifstream file(fileName);
+        std::string line;
+        int n = 0;
+        while ( std::getline(file, line) ) n++;
+        return n;
+    };
+
+    SECTION("Ring buffer") {
+        streamingObserver observer(states, times, indices, "", 1, 3);
+        observe(observer, 4, 0);
+        observe(observer, 6, 4);
+        REQUIRE(states.size() == 3);
+        REQUIRE(times.size() == 3);
+        REQUIRE(observer.nRecorded() == 10);
+        REQUIRE(observer.lastState()[0] == 9.0);
+        REQUIRE(observer.lastTime() == 9.0);
+        REQUIRE(observer.getLastElement() == 9.0);
+    }
+
+    SECTION("Water saturation is kept after leaving the buffer") {
+        streamingObserver observer(states, times, indices, "", 1, 1);
+        x[3] = 2.0 * physFunc::pSat_H2Ol(x[1]) / x[2];
+        observe(observer, 1, 0);
+        x[3] = 1.0e-6;
+        observe(observer, 5, 1);
+        REQUIRE(states.size() == 1);
+        REQUIRE(observer.checkwatersat());
+    }
 
+    SECTION("Decimated output") {
+        streamingObserver observer(states, times, indices, fileName.string(), 1, 1, 4);
+        observe(observer, 10, 0);
+        observer.print2File();
+        // Header and separator, states 0, 4 and 8
+        REQUIRE(countLines() == 5);
+        REQUIRE_FALSE(observer.checkwatersat());
+    }
+
+    SECTION("Full output") {
+        streamingObserver observer(states, times, indices, fileName.string(), 1);
+        observe(observer, 10, 0);
+        observer.print2File();
+        REQUIRE(states.size() == 10);
+        REQUIRE(countLines() == 12);
+    }
+
+    std::filesystem::remove(fileName);
+}
+
+// Not run by default, select with: unittest "[.benchmark]"
+TEST_CASE("EPM solver benchmark", "[.benchmark]") {
+    const std::string engineFile = std::string(APCEMM_TESTS_DIR) + "/../../input_data/ENG_EI.txt";
+    const std::string microFile = (std::filesystem::temp_directory_path() / "APCEMM_EPM_benchmark.out").string();
+    const double pressure_Pa = 22000.0;
+
+    std::cout << "    T [K]  RHw [%]   solver      steps   rejected   time [ms]  status" << std::endl;
+    for ( double temperature_K: {205.0, 210.0, 215.0, 220.0} ) {
+        for ( double rhw: {40.0, 60.0, 80.0} ) {
+            Aircraft aircraft("B747", engineFile, 200000.0, temperature_K, pressure_Pa, rhw, 0.013);
+            Emission EI(aircraft.engine(), Fuel("C12H24"));
+            double airDens = pressure_Pa / ( physConst::kB * temperature_K ) * 1.00E-06;
+            for ( bool stiff: {false, true} ) {
+                double VAR[NSPEC] = {};
+                VAR[ind_H2O] = rhw / 100.0 * physFunc::pSat_H2Ol( temperature_K ) / ( physConst::kB * temperature_K ) * 1.00E-06;
+                VAR[ind_SO4] = 1.0E-12 * airDens;
+                VAR[ind_HNO3] = 1.0E-10 * airDens;
+                Vector_2D aerArray(3, Vector_1D(3, 0.0));
+
+                auto start = std::chrono::high_resolution_clock::now();
+                auto result = EPM::Integrate(temperature_K, pressure_Pa, rhw, 0.9772, 553.65, VAR, aerArray, aircraft, EI, false, 3.0, microFile, stiff);
+                auto stop = std::chrono::high_resolution_clock::now();
+
+                std::cout << std::setw(9) << temperature_K << std::setw(9) << rhw
+                          << std::setw(12) << (stiff ? "rosenbrock4" : "rkf78")
+                          << std::setw(11) << result.first.odeStats.nSteps
+                          << std::setw(11) << result.first.odeStats.nRejected
+                          << std::setw(12) << std::chrono::duration_cast<std::chrono::milliseconds>(stop - start).count()
+                          << "  " << static_cast<int>(result.second) << std::endl;
+            }
+        }
+    }
+    std::filesystem::remove(microFile);
+}
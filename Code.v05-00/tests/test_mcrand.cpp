@@ -0,0 +1,67 @@
+#include "Util/MC_Rand.hpp"
+#include <catch2/catch_test_macros.hpp>
+#include <cmath>
+#include <set>
+#include <stdexcept>
+
+TEST_CASE("Monte Carlo sampling designs", "[single-file]") {
+    const std::size_t nDims = SOBOL_MAX_DIM;
+    const std::size_t nRuns = 64;
+
+    SECTION("Parse sampling name") {
+        REQUIRE(parseMCSampling("Sobol") == MCSampling::Sobol);
+        REQUIRE(parseMCSampling("LHS") == MCSampling::LatinHypercube);
+        REQUIRE(parseMCSampling("random") == MCSampling::Random);
+        REQUIRE(parseMCSampling(MCSamplingName(MCSampling::LatinHypercube)) == MCSampling::LatinHypercube);
+        REQUIRE_THROWS_AS(parseMCSampling("halton"), std::invalid_argument);
+    }
+
+    SECTION("Unscrambled Sobol points") {
+        //Seed 0 still shifts the points, compare differences instead: the first dimension is the van der Corput sequence
+        MCDesign design(MCSampling::Sobol, 2, 4, 0);
+        const double x0 = design(0, 0);
+        REQUIRE(std::abs(std::abs(design(1, 0) - x0) - 0.5) < 1e-15);
+    }
+
+    for (MCSampling sampling: {MCSampling::Sobol, MCSampling::LatinHypercube}) {
+        SECTION("One point per stratum: " + MCSamplingName(sampling)) {
+            MCDesign design(sampling, nDims, nRuns, 1234);
+            for (std::size_t iDim = 0; iDim < nDims; iDim++) {
+                std::set<std::size_t> strata;
+                for (std::size_t iRun = 0; iRun < nRuns; iRun++) {
+                    const double x = design(iRun, iDim);
+                    REQUIRE(x >= 0.0);
+                    REQUIRE(x < 1.0);
+                    strata.insert(static_cast<std::size_t>(x * nRuns));
+                }
+                REQUIRE(strata.size() == nRuns);
+            }
+        }
+    }
+
+    for (MCSampling sampling: {MCSampling::Random, MCSampling::Sobol, MCSampling::LatinHypercube}) {
+        SECTION("Reproducible from the seed: " + MCSamplingName(sampling)) {
+            MCDesign design(sampling, 3, nRuns, 42);
+            MCDesign same(sampling, 3, nRuns, 42);
+            MCDesign other(sampling, 3, nRuns, 43);
+            bool differs = false;
+            for (std::size_t iRun = 0; iRun < nRuns; iRun++) {
+                for (std::size_t iDim = 0; iDim < 3; iDim++) {
+                    REQUIRE(design(iRun, iDim) == same(iRun, iDim));
+                    differs = differs || design(iRun, iDim) != other(iRun, iDim);
+                }
+            }
+            REQUIRE(differs);
+        }
+    }
+
+    SECTION("Case seeds") {
+        REQUIRE(caseSeed(42, 3) == caseSeed(42, 3));
+        REQUIRE(caseSeed(42, 3) != caseSeed(42, 4));
+        REQUIRE(caseSeed(42, 3) != caseSeed(43, 3));
+    }
+
+    SECTION("Too many Sobol dimensions") {
+        REQUIRE_THROWS_AS(MCDesign(MCSampling::Sobol, SOBOL_MAX_DIM + 1, nRuns, 1), std::invalid_argument);
+    }
+}
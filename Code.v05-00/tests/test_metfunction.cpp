@@ -3,6 +3,8 @@
 #include <Util/PhysFunction.hpp>
 #include <Util/PhysConstant.hpp>
 #include <Util/MetFunction.hpp>
+#include <Util/MetField.hpp>
+#include <Util/VectorUtils.hpp>
 #include <iostream>
 
 using namespace met;
@@ -127,3 +129,43 @@ TEST_CASE( "MetFunction", "[single-file]" ) {
 
 	}
 }
+
+TEST_CASE( "MetField", "[single-file]" ) {
+	MetField field(3, 4, 0.0);
+	for (int j = 0; j < 3; j++) {
+		field.setRow(j, 200.0 + j);
+	}
+	SECTION("Uniform storage"){
+		REQUIRE(field.isUniform());
+		REQUIRE(field.size() == 3);
+		REQUIRE(field[0].size() == 4);
+		REQUIRE(field(2, 3) == 202.0);
+		REQUIRE(field[1][2] == 201.0);
+		Vector_2D full = field.toVector2D();
+		REQUIRE(full.size() == 3);
+		REQUIRE(full[2].size() == 4);
+		REQUIRE(full[2][3] == 202.0);
+	}
+	SECTION("Expanding"){
+		field.row(1)[2] = 5.0;
+		REQUIRE(!field.isUniform());
+		REQUIRE(field(1, 2) == 5.0);
+		REQUIRE(field(1, 1) == 201.0);
+		REQUIRE(field(2, 0) == 202.0);
+		REQUIRE(field.column()[1] == 201.0);
+		field.setRow(1, 7.0);
+		REQUIRE(field(1, 2) == 7.0);
+		field.reset(2, 5);
+		REQUIRE(field.isUniform());
+		REQUIRE(field.size() == 2);
+		REQUIRE(field[1].size() == 5);
+	}
+	SECTION("fill2DVec"){
+		Vector_2D vec(3, Vector_1D(4, 0.0));
+		vec[1][1] = 1.0;
+		VectorUtils::fill2DVec(vec, field, [](double val) { return val == 0; });
+		REQUIRE(vec[0][0] == 200.0);
+		REQUIRE(vec[1][1] == 1.0);
+		REQUIRE(vec[2][3] == 202.0);
+	}
+}
@@ -0,0 +1,57 @@
+#include "Util/MPICaseRunner.hpp"
+#include <catch2/catch_session.hpp>
+#include <catch2/catch_test_macros.hpp>
+#include <sstream>
+
+using namespace MPICaseRunner;
+
+//Run with e.g. mpirun -np 4 test_mpi. Every rank runs the test cases, only rank 0 collects the timings.
+TEST_CASE("MPI case distribution") {
+    int rank, nRanks;
+    MPI_Comm_rank(MPI_COMM_WORLD, &rank);
+    MPI_Comm_size(MPI_COMM_WORLD, &nRanks);
+
+    SECTION("Every case runs exactly once") {
+        const unsigned int caseBegin = 3, caseEnd = 40;
+        std::vector<unsigned int> ranCases;
+        std::vector<CaseTiming> timings = runCases(caseBegin, caseEnd, [&](unsigned int iCase) {
+            ranCases.push_back(iCase);
+            return static_cast<int>(iCase % 5);
+        });
+
+        //Gather the number of cases run on each rank
+        int nRan = ranCases.size();
+        int nTotal = 0;
+        MPI_Reduce(&nRan, &nTotal, 1, MPI_INT, MPI_SUM, 0, MPI_COMM_WORLD);
+
+        if (rank == 0) {
+            REQUIRE(nTotal == static_cast<int>(caseEnd - caseBegin));
+            REQUIRE(timings.size() == caseEnd - caseBegin);
+            for (std::size_t i = 0; i < timings.size(); i++) {
+                REQUIRE(timings[i].iCase == caseBegin + i);
+                REQUIRE(timings[i].status == static_cast<int>(timings[i].iCase % 5));
+                REQUIRE(timings[i].seconds >= 0.0);
+                REQUIRE((nRanks == 1 || timings[i].rank != 0));
+            }
+            std::ostringstream ss;
+            writeTimings(ss, timings);
+            REQUIRE(ss.str().find("# case rank status seconds\n3 ") == 0);
+        }
+        else {
+            REQUIRE(timings.empty());
+        }
+    }
+
+    SECTION("Empty case range") {
+        std::vector<CaseTiming> timings = runCases(5, 5, [](unsigned int) { return 0; });
+        REQUIRE(timings.empty());
+    }
+}
+
+int main(int argc, char* argv[]) {
+    MPI_Init(&argc, &argv);
+    //All ranks run the tests, since every rank takes part in the communication
+    const int result = Catch::Session().run(argc, argv);
+    MPI_Finalize();
+    return result;
+}
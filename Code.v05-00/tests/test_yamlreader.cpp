@@ -2,6 +2,7 @@
 #include <YamlInputReader/YamlInputReader.hpp>
 #include <Core/Input.hpp>
 #include <iostream>
+#include <set>
 using namespace YamlInputReader;
 using std::cout;
 using std::endl;
@@ -118,6 +119,13 @@ TEST_CASE("YamlInputReader Helper Functions"){
         }
         REQUIRE(err.find("Unable to read boolean value") == 0);
     }
+    SECTION("Parse unsigned 64-bit string"){
+        REQUIRE(parseUInt64String(" 0 ") == 0);
+        REQUIRE(parseUInt64String("18446744073709551615") == std::numeric_limits<std::uint64_t>::max());
+        REQUIRE_THROWS_AS(parseUInt64String("-1"), std::invalid_argument);
+        REQUIRE_THROWS_AS(parseUInt64String("1e3"), std::invalid_argument);
+        REQUIRE_THROWS_AS(parseUInt64String("18446744073709551616"), std::invalid_argument);
+    }
     SECTION("Parse Parameter Sweep/Monte Carlo Sim input"){
         string teststr;
         Vector_1D vec;
@@ -214,6 +222,11 @@ TEST_CASE("Read Yaml File"){
         REQUIRE(input.SIMULATION_ADJOINT_FILENAME == "APCEMM_ADJ_Case_*");
         REQUIRE(input.SIMULATION_BOXMODEL == true);
         REQUIRE(input.SIMULATION_BOX_FILENAME == "APCEMM_BOX_CASE_*");
+        REQUIRE(input.SIMULATION_EPM_CACHE_FOLDER.empty());
+        REQUIRE(input.SIMULATION_CHECKPOINT_FREQ == 0);
+        REQUIRE(input.SIMULATION_RESTART == false);
+        REQUIRE(input.SIMULATION_ENSEMBLE_FORK_TIME == 0);
+        REQUIRE(input.SIMULATION_ENSEMBLE_DH.empty());
         REQUIRE(err == "In Simulation Menu: Parameter sweep and Monte Carlo cannot have the same value!");
 
     }
@@ -364,6 +377,7 @@ TEST_CASE("Read Yaml File"){
         REQUIRE(input.ADV_CSIZE_WIDTH_BASE == 100.0);
         REQUIRE(input.ADV_CSIZE_WIDTH_SCALING_FACTOR == 0.5);
         REQUIRE(input.ADV_AMBIENT_LAPSERATE == -3.0);
+        REQUIRE(input.ADV_EPM_STIFF_SOLVER == EPM_STIFF_SOLVER);
         REQUIRE(input.ADV_TROPOPAUSE_PRESSURE == 2.0e+4);
 
     }
@@ -398,6 +412,47 @@ TEST_CASE("Generate All Cases"){
     combinations = generateCases(input);
     REQUIRE(combinations.size() == 72);
 }
+TEST_CASE("Lazy Case Stream"){
+    OptInput input;
+    CaseStream empty(input);
+    REQUIRE(empty.size() == 0);
+
+    input.PARAMETER_PARAM_MAP = {{"test1", {1, 2, 3}}, {"test2", {4, 0}}, {"test3", {5, 6, 7, 8}}, {"test4", {9, 10, 11}}};
+    CaseStream cases(input);
+    vector<std::unordered_map<string,double>> combinations = generateCases(input);
+    REQUIRE(cases.size() == 72);
+    for(std::size_t i = 0; i < cases.size(); i++){
+        REQUIRE(cases[i] == combinations[i]);
+    }
+    REQUIRE(cases.at(71) == combinations[71]);
+    REQUIRE_THROWS_AS(cases.at(72), std::out_of_range);
+}
+TEST_CASE("Monte Carlo Cases"){
+    OptInput input;
+    input.SIMULATION_MONTECARLO = true;
+    input.SIMULATION_MCRUNS = 16;
+    input.SIMULATION_MC_SAMPLING = MCSampling::LatinHypercube;
+    input.SIMULATION_MC_SEED = 7;
+    input.PARAMETER_PARAM_MAP = {{"TEMPERATURE", parseMonteCarloRange("200:220")}, {"RHW", parseMonteCarloRange("60:120")}, {"DH", parseMonteCarloRange("15")}};
+    REQUIRE(input.PARAMETER_PARAM_MAP["DH"].size() == 1);
+    REQUIRE_THROWS_AS(parseMonteCarloRange("220:200"), std::invalid_argument);
+    REQUIRE_THROWS_AS(parseMonteCarloRange("200:210:220"), std::invalid_argument);
+
+    CaseStream cases(input);
+    REQUIRE(cases.size() == 16);
+    std::set<int> tempStrata;
+    for(std::size_t i = 0; i < cases.size(); i++){
+        std::unordered_map<string,double> c = cases[i];
+        REQUIRE(c.at("DH") == 15);
+        REQUIRE(c.at("TEMPERATURE") >= 200);
+        REQUIRE(c.at("TEMPERATURE") < 220);
+        REQUIRE(c.at("RHW") >= 60);
+        REQUIRE(c.at("RHW") < 120);
+        tempStrata.insert(static_cast<int>((c.at("TEMPERATURE") - 200) / 20 * 16));
+    }
+    REQUIRE(tempStrata.size() == 16);
+    REQUIRE(CaseStream(input)[5] == cases[5]);
+}
 TEST_CASE("Generate Input Objects"){
     string filename = string(APCEMM_TESTS_DIR)+"/test1.yaml";
     OptInput input;
@@ -0,0 +1,115 @@
+import os
+import sys
+import argparse
+import numpy as np
+import xarray as xr
+
+
+"""
+**********************************
+DATA PROCESSING FUNCTIONS
+**********************************
+"""
+DEFAULT_OUTPUT_IDS = ["Ice Mass", "Number Ice Particles", "intOD"]
+
+def read_APCEMM_timeseries(directory, output_ids = DEFAULT_OUTPUT_IDS):
+    """
+    Reads the scalar outputs of all ts_aerosol files in "directory".
+    Returns a dict mapping the time since formation (in minutes) to a
+    dict of {output_id: value}.
+
+    Supported output_id values:
+        - "Number Ice Particles" (#/m)
+        - "Ice Mass" (Ice mass of contrail section per unit length (kg/m))
+        - "intOD" (Vertical optical depth integrated over the grid)
+        - "width" / "depth" (Extinction defined contrail width/depth in m)
+    """
+    data = {}
+
+    for file in sorted(os.listdir(directory)):
+        if(file.startswith('ts_aerosol') and file.endswith('.nc')):
+            file_path = os.path.join(directory,file)
+            tokens = file_path.split('.')
+            mins = int(tokens[-2][-2:])
+            hrs = int(tokens[-2][-4:-2])
+
+            with xr.open_dataset(file_path, engine = "netcdf4", decode_times = False) as ds:
+                data[hrs*60 + mins] = {output_id: float(ds[output_id].values[0]) for output_id in output_ids}
+
+    return data
+
+def compare_timeseries(ref_directory, test_directory, output_ids = DEFAULT_OUTPUT_IDS, rel_tol = 1e-3, abs_tol = 0.0):
+    """
+    Compares the time series written by two APCEMM runs, e.g. the default double
+    precision build (reference) against a build with FLOAT_PDF=ON (test).
+
+    Relative differences are taken with respect to the reference. Values whose
+    magnitude is below abs_tol in both runs are treated as equal, which avoids
+    spurious failures once the contrail has sublimated.
+
+    Returns (passed, report) where report maps each output_id to a list of
+    (t_mins, ref_value, test_value, rel_diff) tuples.
+    """
+    ref = read_APCEMM_timeseries(ref_directory, output_ids)
+    test = read_APCEMM_timeseries(test_directory, output_ids)
+
+    passed = True
+    if len(ref) == 0:
+        print("No ts_aerosol files found in " + ref_directory)
+        return False, {}
+
+    # Both runs have to survive for the same amount of time
+    if sorted(ref.keys()) != sorted(test.keys()):
+        print("Output times differ: reference has " + str(len(ref)) + " files, test has " + str(len(test)))
+        passed = False
+
+    report = {output_id: [] for output_id in output_ids}
+    for t_mins in sorted(set(ref.keys()) & set(test.keys())):
+        for output_id in output_ids:
+            ref_val = ref[t_mins][output_id]
+            test_val = test[t_mins][output_id]
+
+            if max(abs(ref_val), abs(test_val)) <= abs_tol:
+                rel_diff = 0.0
+            elif ref_val == 0:
+                rel_diff = np.inf
+            else:
+                rel_diff = abs(test_val - ref_val) / abs(ref_val)
+
+            report[output_id].append((t_mins, ref_val, test_val, rel_diff))
+            if rel_diff > rel_tol:
+                passed = False
+
+    return passed, report
+
+def print_report(report, rel_tol):
+    for output_id, rows in report.items():
+        if len(rows) == 0:
+            continue
+        rel_diffs = np.array([row[3] for row in rows])
+        i_max = int(np.argmax(rel_diffs))
+        print(f"{output_id:>22s}: max rel. diff {rel_diffs[i_max]:.3e} at t = {rows[i_max][0]} min, "
+              f"mean rel. diff {np.mean(rel_diffs):.3e} "
+              f"({np.sum(rel_diffs > rel_tol)}/{len(rows)} above {rel_tol:.1e})")
+
+
+"""
+**********************************
+MAIN FUNCTION
+**********************************
+"""
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser(description = "Compare APCEMM aerosol time series between two runs "
+                                                   "(e.g. double vs single precision PDF storage).")
+    parser.add_argument("reference", help = "Output folder of the reference (double precision) run")
+    parser.add_argument("test", help = "Output folder of the run to validate")
+    parser.add_argument("--rtol", type = float, default = 1e-3, help = "Maximum allowed relative difference")
+    parser.add_argument("--atol", type = float, default = 0.0, help = "Values below this in both runs are considered equal")
+    parser.add_argument("--outputs", nargs = "+", default = DEFAULT_OUTPUT_IDS, help = "ts_aerosol variables to compare")
+    args = parser.parse_args()
+
+    passed, report = compare_timeseries(args.reference, args.test, output_ids = args.outputs,
+                                        rel_tol = args.rtol, abs_tol = args.atol)
+    print_report(report, args.rtol)
+    print("PASSED" if passed else "FAILED")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,23 @@
+#!/bin/bash
+# Runs the same case with double (default) and single precision aerosol PDF storage
+# and compares the Ice Mass, N and intOD time series of the two runs.
+set -e
+cd "$(dirname "$0")"
+EXAMPLE_DIR=$(pwd)
+CODE_DIR=$EXAMPLE_DIR/../../Code.v05-00
+
+for PRECISION in double float; do
+    if [ "$PRECISION" == "float" ]; then FLOAT_PDF=ON; else FLOAT_PDF=OFF; fi
+    mkdir -p build_$PRECISION
+    cd build_$PRECISION
+    cmake -DFLOAT_PDF=$FLOAT_PDF $CODE_DIR && cmake --build . || exit 1
+    cd $EXAMPLE_DIR
+
+    rm -rf APCEMM_out APCEMM_out_$PRECISION
+    export APCEMM_runDir="."
+    /usr/bin/time -v ./build_$PRECISION/APCEMM input.yaml 2> time_$PRECISION.log
+    grep "Maximum resident set size" time_$PRECISION.log
+    mv APCEMM_out APCEMM_out_$PRECISION
+done
+
+python APCEMM-Compare-Precision.py APCEMM_out_double APCEMM_out_float --rtol 1e-3 --atol 1e-12
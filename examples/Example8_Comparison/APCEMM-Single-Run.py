@@ -1,4 +1,5 @@
 import os
+import sys
 # import chaospy
 import shutil
 import os.path
@@ -11,6 +12,10 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 from mpl_toolkits.axes_grid1 import make_axes_locatable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+from apcemm_tools.input_template import InputTemplate
+from apcemm_tools.orchestrator import Job, run_jobs
+from apcemm_tools.thermo import compute_p_sat_liq, compute_p_sat_ice, convert_RH_to_RHi, convert_RHi_to_RH
 
 
 """
@@ -99,194 +104,47 @@ def find_contrail_center(N_grid):
 WRITING APCEMM VARIABLES FUNCTIONS
 **********************************
 """
-def set_temp_K(lines : list, T : float) -> list:
-    """Sets thetemperature (T / K) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
+def input_location():
+    return os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
 
-    line =  "    Temperature [K] (double): " + str(T) + "\n"
-    newlines[38] = line
+# original.yaml is only parsed once, see input_template()
+_input_template = None
 
-    return newlines
+def input_template() -> InputTemplate:
+    global _input_template
+    if _input_template is None:
+        _input_template = InputTemplate.from_file(os.path.join(input_location(), 'original.yaml'))
+    return _input_template
 
-def set_RH_percent(lines : list, RH : float) -> list:
-    """Sets the relative humidity (RH / %) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "    R.Hum. wrt water [%] (double): " + str(RH) + "\n"
-    newlines[39] = line
-
-    return newlines
-
-def set_p_hPa(lines : list, p : float) -> list:
-    """Sets the pressure (p / hPa) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "    Pressure [hPa] (double): " + str(p) + "\n"
-    newlines[40] = line
-
-    return newlines
-
-def set_coords_deg(lines : list, lon : float, lat : float) -> list:
-    """Sets the longitude (lon / deg) and latitude (lat / deg) 
-    in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "    LON [deg] (double): " + str(lon) + "\n"
-    newlines[46] = line
-
-    line =  "    LAT [deg] (double): " + str(lat) + "\n"
-    newlines[47] = line
-
-    return newlines
-
-def set_day(lines : list, day : int) -> list:
-    """Sets the day (1-365) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "    Emission day [1-365] (int): " + str(day) + "\n"
-    newlines[48] = line
-
-    return newlines
-
-def set_time_hrs_UTC(lines : list, hr : float) -> list:
-    """Sets the time (24hr format UTC) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "    Emission time [hr] (double) : " + str(hr) + "\n"
-    newlines[49] = line
-
-    return newlines
-
-def set_EI_soot_gPerkg(lines : list, EI_soot : float) -> list:
-    """Sets the soot Emissions Index (EI_soot / g of soot per kg of fuel) 
-    in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "    Soot [g/kg_fuel] (double): " + str(EI_soot) + "\n"
-    newlines[63] = line
-
-    return newlines
-
-def set_fuel_flow_kgPers(lines : list, fuel_flow : float) -> list:
-    """Sets the fuel flow (fuel_flow / kg per s) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "  Total fuel flow [kg/s] (double) : " + str(fuel_flow) + "\n"
-    newlines[65] = line
-
-    return newlines
-
-def set_aircraft_mass_kg(lines : list, aircraft_mass : float) -> list:
-    """Sets the aircraft mass (aircraft_mass / kg) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "  Aircraft mass [kg] (double): " + str(aircraft_mass) + "\n"
-    newlines[66] = line
-
-    return newlines
-
-def set_flight_speed_mPers(lines : list, flight_speed : float) -> list:
-    """Sets the flight speed (flight_speed / m/s) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "  Flight speed [m/s] (double): " + str(flight_speed) + "\n"
-    newlines[67] = line
-
-    return newlines
-
-def set_core_exit_temp_K(lines : list, T_core_exit : float) -> list:
-    """Sets the core exit temperature (T_core_exit / K) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "  Core exit temp. [K] (double): " + str(T_core_exit) + "\n"
-    newlines[70] = line
-
-    return newlines
+def write_input(overrides : dict = {}):
+    # Writes input.yaml: original.yaml with the values of overrides. The keys are the
+    # menu paths of the parameters or their short names (see apcemm_tools.input_template)
+    input_template().write(os.path.join(input_location(), 'input.yaml'), overrides)
 
 def default_APCEMM_vars():
-    location = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
-
-    # Read the input file
-    ip_file = open(os.path.join(location,'original.yaml'), 'r')
-    op_lines = ip_file.readlines()
-    ip_file.close()
-
-    op_file = open(os.path.join(location,'input.yaml'), 'w')
-    op_file.writelines(op_lines)
-    op_file.close()
+    write_input()
 
 def write_APCEMM_vars(temp_K = 217, RH_percent = 63.94, p_hPa = 250.0, lat_deg = 20.2, 
                lon_deg = 20.2, day = 20, time_hrs_UTC = 20.0, EI_soot_gPerkg = 0.008,
                fuel_flow_kgPers = 2.8, aircraft_mass_kg = 3.10e+05, 
                flight_speed_mPers = 250.0, core_exit_temp_K = 560.0):
-    
-    location = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
-
-    # Read the input file
-    ip_file = open(os.path.join(location,'input.yaml'), 'r')
-    op_lines = ip_file.readlines()
-    ip_file.close()
-
-    # Write the variables to input.yaml
-    op_lines = set_temp_K(op_lines, temp_K)
-    op_lines = set_RH_percent(op_lines, RH_percent)
-    op_lines = set_p_hPa(op_lines, p_hPa)
-    op_lines = set_coords_deg(op_lines, lon_deg, lat_deg)
-    op_lines = set_day(op_lines, day)
-    op_lines = set_time_hrs_UTC(op_lines, time_hrs_UTC)
-    op_lines = set_EI_soot_gPerkg(op_lines, EI_soot_gPerkg)
-    op_lines = set_fuel_flow_kgPers(op_lines, fuel_flow_kgPers)
-    op_lines = set_aircraft_mass_kg(op_lines, aircraft_mass_kg)
-    op_lines = set_flight_speed_mPers(op_lines, flight_speed_mPers)
-    op_lines = set_core_exit_temp_K(op_lines, core_exit_temp_K)
-
-    op_file = open(os.path.join(location,'input.yaml'), 'w')
-    op_file.writelines(op_lines)
-    op_file.close()
+    write_input({
+        "temp_K": temp_K,
+        "RH_percent": RH_percent,
+        "p_hPa": p_hPa,
+        "lon_deg": lon_deg,
+        "lat_deg": lat_deg,
+        "day": day,
+        "time_hrs_UTC": time_hrs_UTC,
+        "EI_soot_gPerkg": EI_soot_gPerkg,
+        "fuel_flow_kgPers": fuel_flow_kgPers,
+        "aircraft_mass_kg": aircraft_mass_kg,
+        "flight_speed_mPers": flight_speed_mPers,
+        "core_exit_temp_K": core_exit_temp_K,
+    })
 
 def write_APCEMM_NIPC_vars(NIPC_vars):
-    
-    location = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
-
-    # Read the input file
-    ip_file = open(os.path.join(location,'input.yaml'), 'r')
-    op_lines = ip_file.readlines()
-    ip_file.close()
-
-    for var in NIPC_vars:
-        if var.name == "temp_K":
-            op_lines = set_temp_K(op_lines, var.data)
-            continue
-        if var.name == "RH_percent":
-            op_lines = set_RH_percent(op_lines, var.data)
-            continue
-        if var.name == "EI_soot_gPerkg":
-            op_lines = set_EI_soot_gPerkg(op_lines, var.data)
-            continue
-        if var.name == "fuel_flow_kgPers":
-            op_lines = set_fuel_flow_kgPers(op_lines, var.data)
-            continue
-        if var.name == "aircraft_mass_kg":
-            op_lines = set_aircraft_mass_kg(op_lines, var.data)
-            continue
-        if var.name == "flight_speed_mPers":
-            op_lines = set_flight_speed_mPers(op_lines, var.data)
-            continue
-        if var.name == "core_exit_temp_K":
-            op_lines = set_core_exit_temp_K(op_lines, var.data)
-            continue
-        if var.name == "time_hrs_UTC":
-            op_lines = set_time_hrs_UTC(op_lines, var.data)
-            continue
-        if var.name == "p_hPa":
-            op_lines = set_p_hPa(op_lines, var.data)
-            continue
-
-    op_file = open(os.path.join(location,'input.yaml'), 'w')
-    op_file.writelines(op_lines)
-    op_file.close()
-
-
+    write_input({var.name: var.data for var in NIPC_vars})
 
 """
 **********************************
@@ -405,46 +263,6 @@ def removeLow(arr, cutoff = 1e-3):
 
 
 
-"""
-**********************************
-THERMODYNAMICS FUNCTIONS
-**********************************
-"""
-def compute_p_sat_liq(T_K):
-    # Calculates the liquid saturation pressure "p_sat_liq" (in units of Pa).
-    # This equation can be found in Schumann 2012.
-    # % 
-    # % The inputs are as follows
-    # %	- T_K is the absolute temperature in Kelvin
-    a = -6096.9385
-    b = 16.635794
-    c = -0.02711193
-    d = 1.673952e-5
-    e = 2.433502
-
-    return 100 * np.exp(a / T_K + b + c * T_K + d * T_K * T_K + e * np.log(T_K))
-
-def compute_p_sat_ice(T_K):
-    # Calculates the ice saturation pressure "p_sat_ice" (in units of Pa)
-    # The equation can be found in Schumann 2012.
-    #  
-    # The inputs are as follows
-    # - T_K is the absolute temperature in Kelvin
-
-    a = -6024.5282
-    b = 24.7219
-    c = 0.010613868
-    d = -1.3198825e-5
-    e = -0.49382577
-
-    return 100 * np.exp(a / T_K + b + c * T_K + d * T_K * T_K + e * np.log(T_K))
-
-def convert_RH_to_RHi(T_K, RH):
-    return RH * compute_p_sat_liq(T_K) / compute_p_sat_ice(T_K)
-
-def convert_RHi_to_RH(T_K, RHi):
-    return RHi * compute_p_sat_ice(T_K) / compute_p_sat_liq(T_K)
-
 """
 **********************************
 NIPC FUNCTIONS
@@ -487,6 +305,7 @@ def eval_APCEMM(NIPC_vars = [], met_filepath = "inputs/met/test-APCEMM-met.nc",
     #   - "core_exit_temp_K"
     #   - "time_hrs_UTC"
     #   - "p_hPa"
+    #   - any other parameter of original.yaml, by its menu path
     #
     #
     # Supported output_id values:
@@ -508,8 +327,12 @@ def eval_APCEMM(NIPC_vars = [], met_filepath = "inputs/met/test-APCEMM-met.nc",
     # Copy the relevant met file to the example root folder
     set_up_met(met_filepath=met_filepath)
 
-    # Run APCEMM
-    os.system('./../../build/APCEMM input.yaml')
+    # Run APCEMM, its output goes to APCEMM_out/APCEMM.log.gz
+    output_folder = os.path.join(input_location(), 'APCEMM_out')
+    result = run_jobs([Job(['./../../build/APCEMM', 'input.yaml'], output_folder = output_folder,
+                           log_file = os.path.join(output_folder, 'APCEMM.log.gz'))])[0]
+    if not result.ok:
+        print(result)
 
     return process_and_save_outputs(filepath=output_filepath)
 
@@ -1,4 +1,5 @@
 import os
+import sys
 # import chaospy
 import shutil
 import os.path
@@ -11,6 +12,13 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 from mpl_toolkits.axes_grid1 import make_axes_locatable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+from apcemm_tools.input_template import InputTemplate
+from apcemm_tools.orchestrator import Job, run_jobs
+from apcemm_tools.thermo import compute_p_sat_liq, compute_p_sat_ice, convert_RH_to_RHi, convert_RHi_to_RH
+from apcemm_tools.manifest import RunManifest, hash_inputs
+from apcemm_tools.workqueue import WorkQueue, run_worker, apcemm_runner
+from apcemm_tools.costmodel import RuntimeLog, RuntimeModel, case_features
 
 
 """
@@ -99,209 +107,47 @@ def find_contrail_center(N_grid):
 WRITING APCEMM VARIABLES FUNCTIONS
 **********************************
 """
-def set_temp_K(lines : list, T : float) -> list:
-    """Sets thetemperature (T / K) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
+def input_location():
+    return os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
 
-    line =  "    Temperature [K] (double): " + str(T) + "\n"
-    newlines[38] = line
+# original.yaml is only parsed once, see input_template()
+_input_template = None
 
-    return newlines
+def input_template() -> InputTemplate:
+    global _input_template
+    if _input_template is None:
+        _input_template = InputTemplate.from_file(os.path.join(input_location(), 'original.yaml'))
+    return _input_template
 
-def set_RH_percent(lines : list, RH : float) -> list:
-    """Sets the relative humidity (RH / %) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "    R.Hum. wrt water [%] (double): " + str(RH) + "\n"
-    newlines[39] = line
-
-    return newlines
-
-def set_p_hPa(lines : list, p : float) -> list:
-    """Sets the pressure (p / hPa) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "    Pressure [hPa] (double): " + str(p) + "\n"
-    newlines[40] = line
-
-    return newlines
-
-def set_coords_deg(lines : list, lon : float, lat : float) -> list:
-    """Sets the longitude (lon / deg) and latitude (lat / deg) 
-    in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "    LON [deg] (double): " + str(lon) + "\n"
-    newlines[46] = line
-
-    line =  "    LAT [deg] (double): " + str(lat) + "\n"
-    newlines[47] = line
-
-    return newlines
-
-def set_day(lines : list, day : int) -> list:
-    """Sets the day (1-365) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "    Emission day [1-365] (int): " + str(day) + "\n"
-    newlines[48] = line
-
-    return newlines
-
-def set_time_hrs_UTC(lines : list, hr : float) -> list:
-    """Sets the time (24hr format UTC) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "    Emission time [hr] (double) : " + str(hr) + "\n"
-    newlines[49] = line
-
-    return newlines
-
-def set_EI_soot_gPerkg(lines : list, EI_soot : float) -> list:
-    """Sets the soot Emissions Index (EI_soot / g of soot per kg of fuel) 
-    in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "    Soot [g/kg_fuel] (double): " + str(EI_soot) + "\n"
-    newlines[63] = line
-
-    return newlines
-
-def set_fuel_flow_kgPers(lines : list, fuel_flow : float) -> list:
-    """Sets the fuel flow (fuel_flow / kg per s) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "  Total fuel flow [kg/s] (double) : " + str(fuel_flow) + "\n"
-    newlines[65] = line
-
-    return newlines
-
-def set_aircraft_mass_kg(lines : list, aircraft_mass : float) -> list:
-    """Sets the aircraft mass (aircraft_mass / kg) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "  Aircraft mass [kg] (double): " + str(aircraft_mass) + "\n"
-    newlines[66] = line
-
-    return newlines
-
-def set_flight_speed_mPers(lines : list, flight_speed : float) -> list:
-    """Sets the flight speed (flight_speed / m/s) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "  Flight speed [m/s] (double): " + str(flight_speed) + "\n"
-    newlines[67] = line
-
-    return newlines
-
-def set_core_exit_temp_K(lines : list, T_core_exit : float) -> list:
-    """Sets the core exit temperature (T_core_exit / K) in the lines from input.yaml (lines)"""
-    newlines = lines.copy()
-
-    line =  "  Core exit temp. [K] (double): " + str(T_core_exit) + "\n"
-    newlines[70] = line
-
-    return newlines
+def write_input(overrides : dict = {}):
+    # Writes input.yaml: original.yaml with the values of overrides. The keys are the
+    # menu paths of the parameters or their short names (see apcemm_tools.input_template)
+    input_template().write(os.path.join(input_location(), 'input.yaml'), overrides)
 
 def default_APCEMM_vars():
-    location = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
-
-    # Read the input file
-    ip_file = open(os.path.join(location,'original.yaml'), 'r', newline='\n')
-    op_lines = ip_file.readlines()
-    ip_file.close()
-
-    op_file = open(os.path.join(location,'input.yaml'), 'w', newline='\n')
-    op_file.writelines(op_lines)
-    op_file.close()
+    write_input()
 
 def write_APCEMM_vars(temp_K = 217, RH_percent = 63.94, p_hPa = 250.0, lat_deg = 20.2, 
                lon_deg = 20.2, day = 20, time_hrs_UTC = 20.0, EI_soot_gPerkg = 0.008,
                fuel_flow_kgPers = 2.8, aircraft_mass_kg = 3.10e+05, 
                flight_speed_mPers = 250.0, core_exit_temp_K = 560.0):
-    
-    location = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
-
-    # Read the input file
-    ip_file = open(os.path.join(location,'input.yaml'), 'r', newline='\n')
-    op_lines = ip_file.readlines()
-    ip_file.close()
-
-    # Write the variables to input.yaml
-    op_lines = set_temp_K(op_lines, temp_K)
-    op_lines = set_RH_percent(op_lines, RH_percent)
-    op_lines = set_p_hPa(op_lines, p_hPa)
-    op_lines = set_coords_deg(op_lines, lon_deg, lat_deg)
-    op_lines = set_day(op_lines, day)
-    op_lines = set_time_hrs_UTC(op_lines, time_hrs_UTC)
-    op_lines = set_EI_soot_gPerkg(op_lines, EI_soot_gPerkg)
-    op_lines = set_fuel_flow_kgPers(op_lines, fuel_flow_kgPers)
-    op_lines = set_aircraft_mass_kg(op_lines, aircraft_mass_kg)
-    op_lines = set_flight_speed_mPers(op_lines, flight_speed_mPers)
-    op_lines = set_core_exit_temp_K(op_lines, core_exit_temp_K)
-
-    op_file = open(os.path.join(location,'input.yaml'), 'w', newline='\n')
-    op_file.writelines(op_lines)
-    op_file.close()
+    write_input({
+        "temp_K": temp_K,
+        "RH_percent": RH_percent,
+        "p_hPa": p_hPa,
+        "lon_deg": lon_deg,
+        "lat_deg": lat_deg,
+        "day": day,
+        "time_hrs_UTC": time_hrs_UTC,
+        "EI_soot_gPerkg": EI_soot_gPerkg,
+        "fuel_flow_kgPers": fuel_flow_kgPers,
+        "aircraft_mass_kg": aircraft_mass_kg,
+        "flight_speed_mPers": flight_speed_mPers,
+        "core_exit_temp_K": core_exit_temp_K,
+    })
 
 def write_APCEMM_NIPC_vars(NIPC_vars):
-    
-    location = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
-
-    # Read the input file
-    ip_file = open(os.path.join(location,'input.yaml'), 'r', newline='\n')
-    op_lines = ip_file.readlines()
-    ip_file.close()
-
-    for var in NIPC_vars:
-        if var.name == "temp_K":
-            op_lines = set_temp_K(op_lines, var.data)
-            continue
-        if var.name == "RH_percent":
-            op_lines = set_RH_percent(op_lines, var.data)
-            continue
-        if var.name == "EI_soot_gPerkg":
-            op_lines = set_EI_soot_gPerkg(op_lines, var.data)
-            continue
-        if var.name == "fuel_flow_kgPers":
-            op_lines = set_fuel_flow_kgPers(op_lines, var.data)
-            continue
-        if var.name == "aircraft_mass_kg":
-            op_lines = set_aircraft_mass_kg(op_lines, var.data)
-            continue
-        if var.name == "flight_speed_mPers":
-            op_lines = set_flight_speed_mPers(op_lines, var.data)
-            continue
-        if var.name == "core_exit_temp_K":
-            op_lines = set_core_exit_temp_K(op_lines, var.data)
-            continue
-        if var.name == "time_hrs_UTC":
-            op_lines = set_time_hrs_UTC(op_lines, var.data)
-            continue
-        if var.name == "p_hPa":
-            op_lines = set_p_hPa(op_lines, var.data)
-            continue
-
-    op_file = open(os.path.join(location,'input.yaml'), 'w', newline='\n')
-    op_file.writelines(op_lines)
-    op_file.close()
-
-def write_shear(shear = 2e-3):
-    location = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
-
-    # Read the input file
-    ip_file = open(os.path.join(location,'input.yaml'), 'r', newline='\n')
-    op_lines = ip_file.readlines()
-    ip_file.close()
-
-    shear_line = op_lines[43]
-    line_base = shear_line.split(':')[0]
-
-    op_lines[43] = line_base + f": {shear}\n"
-
-    op_file = open(os.path.join(location,'input.yaml'), 'w', newline='\n')
-    op_file.writelines(op_lines)
-    op_file.close()
+    write_input({var.name: var.data for var in NIPC_vars})
 
 """
 **********************************
@@ -309,10 +155,10 @@ def write_shear(shear = 2e-3):
 **********************************
 """
 
-def process_and_save_outputs(filepath = "outputs/APCEMM-test-outputs.csv"):
+def process_and_save_outputs(filepath = "outputs/APCEMM-test-outputs.csv", output_folder = None):
     directory = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
     op_filepath = os.path.join(directory, filepath)
-    directory = os.path.join(directory, "APCEMM_out/")
+    directory = output_folder if output_folder is not None else os.path.join(directory, "APCEMM_out/")
 
     # Initialise empty lists for the outputs of interest
     t_hrs = []
@@ -413,6 +259,16 @@ def reset_APCEMM_outputs():
             except Exception as e:
                 print('Failed to delete %s. Reason: %s' % (file_path, e))
 
+def read_APCEMM_status(output_folder = None):
+    # Status of the last run (see CreateStatusOutput), "Failed" if it did not write one
+    directory = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
+    directory = output_folder if output_folder is not None else os.path.join(directory, "APCEMM_out/")
+    try:
+        with open(os.path.join(directory, "status_case0")) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return "Failed"
+
 def removeLow(arr, cutoff = 1e-3):
     func = lambda x: (x > cutoff) * x
     vfunc = np.vectorize(func)
@@ -420,46 +276,6 @@ def removeLow(arr, cutoff = 1e-3):
 
 
 
-"""
-**********************************
-THERMODYNAMICS FUNCTIONS
-**********************************
-"""
-def compute_p_sat_liq(T_K):
-    # Calculates the liquid saturation pressure "p_sat_liq" (in units of Pa).
-    # This equation can be found in Schumann 2012.
-    # % 
-    # % The inputs are as follows
-    # %	- T_K is the absolute temperature in Kelvin
-    a = -6096.9385
-    b = 16.635794
-    c = -0.02711193
-    d = 1.673952e-5
-    e = 2.433502
-
-    return 100 * np.exp(a / T_K + b + c * T_K + d * T_K * T_K + e * np.log(T_K))
-
-def compute_p_sat_ice(T_K):
-    # Calculates the ice saturation pressure "p_sat_ice" (in units of Pa)
-    # The equation can be found in Schumann 2012.
-    #  
-    # The inputs are as follows
-    # - T_K is the absolute temperature in Kelvin
-
-    a = -6024.5282
-    b = 24.7219
-    c = 0.010613868
-    d = -1.3198825e-5
-    e = -0.49382577
-
-    return 100 * np.exp(a / T_K + b + c * T_K + d * T_K * T_K + e * np.log(T_K))
-
-def convert_RH_to_RHi(T_K, RH):
-    return RH * compute_p_sat_liq(T_K) / compute_p_sat_ice(T_K)
-
-def convert_RHi_to_RH(T_K, RHi):
-    return RHi * compute_p_sat_ice(T_K) / compute_p_sat_liq(T_K)
-
 """
 **********************************
 NIPC FUNCTIONS
@@ -491,7 +307,8 @@ def set_up_met(met_filepath = "inputs/met/test-APCEMM-met.nc"):
     shutil.copyfile(source_filepath, destination_filepath)
 
 def eval_APCEMM(NIPC_vars = [], met_filepath = "inputs/met/test-APCEMM-met.nc",
-                output_filepath = "outputs/APCEMM-test-outputs.csv"):
+                output_filepath = "outputs/APCEMM-test-outputs.csv", overrides = {}, run_directory = None,
+                features = None, runtime_log = None):
     # Supported NIPC_var.names:
     #   - "temp_K"
     #   - "RH_percent"
@@ -502,6 +319,7 @@ def eval_APCEMM(NIPC_vars = [], met_filepath = "inputs/met/test-APCEMM-met.nc",
     #   - "core_exit_temp_K"
     #   - "time_hrs_UTC"
     #   - "p_hPa"
+    #   - any other parameter of original.yaml, by its menu path
     #
     #
     # Supported output_id values:
@@ -511,8 +329,14 @@ def eval_APCEMM(NIPC_vars = [], met_filepath = "inputs/met/test-APCEMM-met.nc",
     #     - "Ice Mass" (Ice mass of contrail section per unit length (kg/m))
     #     - "intOD" (Vertical optical depth integrated over the grid)
 
-    # Default the variables
-    default_APCEMM_vars()
+    # With run_directory, the input file and the outputs of the run go to that
+    # folder and the status of the run is returned with the outputs (see
+    # eval_APCEMM_in), so that several runs can go on at once.
+    if run_directory is not None:
+        return eval_APCEMM_in(run_directory, met_filepath, output_filepath, overrides, features, runtime_log)
+
+    # Default the variables, except for the overridden ones (e.g. {"shear": 2e-3})
+    write_input(overrides)
 
     # # Write the specific variables one by one
     # write_APCEMM_NIPC_vars(NIPC_vars)
@@ -523,11 +347,51 @@ def eval_APCEMM(NIPC_vars = [], met_filepath = "inputs/met/test-APCEMM-met.nc",
     # Copy the relevant met file to the example root folder
     set_up_met(met_filepath=met_filepath)
 
-    # Run APCEMM
-    os.system('./../../build/APCEMM input.yaml')
+    # Run APCEMM, its output goes to APCEMM_out/APCEMM.log.gz
+    output_folder = os.path.join(input_location(), 'APCEMM_out')
+    result = run_jobs([Job(['./../../build/APCEMM', 'input.yaml'], output_folder = output_folder,
+                           log_file = os.path.join(output_folder, 'APCEMM.log.gz'))])[0]
+    if not result.ok:
+        print(result)
 
     return process_and_save_outputs(filepath=output_filepath)
 
+def eval_APCEMM_in(run_directory, met_filepath, output_filepath, overrides = {}, features = None,
+                   runtime_log = None):
+    # Runs APCEMM with its own input.yaml and APCEMM_out/ in run_directory, which is
+    # emptied first. The met file is read where it is, not copied. Returns the outputs
+    # and the status of the run. The run time is recorded in runtime_log (RuntimeLog)
+    # with the features of the case (see apcemm_tools.costmodel).
+    shutil.rmtree(run_directory, ignore_errors = True)
+    output_folder = os.path.join(run_directory, 'APCEMM_out') + '/'
+    os.makedirs(output_folder)
+
+    template = input_template()
+    overrides = template.absolute_paths(dict(overrides, **{"Met input file path (string)": met_filepath}),
+                                        input_location())
+    overrides[template.resolve("Output folder (string)")] = output_folder
+    overrides[template.resolve("Dir w/ write permission (string)")] = run_directory + '/'
+    input_file = os.path.join(run_directory, 'input.yaml')
+    template.write(input_file, overrides)
+
+    apcemm = os.path.join(input_location(), '../../build/APCEMM')
+    result = run_jobs([Job([apcemm, input_file], cwd = run_directory, output_folder = output_folder,
+                           log_file = os.path.join(output_folder, 'APCEMM.log.gz'), features = features)],
+                      runtime_log = runtime_log)[0]
+    if not result.ok:
+        print(result)
+
+    return process_and_save_outputs(filepath=output_filepath, output_folder=output_folder), \
+        read_APCEMM_status(output_folder)
+
+def shear_from_met_filename(met_filename):
+    shear_val = 2e-3
+    shear_idx = met_filename.find("shear")
+    if shear_idx > -1:
+        shortened_name = met_filename[shear_idx+6:]
+        shear_val = float(shortened_name.split('_')[0])
+    return shear_val
+
 def run_from_met(mode = "sweep"):
     """ Mode can be "sweep", "matrix", or "both" """
 
@@ -543,33 +407,88 @@ def run_from_met(mode = "sweep"):
     met_directory_iter = os.path.join(directory, "inputs/met/" + mode + "/")
     met_directory_iter = os.fsencode(met_directory_iter)
     op_directory = "outputs/" + mode + "/"
-        
-    i = 1
-    for file in os.listdir(met_directory_iter):
-        met_filename = os.fsdecode(file)
-        met_filepath = os.path.join("inputs/met/" + mode + "/", met_filename)
 
-        case_name = met_filename[:-7]
-        op_filepath = os.path.join(op_directory, case_name + "-OP.csv")
+    # The finished runs are recorded, so that an interrupted study resumes where it stopped.
+    # Runs of drivers on other nodes are taken over after 12 hours (longer than any run).
+    manifest = RunManifest(os.path.join(directory, op_directory, "manifest.jsonl"), stale_after = 12 * 3600)
 
-        shear_val = 2e-3
-        shear_idx = met_filename.find("shear")
-        if shear_idx > -1:
-            shortened_name = met_filename[shear_idx+6:]
-            shear_val = float(shortened_name.split('_')[0])
+    # Longest cases first, as predicted from the run times of earlier studies, so that
+    # drivers sharing the manifest finish at about the same time
+    runtime_log = RuntimeLog(os.path.join(directory, "outputs/runtimes.jsonl"))
+    model = RuntimeModel.from_log(runtime_log)
+    def met_features(met_filename):
+        return case_features(input_template(), {"shear": shear_from_met_filename(met_filename)})
 
-        write_shear(shear=shear_val)        
+    met_filenames = sorted(os.fsdecode(file) for file in os.listdir(met_directory_iter))
+    met_filenames.sort(key = lambda met_filename: model.predict(met_features(met_filename)), reverse = True)
+    case_names = [met_filename[:-7] for met_filename in met_filenames]
 
-        eval_APCEMM(
-            met_filepath = met_filepath,
-            output_filepath = op_filepath
-        )
+    for met_filename, case_name in zip(met_filenames, case_names):
+        met_filepath = os.path.join("inputs/met/" + mode + "/", met_filename)
+        op_filepath = os.path.join(op_directory, case_name + "-OP.csv")
+
+        overrides = {"shear": shear_from_met_filename(met_filename)}
+        inputs_hash = hash_inputs(input_template().render(overrides), os.path.join(directory, met_filepath))
+        if not manifest.claim(case_name, inputs_hash, output_path = op_filepath):
+            continue
 
-        print(str(i) + " " + mode + " run(s) done")
-        i += 1
+        # Each case runs in its own folder, so that drivers do not share input or output files
+        try:
+            _, status = eval_APCEMM(
+                met_filepath = met_filepath,
+                output_filepath = op_filepath,
+                overrides = overrides,
+                run_directory = os.path.join(directory, op_directory, "runs", case_name),
+                features = met_features(met_filename),
+                runtime_log = runtime_log
+            )
+        except Exception:
+            manifest.finish(case_name, "Failed")
+            raise
+        manifest.finish(case_name, status)
+
+        print(mode + ": " + manifest.progress_line(case_names))
 
     return 1
 
+def queue_from_met(mode = "sweep", queue_directory = "outputs/queue"):
+    """ Queues the met cases of mode ("sweep" or "matrix") for work_from_queue() """
+    directory = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
+    queue = WorkQueue(os.path.join(directory, queue_directory))
+
+    # The longest cases are run first, as predicted from the run times of earlier studies
+    model = RuntimeModel.from_log(os.path.join(directory, "outputs/runtimes.jsonl"))
+
+    for met_filename in sorted(os.listdir(os.path.join(directory, "inputs/met/" + mode))):
+        case_name = met_filename[:-7]
+        overrides = {
+            "shear": shear_from_met_filename(met_filename),
+            "Met input file path (string)": "inputs/met/" + mode + "/" + met_filename,
+        }
+        queue.add(mode + "-" + case_name, {
+            "output_filepath": "outputs/" + mode + "/" + case_name + "-OP.csv",
+            "overrides": overrides,
+        }, predicted_seconds = model.predict(case_features(input_template(), overrides)))
+
+    print(queue.counts())
+
+def work_from_queue(queue_directory = "outputs/queue", scratch_root = None):
+    """ Runs queued cases, each in its own scratch folder, until none are left.
+    Any number of workers can be started, on any node that shares this folder. """
+    directory = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
+    queue = WorkQueue(os.path.join(directory, queue_directory))
+
+    def summarize(case, task, output_folder):
+        process_and_save_outputs(filepath=task["output_filepath"], output_folder=output_folder)
+        return {"output_path": task["output_filepath"]}
+
+    runtime_log = RuntimeLog(os.path.join(directory, "outputs/runtimes.jsonl"))
+    run_case = apcemm_runner('./../../build/APCEMM', input_template(), directory, summarize = summarize,
+                             runtime_log = runtime_log)
+    n = run_worker(queue, run_case, scratch_root = scratch_root)
+
+    print(str(n) + " run(s) done, " + str(queue.counts()))
+
 def test():
     # Chaospy code from https://chaospy.readthedocs.io/en/master/user_guide/advanced_topics/generalized_polynomial_chaos.html
     # Using point collocation
@@ -589,5 +508,13 @@ def test():
 **********************************
 """
 if __name__ == "__main__" :
-    run_from_met(mode = "both")
-    # write_shear(2142)
\ No newline at end of file
+    # No argument: runs all the met cases one after the other
+    # "queue": queues them for workers, "work": starts a worker (see work_from_queue)
+    if len(sys.argv) > 1 and sys.argv[1] == "queue":
+        queue_from_met(mode = "sweep")
+        queue_from_met(mode = "matrix")
+    elif len(sys.argv) > 1 and sys.argv[1] == "work":
+        work_from_queue()
+    else:
+        run_from_met(mode = "both")
+    # write_input({"shear": 2142})
\ No newline at end of file
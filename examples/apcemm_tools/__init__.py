@@ -0,0 +1,11 @@
+"""
+Python tools for preparing, running and post-processing APCEMM cases.
+"""
+from .input_template import InputTemplate, PARAMETER_ALIASES, PATH_PARAMETERS, format_value
+from .sweep import Sweep, SweepCase, sweep_values, read_manifest, clear_case_outputs
+from .orchestrator import Orchestrator, Job, JobResult, JobProgress, run_jobs
+from .manifest import RunManifest, LockedFile, hash_inputs
+from .workqueue import WorkQueue, CaseFailed, run_worker, apcemm_runner
+from .thermo import compute_p_sat_liq, compute_p_sat_ice, convert_RH_to_RHi, convert_RHi_to_RH
+from .costmodel import RuntimeModel, RuntimeLog, case_features
+from .prescreen import prescreen, peak_RH_water, engine_parameters, ENGINE_PARAMETERS, EI_H2O_JETA
@@ -0,0 +1,201 @@
+"""
+**********************************
+RUNTIME COST MODEL
+**********************************
+
+Predicts the run time of APCEMM cases from their inputs, so that batches can
+be scheduled longest job first: with the long cases started first, the short
+ones fill the gaps at the end and all processes finish at about the same time.
+Started in the order they come, a long case drawn last keeps one process busy
+long after the others are done. E.g.
+
+    log = RuntimeLog("outputs/runtimes.jsonl")
+    model = RuntimeModel.from_log(log)
+    jobs = [Job([...], features = case_features(template, overrides)) for overrides in cases]
+    run_jobs(jobs, cost_model = model, runtime_log = log)
+
+The orchestrator appends the features and the wall time of every successful
+job to the runtime log, so the model gets better with every batch.
+
+The run time is mostly set by the grid size and the plume process time, and
+by whether the contrail persists (RHi): APCEMM stops early when the ice is
+gone. The model is a least-squares fit of the log of the run time on these
+inputs, the moist layer depth and the wind shear. Until the log holds enough
+runs, a rule of thumb (grid cells x simulated hours) is used instead, which
+is enough to order the jobs.
+"""
+import os
+import json
+import math
+from .thermo import convert_RH_to_RHi
+from .manifest import LockedFile
+
+FEATURES = ("grid_cells", "plume_hr", "RHi_percent", "layer_depth_m", "shear")
+
+# Values of the features that cannot be read from an input file
+DEFAULT_FEATURES = {"grid_cells": 200 * 180, "plume_hr": 12.0, "RHi_percent": 110.0, "layer_depth_m": 0.0, "shear": 0.002}
+
+# Rule of thumb before any fit: seconds per grid cell and simulated hour, and
+# the simulated hours of a contrail that does not persist
+_SECONDS_PER_CELL_HR = 1e-4
+_NONPERSISTENT_HR = 0.5
+
+# Ridge regularization of the fit, keeps it well-posed with few or similar runs
+_RIDGE = 1e-3
+
+
+def _first_float(value):
+    """First value of a parameter (sweeps list several), None if not a number"""
+    try:
+        return float(str(value).split()[0])
+    except (IndexError, ValueError):
+        return None
+
+
+def case_features(template, overrides = {}):
+    """Features of the case of an InputTemplate and its overrides, {name: value} for FEATURES"""
+    values = {template.resolve(key): value for key, value in overrides.items()}
+
+    def get(key):
+        path = template.resolve(key)
+        return values.get(path, template.get(path))
+
+    features = dict(DEFAULT_FEATURES)
+    try:
+        nx, ny = _first_float(get("NX (positive int)")), _first_float(get("NY (positive int)"))
+        if nx is not None and ny is not None:
+            features["grid_cells"] = nx * ny
+    except KeyError:
+        pass
+    for name, key in (("plume_hr", "Plume Process [hr] (double)"), ("shear", "shear")):
+        try:
+            value = _first_float(get(key))
+        except KeyError:
+            continue
+        if value is not None:
+            features[name] = value
+    try:
+        T_K, RH_percent = _first_float(get("temp_K")), _first_float(get("RH_percent"))
+        if T_K is not None and RH_percent is not None:
+            features["RHi_percent"] = float(convert_RH_to_RHi(T_K, RH_percent))
+    except KeyError:
+        pass
+    try:
+        if str(get("Impose moist layer depth (T/F)")).strip().upper().startswith("T"):
+            features["layer_depth_m"] = _first_float(get("Moist layer depth [m] (double)")) or 0.0
+    except KeyError:
+        pass
+    return features
+
+
+def _design(features):
+    """Regressors of the log of the run time"""
+    f = dict(DEFAULT_FEATURES, **{k: v for k, v in features.items() if v is not None})
+    hours = math.log(max(f["plume_hr"], 1e-3))
+    persistent = 1.0 if f["RHi_percent"] >= 100.0 else 0.0
+    return [1.0,
+            math.log(max(f["grid_cells"], 1.0)),
+            hours,
+            persistent,
+            persistent * hours,
+            persistent * (f["RHi_percent"] - 100.0) / 10.0,
+            persistent * math.log1p(max(f["layer_depth_m"], 0.0) / 100.0),
+            persistent * f["shear"] * 1e3]
+
+
+def _solve(A, b):
+    """Solution of the linear system A x = b, Gaussian elimination with partial pivoting"""
+    n = len(b)
+    M = [list(row) + [rhs] for row, rhs in zip(A, b)]
+    for i in range(n):
+        pivot = max(range(i, n), key = lambda r: abs(M[r][i]))
+        M[i], M[pivot] = M[pivot], M[i]
+        if M[i][i] == 0.0:
+            raise ValueError("Singular system")
+        for r in range(i + 1, n):
+            factor = M[r][i] / M[i][i]
+            for c in range(i, n + 1):
+                M[r][c] -= factor * M[i][c]
+    x = [0.0] * n
+    for i in reversed(range(n)):
+        x[i] = (M[i][n] - sum(M[i][c] * x[c] for c in range(i + 1, n))) / M[i][i]
+    return x
+
+
+class RuntimeLog:
+    """JSON-lines file of the features and wall times of finished runs. Can be
+    shared by several processes, records are appended under a lock."""
+    def __init__(self, filepath):
+        self.filepath = filepath
+        if os.path.dirname(filepath) != "":
+            os.makedirs(os.path.dirname(filepath), exist_ok = True)
+
+    def record(self, name, features, seconds, status = None):
+        line = (json.dumps({"name": name, "features": features, "seconds": seconds, "status": status}) + "\n").encode()
+        with LockedFile(self.filepath) as f:
+            end = f.seek(0, os.SEEK_END)
+            if end > 0:
+                f.seek(end - 1)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+            f.flush()
+
+    def records(self):
+        if not os.path.exists(self.filepath):
+            return []
+        records = []
+        with open(self.filepath, "rb") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue # Partially written
+        return records
+
+
+class RuntimeModel:
+    def __init__(self, records = ()):
+        """records: {"features": ..., "seconds": ...} of finished runs (see RuntimeLog)"""
+        self.coefficients = None
+        self.n_records = 0
+        self.fit(records)
+
+    @classmethod
+    def from_log(cls, log):
+        """Model fitted on a RuntimeLog or the path of its file"""
+        if not isinstance(log, RuntimeLog):
+            log = RuntimeLog(log)
+        return cls(log.records())
+
+    def fit(self, records):
+        """Fits the model, keeps the rule of thumb if there are fewer runs than regressors"""
+        rows, targets = [], []
+        for record in records:
+            seconds = record.get("seconds")
+            if seconds is None or seconds <= 0.0:
+                continue
+            rows.append(_design(record.get("features", {})))
+            targets.append(math.log(seconds))
+        self.n_records = len(rows)
+        if len(rows) <= len(_design(DEFAULT_FEATURES)):
+            self.coefficients = None
+            return self
+
+        # Ridge on the normal equations, not on the intercept
+        n = len(rows[0])
+        A = [[sum(row[i] * row[j] for row in rows) for j in range(n)] for i in range(n)]
+        b = [sum(row[i] * t for row, t in zip(rows, targets)) for i in range(n)]
+        for i in range(1, n):
+            A[i][i] += _RIDGE * len(rows)
+        self.coefficients = _solve(A, b)
+        return self
+
+    def predict(self, features):
+        """Predicted wall time of a case [s]"""
+        if self.coefficients is None:
+            f = dict(DEFAULT_FEATURES, **{k: v for k, v in features.items() if v is not None})
+            hours = f["plume_hr"] if f["RHi_percent"] >= 100.0 else min(f["plume_hr"], _NONPERSISTENT_HR)
+            return _SECONDS_PER_CELL_HR * f["grid_cells"] * hours
+        log_seconds = sum(c * x for c, x in zip(self.coefficients, _design(features)))
+        return math.exp(min(log_seconds, 50.0))
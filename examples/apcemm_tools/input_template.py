@@ -0,0 +1,227 @@
+"""
+**********************************
+INPUT FILE TEMPLATING
+**********************************
+
+Renders APCEMM input files from a base input.yaml, addressing parameters by
+their menu path instead of by line number, e.g.
+
+    template = InputTemplate.from_file("original.yaml")
+    text = template.render({
+        "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/Temperature [K] (double)": 217.0,
+        "RH_percent": 110.0,
+    })
+
+The base file is parsed once. Rendering only substitutes the values of the
+overridden lines, so comments and formatting of the base file are kept and
+large batches of case files can be rendered in memory (see render_batch).
+
+Parameters can be given by
+    - their full menu path, with the keys exactly as in the input file,
+    - any unambiguous trailing part of the path (e.g. "Temperature [K] (double)"),
+    - the short names of PARAMETER_ALIASES (e.g. the NIPC_var names).
+Keys that are not in the base file (e.g. optional keys of YamlInputReader)
+can be added with InputTemplate.insert.
+"""
+import os
+import re
+
+# Short names of common parameters, including all the NIPC_var names of the example scripts
+PARAMETER_ALIASES = {
+    "temp_K": "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/Temperature [K] (double)",
+    "RH_percent": "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/R.Hum. wrt water [%] (double)",
+    "p_hPa": "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/Pressure [hPa] (double)",
+    "shear": "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/Wind shear [1/s] (double)",
+    "lon_deg": "PARAMETER MENU/LOCATION AND TIME SUBMENU/LON [deg] (double)",
+    "lat_deg": "PARAMETER MENU/LOCATION AND TIME SUBMENU/LAT [deg] (double)",
+    "day": "PARAMETER MENU/LOCATION AND TIME SUBMENU/Emission day [1-365] (int)",
+    "time_hrs_UTC": "PARAMETER MENU/LOCATION AND TIME SUBMENU/Emission time [hr] (double)",
+    "EI_soot_gPerkg": "PARAMETER MENU/EMISSION INDICES SUBMENU/Soot [g/kg_fuel] (double)",
+    "fuel_flow_kgPers": "PARAMETER MENU/Total fuel flow [kg/s] (double)",
+    "aircraft_mass_kg": "PARAMETER MENU/Aircraft mass [kg] (double)",
+    "flight_speed_mPers": "PARAMETER MENU/Flight speed [m/s] (double)",
+    "core_exit_temp_K": "PARAMETER MENU/Core exit temp. [K] (double)",
+    "bypass_area_m2": "PARAMETER MENU/Exit bypass area [m^2] (double)",
+    "n_engines": "PARAMETER MENU/Num. of engines [2/4] (int)",
+}
+
+# Parameters YamlInputReader reads as paths, relative paths are relative to the input file
+PATH_PARAMETERS = (
+    "SIMULATION MENU/OUTPUT SUBMENU/Output folder (string)",
+    "SIMULATION MENU/FFTW WISDOM SUBMENU/Dir w/ write permission (string)",
+    "SIMULATION MENU/Input background condition (string)",
+    "SIMULATION MENU/Input engine emissions (string)",
+    "SIMULATION MENU/EPM cache folder (string)",
+    "CHEMISTRY MENU/Photolysis rates folder (string)",
+    "METEOROLOGY MENU/METEOROLOGICAL INPUT SUBMENU/Met input file path (string)",
+)
+
+# "  key: value  # comment". The key ends at the first colon that is followed by a blank,
+# so values can contain colons (sweep ranges start:inc:end, paths).
+_KEY_VALUE = re.compile(r"^(?P<indent>[ ]*)(?P<key>[^#\s][^#]*?)(?P<pad>[ \t]*):(?=[ \t]|$)(?P<sep>[ \t]*)(?P<value>[^#]*?)(?P<trail>[ \t]*(#.*)?)$")
+
+
+def format_value(value):
+    """Formats a Python value the way YamlInputReader reads it. Booleans become
+    T/F, sequences become space-separated sweep values (x1 x2 x3)."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "T" if value else "F"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return repr(value)
+    if hasattr(value, "item") and getattr(value, "ndim", 1) == 0:
+        # numpy scalars
+        return format_value(value.item())
+    if hasattr(value, "__iter__"):
+        return " ".join(format_value(v) for v in value)
+    return str(value)
+
+
+class _Entry:
+    __slots__ = ("line", "prefix", "value", "suffix", "indent", "is_menu")
+
+    def __init__(self, line, prefix, value, suffix, indent, is_menu):
+        self.line = line
+        self.prefix = prefix
+        self.value = value
+        self.suffix = suffix
+        self.indent = indent
+        self.is_menu = is_menu
+
+
+class InputTemplate:
+    def __init__(self, text):
+        self._lines = text.splitlines(keepends = True)
+        self._parse()
+
+    @classmethod
+    def from_file(cls, filepath):
+        with open(filepath, 'r', newline = '\n') as f:
+            return cls(f.read())
+
+    def _parse(self):
+        self._entries = {}
+        self._renderers = {}
+        matches = []
+        for i, line in enumerate(self._lines):
+            match = _KEY_VALUE.match(line.rstrip("\n"))
+            if match is not None:
+                matches.append((i, match, "\n" if line.endswith("\n") else ""))
+
+        stack = [] # (indent, path) of the enclosing menus
+        for j, (i, match, newline) in enumerate(matches):
+            indent = len(match["indent"])
+            while len(stack) > 0 and stack[-1][0] >= indent:
+                stack.pop()
+            path = stack[-1][1] + "/" + match["key"] if len(stack) > 0 else match["key"]
+            # Parameters can be left empty (optional keys), menus are followed by indented keys
+            is_menu = match["value"] == "" and j + 1 < len(matches) and len(matches[j + 1][1]["indent"]) > indent
+            if path not in self._entries:
+                self._entries[path] = _Entry(i, match["indent"] + match["key"] + match["pad"] + ":" + (match["sep"] or " "),
+                                             match["value"], match["trail"] + newline, indent, is_menu)
+            if is_menu:
+                stack.append((indent, path))
+
+    def keys(self):
+        """Menu paths of all parameters of the base file"""
+        return [path for path, entry in self._entries.items() if not entry.is_menu]
+
+    def resolve(self, key):
+        """Returns the full menu path of a parameter, see the module docstring"""
+        if key in self._entries and not self._entries[key].is_menu:
+            return key
+        if key in PARAMETER_ALIASES:
+            return self.resolve(PARAMETER_ALIASES[key])
+
+        matches = [path for path in self.keys() if path.endswith("/" + key)]
+        if len(matches) == 1:
+            return matches[0]
+        if len(matches) > 1:
+            raise KeyError(f"Ambiguous input parameter '{key}', matches: " + ", ".join(matches))
+        raise KeyError(f"Unknown input parameter '{key}'")
+
+    def get(self, key):
+        """Value of a parameter in the base file, as written"""
+        return self._entries[self.resolve(key)].value
+
+    def insert(self, path, value):
+        """Adds a parameter that is not in the base file at the end of its menu,
+        e.g. insert("SIMULATION MENU/Concurrent cases (int)", 4)"""
+        if path in self._entries:
+            raise KeyError(f"Input parameter '{path}' already exists")
+        menu, _, key = path.rpartition("/")
+        if menu != "" and (menu not in self._entries or not self._entries[menu].is_menu):
+            raise KeyError(f"Unknown input menu '{menu}'")
+
+        if menu == "":
+            indent, line = 0, len(self._lines)
+        else:
+            parent = self._entries[menu]
+            children = [e for p, e in self._entries.items() if p.startswith(menu + "/")]
+            indent = min((e.indent for e in children), default = parent.indent + 2)
+            line = max((e.line for e in children), default = parent.line) + 1
+        if len(self._lines) > 0 and not self._lines[-1].endswith("\n"):
+            self._lines[-1] += "\n"
+        self._lines.insert(line, " " * indent + key + ": " + format_value(value) + "\n")
+        self._parse()
+
+    def absolute_paths(self, overrides, directory):
+        """overrides, with all the path parameters (PATH_PARAMETERS) of the base
+        file made absolute, relative ones taken relative to directory (the
+        folder of the base file). Keeps the paths valid when the input file is
+        written to another folder."""
+        values = {self.resolve(key): value for key, value in overrides.items()}
+        for path in PATH_PARAMETERS:
+            if path not in self._entries:
+                continue
+            value = str(values.get(path, self._entries[path].value))
+            if value != "" and not os.path.isabs(value):
+                trailing = "/" if value.endswith("/") else ""
+                values[path] = os.path.normpath(os.path.join(os.path.abspath(directory), value)) + trailing
+        return values
+
+    def renderer(self, keys):
+        """Compiles the base file for a fixed set of overridden parameters. Returns
+        a function that takes the values (in the order of keys) and returns the
+        text of the input file."""
+        paths = [self.resolve(key) for key in keys]
+        if len(set(paths)) != len(paths):
+            raise KeyError("Input parameters given more than once: " + ", ".join(keys))
+
+        order = sorted(range(len(paths)), key = lambda i: self._entries[paths[i]].line)
+        chunks = []
+        text = ""
+        pos = 0
+        for i in order:
+            entry = self._entries[paths[i]]
+            chunks.append(text + "".join(self._lines[pos:entry.line]) + entry.prefix)
+            text = entry.suffix
+            pos = entry.line + 1
+        chunks.append(text + "".join(self._lines[pos:]))
+
+        def render(values):
+            out = [chunks[0]]
+            for i, chunk in zip(order, chunks[1:]):
+                out.append(format_value(values[i]))
+                out.append(chunk)
+            return "".join(out)
+
+        return render
+
+    def render(self, overrides = {}):
+        """Text of the input file with the values of overrides ({key: value})"""
+        keys = tuple(overrides.keys())
+        if keys not in self._renderers:
+            self._renderers[keys] = self.renderer(keys)
+        return self._renderers[keys](tuple(overrides.values()))
+
+    def render_batch(self, cases):
+        """Texts of the input files of a list of override dicts"""
+        return [self.render(case) for case in cases]
+
+    def write(self, filepath, overrides = {}):
+        with open(filepath, 'w', newline = '\n') as f:
+            f.write(self.render(overrides))
@@ -0,0 +1,202 @@
+"""
+**********************************
+RESUMABLE RUN MANIFESTS
+**********************************
+
+Records which cases of a study have been run, so that an interrupted study can
+be started again without redoing the finished cases, e.g.
+
+    manifest = RunManifest("outputs/sweep/manifest.jsonl")
+    for case_name, overrides in cases.items():
+        inputs_hash = hash_inputs(template.render(overrides), met_filepath)
+        if not manifest.claim(case_name, inputs_hash):
+            continue # finished before, or being run by another driver
+        status = run_case(...)
+        manifest.finish(case_name, status, output_path = ...)
+        print(manifest.progress_line(cases))
+
+The manifest is a JSON-lines file that is only ever appended to, one record
+per claimed or finished case, so a driver that dies leaves it readable. A case
+is run again if it failed, if it has not finished, or if its inputs changed
+(different inputs hash).
+
+Several driver processes, on one or several nodes, can share a manifest: the
+records are appended under a lock on the file (fcntl), and a case that is
+claimed by a driver that is still running is not claimed again. Claims of
+drivers that died are taken over: on the same host when the process is gone,
+on other hosts once the claim is older than stale_after seconds.
+"""
+import os
+import json
+import time
+import fcntl
+import socket
+import hashlib
+from .orchestrator import FINISHED_STATUSES
+
+RUNNING = "running"
+
+
+def hash_inputs(*inputs):
+    """Hash of the inputs of a case. Strings and bytes are hashed as they are,
+    paths of existing files (e.g. met files) by their contents."""
+    h = hashlib.sha256()
+    for item in inputs:
+        if isinstance(item, (str, os.PathLike)) and os.path.isfile(item):
+            with open(item, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+        elif isinstance(item, bytes):
+            h.update(item)
+        else:
+            h.update(str(item).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class RunManifest:
+    def __init__(self, filepath, stale_after = None):
+        """stale_after: age in seconds after which a claim of a driver on another
+        host is taken over. None: never, only claims of dead local processes are."""
+        self.filepath = filepath
+        self.stale_after = stale_after
+        self.host = socket.gethostname()
+        self.pid = os.getpid()
+        self._records = {} # Latest state of each case
+        self._offset = 0
+        if os.path.dirname(filepath) != "":
+            os.makedirs(os.path.dirname(filepath), exist_ok = True)
+
+    def _lock(self):
+        return LockedFile(self.filepath)
+
+    def _read(self, f):
+        """Reads the records appended since the last read"""
+        f.seek(self._offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break # Partially written by a driver that died, never completed
+            self._offset += len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            state = self._records.setdefault(record["case"], {})
+            state.update(record)
+            if record.get("status") == RUNNING:
+                state["attempts"] = state.get("attempts", 0) + 1
+
+    def _append(self, f, record):
+        line = (json.dumps(record) + "\n").encode()
+        end = f.seek(0, os.SEEK_END)
+        if end > 0:
+            # Ends the partial record of a driver that died, so that it is skipped
+            f.seek(end - 1)
+            if f.read(1) != b"\n":
+                line = b"\n" + line
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+        self._read(f)
+
+    def refresh(self):
+        with self._lock() as f:
+            self._read(f)
+
+    def get(self, case):
+        """Latest state of a case: status, inputs_hash, started, finished, seconds, output_path, host, pid, attempts"""
+        return self._records.get(case)
+
+    def is_completed(self, case, inputs_hash = None):
+        state = self._records.get(case)
+        return state is not None and state.get("status") in FINISHED_STATUSES and \
+            (inputs_hash is None or state.get("inputs_hash") == inputs_hash)
+
+    def _claimed_elsewhere(self, state):
+        if state.get("status") != RUNNING:
+            return False
+        if state.get("host") == self.host:
+            if state.get("pid") == self.pid:
+                return False
+            return _process_exists(state.get("pid"))
+        return self.stale_after is None or time.time() - state.get("started", 0) < self.stale_after
+
+    def claim(self, case, inputs_hash = None, output_path = None):
+        """Marks the case (its name or number) as running for this driver.
+        Returns False if it does not need to run: it finished with the same
+        inputs, or another driver that is still alive is running it."""
+        with self._lock() as f:
+            self._read(f)
+            state = self._records.get(case)
+            if state is not None and (self.is_completed(case, inputs_hash) or self._claimed_elsewhere(state)):
+                return False
+            self._append(f, {"case": case, "status": RUNNING, "inputs_hash": inputs_hash, "output_path": output_path,
+                             "host": self.host, "pid": self.pid, "started": time.time()})
+            return True
+
+    def finish(self, case, status, output_path = None, seconds = None):
+        """Records the outcome of a claimed case: an APCEMM status (see
+        FINISHED_STATUSES) or anything else for a failure. seconds defaults to
+        the time since the claim."""
+        with self._lock() as f:
+            self._read(f)
+            state = self._records.get(case, {})
+            now = time.time()
+            record = {"case": case, "status": status, "finished": now,
+                      "seconds": seconds if seconds is not None else now - state.get("started", now)}
+            if output_path is not None:
+                record["output_path"] = output_path
+            self._append(f, record)
+
+    def progress(self, cases = None):
+        """Number of cases per state (completed, failed, running, pending), over
+        cases (all the recorded cases by default)"""
+        self.refresh()
+        cases = list(cases) if cases is not None else list(self._records)
+        counts = {"completed": 0, "failed": 0, "running": 0, "pending": 0}
+        for case in cases:
+            status = self._records.get(case, {}).get("status")
+            if status is None:
+                counts["pending"] += 1
+            elif status in FINISHED_STATUSES:
+                counts["completed"] += 1
+            elif status == RUNNING:
+                counts["running"] += 1
+            else:
+                counts["failed"] += 1
+        return counts
+
+    def progress_line(self, cases = None):
+        counts = self.progress(cases)
+        total = sum(counts.values())
+        return f"{counts['completed']}/{total} completed, {counts['running']} running, " \
+               f"{counts['failed']} failed, {counts['pending']} pending"
+
+
+class LockedFile:
+    """A file shared by several processes (e.g. a manifest or a RuntimeLog),
+    opened for appending and exclusively locked (fcntl) within the with block.
+    Yields the binary file object."""
+    def __init__(self, filepath):
+        self.filepath = filepath
+
+    def __enter__(self):
+        self.f = open(self.filepath, "a+b")
+        fcntl.lockf(self.f, fcntl.LOCK_EX)
+        return self.f
+
+    def __exit__(self, *exc):
+        fcntl.lockf(self.f, fcntl.LOCK_UN)
+        self.f.close()
+
+
+def _process_exists(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
@@ -0,0 +1,313 @@
+"""
+**********************************
+ASYNCHRONOUS APCEMM RUNS
+**********************************
+
+Runs APCEMM processes with asyncio instead of os.system, e.g.
+
+    orchestrator = Orchestrator(max_concurrent = 4)
+    results = [orchestrator.submit(Job(["./APCEMM", f"input_{i}.yaml"],
+                                       output_folder = f"APCEMM_out_{i}/",
+                                       log_file = f"logs/case{i}.log.gz",
+                                       timeout = 3600, retries = 1))
+               for i in range(16)]
+    for result in asyncio.as_completed(results):
+        result = await result
+        result.ok, result.statuses, result.seconds
+
+    run_jobs(jobs) does the same from synchronous code.
+
+At most max_concurrent processes run at a time. Waiting jobs are started
+longest first, by their predicted_seconds or the prediction of the cost_model
+for their features (see costmodel.py), in the order they were submitted
+otherwise. The output of each process
+(stdout and stderr) goes to its gzip-compressed log file instead of the
+terminal, and is parsed on the fly for the progress of the run. A process
+that runs longer than its timeout is killed and, like a process that exited
+with an error, started again up to retries times.
+
+Whether a run succeeded is read from the status files APCEMM writes for each
+case (status_case<N> in the output folder, see CreateStatusOutput), since the
+exit code of APCEMM does not reflect the outcome of the cases.
+"""
+import os
+import re
+import gzip
+import time
+import heapq
+import signal
+import asyncio
+import itertools
+
+# Statuses of finished cases, the contrail outcomes. Any other status is a failure.
+FINISHED_STATUSES = ("Complete", "Incomplete", "NoWaterSaturation", "NoPersistence", "NoSurvivalVortex")
+
+_TIME_STEP = re.compile(r"- Time step: (\d+) out of (\d+)")
+_CASE_STARTED = re.compile(r"-> Running case (\d+)")
+_RUN_TIME = re.compile(r"Plume Model (?:Run|Ensemble) Finished! Run time: (\d+)ms")
+
+# Time given to a process to exit after SIGTERM before it is killed
+_KILL_GRACE_S = 10.0
+
+
+class Job:
+    def __init__(self, args, name = None, cwd = None, env = None, output_folder = None, cases = (0,),
+                 log_file = None, timeout = None, retries = 0, restart_on_retry = True,
+                 features = None, predicted_seconds = None):
+        """args is the command line of APCEMM (executable, input file, options).
+        The statuses of cases are read from output_folder after the run. The
+        output is written to log_file if given. Retries add --restart
+        (restart_on_retry), so that finished cases are skipped and the others
+        resume from their checkpoints. features (see case_features) and
+        predicted_seconds are used to schedule the job."""
+        self.args = [str(arg) for arg in args]
+        self.name = name if name is not None else " ".join(self.args)
+        self.cwd = cwd
+        self.env = env
+        self.output_folder = output_folder
+        self.cases = list(cases)
+        self.log_file = log_file
+        self.timeout = timeout
+        self.retries = retries
+        self.restart_on_retry = restart_on_retry
+        self.features = features
+        self.predicted_seconds = predicted_seconds
+
+    def status_file(self, case):
+        folder = self.output_folder
+        if self.cwd is not None:
+            folder = os.path.join(self.cwd, folder)
+        return os.path.join(folder, f"status_case{case}")
+
+    def clear_statuses(self, keep_finished = False):
+        """Removes the status files of earlier runs of the cases"""
+        if self.output_folder is None:
+            return
+        for case, status in self.read_statuses().items():
+            if status is not None and not (keep_finished and status in FINISHED_STATUSES):
+                os.remove(self.status_file(case))
+
+    def read_statuses(self):
+        """{case: status}, None for the cases without status file"""
+        statuses = {}
+        for case in self.cases:
+            try:
+                with open(self.status_file(case)) as f:
+                    statuses[case] = f.read().strip()
+            except FileNotFoundError:
+                statuses[case] = None
+        return statuses
+
+
+class JobProgress:
+    """What the output of a run tells about its progress"""
+    def __init__(self):
+        self.cases_started = 0
+        self.time_step = 0
+        self.n_time_steps = 0
+        self.model_run_time_s = 0.0 # Sum of the run times reported by the plume model
+        self.last_line = ""
+
+    @property
+    def fraction(self):
+        """Progress of the current case through its time steps"""
+        return self.time_step / self.n_time_steps if self.n_time_steps > 0 else 0.0
+
+    def parse(self, line):
+        self.last_line = line
+        match = _TIME_STEP.search(line)
+        if match is not None:
+            self.time_step, self.n_time_steps = int(match[1]), int(match[2])
+            return
+        match = _CASE_STARTED.search(line)
+        if match is not None:
+            self.cases_started += 1
+            self.time_step = 0
+            return
+        match = _RUN_TIME.search(line)
+        if match is not None:
+            self.model_run_time_s += int(match[1]) / 1000.0
+
+
+class JobResult:
+    def __init__(self, job, returncode, statuses, seconds, attempts, timed_out, progress):
+        self.job = job
+        self.name = job.name
+        self.returncode = returncode
+        self.statuses = statuses
+        self.seconds = seconds # Wall time of all attempts
+        self.attempts = attempts
+        self.timed_out = timed_out # Whether the last attempt was killed
+        self.progress = progress
+        self.log_file = job.log_file
+
+    @property
+    def ok(self):
+        """APCEMM exited normally and all cases finished"""
+        if self.returncode != 0 or self.timed_out:
+            return False
+        if self.job.output_folder is None:
+            return True
+        return all(status in FINISHED_STATUSES for status in self.statuses.values())
+
+    @property
+    def status(self):
+        """Status of the first case, for jobs that run a single case"""
+        return self.statuses.get(self.job.cases[0]) if len(self.job.cases) > 0 else None
+
+    def __repr__(self):
+        return (f"JobResult({self.name!r}, ok={self.ok}, returncode={self.returncode}, statuses={self.statuses}, "
+                f"seconds={self.seconds:.1f}, attempts={self.attempts}, timed_out={self.timed_out})")
+
+
+class Orchestrator:
+    def __init__(self, max_concurrent = None, on_progress = None, cost_model = None, runtime_log = None):
+        """max_concurrent defaults to one process per CPU. on_progress(job, progress)
+        is called for every line of output of a run. cost_model (RuntimeModel)
+        predicts the run time of jobs with features, the jobs that succeed are
+        recorded in runtime_log (RuntimeLog)."""
+        self.max_concurrent = max_concurrent if max_concurrent is not None else (os.cpu_count() or 1)
+        self.on_progress = on_progress
+        self.cost_model = cost_model
+        self.runtime_log = runtime_log
+        self._waiting = [] # Heap of (-predicted seconds, submission number, job, future)
+        self._count = itertools.count()
+        self._running = 0
+        self._dispatch_scheduled = False
+
+    def predict(self, job):
+        """Predicted run time of a job [s], 0 if unknown"""
+        if job.predicted_seconds is not None:
+            return job.predicted_seconds
+        if self.cost_model is not None and job.features is not None:
+            return self.cost_model.predict(job.features)
+        return 0.0
+
+    def submit(self, job):
+        """Starts the job as soon as a slot is free. Returns an awaitable of its JobResult."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiting, (-self.predict(job), next(self._count), job, future))
+        # Jobs submitted together are ordered before any of them starts
+        if not self._dispatch_scheduled:
+            self._dispatch_scheduled = True
+            loop.call_soon(self._dispatch)
+        return future
+
+    async def run_all(self, jobs):
+        """JobResults of all jobs, in the order of jobs"""
+        return await asyncio.gather(*(self.submit(job) for job in jobs))
+
+    async def run(self, job):
+        return await self.submit(job)
+
+    def _dispatch(self):
+        self._dispatch_scheduled = False
+        while self._running < self.max_concurrent and len(self._waiting) > 0:
+            _, _, job, future = heapq.heappop(self._waiting)
+            if future.done():
+                continue # Cancelled while waiting
+            self._running += 1
+            task = asyncio.ensure_future(self._run(job))
+            future.add_done_callback(lambda f, task = task: task.cancel() if f.cancelled() else None)
+            task.add_done_callback(lambda task, future = future: self._finished(task, future))
+
+    def _finished(self, task, future):
+        self._running -= 1
+        if not future.done():
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        self._dispatch()
+
+    async def _run(self, job):
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            args = list(job.args)
+            if attempt == 1 and "--restart" not in args:
+                job.clear_statuses()
+            elif attempt > 1:
+                # Failed cases would be skipped by --restart like finished ones
+                job.clear_statuses(keep_finished = True)
+                if job.restart_on_retry and "--restart" not in args:
+                    args.append("--restart")
+            returncode, timed_out, progress = await self._attempt(job, args, attempt)
+            statuses = job.read_statuses() if job.output_folder is not None else {}
+            result = JobResult(job, returncode, statuses, time.monotonic() - start, attempt, timed_out, progress)
+            if result.ok or attempt > job.retries:
+                # Retried runs resumed from checkpoints, their time is not that of a whole run
+                if self.runtime_log is not None and job.features is not None and result.ok and attempt == 1:
+                    self.runtime_log.record(job.name, job.features, result.seconds, result.status)
+                return result
+
+    async def _attempt(self, job, args, attempt):
+        log = None
+        if job.log_file is not None:
+            if os.path.dirname(job.log_file) != "":
+                os.makedirs(os.path.dirname(job.log_file), exist_ok = True)
+            # Every attempt is a member of the same gzip file
+            log = gzip.open(job.log_file, "wt" if attempt == 1 else "at")
+            log.write(f"# Attempt {attempt}: {' '.join(args)}\n")
+
+        progress = JobProgress()
+        timed_out = False
+        try:
+            process = await asyncio.create_subprocess_exec(*args, cwd = job.cwd, env = job.env,
+                                                           stdin = asyncio.subprocess.DEVNULL,
+                                                           stdout = asyncio.subprocess.PIPE,
+                                                           stderr = asyncio.subprocess.STDOUT,
+                                                           start_new_session = True)
+            try:
+                await asyncio.wait_for(self._read_output(job, process, log, progress), job.timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                await _stop(process)
+            except BaseException:
+                # Cancelled: the process must not outlive its job
+                await _stop(process)
+                raise
+            returncode = await process.wait()
+        finally:
+            if log is not None:
+                if timed_out:
+                    log.write(f"# Killed after {job.timeout} s\n")
+                log.close()
+        return returncode, timed_out, progress
+
+    async def _read_output(self, job, process, log, progress):
+        while True:
+            line = await process.stdout.readline()
+            if line == b"":
+                break
+            line = line.decode(errors = "replace")
+            if log is not None:
+                log.write(line)
+            progress.parse(line)
+            if self.on_progress is not None:
+                self.on_progress(job, progress)
+        await process.wait()
+
+
+async def _stop(process):
+    """Terminates the process group of an APCEMM process, kills it if it does not exit in time"""
+    if process.returncode is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), _KILL_GRACE_S)
+        except asyncio.TimeoutError:
+            os.killpg(process.pid, signal.SIGKILL)
+            await process.wait()
+    except ProcessLookupError:
+        pass
+
+
+def run_jobs(jobs, max_concurrent = None, on_progress = None, cost_model = None, runtime_log = None):
+    """Runs the jobs from synchronous code and returns their JobResults, in the order of jobs"""
+    return asyncio.run(Orchestrator(max_concurrent, on_progress, cost_model, runtime_log).run_all(jobs))
@@ -0,0 +1,111 @@
+"""
+**********************************
+CONTRAIL PRE-SCREENING
+**********************************
+
+Tells, without running APCEMM, which cases cannot form or keep a contrail, so
+that sweeps and samples can skip their runs and use zero outputs instead, e.g.
+
+    engine = engine_parameters(template)
+    statuses = prescreen(**dict(engine, temp_K = samples[1], RH_percent = samples[0]))
+    for sample, status in zip(samples.T, statuses):
+        output = zero_output if status is not None else run(sample)
+
+The checks are those the early plume model (EPM) ends a run with:
+    - NoWaterSaturation: the plume of one engine never reaches saturation with
+      respect to liquid water while it mixes with ambient air
+      (Schmidt-Appleman criterion). As in EPM, the plume temperature and water
+      mixing ratio go from their engine exit values (core exit temperature,
+      emitted water spread over the bypass area) to their ambient values
+      along a straight mixing line.
+    - NoPersistence: the ambient air is subsaturated with respect to ice.
+APCEMM writes no contrail outputs for these cases. Both checks are
+conservative: the warming during vortex sinking and the deposition of water
+on the particles, which are left out, only lower the humidity in the plume.
+The ice check assumes that the temperature does not increase with altitude
+(sinking plumes warm up). The cases must take their temperature and humidity
+from the input file, not from a met input file.
+
+The inputs can be scalars or, when numpy is installed, arrays (any shape,
+broadcast together) of samples.
+"""
+import math
+from .thermo import compute_p_sat_liq, convert_RH_to_RHi
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_KB = 1.380648528E-23   # Boltzmann constant [J/K]
+_NA = 6.022140857E+23   # Avogadro number [1/mol]
+_MW_H2O = 18.0153E-03   # [kg/mol]
+
+# Water emission index of the fuel of APCEMM (C12H24, see Emission::Populate_withFuel) [g/kg_fuel]
+EI_H2O_JETA = 1.0079 * 24 / (12.0107 * 12 + 1.0079 * 24) * 18.0153 / (2 * 1.0079) * 1000
+
+# Exhaust dilutions the mixing line is evaluated at, 1 at the engine exit
+_DILUTIONS = [10 ** (-5 + 5 * i / 999) for i in range(1000)]
+
+# Inputs of prescreen that engine_parameters reads from an input file
+ENGINE_PARAMETERS = ("temp_K", "RH_percent", "p_hPa", "fuel_flow_kgPers", "flight_speed_mPers", "core_exit_temp_K",
+                     "bypass_area_m2", "n_engines")
+
+
+def engine_parameters(template, overrides = {}):
+    """Values of ENGINE_PARAMETERS in an InputTemplate with its overrides. Sweep
+    values (several values in one parameter) are not supported."""
+    values = {template.resolve(key): value for key, value in overrides.items()}
+    parameters = {}
+    for name in ENGINE_PARAMETERS:
+        path = template.resolve(name)
+        parameters[name] = float(values.get(path, template.get(path)))
+    return parameters
+
+
+def _RH_water_on_mixing_line(temp_K, RH_percent, p_Pa, emitted_H2O, core_exit_temp_K, dilution):
+    """Relative humidity wrt liquid water [-] of the plume at a dilution of the exhaust"""
+    p_H2O = RH_percent / 100.0 * compute_p_sat_liq(temp_K)
+    x_ambient = p_H2O / p_Pa
+    # Mixing ratio at the engine exit: ambient and emitted water in air at the core exit temperature (as in EPM)
+    x_exit = (p_H2O / (_KB * temp_K) + emitted_H2O) * _KB * core_exit_temp_K / p_Pa
+    x = x_ambient + (x_exit - x_ambient) * dilution
+    T = temp_K + (core_exit_temp_K - temp_K) * dilution
+    return x * p_Pa / compute_p_sat_liq(T)
+
+
+def peak_RH_water(temp_K, RH_percent, p_hPa, fuel_flow_kgPers, flight_speed_mPers, core_exit_temp_K, bypass_area_m2,
+                  n_engines = 2, EI_H2O_gPerkg = EI_H2O_JETA):
+    """Highest relative humidity wrt liquid water [%] of the plume of one
+    engine along its mixing line. fuel_flow_kgPers is that of the aircraft."""
+    # Number density of the emitted water at the engine exit [1/m^3]
+    emitted_H2O = EI_H2O_gPerkg * 1.0E-03 / _MW_H2O * _NA * fuel_flow_kgPers / n_engines / flight_speed_mPers / bypass_area_m2
+    if np is None:
+        return 100.0 * max(_RH_water_on_mixing_line(temp_K, RH_percent, p_hPa * 100.0, emitted_H2O, core_exit_temp_K, d)
+                           for d in _DILUTIONS)
+
+    args = np.broadcast_arrays(*(np.asarray(a, dtype = float) for a in
+                                 (temp_K, RH_percent, p_hPa * np.asarray(100.0), emitted_H2O, core_exit_temp_K)))
+    RHw = _RH_water_on_mixing_line(*(a[..., None] for a in args), np.array(_DILUTIONS))
+    return 100.0 * RHw.max(axis = -1)
+
+
+def prescreen(temp_K, RH_percent, p_hPa, fuel_flow_kgPers, flight_speed_mPers, core_exit_temp_K, bypass_area_m2,
+              n_engines = 2, EI_H2O_gPerkg = EI_H2O_JETA, tolerance_percent = 1.0):
+    """Status APCEMM would end each case with, "NoWaterSaturation" or
+    "NoPersistence", or None for the cases that need a run. Cases within
+    tolerance_percent of water saturation are run. Returns an array of the
+    shape of the inputs (object dtype), a single status for scalar inputs."""
+    peak = peak_RH_water(temp_K, RH_percent, p_hPa, fuel_flow_kgPers, flight_speed_mPers, core_exit_temp_K,
+                         bypass_area_m2, n_engines, EI_H2O_gPerkg)
+    RHi_percent = convert_RH_to_RHi(temp_K if np is None else np.asarray(temp_K, dtype = float), RH_percent)
+    if np is None:
+        if peak < 100.0 - tolerance_percent:
+            return "NoWaterSaturation"
+        return "NoPersistence" if RHi_percent < 100.0 else None
+
+    no_persistence = np.broadcast_to(RHi_percent < 100.0, np.shape(peak))
+    statuses = np.full(np.shape(peak), None, dtype = object)
+    statuses[no_persistence] = "NoPersistence"
+    statuses[peak < 100.0 - tolerance_percent] = "NoWaterSaturation"
+    return statuses[()] if statuses.ndim == 0 else statuses
@@ -0,0 +1,274 @@
+"""
+**********************************
+NATIVE PARAMETER SWEEPS
+**********************************
+
+Runs a grid of parameter values as a single APCEMM parameter sweep instead of
+launching APCEMM once per grid point, e.g.
+
+    sweep = Sweep(InputTemplate.from_file("original.yaml"), {
+        "temp_K": [215.0, 217.0, 219.0],
+        "RH_percent": "90:10:130",
+    })
+    cases = sweep.run("./../../build/APCEMM", "input.yaml")
+    for (temp_K, RH_percent), case in cases.items():
+        case.status, case.ts_aerosol_files()
+
+All the values of a parameter are written to the input file in the sweep syntax
+of the PARAMETER MENU (x1 x2 x3, or start:inc:end when given as a string), so
+APCEMM runs every combination of them in one process, in parallel.
+
+APCEMM does not number the cases in the order of the input file, so the cases
+are mapped back to their grid values through the case manifest, which is
+written when APCEMM is started with --cases (see command).
+"""
+import os
+import glob
+import itertools
+from .orchestrator import Job, run_jobs
+
+# Parameters of the PARAMETER MENU that can be swept, with their names in the case
+# manifest and the factor YamlInputReader converts the input value with
+SWEEP_PARAMETERS = {
+    "PARAMETER MENU/Plume Process [hr] (double)": ("PLUMEPROCESS", 1.0),
+    "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/Temperature [K] (double)": ("TEMPERATURE", 1.0),
+    "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/R.Hum. wrt water [%] (double)": ("RHW", 1.0),
+    "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/Pressure [hPa] (double)": ("PRESSURE", 100.0),
+    "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/Horiz. diff. coeff. [m^2/s] (double)": ("DH", 1.0),
+    "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/Verti. diff. [m^2/s] (double)": ("DV", 1.0),
+    "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/Wind shear [1/s] (double)": ("SHEAR", 1.0),
+    "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/Brunt-Vaisala Frequency [s^-1] (double)": ("NBV", 1.0),
+    "PARAMETER MENU/LOCATION AND TIME SUBMENU/LON [deg] (double)": ("LONGITUDE", 1.0),
+    "PARAMETER MENU/LOCATION AND TIME SUBMENU/LAT [deg] (double)": ("LATITUDE", 1.0),
+    "PARAMETER MENU/LOCATION AND TIME SUBMENU/Emission day [1-365] (int)": ("EDAY", 1.0),
+    "PARAMETER MENU/LOCATION AND TIME SUBMENU/Emission time [hr] (double)": ("ETIME", 1.0),
+    "PARAMETER MENU/BACKGROUND MIXING RATIOS SUBMENU/NOx [ppt] (double)": ("BACKG_NOX", 1.0),
+    "PARAMETER MENU/BACKGROUND MIXING RATIOS SUBMENU/HNO3 [ppt] (double)": ("BACKG_HNO3", 1.0),
+    "PARAMETER MENU/BACKGROUND MIXING RATIOS SUBMENU/O3 [ppb] (double)": ("BACKG_O3", 1.0),
+    "PARAMETER MENU/BACKGROUND MIXING RATIOS SUBMENU/CO [ppb] (double)": ("BACKG_CO", 1.0),
+    "PARAMETER MENU/BACKGROUND MIXING RATIOS SUBMENU/CH4 [ppm] (double)": ("BACKG_CH4", 1.0),
+    "PARAMETER MENU/BACKGROUND MIXING RATIOS SUBMENU/SO2 [ppt] (double)": ("BACKG_SO2", 1.0),
+    "PARAMETER MENU/EMISSION INDICES SUBMENU/NOx [g(NO2)/kg_fuel] (double)": ("EI_NOX", 1.0),
+    "PARAMETER MENU/EMISSION INDICES SUBMENU/CO [g/kg_fuel] (double)": ("EI_CO", 1.0),
+    "PARAMETER MENU/EMISSION INDICES SUBMENU/UHC [g/kg_fuel] (double)": ("EI_UHC", 1.0),
+    "PARAMETER MENU/EMISSION INDICES SUBMENU/SO2 [g/kg_fuel] (double)": ("EI_SO2", 1.0),
+    "PARAMETER MENU/EMISSION INDICES SUBMENU/SO2 to SO4 conv [%] (double)": ("EI_SO2TOSO4", 0.01),
+    "PARAMETER MENU/EMISSION INDICES SUBMENU/Soot [g/kg_fuel] (double)": ("EI_SOOT", 1.0),
+    "PARAMETER MENU/Soot Radius [m] (double)": ("EI_SOOTRAD", 1.0),
+    "PARAMETER MENU/Total fuel flow [kg/s] (double)": ("FF", 1.0),
+    "PARAMETER MENU/Aircraft mass [kg] (double)": ("AMASS", 1.0),
+    "PARAMETER MENU/Flight speed [m/s] (double)": ("FSPEED", 1.0),
+    "PARAMETER MENU/Num. of engines [2/4] (int)": ("NUMENG", 1.0),
+    "PARAMETER MENU/Wingspan [m] (double)": ("WINGSPAN", 1.0),
+    "PARAMETER MENU/Core exit temp. [K] (double)": ("COREEXITTEMP", 1.0),
+    "PARAMETER MENU/Exit bypass area [m^2] (double)": ("BYPASSAREA", 1.0),
+}
+
+_SWEEP_SWITCH = "SIMULATION MENU/PARAM SWEEP SUBMENU/Parameter sweep (T/F)"
+_MONTE_CARLO_SWITCH = "SIMULATION MENU/PARAM SWEEP SUBMENU/Run Monte Carlo (T/F)"
+_OUTPUT_FOLDER = "SIMULATION MENU/OUTPUT SUBMENU/Output folder (string)"
+_FORWARD_FILENAME = "SIMULATION MENU/SAVE FORWARD RESULTS SUBMENU/netCDF filename format (string)"
+
+
+def sweep_values(spec):
+    """Values of a parameter sweep, expanded the way YamlInputReader does. spec is
+    a number, a list of numbers, or a string in the sweep syntax (x1 x2 x3 or
+    start:inc:end)."""
+    if isinstance(spec, str):
+        tokens = [t for t in spec.strip().split(":") if t != ""]
+        if len(tokens) == 3:
+            start, inc, end = (float(t) for t in tokens)
+            values = []
+            d = start
+            while d < end:
+                values.append(d)
+                d += inc
+            if len(values) == 0 or abs(values[-1] - end) > 1e-40:
+                values.append(end)
+            return values
+        if len(tokens) != 1:
+            raise ValueError(f"Sweep values must be x1 x2 x3 or start:inc:end, not '{spec}'")
+        return [float(t) for t in spec.split()]
+    if hasattr(spec, "__iter__"):
+        return [float(v) for v in spec]
+    return [float(spec)]
+
+
+class SweepCase:
+    """One case of a sweep run: its case number, grid values and output files"""
+    def __init__(self, number, params, output_folder, forward_filename = "APCEMM_Case_*"):
+        self.number = number
+        self.params = params # {grid key: value}
+        self.output_folder = output_folder
+        self._forward_filename = forward_filename
+
+    @property
+    def key(self):
+        return tuple(self.params.values())
+
+    @property
+    def status_file(self):
+        return os.path.join(self.output_folder, f"status_case{self.number}")
+
+    @property
+    def status(self):
+        """Status written by APCEMM (e.g. "Complete", "NoWaterSaturation"), None if the case has not finished"""
+        try:
+            with open(self.status_file) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    @property
+    def forward_file(self):
+        return os.path.join(self.output_folder, f"{self._forward_filename}{self.number:06d}.nc")
+
+    @property
+    def micro_file(self):
+        return os.path.join(self.output_folder, f"Micro{self.number:06d}.out")
+
+    def ts_aerosol_files(self):
+        """Time series files of the case, in time order"""
+        return sorted(glob.glob(os.path.join(glob.escape(self.output_folder), f"ts_aerosol_case{self.number}_*.nc")))
+
+    def __repr__(self):
+        return f"SweepCase({self.number}, {self.params})"
+
+
+class Sweep:
+    def __init__(self, template, grid):
+        """grid maps parameters of the PARAMETER MENU (any key accepted by
+        InputTemplate.resolve) to their values, see sweep_values"""
+        self.template = template
+        self.grid = dict(grid)
+        self._paths = {}
+        self._values = {}
+        for key, spec in self.grid.items():
+            path = template.resolve(key)
+            if path not in SWEEP_PARAMETERS:
+                raise ValueError(f"Input parameter '{key}' cannot be swept, only PARAMETER MENU parameters can")
+            if path in self._paths.values():
+                raise ValueError(f"Input parameter '{key}' given more than once")
+            values = sweep_values(spec)
+            if len(set(values)) != len(values):
+                raise ValueError(f"Sweep values of '{key}' are not unique")
+            self._paths[key] = path
+            self._values[key] = values
+
+    def __len__(self):
+        n = 1
+        for values in self._values.values():
+            n *= len(values)
+        return n
+
+    def values(self, key):
+        return self._values[key]
+
+    def points(self):
+        """All parameter tuples of the grid, in the order of the grid keys"""
+        return list(itertools.product(*self._values.values()))
+
+    def render(self, overrides = {}):
+        """Text of the sweep input file. overrides are applied to the
+        parameters outside the grid."""
+        values = dict(overrides)
+        # Every other parameter must have a single value, or APCEMM would run more cases than the grid has
+        fixed = {self.template.resolve(key): value for key, value in overrides.items()}
+        present = set(self.template.keys())
+        for path in SWEEP_PARAMETERS:
+            if path in self._paths.values() or path not in present:
+                continue
+            value = fixed[path] if path in fixed else self.template.get(path)
+            if len(sweep_values(value)) != 1:
+                raise ValueError(f"Input parameter '{path}' has several values but is not part of the sweep grid")
+        values[_SWEEP_SWITCH] = True
+        values[_MONTE_CARLO_SWITCH] = False
+        for key, path in self._paths.items():
+            spec = self.grid[key]
+            values[path] = spec if isinstance(spec, str) else self._values[key]
+        return self.template.render(values)
+
+    def write(self, filepath, overrides = {}):
+        with open(filepath, 'w', newline = '\n') as f:
+            f.write(self.render(overrides))
+
+    def command(self, apcemm, input_file):
+        """Command line running all the cases of the sweep. --cases makes APCEMM
+        write the case manifest the outputs are mapped with."""
+        return [apcemm, input_file, "--cases", f"0:{len(self)}"]
+
+    def job(self, apcemm, input_file = "input.yaml", overrides = {}, **options):
+        """Writes the sweep input file and returns the Job that runs all its cases
+        (see orchestrator). options are passed on to Job. The case outputs of
+        earlier runs in the output folder are removed first."""
+        self.write(input_file, overrides)
+        output_folder = self.output_folder(input_file)
+        clear_case_outputs(output_folder)
+        options.setdefault("log_file", os.path.join(output_folder, "APCEMM.log.gz"))
+        return Job(self.command(apcemm, input_file), output_folder = output_folder, cases = range(len(self)), **options)
+
+    def run(self, apcemm, input_file = "input.yaml", overrides = {}, **options):
+        """Runs APCEMM once for all the cases (see job) and returns the cases by
+        parameter tuple (see cases)"""
+        job = self.job(apcemm, input_file, overrides, **options)
+        result = run_jobs([job])[0]
+        if result.returncode != 0 or result.timed_out:
+            raise RuntimeError(f"APCEMM sweep did not finish, see {job.log_file}: {result}")
+        return self.cases(job.output_folder)
+
+    def output_folder(self, input_file):
+        """Output folder of the runs of input_file. Relative folders are relative to the input file."""
+        folder = self.template.get(_OUTPUT_FOLDER)
+        return os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(input_file)), folder))
+
+    def cases(self, output_folder):
+        """Maps the parameter tuples of the grid (in the order of the grid keys) to
+        the cases of a finished or running sweep, read from the case manifests in
+        output_folder. Shards of the sweep (--cases, --shard) are combined."""
+        manifests = glob.glob(os.path.join(glob.escape(output_folder), "manifest_cases*.txt"))
+        if len(manifests) == 0:
+            raise FileNotFoundError(f"No case manifest in {output_folder}, start APCEMM with --cases (see Sweep.command)")
+
+        forward_filename = self.template.get(_FORWARD_FILENAME)
+        cases = {}
+        for manifest in manifests:
+            for number, case_params in read_manifest(manifest).items():
+                case = SweepCase(number, self._grid_values(case_params), output_folder, forward_filename)
+                cases[case.key] = case
+        return dict(sorted(cases.items(), key = lambda item: item[1].number))
+
+    def _grid_values(self, case_params):
+        params = {}
+        for key, path in self._paths.items():
+            name, factor = SWEEP_PARAMETERS[path]
+            value = case_params[name]
+            # The manifest values went through the unit conversion of YamlInputReader
+            match = [v for v in self._values[key] if abs(v * factor - value) <= 1e-9 * max(1.0, abs(value))]
+            if len(match) != 1:
+                raise ValueError(f"Case value {name}={value} is not one of the sweep values of '{key}'")
+            params[key] = match[0]
+        return params
+
+
+def clear_case_outputs(output_folder):
+    """Removes the per-case outputs of an earlier run from output_folder, so that
+    they are not mistaken for outputs of the cases of the next run"""
+    for pattern in ("manifest_cases*.txt", "status_case*", "ts_aerosol_case*.nc", "Micro*.out"):
+        for filepath in glob.glob(os.path.join(glob.escape(output_folder), pattern)):
+            os.remove(filepath)
+
+
+def read_manifest(filepath):
+    """Cases of an APCEMM case manifest, {case number: {parameter name: value}}"""
+    cases = {}
+    in_cases = False
+    with open(filepath) as f:
+        for line in f:
+            if not in_cases:
+                in_cases = line.rstrip() == "cases:"
+                continue
+            number, _, params = line.partition(":")
+            if params == "":
+                continue
+            cases[int(number)] = {name: float(value) for name, _, value in (p.partition("=") for p in params.split())}
+    return cases
@@ -0,0 +1,17 @@
+import os
+import sys
+
+# The tools are imported as the example scripts do, from the examples folder
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+SAMPLE_INPUT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "rundirs", "SampleRunDir",
+                                            "input.yaml"))
+
+
+def fake_apcemm(directory, body):
+    """Writes a Python script standing in for APCEMM and returns its command line.
+    body is run with sys.argv as APCEMM would get it (input file, options)."""
+    script = os.path.join(str(directory), "fake_apcemm.py")
+    with open(script, "w") as f:
+        f.write("import os, sys, time\n" + body)
+    return [sys.executable, script]
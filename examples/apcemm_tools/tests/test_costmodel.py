@@ -0,0 +1,119 @@
+import math
+import pytest
+from apcemm_tools.input_template import InputTemplate
+from apcemm_tools.costmodel import RuntimeLog, RuntimeModel, case_features, DEFAULT_FEATURES
+from apcemm_tools.orchestrator import Job, run_jobs
+from apcemm_tools.workqueue import WorkQueue
+from apcemm_tools.thermo import compute_p_sat_liq, compute_p_sat_ice, convert_RH_to_RHi, convert_RHi_to_RH
+from conftest import SAMPLE_INPUT, fake_apcemm
+
+
+def synthetic_seconds(features):
+    """Run times the model can represent: cells x hours, short when the contrail does not persist"""
+    hours = features["plume_hr"] if features["RHi_percent"] >= 100.0 else 0.5
+    return 2e-4 * features["grid_cells"] * hours * (1.0 + features["layer_depth_m"] / 1000.0)
+
+
+def test_thermo():
+    assert compute_p_sat_liq(273.15) == pytest.approx(611.0, rel = 1e-2)
+    assert compute_p_sat_ice(273.15) == pytest.approx(611.0, rel = 1e-2)
+    assert compute_p_sat_ice(220.0) < compute_p_sat_liq(220.0)
+    RHi = convert_RH_to_RHi(220.0, 60.0)
+    assert RHi > 100.0
+    assert convert_RHi_to_RH(220.0, RHi) == pytest.approx(60.0)
+
+
+def test_case_features():
+    template = InputTemplate.from_file(SAMPLE_INPUT)
+    features = case_features(template)
+    assert features["grid_cells"] == 200 * 180
+    assert features["plume_hr"] == 10.0
+    assert features["layer_depth_m"] == 1000.0
+    assert features["shear"] == 0.002
+    assert features["RHi_percent"] == pytest.approx(float(convert_RH_to_RHi(217.0, 40.0)))
+
+    features = case_features(template, {"NX (positive int)": 100, "RH_percent": 20.0, "Plume Process [hr] (double)": "2 4",
+                                        "Impose moist layer depth (T/F)": False})
+    assert features["grid_cells"] == 100 * 180
+    assert features["plume_hr"] == 2.0 # First value of a sweep
+    assert features["layer_depth_m"] == 0.0
+    assert features["RHi_percent"] < 100.0
+
+
+def test_rule_of_thumb():
+    model = RuntimeModel()
+    assert model.coefficients is None
+    persistent = dict(DEFAULT_FEATURES, RHi_percent = 120.0)
+    assert model.predict(persistent) > model.predict(dict(persistent, RHi_percent = 80.0))
+    assert model.predict(persistent) > model.predict(dict(persistent, grid_cells = 100))
+
+
+def test_fit_orders_cases():
+    records = []
+    for cells in (5000, 20000, 80000):
+        for hours in (2.0, 6.0, 12.0):
+            for RHi in (80.0, 110.0, 130.0):
+                features = dict(DEFAULT_FEATURES, grid_cells = cells, plume_hr = hours, RHi_percent = RHi)
+                records.append({"features": features, "seconds": synthetic_seconds(features)})
+    records.append({"features": DEFAULT_FEATURES, "seconds": None}) # Not a finished run
+
+    model = RuntimeModel(records)
+    assert model.coefficients is not None
+    assert model.n_records == 27
+    cases = [dict(DEFAULT_FEATURES, grid_cells = cells, plume_hr = hours, RHi_percent = RHi)
+             for cells, hours, RHi in ((40000, 10.0, 120.0), (10000, 3.0, 115.0), (60000, 12.0, 90.0),
+                                       (8000, 12.0, 125.0))]
+    predicted = [model.predict(case) for case in cases]
+    actual = [synthetic_seconds(case) for case in cases]
+    assert sorted(range(4), key = lambda i: predicted[i]) == sorted(range(4), key = lambda i: actual[i])
+    for p, a in zip(predicted, actual):
+        assert math.log(p) == pytest.approx(math.log(a), abs = 0.5)
+
+
+def test_runtime_log(tmp_path):
+    log = RuntimeLog(str(tmp_path / "logs" / "runtimes.jsonl"))
+    assert log.records() == []
+    log.record("a", {"grid_cells": 100}, 2.0, "Complete")
+    with open(log.filepath, "ab") as f:
+        f.write(b'{"name": "partial')
+    log.record("b", {"grid_cells": 200}, 3.0)
+    assert [(r["name"], r["seconds"], r["status"]) for r in log.records()] == [("a", 2.0, "Complete"), ("b", 3.0, None)]
+    assert RuntimeModel.from_log(log.filepath).n_records == 2
+
+
+def test_longest_job_first(tmp_path):
+    """With one slot, jobs start longest predicted first, those without a prediction in submission order"""
+    apcemm = fake_apcemm(tmp_path, "with open(sys.argv[1], 'a') as f:\n    f.write(sys.argv[2] + '\\n')\n")
+    order = str(tmp_path / "order")
+    model = RuntimeModel()
+    jobs = [Job(apcemm + [order, "none1"]),
+            Job(apcemm + [order, "short"], predicted_seconds = 1.0),
+            Job(apcemm + [order, "small_grid"], features = dict(DEFAULT_FEATURES, grid_cells = 100)),
+            Job(apcemm + [order, "long"], predicted_seconds = 1e5),
+            Job(apcemm + [order, "none2"]),
+            Job(apcemm + [order, "large_grid"], features = dict(DEFAULT_FEATURES, grid_cells = 1e6))]
+    log = RuntimeLog(str(tmp_path / "runtimes.jsonl"))
+    results = run_jobs(jobs, max_concurrent = 1, cost_model = model, runtime_log = log)
+    assert all(result.ok for result in results)
+    with open(order) as f:
+        assert f.read().split() == ["long", "large_grid", "short", "small_grid", "none1", "none2"]
+    # Only the jobs with features are recorded
+    assert sorted(record["features"]["grid_cells"] for record in log.records()) == [100, 1e6]
+
+
+def test_queue_claims_longest_first(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue"))
+    queue.add("a", predicted_seconds = 10.0)
+    queue.add("b")
+    queue.add("c", predicted_seconds = 100.0)
+    queue.add("d", predicted_seconds = 1.0)
+    queue.add("e")
+    assert [queue.claim()["case"] for _ in range(5)] == ["c", "a", "d", "b", "e"]
+    assert queue.claim() is None
+
+    # Requeued cases keep their prediction
+    queue = WorkQueue(str(tmp_path / "queue2"))
+    queue.add("a", predicted_seconds = 1.0)
+    queue.fail(queue.claim(), "retry")
+    queue.add("b", predicted_seconds = 5.0)
+    assert WorkQueue(str(tmp_path / "queue2")).claim()["case"] == "b"
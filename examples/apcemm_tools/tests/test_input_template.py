@@ -0,0 +1,104 @@
+import os
+import pytest
+from apcemm_tools.input_template import InputTemplate, format_value
+from conftest import SAMPLE_INPUT
+
+TEXT = """SIMULATION MENU:
+  # A comment
+  OUTPUT SUBMENU:
+    Output folder (string): APCEMM_out/   # trailing comment
+  Sweep values (double): 1:1:3
+PARAMETER MENU:
+  METEOROLOGICAL PARAMETERS SUBMENU:
+    Temperature [K] (double): 217
+    R.Hum. wrt water [%] (double): 40
+  Total fuel flow [kg/s] (double): 2.8
+"""
+
+
+@pytest.fixture
+def template():
+    return InputTemplate(TEXT)
+
+
+def test_keys_and_get(template):
+    assert template.keys() == ["SIMULATION MENU/OUTPUT SUBMENU/Output folder (string)", "SIMULATION MENU/Sweep values (double)",
+                               "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/Temperature [K] (double)",
+                               "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/R.Hum. wrt water [%] (double)",
+                               "PARAMETER MENU/Total fuel flow [kg/s] (double)"]
+    assert template.get("Output folder (string)") == "APCEMM_out/"
+    assert template.get("Sweep values (double)") == "1:1:3"
+
+
+def test_resolve(template):
+    path = "PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/Temperature [K] (double)"
+    assert template.resolve(path) == path
+    assert template.resolve("Temperature [K] (double)") == path
+    assert template.resolve("temp_K") == path
+    with pytest.raises(KeyError):
+        template.resolve("Pressure [hPa] (double)")
+    with pytest.raises(KeyError):
+        template.resolve("PARAMETER MENU") # Menus are not parameters
+    with pytest.raises(KeyError):
+        InputTemplate("A:\n  x: 1\nB:\n  x: 2\n").resolve("x") # Ambiguous
+
+
+def test_render_keeps_the_rest_of_the_file(template):
+    assert template.render() == TEXT
+    text = template.render({"temp_K": 220.5, "Output folder (string)": "out/"})
+    assert text == TEXT.replace("217", "220.5").replace("APCEMM_out/   #", "out/   #")
+    # Rendering again with other values reuses the compiled renderer
+    assert template.render({"temp_K": 230.0, "Output folder (string)": "x/"}).count("230.0") == 1
+
+
+def test_render_twice_same_parameter(template):
+    with pytest.raises(KeyError):
+        template.render({"temp_K": 220.0, "Temperature [K] (double)": 221.0})
+
+
+def test_format_value():
+    assert format_value(True) == "T"
+    assert format_value(False) == "F"
+    assert format_value(3) == "3"
+    assert format_value(0.1) == "0.1"
+    assert format_value([217.0, 220.0]) == "217.0 220.0"
+    assert format_value("1:1:3") == "1:1:3"
+
+
+def test_insert(template):
+    template.insert("SIMULATION MENU/Concurrent cases (int)", 4)
+    assert template.get("Concurrent cases (int)") == "4"
+    assert template.render().splitlines()[5] == "  Concurrent cases (int): 4"
+    with pytest.raises(KeyError):
+        template.insert("SIMULATION MENU/Concurrent cases (int)", 2)
+    with pytest.raises(KeyError):
+        template.insert("NO MENU/x (int)", 2)
+
+
+def test_absolute_paths(template, tmp_path):
+    values = template.absolute_paths({"temp_K": 220.0}, str(tmp_path))
+    assert values["SIMULATION MENU/OUTPUT SUBMENU/Output folder (string)"] == os.path.join(str(tmp_path), "APCEMM_out") + "/"
+    assert values["PARAMETER MENU/METEOROLOGICAL PARAMETERS SUBMENU/Temperature [K] (double)"] == 220.0
+    assert template.absolute_paths({"Output folder (string)": "/abs/out/"}, str(tmp_path)) == \
+        {"SIMULATION MENU/OUTPUT SUBMENU/Output folder (string)": "/abs/out/"}
+
+
+def test_round_trip_sample_input(tmp_path):
+    """Rendered input files read back with the overridden values, and the others unchanged"""
+    yaml = pytest.importorskip("yaml")
+    template = InputTemplate.from_file(SAMPLE_INPUT)
+    with open(SAMPLE_INPUT) as f:
+        base = yaml.safe_load(f)
+    assert yaml.safe_load(template.render()) == base
+
+    filepath = str(tmp_path / "input.yaml")
+    template.write(filepath, {"temp_K": 222.5, "RH_percent": 110, "Output folder (string)": "out/"})
+    with open(filepath) as f:
+        rendered = yaml.safe_load(f)
+    meteorology = rendered["PARAMETER MENU"]["METEOROLOGICAL PARAMETERS SUBMENU"]
+    assert meteorology["Temperature [K] (double)"] == 222.5
+    assert meteorology["R.Hum. wrt water [%] (double)"] == 110
+    assert rendered["SIMULATION MENU"]["OUTPUT SUBMENU"]["Output folder (string)"] == "out/"
+    meteorology.update(base["PARAMETER MENU"]["METEOROLOGICAL PARAMETERS SUBMENU"])
+    rendered["SIMULATION MENU"]["OUTPUT SUBMENU"]["Output folder (string)"] = "APCEMM_out/"
+    assert rendered == base
@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import multiprocessing
+import pytest
+from apcemm_tools.manifest import RunManifest, LockedFile, hash_inputs
+
+CASES = [f"case{i}" for i in range(40)]
+
+
+def test_hash_inputs(tmp_path):
+    met = tmp_path / "met.nc"
+    met.write_bytes(b"abc")
+    h = hash_inputs("input text", str(met))
+    assert h == hash_inputs("input text", str(met))
+    assert h != hash_inputs(str(met), "input text")
+    met.write_bytes(b"abd") # Files are hashed by their contents
+    assert h != hash_inputs("input text", str(met))
+    assert hash_inputs(b"x", 1.5) == hash_inputs("x", "1.5")
+
+
+def test_claim_finish_resume(tmp_path):
+    filepath = str(tmp_path / "study" / "manifest.jsonl")
+    manifest = RunManifest(filepath)
+    assert manifest.claim("a", "h1", output_path = "a.csv")
+    assert manifest.claim("b", "h1")
+    assert manifest.get("a")["status"] == "running"
+    assert manifest.get("a")["output_path"] == "a.csv"
+    manifest.finish("a", "Complete")
+    manifest.finish("b", "Failed")
+    assert manifest.progress(["a", "b", "c"]) == {"completed": 1, "failed": 1, "running": 0, "pending": 1}
+    assert manifest.progress_line(["a", "b", "c"]) == "1/3 completed, 0 running, 1 failed, 1 pending"
+
+    # A new driver skips the finished case, unless its inputs changed, and retries the failed one
+    resumed = RunManifest(filepath)
+    assert not resumed.claim("a", "h1")
+    assert resumed.claim("b", "h1")
+    assert resumed.claim("a", "h2")
+    assert resumed.get("b")["attempts"] == 2
+
+
+def _claim_all(filepath, name, barrier, results):
+    manifest = RunManifest(filepath)
+    barrier.wait()
+    claimed = []
+    for case in CASES:
+        if manifest.claim(case, "h"):
+            claimed.append(case)
+            manifest.finish(case, "Complete", output_path = f"{name}/{case}.csv")
+    # Claims of live drivers are not taken over: stay alive until all have gone through the cases
+    results.put((name, claimed))
+    barrier.wait()
+
+
+def test_drivers_share_a_manifest(tmp_path):
+    """Drivers in separate processes run every case exactly once"""
+    context = multiprocessing.get_context("fork")
+    filepath = str(tmp_path / "manifest.jsonl")
+    barrier = context.Barrier(4)
+    results = context.Queue()
+    drivers = [context.Process(target = _claim_all, args = (filepath, f"driver{i}", barrier, results))
+               for i in range(4)]
+    for driver in drivers:
+        driver.start()
+    claimed = dict(results.get(timeout = 60) for _ in drivers)
+    for driver in drivers:
+        driver.join(timeout = 60)
+        assert driver.exitcode == 0
+
+    all_claimed = [case for cases in claimed.values() for case in cases]
+    assert sorted(all_claimed) == sorted(CASES)
+    # Every line of the shared file is a complete record
+    with open(filepath) as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 2 * len(CASES)
+    assert RunManifest(filepath).progress(CASES)["completed"] == len(CASES)
+
+
+def _claim_and_die(filepath):
+    RunManifest(filepath).claim("a", "h")
+    os._exit(0)
+
+
+def test_claims_of_dead_drivers_are_taken_over(tmp_path):
+    filepath = str(tmp_path / "manifest.jsonl")
+    driver = multiprocessing.get_context("fork").Process(target = _claim_and_die, args = (filepath,))
+    driver.start()
+    driver.join()
+    manifest = RunManifest(filepath)
+    manifest.refresh()
+    assert manifest.get("a")["status"] == "running"
+    assert manifest.claim("a", "h")
+
+
+def test_claims_on_other_hosts(tmp_path):
+    filepath = str(tmp_path / "manifest.jsonl")
+    with open(filepath, "w") as f:
+        f.write(json.dumps({"case": "recent", "status": "running", "host": "elsewhere", "pid": 1,
+                            "started": time.time()}) + "\n")
+        f.write(json.dumps({"case": "old", "status": "running", "host": "elsewhere", "pid": 1,
+                            "started": time.time() - 7200}) + "\n")
+    assert not RunManifest(filepath).claim("old")
+    manifest = RunManifest(filepath, stale_after = 3600)
+    assert not manifest.claim("recent")
+    assert manifest.claim("old")
+
+
+def test_partial_record(tmp_path):
+    """A record left half-written by a driver that died is skipped"""
+    filepath = str(tmp_path / "manifest.jsonl")
+    manifest = RunManifest(filepath)
+    manifest.claim("a")
+    with open(filepath, "ab") as f:
+        f.write(b'{"case": "b", "sta')
+    assert manifest.claim("b")
+    manifest.finish("b", "Complete")
+    resumed = RunManifest(filepath)
+    resumed.refresh()
+    assert resumed.is_completed("b")
+    assert resumed.get("a")["status"] == "running"
+
+
+def test_locked_file(tmp_path):
+    filepath = str(tmp_path / "log")
+    with LockedFile(filepath) as f:
+        f.write(b"one\n")
+    with LockedFile(filepath) as f:
+        f.write(b"two\n")
+    assert (tmp_path / "log").read_bytes() == b"one\ntwo\n"
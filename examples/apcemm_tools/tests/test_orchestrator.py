@@ -0,0 +1,145 @@
+import os
+import gzip
+import time
+import asyncio
+import pytest
+from apcemm_tools.orchestrator import Job, JobProgress, Orchestrator, run_jobs
+from conftest import fake_apcemm
+
+# Writes the status of case 0 given as first option and prints progress lines as APCEMM does
+STATUS = """
+folder = os.path.join(os.path.dirname(sys.argv[1]), "out")
+os.makedirs(folder, exist_ok = True)
+print("-> Running case 0", flush = True)
+print("- Time step: 3 out of 10", flush = True)
+print("Plume Model Run Finished! Run time: 1500ms", flush = True)
+with open(os.path.join(folder, "status_case0"), "w") as f:
+    f.write(sys.argv[2] + "\\n")
+"""
+
+
+def test_progress():
+    progress = JobProgress()
+    progress.parse("-> Running case 3")
+    progress.parse("   - Time step: 5 out of 20")
+    assert progress.cases_started == 1
+    assert progress.fraction == 0.25
+    progress.parse("Plume Model Ensemble Finished! Run time: 2500ms")
+    assert progress.model_run_time_s == 2.5
+
+
+def test_status_and_log(tmp_path):
+    apcemm = fake_apcemm(tmp_path, STATUS)
+    input_file = str(tmp_path / "input.yaml")
+    jobs = [Job(apcemm + [input_file, status], output_folder = str(tmp_path / "out"),
+                log_file = str(tmp_path / "logs" / f"{status}.log.gz")) for status in ("Complete", "Failed")]
+    lines = []
+    complete, failed = run_jobs(jobs, on_progress = lambda job, progress: lines.append(progress.last_line))
+
+    assert complete.ok and complete.returncode == 0 and complete.attempts == 1
+    assert complete.status == "Complete"
+    assert complete.progress.fraction == 0.3
+    assert complete.progress.model_run_time_s == 1.5
+    with gzip.open(complete.log_file, "rt") as f:
+        log = f.read()
+    assert log.startswith("# Attempt 1: ")
+    assert "- Time step: 3 out of 10" in log
+    assert len(lines) == 6
+
+    # APCEMM exits normally for failed cases, the status file tells
+    assert failed.returncode == 0 and not failed.ok
+    assert failed.status == "Failed"
+
+
+def test_missing_status(tmp_path):
+    """Statuses of earlier runs are removed, a run that writes none did not finish its case"""
+    os.makedirs(str(tmp_path / "out"))
+    (tmp_path / "out" / "status_case0").write_text("Complete")
+    result = run_jobs([Job(fake_apcemm(tmp_path, "") + ["input.yaml"], output_folder = str(tmp_path / "out"))])[0]
+    assert result.returncode == 0
+    assert result.statuses == {0: None}
+    assert not result.ok
+
+
+def test_retry(tmp_path):
+    """The first attempt fails, the retry runs with --restart"""
+    apcemm = fake_apcemm(tmp_path, """
+attempts = os.path.join(os.path.dirname(sys.argv[1]), "attempts")
+with open(attempts, "a") as f:
+    f.write(" ".join(sys.argv[2:]) + "\\n")
+with open(attempts) as f:
+    if len(f.readlines()) == 1:
+        sys.exit(3)
+""" + STATUS)
+    result = run_jobs([Job(apcemm + [str(tmp_path / "input.yaml"), "Complete"], output_folder = str(tmp_path / "out"),
+                           log_file = str(tmp_path / "job.log.gz"), retries = 2)])[0]
+    assert result.ok
+    assert result.attempts == 2
+    assert (tmp_path / "attempts").read_text() == "Complete\nComplete --restart\n"
+    with gzip.open(str(tmp_path / "job.log.gz"), "rt") as f:
+        log = f.read()
+    assert "# Attempt 1: " in log and "# Attempt 2: " in log
+
+    # Without retries the failure is the result
+    (tmp_path / "attempts").unlink()
+    result = run_jobs([Job(apcemm + [str(tmp_path / "input.yaml"), "Complete"], output_folder = str(tmp_path / "out"))])[0]
+    assert not result.ok
+    assert result.returncode == 3 and result.attempts == 1
+
+
+def test_timeout(tmp_path):
+    apcemm = fake_apcemm(tmp_path, "print('started', flush = True)\ntime.sleep(60)\n")
+    start = time.monotonic()
+    result = run_jobs([Job(apcemm + ["input.yaml"], timeout = 0.5, retries = 1, log_file = str(tmp_path / "job.log.gz"))])[0]
+    assert time.monotonic() - start < 20.0
+    assert result.timed_out and not result.ok
+    assert result.attempts == 2
+    with gzip.open(str(tmp_path / "job.log.gz"), "rt") as f:
+        assert f.read().count("# Killed after 0.5 s") == 2
+
+
+def test_max_concurrent(tmp_path):
+    """No more than max_concurrent processes run at a time"""
+    apcemm = fake_apcemm(tmp_path, """
+with open(sys.argv[1], "a") as f:
+    f.write(f"start {time.time()}\\n")
+time.sleep(0.3)
+with open(sys.argv[1], "a") as f:
+    f.write(f"end {time.time()}\\n")
+""")
+    results = run_jobs([Job(apcemm + [str(tmp_path / f"times{i}")]) for i in range(6)], max_concurrent = 2)
+    assert all(result.ok for result in results)
+
+    events = []
+    for i in range(6):
+        for line in (tmp_path / f"times{i}").read_text().splitlines():
+            kind, t = line.split()
+            events.append((float(t), 1 if kind == "start" else -1))
+    running = peak = 0
+    for _, change in sorted(events, key = lambda e: (e[0], e[1])):
+        running += change
+        peak = max(peak, running)
+    assert peak == 2
+
+
+def test_results_in_submission_order(tmp_path):
+    apcemm = fake_apcemm(tmp_path, "time.sleep(float(sys.argv[1]))\nsys.exit(int(float(sys.argv[1]) * 10))\n")
+    results = run_jobs([Job(apcemm + [str(d)]) for d in (0.3, 0.1, 0.2)], max_concurrent = 3)
+    assert [result.returncode for result in results] == [3, 1, 2]
+
+
+def test_cancel_stops_the_process(tmp_path):
+    apcemm = fake_apcemm(tmp_path, "print(os.getpid(), flush = True)\ntime.sleep(60)\n")
+    pids = []
+
+    async def main():
+        orchestrator = Orchestrator(on_progress = lambda job, progress: pids.append(int(progress.last_line)))
+        future = orchestrator.submit(Job(apcemm + ["input.yaml"]))
+        while len(pids) == 0:
+            await asyncio.sleep(0.05)
+        future.cancel()
+        await asyncio.sleep(0.5)
+
+    asyncio.run(main())
+    with pytest.raises(ProcessLookupError):
+        os.kill(pids[0], 0)
@@ -0,0 +1,78 @@
+import pytest
+from apcemm_tools.input_template import InputTemplate
+from apcemm_tools.prescreen import prescreen, peak_RH_water, engine_parameters, ENGINE_PARAMETERS
+from apcemm_tools.thermo import convert_RH_to_RHi
+from conftest import SAMPLE_INPUT
+
+ENGINE = {"p_hPa": 250.0, "fuel_flow_kgPers": 2.8, "flight_speed_mPers": 250.0, "core_exit_temp_K": 560.0,
+          "bypass_area_m2": 1.804, "n_engines": 2}
+
+
+def status(temp_K, RH_percent, **options):
+    return prescreen(temp_K, RH_percent, **dict(ENGINE, **options))
+
+
+def test_statuses():
+    # Too warm for the plume to reach water saturation (Schmidt-Appleman criterion)
+    assert status(245.0, 10.0) == "NoWaterSaturation"
+    # The plume saturates, but the ambient air is subsaturated wrt ice
+    assert convert_RH_to_RHi(210.0, 40.0) < 100.0
+    assert status(210.0, 40.0) == "NoPersistence"
+    # Persistent contrail, to be run
+    assert convert_RH_to_RHi(215.0, 70.0) > 100.0
+    assert status(215.0, 70.0) is None
+
+
+def test_peak_RH_water():
+    assert peak_RH_water(215.0, 70.0, **ENGINE) > 100.0
+    assert peak_RH_water(245.0, 10.0, **ENGINE) < 100.0
+    # Wetter and colder ambient air, more water in the exhaust: higher peak
+    assert peak_RH_water(230.0, 60.0, **ENGINE) > peak_RH_water(230.0, 30.0, **ENGINE)
+    assert peak_RH_water(225.0, 30.0, **ENGINE) > peak_RH_water(230.0, 30.0, **ENGINE)
+    assert peak_RH_water(230.0, 30.0, **dict(ENGINE, fuel_flow_kgPers = 5.6)) > peak_RH_water(230.0, 30.0, **ENGINE)
+    # The peak is never below the ambient humidity (no dilution left at the end of the mixing line)
+    assert peak_RH_water(240.0, 50.0, **ENGINE) >= 50.0 - 1e-9
+
+
+def test_tolerance():
+    """Cases just below water saturation are run, so that borderline contrails are not missed"""
+    temp_K = 240.0
+    low, high = 0.0, 100.0
+    for _ in range(60):
+        RH_percent = (low + high) / 2
+        if peak_RH_water(temp_K, RH_percent, **ENGINE) < 99.5:
+            low = RH_percent
+        else:
+            high = RH_percent
+    assert peak_RH_water(temp_K, low, **ENGINE) == pytest.approx(99.5, abs = 1e-6)
+    assert status(temp_K, low, tolerance_percent = 1.0) != "NoWaterSaturation"
+    assert status(temp_K, low, tolerance_percent = 0.0) == "NoWaterSaturation"
+
+
+def test_engine_parameters():
+    template = InputTemplate.from_file(SAMPLE_INPUT)
+    parameters = engine_parameters(template, {"temp_K": 220.0, "Num. of engines [2/4] (int)": 4})
+    assert set(parameters) == set(ENGINE_PARAMETERS)
+    assert parameters["temp_K"] == 220.0
+    assert parameters["RH_percent"] == float(template.get("RH_percent"))
+    assert parameters["n_engines"] == 4.0
+    # The parameters are the inputs of prescreen
+    assert prescreen(**parameters) in ("NoWaterSaturation", "NoPersistence", None)
+    with pytest.raises(ValueError):
+        engine_parameters(template, {"temp_K": "215 220"})
+
+
+def test_arrays():
+    np = pytest.importorskip("numpy")
+    temp_K = np.array([245.0, 210.0, 215.0])
+    RH_percent = np.array([10.0, 40.0, 70.0])
+    statuses = prescreen(temp_K, RH_percent, **ENGINE)
+    assert statuses.shape == (3,)
+    assert list(statuses) == ["NoWaterSaturation", "NoPersistence", None]
+    # Broadcast over a grid, and scalars for a single case
+    grid = prescreen(temp_K[:, None], np.array([10.0, 70.0])[None, :], **ENGINE)
+    assert grid.shape == (3, 2)
+    assert grid[2, 1] is None
+    assert prescreen(np.float64(215.0), 70.0, **ENGINE) is None
+    assert peak_RH_water(temp_K, RH_percent, **ENGINE) == pytest.approx(
+        [peak_RH_water(float(t), float(rh), **ENGINE) for t, rh in zip(temp_K, RH_percent)])
@@ -0,0 +1,150 @@
+import os
+import sys
+import pytest
+from apcemm_tools.input_template import InputTemplate
+from apcemm_tools.sweep import Sweep, SweepCase, sweep_values, read_manifest, clear_case_outputs
+from conftest import SAMPLE_INPUT
+
+MANIFEST = """# APCEMM case manifest
+input file: input.yaml
+selection: 0:4
+total cases: 4
+case range: {begin}:{end}
+cases:
+{cases}"""
+
+
+def write_manifest(folder, cases, begin = 0, end = None):
+    """Writes a case manifest as APCEMM does, cases: {number: {name: value}}"""
+    end = end if end is not None else begin + len(cases)
+    lines = "".join(f"  {number}:" + "".join(f" {name}={value!r}" for name, value in sorted(params.items())) + "\n"
+                    for number, params in cases.items())
+    with open(os.path.join(folder, f"manifest_cases{begin}-{end}.txt"), "w") as f:
+        f.write(MANIFEST.format(begin = begin, end = end, cases = lines))
+
+
+@pytest.fixture
+def template():
+    return InputTemplate.from_file(SAMPLE_INPUT)
+
+
+def test_sweep_values():
+    assert sweep_values(217) == [217.0]
+    assert sweep_values([215, 217]) == [215.0, 217.0]
+    assert sweep_values("215 217 219") == [215.0, 217.0, 219.0]
+    assert sweep_values("90:10:130") == [90.0, 100.0, 110.0, 120.0, 130.0]
+    assert sweep_values("90:15:130") == [90.0, 105.0, 120.0, 130.0] # The end is always included
+    with pytest.raises(ValueError):
+        sweep_values("90:10")
+
+
+def test_grid(template):
+    sweep = Sweep(template, {"temp_K": [215.0, 217.0], "RH_percent": "90:10:110"})
+    assert len(sweep) == 6
+    assert sweep.values("RH_percent") == [90.0, 100.0, 110.0]
+    assert sweep.points()[:2] == [(215.0, 90.0), (215.0, 100.0)]
+
+
+def test_invalid_grids(template):
+    with pytest.raises(ValueError):
+        Sweep(template, {"Output folder (string)": [1, 2]}) # Not a PARAMETER MENU parameter
+    with pytest.raises(ValueError):
+        Sweep(template, {"temp_K": [215.0], "Temperature [K] (double)": [217.0]})
+    with pytest.raises(ValueError):
+        Sweep(template, {"temp_K": [215.0, 215.0]})
+
+
+def test_render(template):
+    yaml = pytest.importorskip("yaml")
+    sweep = Sweep(template, {"temp_K": [215.0, 217.0], "RH_percent": "90:10:110"})
+    rendered = yaml.safe_load(sweep.render({"shear": 0.004}))
+    assert rendered["SIMULATION MENU"]["PARAM SWEEP SUBMENU"]["Parameter sweep (T/F)"] == "T"
+    assert rendered["SIMULATION MENU"]["PARAM SWEEP SUBMENU"]["Run Monte Carlo (T/F)"] == "F"
+    meteorology = rendered["PARAMETER MENU"]["METEOROLOGICAL PARAMETERS SUBMENU"]
+    assert meteorology["Temperature [K] (double)"] == "215.0 217.0"
+    assert meteorology["R.Hum. wrt water [%] (double)"] == "90:10:110"
+    assert meteorology["Wind shear [1/s] (double)"] == 0.004
+
+    # Parameters outside the grid must have a single value
+    with pytest.raises(ValueError):
+        sweep.render({"shear": "0.002 0.004"})
+
+
+def test_cases_from_manifests(template, tmp_path):
+    sweep = Sweep(template, {"temp_K": [215.0, 217.0], "p_hPa": [200.0, 250.0]})
+    # Shards of the sweep, with the case numbers not in grid order. Pressures are in Pa in the manifest.
+    write_manifest(str(tmp_path), {0: {"TEMPERATURE": 217.0, "PRESSURE": 20000.0, "RHW": 40.0},
+                                   1: {"TEMPERATURE": 215.0, "PRESSURE": 25000.0, "RHW": 40.0}}, 0, 2)
+    write_manifest(str(tmp_path), {2: {"TEMPERATURE": 215.0, "PRESSURE": 20000.0, "RHW": 40.0},
+                                   3: {"TEMPERATURE": 217.0, "PRESSURE": 25000.0, "RHW": 40.0}}, 2, 4)
+    (tmp_path / "status_case2").write_text("Complete\n")
+    for hhmm in ("0100", "0010"):
+        (tmp_path / f"ts_aerosol_case2_{hhmm}.nc").write_text("")
+    (tmp_path / "ts_aerosol_case21_0010.nc").write_text("")
+
+    cases = sweep.cases(str(tmp_path))
+    assert list(cases.keys()) == [(217.0, 200.0), (215.0, 250.0), (215.0, 200.0), (217.0, 250.0)]
+    case = cases[(215.0, 200.0)]
+    assert case.number == 2
+    assert case.params == {"temp_K": 215.0, "p_hPa": 200.0}
+    assert case.status == "Complete"
+    assert cases[(217.0, 200.0)].status is None
+    assert [os.path.basename(f) for f in case.ts_aerosol_files()] == ["ts_aerosol_case2_0010.nc",
+                                                                      "ts_aerosol_case2_0100.nc"]
+    assert os.path.basename(case.micro_file) == "Micro000002.out"
+    # APCEMM appends the case number to the file name format as it is
+    assert os.path.basename(case.forward_file) == "APCEMM_Case_*000002.nc"
+
+
+def test_cases_without_manifest(template, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Sweep(template, {"temp_K": [215.0, 217.0]}).cases(str(tmp_path))
+
+
+def test_case_not_in_grid(template, tmp_path):
+    write_manifest(str(tmp_path), {0: {"TEMPERATURE": 230.0}})
+    with pytest.raises(ValueError):
+        Sweep(template, {"temp_K": [215.0, 217.0]}).cases(str(tmp_path))
+
+
+def test_read_manifest(tmp_path):
+    write_manifest(str(tmp_path), {5: {"RHW": 110.0, "SHEAR": 0.002}}, 5, 6)
+    assert read_manifest(str(tmp_path / "manifest_cases5-6.txt")) == {5: {"RHW": 110.0, "SHEAR": 0.002}}
+
+
+def test_clear_case_outputs(tmp_path):
+    for name in ("manifest_cases0-2.txt", "status_case0", "ts_aerosol_case0_0010.nc", "Micro000000.out", "keep.nc"):
+        (tmp_path / name).write_text("")
+    clear_case_outputs(str(tmp_path))
+    assert os.listdir(str(tmp_path)) == ["keep.nc"]
+
+
+def test_run(template, tmp_path):
+    """Runs a stand-in for APCEMM that writes the manifest and the statuses of the cases"""
+    fake = tmp_path / "fake_apcemm.py"
+    fake.write_text(f"""import os, sys
+sys.path[:0] = [{os.path.dirname(__file__)!r}, {os.path.dirname(os.path.dirname(os.path.dirname(__file__)))!r}]
+from test_sweep import write_manifest
+assert sys.argv[2:] == ["--cases", "0:2"], sys.argv
+folder = os.path.join(os.path.dirname(sys.argv[1]), "APCEMM_out")
+os.makedirs(folder, exist_ok = True)
+write_manifest(folder, {{0: {{"TEMPERATURE": 217.0}}, 1: {{"TEMPERATURE": 215.0}}}})
+for case in (0, 1):
+    with open(os.path.join(folder, f"status_case{{case}}"), "w") as f:
+        f.write("NoPersistence")
+""")
+    os.makedirs(str(tmp_path / "APCEMM_out"))
+    (tmp_path / "APCEMM_out" / "status_case7").write_text("Complete") # From an earlier run
+
+    sweep = Sweep(template, {"temp_K": [215.0, 217.0]})
+    job = sweep.job(sys.executable, str(tmp_path / "input.yaml"))
+    assert job.args[-2:] == ["--cases", "0:2"]
+    assert not os.path.exists(str(tmp_path / "APCEMM_out" / "status_case7"))
+    job.args.insert(1, str(fake))
+
+    from apcemm_tools.orchestrator import run_jobs
+    result = run_jobs([job])[0]
+    assert result.ok, result
+    cases = sweep.cases(job.output_folder)
+    assert [case.number for case in cases.values()] == [0, 1]
+    assert cases[(215.0,)].status == "NoPersistence"
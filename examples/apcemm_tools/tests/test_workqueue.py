@@ -0,0 +1,201 @@
+import os
+import time
+import multiprocessing
+import pytest
+from apcemm_tools.input_template import InputTemplate
+from apcemm_tools.workqueue import WorkQueue, CaseFailed, run_worker, apcemm_runner
+from apcemm_tools.costmodel import RuntimeLog
+from conftest import SAMPLE_INPUT, fake_apcemm
+
+
+def test_add_claim_complete(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue"))
+    assert queue.add("a", {"overrides": {"temp_K": 217.0}})
+    assert not queue.add("a", {})
+    for name in ("", "x/y", ".hidden"):
+        with pytest.raises(ValueError):
+            queue.add(name)
+
+    record = queue.claim()
+    assert record["case"] == "a" and record["attempts"] == 1
+    assert record["task"] == {"overrides": {"temp_K": 217.0}}
+    assert queue.state("a") == "running"
+    assert queue.claim() is None
+    queue.complete(record, {"status": "Complete"})
+    assert queue.counts() == {"pending": 0, "running": 0, "done": 1, "failed": 0}
+    assert queue.summaries() == {"a": {"status": "Complete"}}
+
+
+def test_fail_and_retry(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue"), max_attempts = 2)
+    queue.add("a")
+    queue.fail(queue.claim(), "first")
+    assert queue.state("a") == "pending"
+    record = queue.claim()
+    assert record["attempts"] == 2
+    queue.fail(record, "second", {"status": "Failed"})
+    assert queue.state("a") == "failed"
+    assert queue.claim() is None
+
+
+def test_claim_while_failing(tmp_path):
+    """A worker that claims a case as soon as a failed attempt requeues it keeps its claim"""
+    directory = str(tmp_path / "queue")
+    a, b = WorkQueue(directory, max_attempts = 3), WorkQueue(directory, max_attempts = 3)
+    a.add("x")
+    record = a.claim()
+
+    claims = []
+    write = a._write
+
+    def write_then_claim(state, case, record):
+        write(state, case, record)
+        claims.append(b.claim())
+
+    a._write = write_then_claim
+    a.fail(record, "first")
+    assert claims[0] is not None and claims[0]["attempts"] == 2
+    assert a.counts() == {"pending": 0, "running": 1, "done": 0, "failed": 0}
+    assert os.listdir(os.path.join(directory, "tmp")) == []
+
+    # Same when a finished case is pushed back
+    a._write = write
+    b.complete(claims[0], {"status": "Complete"})
+    assert a.counts() == {"pending": 0, "running": 0, "done": 1, "failed": 0}
+
+
+def test_requeue_stale(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue"), stale_after = 60.0, max_attempts = 2)
+    queue.add("a")
+    queue.claim()
+    queue.requeue_stale()
+    assert queue.state("a") == "running"
+
+    # The worker stopped sending heartbeats
+    old = time.time() - 3600
+    os.utime(queue._path("running", "a"), (old, old))
+    queue.requeue_stale()
+    assert queue.state("a") == "pending"
+
+    # A requeued case keeps its old modification time, but is not stale once claimed
+    record = queue.claim()
+    assert record["attempts"] == 2
+    queue.requeue_stale()
+    assert queue.state("a") == "running"
+
+    # Claimed max_attempts times, the case fails
+    os.utime(queue._path("running", "a"), (old, old))
+    queue.requeue_stale()
+    assert queue.state("a") == "failed"
+    assert os.listdir(os.path.join(str(tmp_path / "queue"), "tmp")) == []
+
+
+def _claim_all(directory, barrier, results):
+    queue = WorkQueue(directory, stale_after = 30.0)
+    barrier.wait()
+    claimed = []
+    while True:
+        record = queue.claim()
+        if record is None:
+            break
+        claimed.append(record["case"])
+    results.put(claimed)
+    barrier.wait()
+
+
+def test_no_duplicate_claims(tmp_path):
+    """Workers that claim and requeue at the same time never claim a case twice,
+    even cases whose files look stale before they are claimed"""
+    directory = str(tmp_path / "queue")
+    queue = WorkQueue(directory)
+    cases = [f"case{i:03d}" for i in range(200)]
+    old = time.time() - 3600
+    for case in cases:
+        queue.add(case)
+        os.utime(queue._path("pending", case), (old, old))
+
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(6)
+    results = context.Queue()
+    workers = [context.Process(target = _claim_all, args = (directory, barrier, results)) for _ in range(6)]
+    for worker in workers:
+        worker.start()
+    claimed = [case for _ in workers for case in results.get(timeout = 60)]
+    for worker in workers:
+        worker.join(timeout = 60)
+    assert sorted(claimed) == cases
+    assert queue.counts()["running"] == len(cases)
+
+
+def _work(directory, scratch_root):
+    def run_case(case, task, scratch):
+        with open(os.path.join(directory, "..", "ran", f"{case}.{os.getpid()}.{time.monotonic_ns()}"), "w"):
+            pass
+        assert os.listdir(scratch) == []
+        if task.get("fail"):
+            raise CaseFailed("did not finish", {"status": "Failed"})
+        time.sleep(0.01)
+        return {"pid": os.getpid()}
+
+    run_worker(WorkQueue(directory, stale_after = 5.0), run_case, scratch_root = scratch_root, poll_interval = 0.05)
+
+
+def test_workers(tmp_path):
+    """Several worker processes run every case once, failed cases max_attempts times"""
+    directory = str(tmp_path / "queue")
+    os.makedirs(str(tmp_path / "ran"))
+    queue = WorkQueue(directory, max_attempts = 2)
+    for i in range(30):
+        queue.add(f"case{i:02d}", {"fail": i == 7})
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target = _work, args = (directory, str(tmp_path / "scratch"))) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout = 60)
+        assert worker.exitcode == 0
+
+    assert queue.counts() == {"pending": 0, "running": 0, "done": 29, "failed": 1}
+    runs = [name.split(".")[0] for name in os.listdir(str(tmp_path / "ran"))]
+    assert sorted(set(runs)) == sorted(f"case{i:02d}" for i in range(30))
+    assert runs.count("case07") == 2
+    assert len(runs) == 31
+    # Scratch directories are removed after successful cases only
+    assert [name.split("-")[0] for name in os.listdir(str(tmp_path / "scratch"))] == ["case07", "case07"]
+
+
+def test_apcemm_runner(tmp_path):
+    apcemm = fake_apcemm(tmp_path, """
+assert os.getcwd() == os.path.dirname(sys.argv[1])
+with open(sys.argv[1]) as f:
+    text = f.read()
+folder = os.path.join(os.getcwd(), "APCEMM_out")
+os.makedirs(folder, exist_ok = True)
+assert "Output folder (string): " + folder + "/" in text
+assert "Temperature [K] (double): 230.0" in text
+with open(os.path.join(folder, "status_case0"), "w") as f:
+    f.write("NoPersistence" if "Wind shear [1/s] (double): 0.004" in text else "Failed")
+""")
+    apcemm_script = os.path.join(str(tmp_path), "apcemm.sh")
+    with open(apcemm_script, "w") as f:
+        f.write("#!/bin/sh\nexec " + " ".join(apcemm) + " \"$@\"\n")
+    os.chmod(apcemm_script, 0o755)
+
+    template = InputTemplate.from_file(SAMPLE_INPUT)
+    log = RuntimeLog(str(tmp_path / "runtimes.jsonl"))
+    run_case = apcemm_runner(apcemm_script, template, os.path.dirname(SAMPLE_INPUT),
+                             summarize = lambda case, task, folder: {"folder": folder}, runtime_log = log)
+    scratch = str(tmp_path / "scratch")
+    os.makedirs(scratch)
+    summary = run_case("a", {"overrides": {"temp_K": 230.0, "shear": 0.004}}, scratch)
+    assert summary["status"] == "NoPersistence"
+    assert summary["folder"] == os.path.join(scratch, "APCEMM_out") + "/"
+    assert os.path.exists(os.path.join(scratch, "APCEMM.log.gz"))
+    assert [record["name"] for record in log.records()] == ["a"]
+
+    scratch = str(tmp_path / "scratch2")
+    os.makedirs(scratch)
+    with pytest.raises(CaseFailed) as failure:
+        run_case("b", {"overrides": {"temp_K": 230.0}}, scratch)
+    assert failure.value.summary["status"] == "Failed"
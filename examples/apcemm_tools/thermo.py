@@ -0,0 +1,56 @@
+"""
+**********************************
+THERMODYNAMIC HELPERS
+**********************************
+
+Saturation pressures and relative humidity conversions, as in the example
+scripts (the same fits as the model, see Util/PhysFunction). The functions take
+scalars or, when numpy is installed, arrays of any shape, e.g.
+
+    compute_p_sat_ice(217.0)
+    convert_RH_to_RHi(np.array([217.0, 220.0]), np.array([40.0, 60.0]))
+"""
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _exp(x):
+    return math.exp(x) if np is None else np.exp(x)
+
+
+def _log(x):
+    return math.log(x) if np is None else np.log(x)
+
+
+def compute_p_sat_liq(T_K):
+    """Saturation pressure over liquid water [Pa]"""
+    a = -6096.9385
+    b = 16.635794
+    c = -0.02711193
+    d = 1.673952 * 1e-5
+    e = 2.433502
+    return 100 * _exp(a / T_K + b + c * T_K + d * T_K * T_K + e * _log(T_K))
+
+
+def compute_p_sat_ice(T_K):
+    """Saturation pressure over ice [Pa]"""
+    a = -6024.5282
+    b = 24.7219
+    c = 0.010613868
+    d = -1.3198825 * 1e-5
+    e = -0.49382577
+    return 100 * _exp(a / T_K + b + c * T_K + d * T_K * T_K + e * _log(T_K))
+
+
+def convert_RH_to_RHi(T_K, RH_percent):
+    """Relative humidity over ice [%] from relative humidity over water [%]"""
+    return RH_percent * compute_p_sat_liq(T_K) / compute_p_sat_ice(T_K)
+
+
+def convert_RHi_to_RH(T_K, RHi_percent):
+    """Relative humidity over water [%] from relative humidity over ice [%]"""
+    return RHi_percent * compute_p_sat_ice(T_K) / compute_p_sat_liq(T_K)
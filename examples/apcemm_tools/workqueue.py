@@ -0,0 +1,309 @@
+"""
+**********************************
+SHARED-FILESYSTEM WORK QUEUE
+**********************************
+
+Distributes the cases of a study over any number of worker processes, on any
+number of nodes that share a filesystem, without a broker. Workers pull the
+next pending case when they are free, so long cases do not leave the other
+workers idle, e.g.
+
+    # Once, from the driver
+    queue = WorkQueue("/shared/study/queue")
+    model = RuntimeModel.from_log("/shared/study/runtimes.jsonl")
+    for case_name, overrides in cases.items():
+        queue.add(case_name, {"overrides": overrides},
+                  predicted_seconds = model.predict(case_features(template, overrides)))
+
+    # On every node, as many times as there are free cores
+    run_case = apcemm_runner("/path/to/APCEMM", template, template_directory)
+    run_worker(queue, run_case, scratch_root = "/local/scratch")
+
+    # Afterwards
+    queue.summaries()
+
+The queue is a directory with one JSON file per case, in one of
+    pending/   cases waiting for a worker
+    running/   cases claimed by a worker
+    done/      summaries of the finished cases
+    failed/    cases that failed max_attempts times
+Workers claim the cases with the longest predicted run time first (see
+costmodel), so that the short ones fill the gaps at the end of the study.
+A worker claims a case by renaming its file from pending/ to running/, which
+only one worker can do. While it runs a case, it touches the claim file every
+heartbeat seconds; claims that have not been touched for stale_after seconds
+(a worker that died) are put back into pending/ by the other workers, or into
+failed/ once the case has been claimed max_attempts times.
+"""
+import os
+import json
+import time
+import shutil
+import socket
+import tempfile
+import threading
+from .orchestrator import Job, run_jobs
+from .costmodel import case_features
+
+STATES = ("pending", "running", "done", "failed")
+
+
+class CaseFailed(Exception):
+    """Raised by a case runner for a case that did not finish. summary is kept with the failure."""
+    def __init__(self, message, summary = None):
+        super().__init__(message)
+        self.summary = summary if summary is not None else {}
+
+
+class WorkQueue:
+    def __init__(self, directory, stale_after = 600.0, max_attempts = 2):
+        self.directory = directory
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self._predicted = {} # Predicted run times of the cases, see _claim_order
+        for state in STATES + ("tmp",):
+            os.makedirs(os.path.join(directory, state), exist_ok = True)
+
+    def _path(self, state, case):
+        return os.path.join(self.directory, state, case + ".json")
+
+    def _write(self, state, case, record):
+        """Writes the file of a case atomically, readers never see a partial file"""
+        tmp = os.path.join(self.directory, "tmp", f"{case}.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}")
+        with open(tmp, "w") as f:
+            json.dump(record, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path(state, case))
+
+    def _read(self, state, case):
+        with open(self._path(state, case)) as f:
+            return json.load(f)
+
+    def cases(self, state):
+        return sorted(name[:-5] for name in os.listdir(os.path.join(self.directory, state)) if name.endswith(".json"))
+
+    def state(self, case):
+        for state in STATES:
+            if os.path.exists(self._path(state, case)):
+                return state
+        return None
+
+    def add(self, case, task = {}, predicted_seconds = None):
+        """Queues a case. task (JSON-serializable) tells the case runner what to
+        run. Cases with the longest predicted_seconds (e.g. from a RuntimeModel)
+        are claimed first, cases without a prediction last, in name order.
+        Returns False if the case is already in the queue, in any state."""
+        if case == "" or os.sep in case or case.startswith("."):
+            raise ValueError(f"Invalid case name '{case}'")
+        if self.state(case) is not None:
+            return False
+        self._write("pending", case, {"case": case, "task": task, "attempts": 0,
+                                      "predicted_seconds": predicted_seconds})
+        return True
+
+    def _claim_order(self):
+        """Pending cases, longest predicted first. The predictions do not change,
+        they are only read once from the files of the cases."""
+        cases = self.cases("pending")
+        for case in cases:
+            if case not in self._predicted:
+                try:
+                    self._predicted[case] = self._read("pending", case).get("predicted_seconds")
+                except (FileNotFoundError, ValueError):
+                    continue # Claimed by another worker, or being requeued
+        def order(case):
+            predicted = self._predicted.get(case)
+            return (predicted is None, -predicted if predicted is not None else 0.0)
+        return sorted(cases, key = order)
+
+    def claim(self):
+        """Claims the next pending case for this process. Returns its record
+        (case, task, attempts) or None if no case is pending."""
+        self.requeue_stale()
+        for case in self._claim_order():
+            try:
+                # A renamed file keeps its modification time, so the pending file is touched first:
+                # the claim must never look stale to the other workers, not even right after the rename
+                os.utime(self._path("pending", case))
+                os.rename(self._path("pending", case), self._path("running", case))
+                record = self._read("running", case)
+            except FileNotFoundError:
+                continue # Claimed by another worker
+            record["attempts"] += 1
+            record["worker"] = {"host": socket.gethostname(), "pid": os.getpid(), "claimed": time.time()}
+            self._write("running", case, record)
+            return record
+        return None
+
+    def heartbeat(self, case):
+        """Marks a claimed case as still running"""
+        try:
+            os.utime(self._path("running", case))
+        except FileNotFoundError:
+            pass
+
+    def requeue_stale(self):
+        """Puts the cases of workers that stopped sending heartbeats back into
+        pending/, or into failed/ once they have been claimed max_attempts times"""
+        for case in self.cases("running"):
+            try:
+                if time.time() - os.path.getmtime(self._path("running", case)) <= self.stale_after:
+                    continue
+                # Only one worker can move the claim away. It may have been requeued and claimed
+                # again since it was found stale, then it is put back.
+                moved = os.path.join(self.directory, "tmp",
+                                     f"{case}.stale.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}")
+                os.rename(self._path("running", case), moved)
+            except FileNotFoundError:
+                continue
+            if time.time() - os.path.getmtime(moved) <= self.stale_after:
+                try:
+                    if not any(os.path.exists(self._path(state, case)) for state in ("done", "failed")):
+                        os.link(moved, self._path("running", case))
+                except FileExistsError:
+                    pass # Already rewritten by the worker that claimed it
+                os.remove(moved)
+                continue
+
+            with open(moved) as f:
+                record = json.load(f)
+            if record.get("attempts", 0) >= self.max_attempts:
+                record = dict(record, error = "The worker stopped sending heartbeats", finished = time.time())
+                self._write("failed", case, record)
+            else:
+                self._write("pending", case, record)
+            os.remove(moved)
+
+    def complete(self, record, summary):
+        """Pushes back the summary of a finished case"""
+        record = dict(record, summary = summary, finished = time.time())
+        released = self._release(record["case"])
+        self._write("done", record["case"], record)
+        self._remove_file(released)
+
+    def fail(self, record, error, summary = None):
+        """Records the failure of a claimed case, which is queued again unless it
+        failed max_attempts times"""
+        record = dict(record, error = str(error), summary = summary, finished = time.time())
+        state = "pending" if record["attempts"] < self.max_attempts else "failed"
+        # Once the case is pending again, another worker can claim it: the claim file of this
+        # worker must be gone by then, or removing it would delete the new claim
+        released = self._release(record["case"])
+        self._write(state, record["case"], record)
+        self._remove_file(released)
+
+    def _release(self, case):
+        """Moves the claim file of a case out of running/ (atomically, to tmp/).
+        Returns its new path, None if there was no claim file."""
+        released = os.path.join(self.directory, "tmp",
+                                f"{case}.released.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            os.rename(self._path("running", case), released)
+        except FileNotFoundError:
+            return None
+        return released
+
+    def _remove_file(self, filepath):
+        if filepath is None:
+            return
+        try:
+            os.remove(filepath)
+        except FileNotFoundError:
+            pass
+
+    def counts(self):
+        return {state: len(self.cases(state)) for state in STATES}
+
+    def summaries(self):
+        """{case: summary} of the finished cases"""
+        summaries = {}
+        for case in self.cases("done"):
+            try:
+                summaries[case] = self._read("done", case)["summary"]
+            except FileNotFoundError:
+                continue
+        return summaries
+
+
+class _Heartbeat:
+    """Touches the claim file of a case from a background thread while it runs"""
+    def __init__(self, queue, case, interval):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target = self._beat, args = (queue, case, interval), daemon = True)
+
+    def _beat(self, queue, case, interval):
+        while not self._stop.wait(interval):
+            queue.heartbeat(case)
+
+    def __enter__(self):
+        self._thread.start()
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_worker(queue, run_case, scratch_root = None, keep_scratch = False, wait = True, poll_interval = 5.0):
+    """Runs cases of the queue until none is left. run_case(case, task, scratch)
+    runs a case in its own empty scratch directory and returns its summary
+    (JSON-serializable), or raises for a failure. Scratch directories are
+    removed after successful cases unless keep_scratch. With wait, the worker
+    only stops once no other worker is running a case either, so that it can
+    take over the cases of workers that die. Returns the number of cases run."""
+    if scratch_root is not None:
+        os.makedirs(scratch_root, exist_ok = True)
+    n = 0
+    while True:
+        record = queue.claim()
+        if record is None:
+            if not wait or len(queue.cases("running")) == 0:
+                return n
+            time.sleep(poll_interval)
+            continue
+
+        case = record["case"]
+        scratch = tempfile.mkdtemp(prefix = case + "-", dir = scratch_root)
+        try:
+            with _Heartbeat(queue, case, max(queue.stale_after / 4.0, 0.1)):
+                summary = run_case(case, record["task"], scratch)
+        except Exception as e:
+            queue.fail(record, e, e.summary if isinstance(e, CaseFailed) else None)
+        else:
+            queue.complete(record, summary)
+            if not keep_scratch:
+                shutil.rmtree(scratch, ignore_errors = True)
+        n += 1
+
+
+def apcemm_runner(apcemm, template, template_directory, summarize = None, timeout = None, runtime_log = None):
+    """Case runner of run_worker for APCEMM runs. The task of a case holds the
+    "overrides" of the input file (see InputTemplate). Relative paths of the
+    template are relative to template_directory. The input file, the output
+    folder and the log are written to the scratch directory.
+    summarize(case, task, output_folder) can add entries (e.g. diagnostics) to
+    the summary. The run times of the cases are recorded in runtime_log
+    (RuntimeLog) if given."""
+    apcemm = os.path.abspath(apcemm) if os.sep in apcemm else apcemm
+
+    def run_case(case, task, scratch):
+        output_folder = os.path.join(scratch, "APCEMM_out") + "/"
+        features = case_features(template, task.get("overrides", {})) if runtime_log is not None else None
+        overrides = template.absolute_paths(task.get("overrides", {}), template_directory)
+        overrides[template.resolve("Output folder (string)")] = output_folder
+        overrides[template.resolve("Dir w/ write permission (string)")] = scratch + "/"
+        input_file = os.path.join(scratch, "input.yaml")
+        template.write(input_file, overrides)
+
+        result = run_jobs([Job([apcemm, input_file], name = case, cwd = scratch, output_folder = output_folder,
+                               log_file = os.path.join(scratch, "APCEMM.log.gz"), timeout = timeout,
+                               features = features)], runtime_log = runtime_log)[0]
+        summary = {"status": result.status, "returncode": result.returncode, "seconds": result.seconds,
+                   "host": socket.gethostname(), "scratch": scratch}
+        if not result.ok:
+            raise CaseFailed(f"APCEMM did not finish {case}: {result}", summary)
+        if summarize is not None:
+            summary.update(summarize(case, task, output_folder))
+        return summary
+
+    return run_case